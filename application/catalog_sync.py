@@ -0,0 +1,69 @@
+import logging
+import requests
+from communication.api.tcg_fetcher import TCGFetcher
+from persistence.catalog_manager import CatalogManager
+from communication.api.rate_limiter import LANE_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSynchronizer:
+    """
+    Scarica il catalogo TCGDEX (set e carte) nel mirror locale.
+    La sincronizzazione e' incrementale per set: un set viene riscaricato solo se
+    non e' presente o se il numero di carte dichiarato da TCGDEX e' cambiato.
+    """
+
+    def __init__(self, tcg_fetcher: TCGFetcher, catalog_manager: CatalogManager):
+        self.tcg_fetcher = tcg_fetcher
+        self.catalog_manager = catalog_manager
+
+    def sync(self, set_ids: list = None, force: bool = False, full_details: bool = False) -> dict:
+        """
+        Sincronizza il catalogo.
+        - set_ids: limita la sincronizzazione a questi set (default: tutti)
+        - force: riscarica i set anche se invariati
+        - full_details: esegue anche il lookup completo per ID (tipo e rarità) delle carte sincronizzate
+        """
+        # La sincronizzazione e' un'attivita' di background rispetto alle ricerche dell'utente
+        with self.tcg_fetcher.rate_limiter.lane(LANE_BACKGROUND):
+            return self._sync(set_ids, force, full_details)
+
+    def _sync(self, set_ids: list, force: bool, full_details: bool) -> dict:
+        report = {'synced_sets': [], 'skipped_sets': 0, 'failed_sets': {}, 'cards': 0, 'detailed_cards': 0}
+
+        remote_sets = self.tcg_fetcher.fetch_sets()
+        # Anche con --sets tutti i set di TCGDEX vengono registrati: quelli mai sincronizzati
+        # rendono il mirror incompleto e la modalità ibrida consulta anche TCGDEX
+        self.catalog_manager.register_sets(remote_sets)
+        local_counts = self.catalog_manager.get_set_card_counts()
+
+        if set_ids:
+            wanted = set(set_ids)
+            remote_sets = [remote_set for remote_set in remote_sets if remote_set['id'] in wanted]
+
+        for remote_set in remote_sets:
+            set_id = remote_set['id']
+
+            if not force and local_counts.get(set_id) == remote_set['card_count'] and remote_set['card_count']:
+                report['skipped_sets'] += 1
+                continue
+
+            try:
+                set_data = self.tcg_fetcher.fetch_set(set_id)
+                report['cards'] += self.catalog_manager.replace_set(set_data)
+            except requests.exceptions.RequestException as e:
+                logger.error("Errore durante la sincronizzazione del set", extra={'set_id': set_id, 'error': str(e)})
+                report['failed_sets'][set_id] = str(e)
+                continue
+
+            report['synced_sets'].append(set_id)
+            logger.info("Set sincronizzato", extra={'set_id': set_id, 'cards': len(set_data['cards'])})
+
+            if full_details and set_data['cards']:
+                lookups = self.tcg_fetcher.search_cards_by_ids([card['id'] for card in set_data['cards']])
+                report['detailed_cards'] += self.catalog_manager.update_card_details(
+                    [lookup['card'] for lookup in lookups if lookup['card']]
+                )
+
+        return report
@@ -1,5 +1,29 @@
 from persistence.data_manager import DataManager 
+from persistence.catalog_manager import CatalogManager
+from persistence.enrichment_queue_manager import EnrichmentQueueManager
 from communication.api.tcg_fetcher import TCGFetcher 
+from application.single_flight import SingleFlight, AsyncSingleFlight, SingleFlightTimeoutError
+from application.name_index import NamePrefixIndex
+from application.enrichment_worker import EnrichmentWorkerPool, PermanentEnrichmentError
+from communication.api.rate_limiter import LANE_BACKGROUND
+from communication.api.image_cache import ImageCache, IMAGE_SIZE_THUMB, IMAGE_SIZE_HIGH, make_thumbnail, thumbnails_supported
+from monitoring.metrics import CORE_REQUESTS
+import asyncio
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Modalità di ricerca rispetto al mirror locale del catalogo
+CATALOG_MODE_REMOTE = 'remote'   # Sempre TCGDEX
+CATALOG_MODE_LOCAL = 'local'     # Solo mirror locale (funziona offline)
+CATALOG_MODE_HYBRID = 'hybrid'   # Mirror locale, con fallback su TCGDEX
+
+# Carte restituite al massimo da una ricerca per nome (search.max_results in api_config.yaml)
+DEFAULT_SEARCH_LIMIT = 250
+
+# Numero massimo di errori riportati nella risposta di un import
+MAX_REPORTED_IMPORT_ERRORS = 50
 
 class CoreManager:
     """
@@ -7,48 +31,301 @@ class CoreManager:
     Orchestra l'arricchimento dei dati (ID Lookup) solo al momento del salvataggio.
     """
     
-    def __init__(self, data_manager: DataManager, tcg_fetcher: TCGFetcher):
+    def __init__(self, data_manager: DataManager, tcg_fetcher: TCGFetcher,
+                 catalog_manager: CatalogManager = None, catalog_mode: str = CATALOG_MODE_REMOTE,
+                 coalescing_timeout: float = None, image_cache: ImageCache = None, thumbnail_width: int = 245,
+                 async_tcg_fetcher=None, enrichment_queue: EnrichmentQueueManager = None,
+                 enrichment_options: dict = None, search_limit: int = DEFAULT_SEARCH_LIMIT):
         self.data_manager = data_manager
         self.tcg_fetcher = tcg_fetcher
-        self.api_call_counter = 0
+        self.catalog_manager = catalog_manager
+        # Senza CatalogManager il mirror non e' disponibile: si resta in modalità remota
+        self.catalog_mode = catalog_mode if catalog_manager is not None else CATALOG_MODE_REMOTE
+        # Carte restituite al massimo da una ricerca per nome (mirror locale e TCGDEX)
+        self.search_limit = search_limit
+        # Ricerche identiche concorrenti condividono un'unica chiamata a TCGDEX
+        self.single_flight = SingleFlight(timeout_seconds=coalescing_timeout)
+        # Variante asyncio delle ricerche (solo in modalità ASGI, vedi AsyncTCGFetcher)
+        self.async_tcg_fetcher = async_tcg_fetcher
+        self.async_single_flight = AsyncSingleFlight(timeout_seconds=coalescing_timeout)
+        # Proxy immagini: senza ImageCache l'endpoint /api/images non e' disponibile
+        self.image_cache = image_cache
+        self.thumbnail_width = thumbnail_width
+        # Autocompletamento: nomi noti (mirror, collezione, risultati delle ricerche) in memoria
+        self.name_index = NamePrefixIndex()
+        # Coda persistente dell'arricchimento: senza coda l'aggiunta e' sincrona. I worker (opzioni di
+        # EnrichmentWorkerPool) partono solo con start_enrichment_workers, dai processi che servono richieste
+        self.enrichment_queue = enrichment_queue
+        self.enrichment_options = enrichment_options or {}
+        self.enrichment_workers = None
         
 
     # -------------------------------------------------------------------
     # METODI PER LA RICERCA ESTERNA (Proxy Semplice)
     # -------------------------------------------------------------------
 
-    def search_cards_by_name(self, name_query: str) -> list:
+    def search_cards_by_name(self, name_query: str) -> tuple:
         """
         Passa la richiesta di ricerca al TCGFetcher. Non esegue l'arricchimento.
-        Restituisce i dati brevi per la visualizzazione nel frontend.
+        Restituisce (carte, partial): i dati brevi per la visualizzazione nel frontend, al massimo
+        search_limit, e partial=True se l'elenco puo' essere incompleto (troncato al limite, oppure
+        servito da un mirror locale non ancora sincronizzato per intero senza risposta da TCGDEX).
         """
-        self.api_call_counter += 1
-        print(f"[CORE MONITOR] Richiesta API N° {self.api_call_counter} (Ricerca per nome) in corso...")
+        CORE_REQUESTS.inc(operation='search_name')
         
         if not name_query:
-            return []
+            return [], False
+
+        local_cards = []
+        if self.catalog_mode != CATALOG_MODE_REMOTE:
+            local_cards, catalog_complete = self._search_catalog_by_name(name_query)
+            if self.catalog_mode == CATALOG_MODE_LOCAL or (local_cards and catalog_complete):
+                logger.debug("Ricerca per nome servita dal mirror locale", extra={'results': len(local_cards)})
+                return self._name_search_result(local_cards, partial=not catalog_complete)
     
         try:
             # Chiama il Fetcher (restituisce lista di dizionari DTO-compatibili con N/A)
-            simplified_cards = self.tcg_fetcher.search_cards_by_name(name_query)
-            print(f"[CoreManager] Trovate {len(simplified_cards)} carte. Visualizzazione breve.")
+            simplified_cards = self.single_flight.do(
+                f"name:{name_query.strip().lower()}",
+                lambda: self.tcg_fetcher.search_cards_by_name(name_query)
+            )
+            logger.debug("Ricerca per nome servita da TCGDEX", extra={'results': len(simplified_cards)})
         except Exception as e:
-            print(f"Errore nella Fase di ricerca breve: {e}")
-            return []
+            logger.error("Errore nella fase di ricerca breve", extra={'error': str(e)})
+            simplified_cards = []
             
-        return simplified_cards
+        return self._name_search_result(*self._merge_name_results(local_cards, simplified_cards))
+
+    def _search_catalog_by_name(self, name_query: str) -> tuple:
+        """(carte del mirror, mirror completo): una carta oltre il limite indica un elenco troncato."""
+        cards = self.catalog_manager.search_by_name(name_query, limit=self.search_limit + 1)
+        return cards, self.catalog_manager.is_complete()
+
+    @staticmethod
+    def _merge_name_results(local_cards: list, remote_cards: list) -> tuple:
+        """
+        Modalità ibrida con mirror incompleto: risultati di TCGDEX piu' le carte del mirror che TCGDEX
+        non ha restituito. Senza risposta da TCGDEX restano le sole carte del mirror, segnate come parziali.
+        """
+        if not local_cards:
+            return remote_cards, False
+        remote_ids = {card.get('id') for card in remote_cards}
+        return remote_cards + [card for card in local_cards if card['id'] not in remote_ids], not remote_cards
+
+    def _name_search_result(self, cards: list, partial: bool) -> tuple:
+        if len(cards) > self.search_limit:
+            cards, partial = cards[:self.search_limit], True
+        self._remember_names(cards)
+        return cards, partial
+
+    # -------------------------------------------------------------------
+    # AUTOCOMPLETAMENTO (indice dei nomi in memoria)
+    # -------------------------------------------------------------------
+
+    def suggest_card_names(self, prefix: str, limit: int = 10) -> list:
+        """Nomi di carte noti che iniziano con prefix (o con una loro parola), senza chiamare TCGDEX."""
+        CORE_REQUESTS.inc(operation='suggest')
+        if not self.name_index.built:
+            self._build_name_index()
+        return self.name_index.suggest(prefix, limit)
+
+    def _build_name_index(self):
+        """Costruzione iniziale (alla prima richiesta) dai nomi del mirror e della collezione."""
+        def known_names():
+            if self.catalog_manager is not None:
+                yield from self.catalog_manager.iter_card_names()
+            yield from self.data_manager.iter_card_names()
+
+        added = self.name_index.build(known_names())
+        if added:
+            logger.info("Indice di autocompletamento costruito", extra=self.name_index.stats())
+
+    def _remember_names(self, cards: list):
+        """Aggiunge all'indice i nomi mai visti (risultati delle ricerche e carte salvate)."""
+        self.name_index.add_names(card.get('name') for card in cards if card)
     
     def search_card_by_id(self, card_id: str) -> dict:
         """
         Passa la richiesta di ricerca per ID al TCGFetcher.
         """
-        self.api_call_counter += 1 
-        print(f"[CORE MONITOR] Richiesta API N° {self.api_call_counter} (Ricerca ID) in corso...")
+        CORE_REQUESTS.inc(operation='search_id')
         
         if not card_id:
             return {}
 
-        return self.tcg_fetcher.search_card_by_id(card_id)
+        local_card = None
+        if self.catalog_mode != CATALOG_MODE_REMOTE:
+            local_card, is_full_detail = self.catalog_manager.get_card(card_id)
+            # In modalità ibrida la carta locale basta solo se ha già i dettagli completi
+            if self.catalog_mode == CATALOG_MODE_LOCAL or (local_card and is_full_detail):
+                return local_card or {}
+
+        try:
+            remote_card = self.single_flight.do(f"id:{card_id}", lambda: self.tcg_fetcher.search_card_by_id(card_id))
+        except SingleFlightTimeoutError as e:
+            logger.warning("Timeout in attesa della ricerca per ID in corso", extra={'card_id': card_id, 'error': str(e)})
+            remote_card = {}
+        # TCGDEX non raggiungibile: meglio i dati brevi del mirror che nessun dato
+        return remote_card or local_card or {}
+
+    # -------------------------------------------------------------------
+    # RICERCA ESTERNA ASINCRONA (modalità ASGI, vedi AsgiApp)
+    # -------------------------------------------------------------------
+
+    async def search_cards_by_name_async(self, name_query: str) -> tuple:
+        """
+        Come search_cards_by_name, sull'event loop: l'attesa di TCGDEX non occupa un thread.
+        Il mirror locale (SQLAlchemy sincrono) viene letto in un thread del pool di default.
+        """
+        CORE_REQUESTS.inc(operation='search_name')
+
+        if not name_query:
+            return [], False
+
+        local_cards = []
+        if self.catalog_mode != CATALOG_MODE_REMOTE:
+            local_cards, catalog_complete = await asyncio.to_thread(self._search_catalog_by_name, name_query)
+            if self.catalog_mode == CATALOG_MODE_LOCAL or (local_cards and catalog_complete):
+                logger.debug("Ricerca per nome servita dal mirror locale", extra={'results': len(local_cards)})
+                return self._name_search_result(local_cards, partial=not catalog_complete)
+
+        try:
+            simplified_cards = await self.async_single_flight.do(
+                f"name:{name_query.strip().lower()}",
+                lambda: self.async_tcg_fetcher.search_cards_by_name(name_query)
+            )
+            logger.debug("Ricerca per nome servita da TCGDEX", extra={'results': len(simplified_cards)})
+        except Exception as e:
+            logger.error("Errore nella fase di ricerca breve", extra={'error': str(e)})
+            simplified_cards = []
+
+        return self._name_search_result(*self._merge_name_results(local_cards, simplified_cards))
+
+    async def search_card_by_id_async(self, card_id: str) -> dict:
+        """Come search_card_by_id, sull'event loop."""
+        CORE_REQUESTS.inc(operation='search_id')
+
+        if not card_id:
+            return {}
+
+        local_card = None
+        if self.catalog_mode != CATALOG_MODE_REMOTE:
+            local_card, is_full_detail = await asyncio.to_thread(self.catalog_manager.get_card, card_id)
+            if self.catalog_mode == CATALOG_MODE_LOCAL or (local_card and is_full_detail):
+                return local_card or {}
+
+        try:
+            remote_card = await self.async_single_flight.do(
+                f"id:{card_id}", lambda: self.async_tcg_fetcher.search_card_by_id(card_id)
+            )
+        except SingleFlightTimeoutError as e:
+            logger.warning("Timeout in attesa della ricerca per ID in corso", extra={'card_id': card_id, 'error': str(e)})
+            remote_card = {}
+        return remote_card or local_card or {}
+
+    def search_cards_by_ids(self, card_ids: list) -> list:
+        """
+        Lookup completo di piu' ID in parallelo tramite il TCGFetcher.
+        Ogni elemento riporta 'id', 'card' ed un eventuale 'error' per il singolo ID.
+        """
+        CORE_REQUESTS.inc(operation='search_ids')
+
+        if not card_ids:
+            return []
+
+        if self.catalog_mode == CATALOG_MODE_REMOTE:
+            return self.tcg_fetcher.search_cards_by_ids(card_ids)
+
+        # Gli ID presenti nel mirror (con dettagli completi, o qualsiasi in modalità locale) non vanno su TCGDEX
+        results = {}
+        local_cards = self.catalog_manager.get_cards(card_ids)
+        for card_id in dict.fromkeys(card_ids):
+            local_card, is_full_detail = local_cards.get(card_id, (None, False))
+            if local_card and (is_full_detail or self.catalog_mode == CATALOG_MODE_LOCAL):
+                results[card_id] = {'id': card_id, 'card': local_card, 'error': None}
+            elif self.catalog_mode == CATALOG_MODE_LOCAL:
+                results[card_id] = {'id': card_id, 'card': None, 'error': f"Carta {card_id} non presente nel catalogo locale."}
+
+        missing_ids = [card_id for card_id in dict.fromkeys(card_ids) if card_id not in results]
+        if missing_ids:
+            for lookup in self.tcg_fetcher.search_cards_by_ids(missing_ids):
+                results[lookup['id']] = lookup
+
+        return [results[card_id] for card_id in card_ids]
+
+    def get_cache_stats(self) -> dict:
+        """Restituisce i contatori della cache del fetcher (vuoto se la cache non e' attiva)."""
+        get_stats = getattr(self.tcg_fetcher, 'get_cache_stats', None)
+        return get_stats() if get_stats else {}
+
+    # -------------------------------------------------------------------
+    # PROXY IMMAGINI
+    # -------------------------------------------------------------------
+
+    def get_card_image(self, card_id: str, size: str = IMAGE_SIZE_THUMB):
+        """
+        Restituisce (percorso su disco, digest) dell'immagine della carta nel formato richiesto,
+        scaricandola da TCGDEX solo al primo accesso. None se la carta o l'immagine non esistono.
+        Se TCGDEX non e' raggiungibile (errore di rete, circuit breaker aperto, timeout) l'eccezione
+        viene propagata: l'handler risponde 503/504 invece di 404.
+        """
+        if self.image_cache is None or not card_id:
+            return None
+
+        key = f"{card_id}:{size}"
+        cached = self.image_cache.get(key)
+        if cached:
+            return cached
+
+        CORE_REQUESTS.inc(operation='fetch_image')
+        # Richieste concorrenti della stessa immagine condividono un solo download
+        return self.single_flight.do(f"image:{key}", lambda: self._fetch_card_image(card_id, size))
+
+    def _fetch_card_image(self, card_id: str, size: str):
+        base_image_url = self._resolve_image_base_url(card_id)
+        if not base_image_url:
+            return None
+
+        key = f"{card_id}:{size}"
+        try:
+            if size == IMAGE_SIZE_THUMB:
+                if thumbnails_supported():
+                    # Miniatura generata localmente a partire dall'immagine ad alta risoluzione (gia' in cache)
+                    high = self.get_card_image(card_id, IMAGE_SIZE_HIGH)
+                    if high is None:
+                        return None
+                    with open(high[0], 'rb') as file:
+                        thumbnail = make_thumbnail(file.read(), self.thumbnail_width)
+                    if thumbnail:
+                        return self.image_cache.put(key, thumbnail)
+                # Senza Pillow si usa la versione ridotta fornita da TCGDEX
+                data = self.tcg_fetcher.fetch_image(f"{base_image_url}/low.webp")
+            else:
+                data = self.tcg_fetcher.fetch_image(f"{base_image_url}/high.webp")
+        except (requests.exceptions.RequestException, TimeoutError) as e:
+            if getattr(e, 'response', None) is None or e.response.status_code != 404:
+                raise
+            logger.warning("Immagine non presente su TCGDEX", extra={'card_id': card_id, 'size': size, 'error': str(e)})
+            return None
+        except Exception as e:
+            logger.warning("Download dell'immagine non riuscito", extra={'card_id': card_id, 'size': size, 'error': str(e)})
+            return None
+
+        return self.image_cache.put(key, data)
+
+    def _resolve_image_base_url(self, card_id: str):
+        """URL base dell'immagine (senza qualità/estensione): collezione, mirror locale e infine TCGDEX."""
+        card = self.data_manager.get_card_by_id(card_id)
+        if not card and self.catalog_manager is not None:
+            card, _ = self.catalog_manager.get_card(card_id)
+        if not card:
+            card = self.search_card_by_id(card_id)
+
+        image_url = (card or {}).get('image_url') or ''
+        if not image_url.endswith('/high.webp'):
+            # Placeholder: TCGDEX non ha un'immagine per questa carta
+            return None
+        return image_url[:-len('/high.webp')]
 
     # -------------------------------------------------------------------
     # METODI PER LA COLLEZIONE INTERNA (Ponte con DataManager)
@@ -64,40 +341,272 @@ class CoreManager:
             return False, "ID della carta mancante o non valido per il salvataggio."
 
         # 1. ESEGUIRE L'ID LOOKUP PER OTTENERE I DATI COMPLETI (Arricchimento)
-        print(f"[CORE MANAGER] Esecuzione Lookup ID per arricchimento: {card_id}...")
+        CORE_REQUESTS.inc(operation='add_card')
+        logger.debug("Lookup ID per arricchimento", extra={'card_id': card_id})
         
         # Chiama la funzione di lookup ID
         full_card_data = self.search_card_by_id(card_id)
-        #print(full_card_data)
         
         if not full_card_data or full_card_data.get('id') != card_id:
             return False, f"Impossibile trovare dati completi per la carta ID: {card_id}."
         
+        payload_to_save = self._build_collection_payload(full_card_data)
+
+        # Se set_id è None o N/A dopo l'arricchimento, blocca il salvataggio qui
+        if payload_to_save is None:
+            return False, "Dati incompleti: ID del Set mancante dopo l'arricchimento."
+
+        # 2. Passa i dati COMPLETI (arricchiti) al DataManager
+        success, message = self.data_manager.add_card(payload_to_save) # Il DM deve ricevere set_id e set_name
+        if success:
+            self._remember_names([payload_to_save])
+        return success, message
+
+    def _build_collection_payload(self, full_card_data: dict):
+        """
+        Costruisce il payload per il DataManager a partire dai dati arricchiti.
+        Restituisce None se manca l'ID del Set.
+        """
         # Verifica cruciale per il Set
         set_name = full_card_data.get('set')
         set_id = full_card_data.get('set_id')
-        
-    
-        # Costruiamo il payload per il DataManager
-        payload_to_save = {
+
+        if not set_id or set_id == 'N/A':
+            return None
+
+        return {
             **full_card_data, 
             'set_id': set_id, 
             'set_name': set_name
         }
 
-        # Se set_id è None o N/A dopo l'arricchimento, blocca il salvataggio qui
-        if not payload_to_save.get('set_id') or payload_to_save.get('set_id') == 'N/A':
-            return False, "Dati incompleti: ID del Set mancante dopo l'arricchimento."
+    # -------------------------------------------------------------------
+    # ARRICCHIMENTO IN BACKGROUND (coda persistente + worker)
+    # -------------------------------------------------------------------
 
-        # 2. Passa i dati COMPLETI (arricchiti) al DataManager
-        return self.data_manager.add_card(payload_to_save) # Il DM deve ricevere set_id e set_name
+    @property
+    def enrichment_enabled(self) -> bool:
+        return self.enrichment_queue is not None
+
+    def start_enrichment_workers(self, **pool_options):
+        """
+        Avvia i worker che elaborano la coda di arricchimento (no-op se gia' avviati).
+        pool_options sovrascrive le opzioni di EnrichmentWorkerPool passate al costruttore.
+        """
+        if self.enrichment_queue is None or self.enrichment_workers is not None:
+            return
+        self.enrichment_workers = EnrichmentWorkerPool(
+            self.enrichment_queue, self.enrich_card, **{**self.enrichment_options, **pool_options}
+        )
+        self.enrichment_workers.start()
+
+    def stop_enrichment_workers(self, timeout: float = 10):
+        """Arresta i worker; i job in corso non completati tornano prelevabili alla scadenza del lease."""
+        if self.enrichment_workers is not None:
+            self.enrichment_workers.stop(timeout)
+            self.enrichment_workers = None
+
+    def enqueue_card_for_enrichment(self, card_data_brief: dict) -> tuple:
+        """
+        Aggiunta asincrona: accoda l'arricchimento della carta e restituisce subito.
+        Restituisce (job, message); job e' None se la carta non e' valida o e' gia' in collezione.
+        Una carta con un job gia' attivo restituisce quel job (POST ripetuti non creano duplicati).
+        """
+        card_id = card_data_brief.get('id')
+
+        if not card_id or card_id == 'N/A':
+            return None, "ID della carta mancante o non valido per il salvataggio."
+
+        CORE_REQUESTS.inc(operation='enqueue_card')
+        if self.data_manager.get_existing_card_ids([card_id]):
+            return None, f"Card ID {card_id} is already in the collection."
+
+        job, created = self.enrichment_queue.enqueue(card_data_brief)
+        if created:
+            # I worker di questo processo partono subito; quelli di altri processi al prossimo polling
+            if self.enrichment_workers is not None:
+                self.enrichment_workers.notify()
+            return job, f"Card {card_data_brief.get('name') or card_id} queued for enrichment."
+        return job, f"Card {card_data_brief.get('name') or card_id} is already being added to the collection."
+
+    def enrich_card(self, job: dict) -> str:
+        """
+        Elaborazione di un job (eseguita dai worker): lookup completo su TCGDEX (set, tipo, rarità,
+        varianti e prezzi, corsia di background del rate limiter) e salvataggio nella collezione.
+        Solleva PermanentEnrichmentError se un nuovo tentativo non puo' riuscire; le altre eccezioni
+        (RequestException, errori del database) fanno ritentare il job.
+        """
+        card_id = job['card_id']
+        CORE_REQUESTS.inc(operation='enrich_card')
+
+        # Job ripreso dopo un'interruzione: la carta potrebbe essere gia' stata salvata
+        if self.data_manager.get_existing_card_ids([card_id]):
+            return f"Card ID {card_id} is already in the collection."
+
+        if self.catalog_mode == CATALOG_MODE_LOCAL:
+            # Modalità offline: solo i dati del mirror (senza varianti e prezzi)
+            full_card_data, _ = self.catalog_manager.get_card(card_id)
+        else:
+            try:
+                with self.tcg_fetcher.rate_limiter.lane(LANE_BACKGROUND):
+                    full_card_data = self.tcg_fetcher.fetch_card_details(card_id)
+            except requests.exceptions.HTTPError as e:
+                # 429 e 5xx sono gia' stati ritentati dal fetcher; gli altri 4xx non cambieranno
+                status_code = getattr(e.response, 'status_code', None)
+                if status_code is not None and 400 <= status_code < 500:
+                    raise PermanentEnrichmentError(f"Carta ID {card_id} non disponibile su TCGDEX ({status_code}).") from e
+                raise
+
+        if not full_card_data or full_card_data.get('id') != card_id:
+            raise PermanentEnrichmentError(f"Impossibile trovare dati completi per la carta ID: {card_id}.")
+
+        payload_to_save = self._build_collection_payload(full_card_data)
+        if payload_to_save is None:
+            raise PermanentEnrichmentError("Dati incompleti: ID del Set mancante dopo l'arricchimento.")
+
+        success, message = self.data_manager.add_card(payload_to_save)
+        if not success:
+            # Errore del database (es. lock): il job viene ritentato
+            raise RuntimeError(message)
+        self._remember_names([payload_to_save])
+        return message
+
+    def get_enrichment_status(self, limit: int = 50) -> dict:
+        """Avanzamento della coda di arricchimento (job per stato, job attivi e falliti, worker impegnati)."""
+        CORE_REQUESTS.inc(operation='get_enrichment_status')
+        summary = self.enrichment_queue.get_summary(limit)
+        summary['workers'] = {
+            'total': self.enrichment_workers.workers if self.enrichment_workers else 0,
+            'busy': self.enrichment_workers.busy if self.enrichment_workers else 0,
+        }
+        return summary
+
+    def get_enrichment_job(self, job_id: int):
+        """Stato di un singolo job di arricchimento (None se non esiste)."""
+        CORE_REQUESTS.inc(operation='get_enrichment_job')
+        return self.enrichment_queue.get_job(job_id)
+
+    def add_cards_to_collection(self, card_ids: list) -> dict:
+        """
+        Import massivo: salta gli ID gia' in collezione, arricchisce gli altri in parallelo
+        e li salva con un'unica transazione. Restituisce un report per carta (nell'ordine di input).
+        """
+        CORE_REQUESTS.inc(operation='add_cards')
+        # Normalizzazione: rimuove spazi, valori vuoti e duplicati mantenendo l'ordine
+        unique_ids = list(dict.fromkeys(str(card_id).strip() for card_id in card_ids if card_id and str(card_id).strip()))
+        results = {}
+
+        # 1. Le carte gia' presenti non vengono nemmeno richieste a TCGDEX
+        existing_ids = self.data_manager.get_existing_card_ids(unique_ids)
+        for card_id in existing_ids:
+            results[card_id] = {'id': card_id, 'success': False, 'message': f"Card ID {card_id} is already in the collection."}
+
+        # 2. Arricchimento concorrente degli ID mancanti
+        ids_to_fetch = [card_id for card_id in unique_ids if card_id not in existing_ids]
+        logger.info("Import massivo", extra={'to_fetch': len(ids_to_fetch), 'already_present': len(existing_ids)})
+
+        payloads = []
+        for lookup in self.search_cards_by_ids(ids_to_fetch):
+            card_id = lookup['id']
+            full_card_data = lookup['card']
+
+            if lookup['error'] or not full_card_data or full_card_data.get('id') != card_id:
+                message = lookup['error'] or f"Impossibile trovare dati completi per la carta ID: {card_id}."
+                results[card_id] = {'id': card_id, 'success': False, 'message': message}
+                continue
+
+            payload_to_save = self._build_collection_payload(full_card_data)
+            if payload_to_save is None:
+                results[card_id] = {'id': card_id, 'success': False, 'message': "Dati incompleti: ID del Set mancante dopo l'arricchimento."}
+                continue
+            payloads.append(payload_to_save)
+
+        # 3. Salvataggio in un'unica transazione
+        for entry in self.data_manager.add_cards(payloads):
+            results[entry['id']] = entry
+        self._remember_names([payload for payload in payloads if results[payload['id']]['success']])
+
+        report = [results[card_id] for card_id in unique_ids]
+        added = sum(1 for entry in report if entry['success'])
+        return {
+            'requested': len(unique_ids),
+            'added': added,
+            'failed': len(report) - added,
+            'results': report
+        }
 
     def get_user_collection(self, search_query):
         """Recupera la collezione dell'utente dal DataManager."""
-        print(f"[CORE -> DM] Ricevuta richiesta GET per collezione")
+        CORE_REQUESTS.inc(operation='get_collection')
         return self.data_manager.get_all_card(search_query)
         
+    def get_user_collection_page(self, search_query=None, limit: int = 100, cursor: str = None, fields: list = None,
+                                 filters: dict = None, sort: str = 'name', order: str = 'asc') -> dict:
+        """Recupera una pagina della collezione (paginazione keyset, filtri e ordinamento) dal DataManager."""
+        CORE_REQUESTS.inc(operation='get_collection_page')
+        return self.data_manager.get_cards_page(search_query, limit=limit, cursor=cursor, fields=fields,
+                                                filters=filters, sort=sort, order=order)
+        
+    def get_collection_stats(self) -> dict:
+        """Statistiche della collezione (per set, tipo e rarità)."""
+        CORE_REQUESTS.inc(operation='get_collection_stats')
+        return self.data_manager.get_collection_stats()
+
+    def get_collection_version(self) -> int:
+        """Versione corrente della collezione (per le risposte condizionali)."""
+        return self.data_manager.get_collection_version()
+
+    def get_collection_changes(self, since: int) -> dict:
+        """Carte aggiunte e rimosse dopo la versione 'since' (change feed)."""
+        CORE_REQUESTS.inc(operation='get_collection_changes')
+        return self.data_manager.get_changes_since(since)
+        
+    def export_collection(self):
+        """Generatore sulle carte della collezione, per l'export in streaming."""
+        CORE_REQUESTS.inc(operation='export_collection')
+        return self.data_manager.iter_cards()
+
+    def import_collection(self, rows, batch_size: int = 500) -> dict:
+        """
+        Import di un backup (righe gia' complete, nessun arricchimento su TCGDEX).
+        Le righe vengono consumate dall'iteratore e salvate a blocchi di batch_size,
+        cosi' la memoria resta costante anche per file molto grandi. Le righe non leggibili
+        (ValueError al posto del dizionario) sono riportate tra gli errori senza interrompere l'import.
+        """
+        CORE_REQUESTS.inc(operation='import_collection')
+        summary = {'imported': 0, 'failed': 0, 'errors': []}
+
+        def record_failure(entry):
+            summary['failed'] += 1
+            # Conserviamo solo i primi errori per non far crescere la risposta
+            if len(summary['errors']) < MAX_REPORTED_IMPORT_ERRORS:
+                summary['errors'].append(entry)
+
+        def flush(batch):
+            report = self.data_manager.add_cards(batch)
+            self._remember_names([row for row, entry in zip(batch, report) if entry['success']])
+            for entry in report:
+                if entry['success']:
+                    summary['imported'] += 1
+                else:
+                    record_failure(entry)
+
+        batch = []
+        for row in rows:
+            if isinstance(row, ValueError):
+                record_failure({'id': None, 'success': False, 'message': str(row)})
+                continue
+            batch.append({**row, 'set_name': row.get('set_name') or row.get('set')})
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+        logger.info("Import completato", extra={'imported': summary['imported'], 'failed': summary['failed']})
+        return summary
+
     def delete_card_from_collection(self, card_id: str) -> tuple:
         """Elimina una carta tramite ID."""
-        print(f"[CORE -> DM] Ricevuta richiesta DELETE per cancellare ID: {card_id}")
+        CORE_REQUESTS.inc(operation='delete_card')
         return self.data_manager.delete_card_by_id(card_id)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import logging
+import random
+import threading
+import time
+from persistence.enrichment_queue_manager import EnrichmentQueueManager
+from monitoring.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_JOBS = REGISTRY.counter(
+    'tcg_enrichment_jobs_total', 'Job di arricchimento elaborati per esito (done, retry, failed, unrecorded)', ('outcome',)
+)
+ENRICHMENT_DURATION = REGISTRY.histogram(
+    'tcg_enrichment_job_duration_seconds', 'Durata di un tentativo di arricchimento (lookup TCGDEX + salvataggio)'
+)
+
+
+class PermanentEnrichmentError(Exception):
+    """Errore che un nuovo tentativo non puo' risolvere (carta inesistente, dati incompleti): il job fallisce subito."""
+
+
+class EnrichmentWorkerPool:
+    """
+    Pool di thread che elaborano la coda persistente dell'arricchimento.
+
+    Ogni worker preleva un job (EnrichmentQueueManager.claim), esegue enrich(job) e ne registra l'esito:
+    - completato: enrich restituisce normalmente;
+    - PermanentEnrichmentError: fallito subito, senza altri tentativi;
+    - qualsiasi altra eccezione (rete, circuit breaker, rate limiter, database): nuovo tentativo con
+      backoff esponenziale, fino a max_attempts tentativi.
+
+    I worker attendono i nuovi job per al massimo poll_interval secondi (notify() li sveglia subito
+    per i job accodati da questo processo). Un job il cui worker termina a meta' torna prelevabile
+    alla scadenza del lease, anche da un altro processo.
+    """
+
+    def __init__(self, queue: EnrichmentQueueManager, enrich, workers: int = 2, max_attempts: int = 5,
+                 backoff_base: float = 2.0, backoff_max: float = 300.0, poll_interval: float = 1.0,
+                 lease_seconds: float = 60.0):
+        self.queue = queue
+        self.enrich = enrich
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+        self._threads = []
+        self._stopping = threading.Event()
+        self._condition = threading.Condition()
+        self._busy = 0
+
+        REGISTRY.gauge('tcg_enrichment_workers_busy', 'Worker di arricchimento impegnati su un job').set_function(
+            lambda: self._busy
+        )
+
+    # -------------------------------------------------------------------
+    # AVVIO E ARRESTO
+    # -------------------------------------------------------------------
+
+    def start(self):
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"enrichment-worker-{index + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Worker di arricchimento avviati", extra={'workers': self.workers})
+
+    def stop(self, timeout: float = 10):
+        """Arresta i worker, attendendo (fino a timeout) i job in corso."""
+        self._stopping.set()
+        self.notify()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+        self._threads = []
+
+    def notify(self):
+        """Sveglia i worker in attesa (nuovo job in coda)."""
+        with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    # -------------------------------------------------------------------
+    # CICLO DEI WORKER
+    # -------------------------------------------------------------------
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.claim(self.lease_seconds)
+            except Exception as e:
+                # Database occupato o non raggiungibile: si riprova al prossimo giro
+                logger.warning("Prelievo di un job di arricchimento fallito", extra={'error': str(e)})
+                job = None
+
+            if job is None:
+                with self._condition:
+                    if not self._stopping.is_set():
+                        self._condition.wait(self.poll_interval)
+                continue
+
+            with self._condition:
+                self._busy += 1
+            try:
+                self._process(job)
+            finally:
+                with self._condition:
+                    self._busy -= 1
+
+    def _backoff_delay(self, attempts: int) -> float:
+        """Backoff esponenziale con jitter: tra meta' e l'intero di min(max, base * 2^(tentativi - 1))."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _process(self, job: dict):
+        start = time.perf_counter()
+        try:
+            self.enrich(job)
+        except PermanentEnrichmentError as e:
+            outcome = self._record_outcome(self.queue.fail, job, str(e), outcome='failed')
+        except Exception as e:
+            if job['attempts'] >= self.max_attempts:
+                outcome = self._record_outcome(self.queue.fail, job, str(e), outcome='failed')
+            else:
+                delay = self._backoff_delay(job['attempts'])
+                outcome = self._record_outcome(self.queue.retry, job, str(e), delay, outcome='retry')
+        else:
+            outcome = self._record_outcome(self.queue.complete, job, outcome='done')
+
+        ENRICHMENT_DURATION.observe(time.perf_counter() - start)
+        log = logger.info if outcome == 'done' else logger.warning
+        log("Job di arricchimento elaborato", extra={
+            'job_id': job['id'], 'card_id': job['card_id'], 'attempt': job['attempts'], 'outcome': outcome,
+            'error': job['last_error'] if outcome != 'done' else None
+        })
+
+    @staticmethod
+    def _record_outcome(record, job: dict, *args, outcome: str) -> str:
+        """
+        Registra l'esito nella coda per il tentativo del job. Se il database non risponde il job tornera'
+        prelevabile alla scadenza del lease; se il lease e' gia' scaduto e il job e' stato ripreso da un
+        altro worker l'esito viene scartato. In entrambi i casi l'esito conta come 'unrecorded'.
+        """
+        if args:
+            job['last_error'] = args[0]
+        try:
+            recorded = record(job['id'], job['attempts'], *args)
+        except Exception as e:
+            logger.error("Esito del job di arricchimento non registrato",
+                         extra={'job_id': job['id'], 'outcome': outcome, 'error': str(e)})
+            recorded = False
+        else:
+            if not recorded:
+                logger.warning("Lease del job di arricchimento scaduto, esito scartato",
+                               extra={'job_id': job['id'], 'attempt': job['attempts'], 'outcome': outcome})
+        if not recorded:
+            outcome = 'unrecorded'
+        ENRICHMENT_JOBS.inc(outcome=outcome)
+        return outcome
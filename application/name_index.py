@@ -0,0 +1,133 @@
+import bisect
+import re
+import sys
+import threading
+import unicodedata
+from monitoring.metrics import REGISTRY
+
+# Separatori dopo i quali inizia una parola indicizzata ("char" trova anche "Dark Charizard")
+WORD_BOUNDARY = re.compile(r"(?<=[\s\-.])\S")
+
+
+def normalize_name(name: str) -> str:
+    """Chiave di confronto: senza accenti, case-insensitive, spazi compattati ("Flabébé" -> "flabebe")."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.casefold().split())
+
+
+def display_name(name: str) -> str:
+    """Nome mostrato: i nomi salvati hanno l'apostrofo sostituito da '^' (vedi CardDTO.from_raw)."""
+    return name.replace('^', "'")
+
+
+class NamePrefixIndex:
+    """
+    Indice in memoria dei nomi delle carte per l'autocompletamento.
+
+    Due array ordinati di tuple (chiave normalizzata, nome): uno con il nome intero, uno con
+    ogni parola successiva alla prima. Una ricerca per prefisso e' una bisect seguita dalla
+    lettura delle chiavi contigue, fino a limit nomi distinti.
+
+    Le scritture (rare: solo i nomi mai visti) sono copy-on-write sotto lock: le letture usano
+    il riferimento corrente agli array senza lock e non vedono mai un array a meta' modifica.
+    """
+
+    def __init__(self):
+        self._names = set()
+        self._full_entries = []
+        self._word_entries = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.built = False
+
+        REGISTRY.gauge('tcg_suggest_index_names', 'Nomi di carte distinti nell\'indice di autocompletamento').set_function(
+            lambda: len(self._names)
+        )
+        REGISTRY.gauge('tcg_suggest_index_bytes', 'Memoria stimata dell\'indice di autocompletamento').set_function(
+            lambda: self._bytes
+        )
+
+    # -------------------------------------------------------------------
+    # COSTRUZIONE E AGGIORNAMENTO
+    # -------------------------------------------------------------------
+
+    def build(self, names) -> int:
+        """Costruzione iniziale (una volta sola) dai nomi gia' noti; i nomi aggiunti nel frattempo restano."""
+        with self._lock:
+            if self.built:
+                return 0
+            added = self._add_locked(names)
+            self.built = True
+            return added
+
+    def add_names(self, names) -> int:
+        """Aggiunge i nomi non ancora presenti; restituisce quanti sono nuovi."""
+        with self._lock:
+            return self._add_locked(names)
+
+    def _add_locked(self, names) -> int:
+        full_entries, word_entries = [], []
+        for name in names:
+            if not name or name in self._names:
+                continue
+            self._names.add(name)
+            shown = display_name(name)
+            key = normalize_name(shown)
+            if not key:
+                continue
+            words = [key[match.start():] for match in WORD_BOUNDARY.finditer(key)]
+            full_entries.append((key, shown))
+            word_entries.extend((word, shown) for word in words)
+            # Stima: stringhe (chiavi delle parole incluse); tuple e puntatori degli array piu' sotto
+            self._bytes += sys.getsizeof(key) + sys.getsizeof(shown) + (sys.getsizeof(name) if name is not shown else 0)
+            self._bytes += sum(sys.getsizeof(word) for word in words)
+
+        if not full_entries:
+            return 0
+        self._full_entries = self._merge(self._full_entries, full_entries)
+        self._word_entries = self._merge(self._word_entries, word_entries)
+        entry_overhead = sys.getsizeof(('', '')) + 8
+        self._bytes += (len(full_entries) + len(word_entries)) * entry_overhead
+        return len(full_entries)
+
+    @staticmethod
+    def _merge(entries: list, new_entries: list) -> list:
+        """Nuovo array ordinato (copy-on-write): poche voci con insort, molte con un unico sort."""
+        if len(new_entries) <= 32:
+            merged = entries[:]
+            for entry in new_entries:
+                bisect.insort(merged, entry)
+            return merged
+        return sorted(entries + new_entries)
+
+    # -------------------------------------------------------------------
+    # RICERCA
+    # -------------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """Fino a limit nomi che iniziano con prefix: prima per nome intero, poi per parola."""
+        key = normalize_name(prefix or '')
+        if not key or limit <= 0:
+            return []
+
+        results, seen = [], set()
+        for entries in (self._full_entries, self._word_entries):
+            index = bisect.bisect_left(entries, (key,))
+            while index < len(entries) and len(results) < limit:
+                entry_key, name = entries[index]
+                if not entry_key.startswith(key):
+                    break
+                if name not in seen:
+                    seen.add(name)
+                    results.append(name)
+                index += 1
+        return results
+
+    def stats(self) -> dict:
+        return {
+            'built': self.built,
+            'names': len(self._names),
+            'entries': len(self._full_entries) + len(self._word_entries),
+            'approx_bytes': self._bytes,
+        }
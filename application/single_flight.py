@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from monitoring.metrics import REGISTRY
+
+COALESCING_EVENTS = REGISTRY.counter(
+    'tcg_coalescing_events_total', 'Chiamate gestite dal single-flight per ruolo (leader, shared, timeout)', ('event',)
+)
+
+
+class SingleFlightTimeoutError(TimeoutError):
+    """Il risultato della chiamata in corso non e' arrivato entro il timeout del chiamante in attesa."""
+
+
+class _Call:
+    """Una chiamata in corso: il leader la esegue, gli altri thread attendono l'evento."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Thread che si sono accodati alla chiamata (oltre al leader)
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalescenza delle richieste (single-flight): chiamate concorrenti con la stessa chiave
+    condividono un'unica esecuzione. Il primo thread (leader) esegue la funzione, gli altri
+    ricevono lo stesso risultato o la stessa eccezione.
+
+    La chiave viene rilasciata appena la chiamata termina: le richieste successive
+    eseguono una nuova chiamata (la memorizzazione dei risultati resta compito della cache).
+    Il risultato e' condiviso tra i thread e va trattato in sola lettura.
+    """
+
+    def __init__(self, timeout_seconds: float = None):
+        self.timeout_seconds = timeout_seconds
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func, timeout_seconds: float = None):
+        """
+        Esegue func() una sola volta per le chiamate concorrenti con la stessa chiave.
+        I thread in attesa sollevano SingleFlightTimeoutError se il risultato non arriva
+        entro il timeout (il leader non viene interrotto e completa comunque la chiamata).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if is_leader:
+            COALESCING_EVENTS.inc(event='leader')
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+            return call.result
+
+        timeout = timeout_seconds if timeout_seconds is not None else self.timeout_seconds
+        if not call.done.wait(timeout):
+            COALESCING_EVENTS.inc(event='timeout')
+            raise SingleFlightTimeoutError(f"Timeout in attesa della chiamata in corso per '{key}'.")
+
+        COALESCING_EVENTS.inc(event='shared')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        """Numero di chiavi con una chiamata attualmente in corso."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Variante asyncio del single-flight: le coroutine concorrenti con la stessa chiave
+    attendono lo stesso task. Va usata da un solo event loop (nessun lock necessario).
+
+    A differenza della versione a thread, la chiamata condivisa viene cancellata quando
+    tutti i chiamanti rinunciano (ad esempio perche' i client si sono disconnessi):
+    nessuna richiesta a TCGDEX resta in corso senza qualcuno che ne attenda il risultato.
+    """
+
+    def __init__(self, timeout_seconds: float = None):
+        self.timeout_seconds = timeout_seconds
+        self._calls = {}    # chiave -> [task, chiamanti in attesa]
+
+    async def do(self, key: str, coroutine_func, timeout_seconds: float = None):
+        """
+        Attende il risultato di coroutine_func() condiviso tra i chiamanti con la stessa chiave.
+        I chiamanti che si accodano sollevano SingleFlightTimeoutError dopo il timeout.
+        """
+        call = self._calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            COALESCING_EVENTS.inc(event='leader')
+            call = self._calls[key] = [asyncio.ensure_future(coroutine_func()), 0]
+            call[0].add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is call else None)
+
+        task = call[0]
+        call[1] += 1
+        timeout = None if is_leader else (timeout_seconds if timeout_seconds is not None else self.timeout_seconds)
+        try:
+            # shield: la cancellazione di un chiamante non interrompe il task condiviso
+            result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            COALESCING_EVENTS.inc(event='timeout')
+            raise SingleFlightTimeoutError(f"Timeout in attesa della chiamata in corso per '{key}'.")
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not task.done():
+                task.cancel()
+
+        if not is_leader:
+            COALESCING_EVENTS.inc(event='shared')
+        return result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
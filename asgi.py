@@ -0,0 +1,14 @@
+"""
+Entry point ASGI per server esterni, ad esempio:
+    uvicorn --workers 2 asgi:app
+Le ricerche su TCGDEX sono servite da handler async, il resto dell'app tramite WSGI (vedi AsgiApp).
+"""
+from main import create_app, load_app_config, start_background_workers
+from communication.serving_modes import SERVING_MODE_ASGI
+
+app_config = load_app_config()
+app_config.setdefault('server', {})['mode'] = SERVING_MODE_ASGI
+
+flask_app = create_app(app_config)
+start_background_workers(flask_app)
+app = flask_app.extensions['rest_api_server'].asgi_app()
@@ -0,0 +1,154 @@
+"""
+Capacita' delle ricerche su TCGDEX: server sincrono (waitress, un thread occupato per ogni ricerca
+in corso) contro la modalita' ASGI (handler async su un event loop), con lo stub TCGDEX ad alta latenza.
+
+Ogni client concorrente ripete GET /api/tcg/search_id con ID sempre diversi (niente cache ne'
+coalescenza) per --duration secondi. Con latenza L e T thread il server sincrono non supera
+T/L richieste al secondo; quello async e' limitato dalle --async-pool connessioni verso TCGDEX.
+
+Infine verifica la cancellazione in modalita' ASGI: le richieste abbandonate dal client prima della
+risposta devono essere contate in tcg_asgi_cancelled_requests_total senza completare la chiamata a TCGDEX.
+
+Uso:
+    python -m benchmarks.async_capacity --clients 500 --latency-ms 500 --duration 10
+Richiede uvicorn, aiohttp e a2wsgi. Esce con codice 1 se un controllo fallisce.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks.load_suite import build_app, free_port
+from benchmarks.serving_load import percentile, wait_until_ready
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.asgi_app import ASGI_CANCELLED_REQUESTS
+from monitoring.metrics import UPSTREAM_REQUESTS
+
+MODES = ('waitress', 'asgi')
+
+
+async def run_clients(base_url: str, clients: int, duration: float, card_ids) -> dict:
+    """clients client concorrenti (un solo event loop) che ripetono la ricerca per ID fino alla scadenza."""
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                request_start = time.perf_counter()
+                try:
+                    async with session.get(f"{base_url}/api/tcg/search_id?id={next(card_ids)}") as response:
+                        await response.read()
+                        ok = response.status == 200
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    ok = False
+                latencies.append(time.perf_counter() - request_start)
+                errors += not ok
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def check_cancellation(port: int, card_ids, count: int, latency_s: float) -> bool:
+    """Apre count richieste, chiude le connessioni prima della risposta e controlla le metriche."""
+    cancelled_before = ASGI_CANCELLED_REQUESTS.value(endpoint='get_card_by_id')
+    success_before = UPSTREAM_REQUESTS.value(outcome='success')
+
+    connections = []
+    for _ in range(count):
+        connection = socket.create_connection(("127.0.0.1", port))
+        connection.sendall(f"GET /api/tcg/search_id?id={next(card_ids)} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        connections.append(connection)
+    time.sleep(latency_s / 4)
+    for connection in connections:
+        connection.close()
+    # Le chiamate a TCGDEX, se non cancellate, sarebbero terminate entro questo tempo
+    time.sleep(latency_s * 2 + 0.5)
+
+    cancelled = ASGI_CANCELLED_REQUESTS.value(endpoint='get_card_by_id') - cancelled_before
+    completed_upstream = UPSTREAM_REQUESTS.value(outcome='success') - success_before
+    ok = cancelled == count and completed_upstream == 0
+    print(f"[{'OK' if ok else 'FAIL'}] cancellazione: {cancelled:.0f}/{count} richieste cancellate, "
+          f"{completed_upstream:.0f} chiamate a TCGDEX completate")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capacita' delle ricerche TCGDEX: server sincrono contro ASGI")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=500, help="Latenza dello stub TCGDEX")
+    parser.add_argument("--threads", type=int, default=8, help="server.threads per entrambe le modalità")
+    parser.add_argument("--async-pool", type=int, default=1000, help="Connessioni aiohttp verso TCGDEX (ASGI)")
+    parser.add_argument("--cancel-requests", type=int, default=20)
+    args = parser.parse_args()
+
+    # Con centinaia di client in coda waitress segnala ogni richiesta accodata
+    logging.getLogger('waitress').setLevel(logging.ERROR)
+
+    stub = StubTCGDexServer(latency_ms=args.latency_ms, num_sets=200).start()
+    # ID sempre nuovi: ogni richiesta arriva davvero a TCGDEX
+    card_ids = itertools.cycle(list(stub.catalog.cards))
+    latency_s = args.latency_ms / 1000
+
+    results = {}
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in MODES:
+            port = free_port()
+            app, rest_api_server = build_app(os.path.join(tmp_dir, f"{mode}.db"), port, stub.base_url, mode, args.threads)
+            core_manager = rest_api_server.core_manager
+            # Solo il percorso verso TCGDEX: il mirror locale (vuoto) non viene consultato
+            core_manager.catalog_mode = 'remote'
+            if core_manager.async_tcg_fetcher is not None:
+                core_manager.async_tcg_fetcher.pool_size = args.async_pool
+
+            rest_api_server.start()
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                wait_until_ready(f"{base_url}/api/collection?limit=1")
+                results[mode] = asyncio.run(run_clients(base_url, args.clients, args.duration, card_ids))
+                if mode == 'asgi':
+                    failed |= not check_cancellation(port, card_ids, args.cancel_requests, latency_s)
+            finally:
+                rest_api_server.stop()
+
+    stub.stop()
+
+    print()
+    print(f"{args.clients} client, latenza TCGDEX {args.latency_ms:.0f} ms, {args.threads} thread")
+    print(f"{'modalità':>10} | {'richieste':>9} | {'errori':>6} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    for mode, result in results.items():
+        print(f"{mode:>10} | {result['requests']:>9} | {result['errors']:>6} | {result['rps']:>8.1f} | "
+              f"{result['p50_ms']:>8.1f} | {result['p99_ms']:>8.1f}")
+
+    sync_bound = args.threads / latency_s
+    async_ok = results['asgi']['rps'] > 2 * sync_bound and results['asgi']['errors'] == 0
+    failed |= not async_ok
+    print(f"[{'OK' if async_ok else 'FAIL'}] ASGI oltre il doppio del limite teorico sincrono "
+          f"({args.threads} thread / {args.latency_ms:.0f} ms = {sync_bound:.0f} req/s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
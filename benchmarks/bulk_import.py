@@ -0,0 +1,80 @@
+"""
+Confronta l'import di N carte una alla volta (CoreManager.add_card_to_collection)
+con l'import massivo (CoreManager.add_cards_to_collection) contro lo stub TCGDEX locale.
+
+Uso:
+    python -m benchmarks.bulk_import --cards 500 --latency-ms 50
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from application.core_manager import CoreManager
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.tcg_fetcher import TCGFetcher
+from persistence.data_manager import DataManager
+from persistence.database.model import db, initialize_db
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TCG_CONFIG_FILE = os.path.join(BASE_DIR, "config", "api_config.yaml")
+
+
+def build_core_manager(db_path: str, base_url: str):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    initialize_db(app)
+
+    fetcher = TCGFetcher(TCG_CONFIG_FILE)
+    fetcher.base_url = base_url
+    return app, CoreManager(data_manager=DataManager(app=app), tcg_fetcher=fetcher)
+
+
+def reset_collection(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import singolo vs import massivo")
+    parser.add_argument("--cards", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    cards_per_set = 100
+    stub = StubTCGDexServer(latency_ms=args.latency_ms, num_sets=args.cards // cards_per_set + 1,
+                            cards_per_set=cards_per_set).start()
+    card_ids = list(stub.catalog.cards)[:args.cards]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app, core_manager = build_core_manager(os.path.join(tmp_dir, "bench.db"), stub.base_url)
+
+        # I log di debug del fetcher falserebbero la misura
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for card_id in card_ids:
+                core_manager.add_card_to_collection({'id': card_id})
+            serial_seconds = time.perf_counter() - start
+
+            reset_collection(app)
+
+            start = time.perf_counter()
+            report = core_manager.add_cards_to_collection(card_ids)
+            bulk_seconds = time.perf_counter() - start
+
+    stub.stop()
+
+    print(f"Carte importate:        {report['added']}/{len(card_ids)} (latenza stub {args.latency_ms} ms)")
+    print(f"Una alla volta:         {serial_seconds:.2f} s")
+    print(f"Import massivo:         {bulk_seconds:.2f} s")
+    print(f"Speed-up:               {serial_seconds / bulk_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Microbenchmark del percorso di risposta delle ricerche, dai byte ricevuti da TCGDEX al corpo della
+risposta Flask, su qualche migliaio di carte:
+- precedente: json.loads, classe con __dict__ per istanza, to_dict() per carta e jsonify di Flask
+- attuale: il percorso del server (TCGFetcher._cards_from_search / _card_from_lookup, poi
+  RestApiServer._json_response): loads_json, CardDTO (tupla immutabile) in batch, dumps_json
+
+Le righe 'solo DTO' isolano la costruzione dei DTO e dei dizionari (stesso JSON in ingresso, nessuna
+serializzazione), per separare l'effetto di CardDTO da quello del backend JSON (orjson se installato).
+
+Riporta tempo medio e picco di memoria allocata (tracemalloc).
+
+Uso:
+    python -m benchmarks.card_dto --cards 5000 --repeat 20
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from flask import Flask, jsonify
+
+from benchmarks.stub_tcgdex import StubCatalog
+from communication.api.tcg_fetcher import TCGFetcher
+from communication.api_server import RestApiServer
+from communication.dto.card_dto import CardDTO
+from communication.json_codec import JSON_BACKEND
+from main import TCG_CONFIG_FILE
+
+
+class LegacyCardDTO:
+    """Replica della versione precedente di CardDTO (istanze con __dict__)."""
+
+    def __init__(self, id, name, image_url, set_name='N/A', set_id='N/A', type='N/A', rarity='N/A'):
+        self.id = id
+        self.name = name
+        self.image_url = image_url
+        self.set_name = set_name
+        self.set_id = set_id
+        self.type = type
+        self.rarity = rarity
+
+    def to_dict(self):
+        return {'id': self.id, 'name': self.name, 'image_url': self.image_url, 'set': self.set_name,
+                'set_id': self.set_id, 'type': self.type, 'rarity': self.rarity}
+
+
+def legacy_from_raw(card_data: dict, is_full_detail: bool) -> LegacyCardDTO:
+    card_name = card_data.get('name', 'Unknown Card')
+    if isinstance(card_name, str) and "'" in card_name:
+        card_name = card_name.replace("'", "^")
+    base_image_url = card_data.get('image', '')
+    image_url = f"{base_image_url}/high.webp" if base_image_url else "placeholder.png"
+    if is_full_detail:
+        types_list = card_data.get('types', [])
+        main_type = types_list[0] if types_list and isinstance(types_list, list) and len(types_list) > 0 else 'Unknown'
+        set_obj = card_data.get('set', {})
+        return LegacyCardDTO(id=card_data.get('id', 'N/A'), name=card_name, image_url=image_url,
+                             set_name=set_obj.get('name', 'Unknown Set'), set_id=set_obj.get('id', 'N/A'),
+                             type=main_type, rarity=card_data.get('rarity', 'N/A'))
+    return LegacyCardDTO(id=card_data.get('id', 'N/A'), name=card_name, image_url=image_url)
+
+
+def legacy_dtos(raw_cards: list, is_full_detail: bool) -> list:
+    return [legacy_from_raw(card, is_full_detail).to_dict() for card in raw_cards]
+
+
+def current_dtos(raw_cards: list, is_full_detail: bool) -> list:
+    return CardDTO.to_dicts(CardDTO.from_raw_list(raw_cards, is_full_detail))
+
+
+def legacy_pipeline(fetcher: TCGFetcher, responses: list, is_full_detail: bool) -> bytes:
+    # Ricerca per nome: una risposta con la lista; lookup completi: una risposta per carta
+    raw_cards = json.loads(responses[0]) if not is_full_detail else [json.loads(content) for content in responses]
+    return jsonify(legacy_dtos(raw_cards, is_full_detail)).get_data()
+
+
+def current_pipeline(fetcher: TCGFetcher, responses: list, is_full_detail: bool) -> bytes:
+    if is_full_detail:
+        payload = [fetcher._card_from_lookup(content) for content in responses]
+    else:
+        payload = fetcher._cards_from_search(responses[0])
+    return RestApiServer._json_response(payload).get_data()
+
+
+def measure(run, repeat: int) -> dict:
+    """run() esegue una pipeline; corpo_kb e' la dimensione del risultato se sono byte."""
+    run()  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    body_kb = len(result) / 1024 if isinstance(result, bytes) else 0.0
+    return {'ms': elapsed * 1000, 'peak_kb': peak / 1024, 'body_kb': body_kb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark della serializzazione di CardDTO")
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = StubCatalog(num_sets=args.cards // 100 + 1, cards_per_set=100)
+    full_cards = list(catalog.cards.values())[:args.cards]
+    brief_cards = [catalog.brief(card) for card in full_cards]
+    # Byte come arrivano da TCGDEX: una risposta per la ricerca per nome, una per ogni lookup per ID
+    responses = {
+        False: [json.dumps(brief_cards).encode('utf-8')],
+        True: [json.dumps(card).encode('utf-8') for card in full_cards],
+    }
+    fetcher = TCGFetcher(TCG_CONFIG_FILE)
+
+    app = Flask(__name__)
+    print(f"backend JSON: {JSON_BACKEND}, carte: {args.cards}")
+    print(f"{'risposta':>8} | {'pipeline':>18} | {'ms':>8} | {'picco KB':>9} | {'corpo KB':>9}")
+    with app.app_context():
+        for label, raw_cards, is_full_detail in (('breve', brief_cards, False), ('completa', full_cards, True)):
+            pipelines = (
+                ('precedente', lambda: legacy_pipeline(fetcher, responses[is_full_detail], is_full_detail)),
+                ('attuale', lambda: current_pipeline(fetcher, responses[is_full_detail], is_full_detail)),
+                ('solo DTO, prec.', lambda: legacy_dtos(raw_cards, is_full_detail)),
+                ('solo DTO, attuale', lambda: current_dtos(raw_cards, is_full_detail)),
+            )
+            for name, run in pipelines:
+                result = measure(run, args.repeat)
+                print(f"{label:>8} | {name:>18} | {result['ms']:>8.2f} | {result['peak_kb']:>9.1f} | {result['body_kb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Misura dell'avvio a freddo: tempo dal lancio di `python main.py` alla prima risposta
+di GET /api/collection, con database nuovo (creazione dello schema) e con database esistente
+(schema gia' alla versione corrente, creazione saltata).
+
+Riporta anche le fasi di avvio (main.py --profile-startup) e i moduli importati direttamente
+da main.py piu' costosi (python -X importtime). Esce con codice 1 se la mediana dei riavvii
+supera --target-ms.
+
+Uso:
+    python -m benchmarks.cold_start --restarts 5 --target-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+import yaml
+
+from benchmarks.load_suite import free_port
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(BASE_DIR, "main.py")
+
+
+def write_config(tmp_dir: str, mode: str) -> str:
+    config_path = os.path.join(tmp_dir, "app_config.yaml")
+    with open(config_path, "w") as file:
+        yaml.safe_dump({
+            'server': {'host': '127.0.0.1', 'mode': mode, 'threads': 8},
+            'database': {'uri': f"sqlite:///{os.path.join(tmp_dir, 'cold_start.db')}"},
+            'logging': {'level': 'WARNING'},
+        }, file)
+    return config_path
+
+
+def time_to_first_response(config_path: str, tmp_dir: str, timeout: float = 30) -> float:
+    """Secondi tra il lancio del processo e la prima risposta 200 della collezione."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/collection?limit=1"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, MAIN_SCRIPT, "--config", config_path, "--port", str(port)],
+        cwd=tmp_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"main.py terminato con codice {process.returncode}")
+            try:
+                if requests.get(url, timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.exceptions.ConnectionError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"Nessuna risposta entro {timeout} s")
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+
+def top_imports(count: int) -> list:
+    """(ms cumulativi, modulo) dei moduli importati direttamente da main.py, dal piu' costoso."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Un livello di indentazione (2 spazi) sotto main: import diretti di main.py
+        if name.startswith("   ") and not name.startswith("    ") and cumulative.strip().isdigit():
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo di avvio a freddo dell'applicazione")
+    parser.add_argument("--restarts", type=int, default=5, help="Avvii con database esistente")
+    parser.add_argument("--mode", default="waitress", choices=["dev", "waitress"])
+    parser.add_argument("--target-ms", type=float, default=1500,
+                        help="Obiettivo per la mediana dei riavvii (prima risposta)")
+    parser.add_argument("--imports", type=int, default=8, help="Moduli piu' costosi da mostrare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = write_config(tmp_dir, args.mode)
+
+        fresh_ms = time_to_first_response(config_path, tmp_dir) * 1000
+        restarts_ms = [time_to_first_response(config_path, tmp_dir) * 1000 for _ in range(args.restarts)]
+
+        profile = subprocess.run([sys.executable, MAIN_SCRIPT, "--config", config_path, "--profile-startup"],
+                                 cwd=tmp_dir, capture_output=True, text=True, check=True)
+
+    print("Fasi di avvio (database esistente):")
+    print(profile.stdout.rstrip())
+    print()
+    print("Import diretti di main.py piu' costosi:")
+    for cumulative_ms, module in top_imports(args.imports):
+        print(f"  {module:<45} {cumulative_ms:>7.1f} ms")
+    print()
+
+    median_ms = statistics.median(restarts_ms)
+    print(f"Prima risposta, database nuovo:      {fresh_ms:.0f} ms")
+    print(f"Prima risposta, database esistente:  mediana {median_ms:.0f} ms "
+          f"(min {min(restarts_ms):.0f}, max {max(restarts_ms):.0f}, {len(restarts_ms)} avvii)")
+
+    ok = median_ms <= args.target_ms
+    print(f"[{'OK' if ok else 'FAIL'}] obiettivo avvio a freddo <= {args.target_ms:.0f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Confronta la ricerca per nome nella collezione con LIKE '%q%' e con l'indice FTS5.
+Per ogni dimensione crea un database SQLite sintetico e misura DataManager.get_all_card.
+
+Uso:
+    python -m benchmarks.collection_search --sizes 10000,100000,1000000 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import insert, select
+
+from benchmarks.stub_tcgdex import POKEMON_NAMES
+from persistence.data_manager import DataManager
+from persistence.database.model import db, initialize_db, Card, Set
+
+SYLLABLES = ["ka", "zu", "mi", "ro", "ta", "ne", "shi", "vo", "lux", "dra", "gon", "pel", "qui", "bor", "fen"]
+QUERIES = ["pikachu", "drago", "flabebe", "zuka"]
+
+
+def synthetic_name(rng: random.Random) -> str:
+    suffix = "".join(rng.choice(SYLLABLES) for _ in range(3))
+    return f"{rng.choice(POKEMON_NAMES)} {suffix}"
+
+
+def seed(app, rows: int, batch_size: int = 20000):
+    rng = random.Random(42)
+    with app.app_context():
+        db.session.execute(insert(Set), [{'id': f"set{i}", 'name': f"Set {i}", 'release_date': "N/A"} for i in range(100)])
+        for start in range(0, rows, batch_size):
+            db.session.execute(insert(Card), [
+                {
+                    'id': f"card-{n}",
+                    'name': synthetic_name(rng),
+                    'type': "Colorless",
+                    'rarity': "Common",
+                    'image_url': None,
+                    'set_id': f"set{n % 100}",
+                }
+                for n in range(start, min(rows, start + batch_size))
+            ])
+        db.session.commit()
+
+
+def measure(data_manager: DataManager, query: str, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = data_manager.get_all_card(query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, len(results)
+
+
+def measure_filter_only(app, data_manager: DataManager, query: str, repeat: int) -> float:
+    """Costo del solo filtro (ID delle carte corrispondenti), senza materializzare gli oggetti ORM."""
+    timings = []
+    with app.app_context():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.session.execute(data_manager._apply_name_filter(select(Card.id), query)).all()
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LIKE vs FTS5 sulla ricerca nella collezione")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'righe':>9} | {'query':>9} | {'risultati':>9} | {'LIKE ms':>9} | {'FTS5 ms':>9} "
+          f"| {'LIKE filtro':>11} | {'FTS5 filtro':>11}")
+    for rows in [int(size) for size in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            app = Flask(__name__)
+            app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+            app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+            initialize_db(app)
+            seed(app, rows)
+            data_manager = DataManager(app=app)
+
+            for query in QUERIES:
+                app.config['CARD_FTS_ENABLED'] = False
+                like_ms, like_count = measure(data_manager, query, args.repeat)
+                like_filter_ms = measure_filter_only(app, data_manager, query, args.repeat)
+                app.config['CARD_FTS_ENABLED'] = True
+                fts_ms, _ = measure(data_manager, query, args.repeat)
+                fts_filter_ms = measure_filter_only(app, data_manager, query, args.repeat)
+                print(f"{rows:>9} | {query:>9} | {like_count:>9} | {like_ms:>9.1f} | {fts_ms:>9.1f} "
+                      f"| {like_filter_ms:>11.1f} | {fts_filter_ms:>11.1f}")
+
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Verifica dell'arricchimento in background delle carte aggiunte alla collezione.
+
+Con lo stub TCGDEX ad alta latenza:
+1. POST /api/collection concorrenti: risposta 202 senza attendere TCGDEX (p99 sotto la latenza dello stub);
+   i worker salvano poi tutte le carte con set, tipo, rarità, varianti e prezzi.
+2. POST ripetuto di una carta in attesa: stesso job, nessun duplicato.
+3. Carta inesistente su TCGDEX: job 'failed' al primo tentativo (errore permanente, niente retry).
+4. TCGDEX irraggiungibile: i job vengono ritentati con backoff e completati quando il servizio torna.
+5. Worker terminato a meta' job: il job torna prelevabile alla scadenza del lease e viene completato;
+   l'esito tardivo del worker originale viene scartato.
+
+Uso:
+    python -m benchmarks.enrichment_queue --cards 100 --latency-ms 300
+Esce con codice 1 se un controllo fallisce.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.load_suite import build_app, free_port
+from benchmarks.serving_load import percentile, wait_until_ready
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.circuit_breaker import CircuitBreaker
+
+
+def check(description: str, condition: bool) -> bool:
+    print(f"[{'OK' if condition else 'FAIL'}] {description}")
+    return condition
+
+
+# Una sessione keep-alive per thread client (chiuse tutte prima di arrestare il server)
+_sessions = threading.local()
+_all_sessions = []
+
+
+def session() -> requests.Session:
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = requests.Session()
+        _all_sessions.append(_sessions.session)
+    return _sessions.session
+
+
+def post_card(base_url: str, card: dict):
+    start = time.perf_counter()
+    response = session().post(f"{base_url}/api/collection", json=card, timeout=30)
+    return time.perf_counter() - start, response
+
+
+def wait_for_jobs(base_url: str, job_ids: list, timeout: float) -> list:
+    """Attende che i job escano dagli stati attivi; restituisce l'ultimo stato di ciascuno."""
+    deadline = time.monotonic() + timeout
+    pending = list(job_ids)
+    jobs = {}
+    while pending and time.monotonic() < deadline:
+        for job_id in list(pending):
+            job = session().get(f"{base_url}/api/collection/jobs/{job_id}", timeout=10).json()
+            jobs[job_id] = job
+            if job['status'] in ('done', 'failed'):
+                pending.remove(job_id)
+        if pending:
+            time.sleep(0.2)
+    return [jobs[job_id] for job_id in job_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica dell'arricchimento in background (coda persistente + worker)")
+    parser.add_argument("--cards", type=int, default=100, help="Carte aggiunte in parallelo")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Latenza dello stub TCGDEX")
+    parser.add_argument("--workers", type=int, default=4, help="Worker di arricchimento")
+    parser.add_argument("--timeout", type=float, default=120, help="Attesa massima del completamento dei job")
+    args = parser.parse_args()
+
+    # Con i client in coda waitress segnala ogni richiesta accodata
+    logging.getLogger('waitress').setLevel(logging.ERROR)
+
+    stub = StubTCGDexServer(latency_ms=args.latency_ms).start()
+    card_ids = list(stub.catalog.cards)
+    passed = True
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        port = free_port()
+        app, rest_api_server = build_app(os.path.join(tmp_dir, "enrichment.db"), port, stub.base_url, 'waitress', 8)
+        core_manager = rest_api_server.core_manager
+        fetcher = core_manager.tcg_fetcher
+        # Tempi ridotti per la verifica: backoff dei job, circuito riprovato dopo 1 s, lease di 2 s
+        core_manager.stop_enrichment_workers()
+        core_manager.start_enrichment_workers(workers=args.workers, max_attempts=10, backoff_base=0.5, backoff_max=2,
+                                              poll_interval=0.2, lease_seconds=2)
+        fetcher.circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout_seconds=1)
+        fetcher.max_retries = 0
+
+        rest_api_server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(f"{base_url}/api/collection?limit=1")
+
+            # 1. Aggiunte concorrenti: 202 immediato, carte complete a fine coda
+            cards = [stub.catalog.brief(stub.catalog.cards[card_id]) for card_id in card_ids[:args.cards]]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as executor:
+                posts = list(executor.map(lambda card: post_card(base_url, card), cards))
+            latencies = sorted(latency for latency, _ in posts)
+            statuses = {response.status_code for _, response in posts}
+            passed &= check(f"{args.cards} POST -> {sorted(statuses)}, p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+                            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms (latenza TCGDEX {args.latency_ms:.0f} ms)",
+                            statuses == {202} and percentile(latencies, 0.99) * 1000 < args.latency_ms)
+
+            jobs = wait_for_jobs(base_url, [response.json()['job']['id'] for _, response in posts], args.timeout)
+            elapsed = time.perf_counter() - start
+            done = sum(1 for job in jobs if job['status'] == 'done')
+            passed &= check(f"{done}/{args.cards} job completati in {elapsed:.1f} s con {args.workers} worker",
+                            done == args.cards)
+
+            collection = session().get(f"{base_url}/api/collection", timeout=30, params={
+                'limit': 500, 'fields': 'id,set_id,type,rarity,variants,pricing'
+            }).json()
+            enriched = [card for card in collection
+                        if card['set_id'] and card['type'] and card['rarity'] and card['variants'] and card['pricing']]
+            passed &= check(f"{len(enriched)}/{args.cards} carte salvate con set, tipo, rarità, varianti e prezzi",
+                            len(collection) == args.cards and len(enriched) == args.cards)
+
+            # 2. POST ripetuto mentre la carta e' in attesa
+            duplicate = stub.catalog.brief(stub.catalog.cards[card_ids[args.cards]])
+            first = session().post(f"{base_url}/api/collection", json=duplicate, timeout=10).json()
+            second = session().post(f"{base_url}/api/collection", json=duplicate, timeout=10).json()
+            passed &= check("POST ripetuto di una carta in attesa: stesso job",
+                            first['job']['id'] == second['job']['id'])
+            wait_for_jobs(base_url, [first['job']['id']], args.timeout)
+            again = session().post(f"{base_url}/api/collection", json=duplicate, timeout=10)
+            passed &= check(f"POST di una carta gia' salvata: {again.status_code}", again.status_code == 409)
+
+            # 3. Errore permanente: nessun nuovo tentativo
+            missing = session().post(f"{base_url}/api/collection", json={'id': 'missing-1', 'name': 'Missing'}, timeout=10).json()
+            [missing_job] = wait_for_jobs(base_url, [missing['job']['id']], args.timeout)
+            passed &= check(f"carta inesistente: job {missing_job['status']} dopo {missing_job['attempts']} tentativo/i",
+                            missing_job['status'] == 'failed' and missing_job['attempts'] == 1)
+
+            # 4. TCGDEX irraggiungibile: retry con backoff fino al ritorno del servizio
+            fetcher.base_url = f"http://127.0.0.1:{free_port()}/v2"
+            outage_cards = [stub.catalog.brief(stub.catalog.cards[card_id])
+                            for card_id in card_ids[args.cards + 1:args.cards + 11]]
+            outage_jobs = [session().post(f"{base_url}/api/collection", json=card, timeout=10).json()['job']['id']
+                           for card in outage_cards]
+            time.sleep(3)
+            fetcher.base_url = stub.base_url
+            jobs = wait_for_jobs(base_url, outage_jobs, args.timeout)
+            retried = sum(1 for job in jobs if job['status'] == 'done' and job['attempts'] > 1)
+            passed &= check(f"indisponibilità di TCGDEX: {retried}/{len(jobs)} job completati dopo piu' tentativi",
+                            retried == len(jobs))
+
+            # 5. Worker terminato a meta' job: ripreso alla scadenza del lease
+            core_manager.stop_enrichment_workers()
+            lost_card = stub.catalog.brief(stub.catalog.cards[card_ids[args.cards + 11]])
+            lost_job, _ = core_manager.enrichment_queue.enqueue(lost_card)
+            stale_claim = core_manager.enrichment_queue.claim(lease_seconds=2)
+            core_manager.start_enrichment_workers(workers=args.workers, poll_interval=0.2, lease_seconds=2)
+            [lost_job] = wait_for_jobs(base_url, [lost_job['id']], args.timeout)
+            passed &= check(f"job abbandonato: {lost_job['status']} al tentativo {lost_job['attempts']}",
+                            lost_job['status'] == 'done' and lost_job['attempts'] == 2)
+            # L'esito tardivo del primo worker (lease scaduto) non sovrascrive quello del nuovo proprietario
+            late = core_manager.enrichment_queue.retry(stale_claim['id'], stale_claim['attempts'], "late", 0)
+            after = core_manager.enrichment_queue.get_job(stale_claim['id'])
+            passed &= check(f"esito tardivo con lease scaduto: registrato={late}, stato {after['status']}",
+                            not late and after['status'] == 'done')
+
+            status = session().get(f"{base_url}/api/collection/jobs", timeout=10).json()
+            print(f"Stato della coda: {status['counts']}, worker {status['workers']}")
+        finally:
+            for client_session in _all_sessions:
+                client_session.close()
+            rest_api_server.stop()
+            stub.stop()
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
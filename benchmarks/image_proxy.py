@@ -0,0 +1,99 @@
+"""
+Confronta i byte trasferiti per mostrare le immagini di una collezione di N carte:
+- diretto: ogni carta scarica <image>/high.webp da TCGDEX (comportamento precedente)
+- proxy: GET /api/images/<id>?size=thumb, primo caricamento e ricaricamento con If-None-Match
+
+Uso:
+    python -m benchmarks.image_proxy --cards 200 --latency-ms 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import requests
+from flask import Flask
+
+from application.core_manager import CoreManager
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.image_cache import ImageCache
+from communication.api.tcg_fetcher import TCGFetcher
+from communication.api_server import RestApiServer
+from persistence.data_manager import DataManager
+from persistence.database.model import initialize_db
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TCG_CONFIG_FILE = os.path.join(BASE_DIR, "config", "api_config.yaml")
+
+
+def build_app(tmp_dir: str, base_url: str):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    initialize_db(app)
+
+    fetcher = TCGFetcher(TCG_CONFIG_FILE)
+    fetcher.base_url = base_url
+    core_manager = CoreManager(
+        data_manager=DataManager(app=app), tcg_fetcher=fetcher,
+        image_cache=ImageCache(os.path.join(tmp_dir, "images"))
+    )
+    RestApiServer(core_manager=core_manager, app=app, host="127.0.0.1", port=0)
+    return app, core_manager
+
+
+def load_images(client, card_ids: list, etags: dict = None) -> dict:
+    """Carica le miniature di tutte le carte; con etags invia If-None-Match (ricaricamento del browser)."""
+    total_bytes = 0
+    not_modified = 0
+    received_etags = {}
+    start = time.perf_counter()
+    for card_id in card_ids:
+        headers = {'If-None-Match': etags[card_id]} if etags else {}
+        response = client.get(f"/api/images/{card_id}?size=thumb", headers=headers)
+        total_bytes += len(response.get_data())
+        not_modified += response.status_code == 304
+        received_etags[card_id] = response.headers.get('ETag')
+    return {'bytes': total_bytes, 'not_modified': not_modified, 'elapsed_s': time.perf_counter() - start,
+            'etags': received_etags}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del proxy immagini")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    cards_per_set = 100
+    stub = StubTCGDexServer(latency_ms=args.latency_ms, num_sets=args.cards // cards_per_set + 1,
+                            cards_per_set=cards_per_set).start()
+    card_ids = list(stub.catalog.cards)[:args.cards]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app, core_manager = build_app(tmp_dir, stub.base_url)
+        core_manager.add_cards_to_collection(card_ids)
+
+        session = requests.Session()
+        start = time.perf_counter()
+        direct_bytes = sum(
+            len(session.get(f"{stub.catalog.cards[card_id]['image']}/high.webp").content) for card_id in card_ids
+        )
+        direct_elapsed = time.perf_counter() - start
+
+        client = app.test_client()
+        first = load_images(client, card_ids)
+        warm = load_images(client, card_ids)
+        revalidated = load_images(client, card_ids, etags=first['etags'])
+
+    stub.stop()
+
+    print(f"{'caricamento':>24} | {'KB':>9} | {'304':>5} | {'tempo s':>8}")
+    print(f"{'diretto (high.webp)':>24} | {direct_bytes / 1024:>9.1f} | {0:>5} | {direct_elapsed:>8.2f}")
+    print(f"{'proxy, primo accesso':>24} | {first['bytes'] / 1024:>9.1f} | {first['not_modified']:>5} | {first['elapsed_s']:>8.2f}")
+    print(f"{'proxy, cache disco':>24} | {warm['bytes'] / 1024:>9.1f} | {warm['not_modified']:>5} | {warm['elapsed_s']:>8.2f}")
+    print(f"{'proxy, If-None-Match':>24} | {revalidated['bytes'] / 1024:>9.1f} | {revalidated['not_modified']:>5} "
+          f"| {revalidated['elapsed_s']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
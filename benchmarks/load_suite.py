@@ -0,0 +1,354 @@
+"""
+Load test dell'intero percorso delle richieste: app reale (RestApiServer + CoreManager + DataManager)
+servita in-process, contro lo stub TCGDEX locale con latenza configurabile e un database SQLite
+popolato con una collezione sintetica (da 1k a 1M carte).
+
+Scenari (ognuno per --duration secondi con --clients client concorrenti):
+- search:  GET /api/tcg/search_name        (ricerca remota sullo stub)
+- list:    GET /api/collection?limit=50    (prima pagina della collezione)
+- filter:  GET /api/collection?name=...    (ricerca per nome nella collezione)
+- facets:  GET /api/collection?type=...&rarity=...&sort=...  (filtri e ordinamento lato server)
+- add:     POST /api/collection            (accodamento dell'arricchimento, 202; 201 se sincrono)
+- delete:  DELETE /api/collection?id=...
+
+I risultati (throughput, p50/p95/p99, errori) vengono stampati e, con --output, salvati in JSON
+insieme al commit corrente; con --baseline vengono confrontati con un'esecuzione precedente
+e il processo termina con codice 1 se qualche scenario peggiora oltre --tolerance.
+
+Uso:
+    python -m benchmarks.load_suite --sizes 1000,100000 --latency-ms 50 --output results.json
+    python -m benchmarks.load_suite --sizes 1000,100000 --baseline results.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+
+import requests
+from sqlalchemy import insert
+
+from benchmarks.serving_load import percentile, wait_until_ready
+from benchmarks.stub_tcgdex import StubTCGDexServer, POKEMON_NAMES, TYPES, RARITIES
+from communication.api.rate_limiter import RateLimiter
+from communication.json_codec import JSON_BACKEND
+from persistence.database.model import db, Card, Set, _backfill_collection_stats
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ('search', 'list', 'filter', 'facets', 'add', 'delete')
+NUM_SETS = 100
+FILTER_QUERIES = ["pikachu", "charizard", "eevee", "mewtwo", "lucario"]
+
+
+def free_port() -> int:
+    with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# -------------------------------------------------------------------
+# PREPARAZIONE: APP, STUB E COLLEZIONE SINTETICA
+# -------------------------------------------------------------------
+
+def build_app(db_path: str, port: int, stub_base_url: str, mode: str, threads: int):
+    """Costruisce l'app con l'app factory, la collega allo stub TCGDEX e avvia i worker di arricchimento."""
+    from main import create_app, start_background_workers
+
+    app = create_app({
+        'server': {'host': '127.0.0.1', 'port': port, 'mode': mode, 'threads': threads,
+                   'shutdown_timeout_seconds': 5},
+        'database': {'uri': f"sqlite:///{db_path}"},
+        'logging': {'level': 'WARNING'},
+    })
+    # Il log di accesso del server di sviluppo (una riga per richiesta) falserebbe la misura
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    rest_api_server = app.extensions['rest_api_server']
+    core_manager = rest_api_server.core_manager
+
+    # Si misura il percorso completo verso lo stub: niente cache delle risposte (che sarebbe anche
+    # persistente su disco) e niente rate limiter, pensato per l'API pubblica e non per lo stub locale
+    fetcher = getattr(core_manager.tcg_fetcher, 'fetcher', core_manager.tcg_fetcher)
+    fetcher.base_url = stub_base_url
+    fetcher.rate_limiter = RateLimiter(rate_per_second=0)
+    core_manager.tcg_fetcher = fetcher
+    if core_manager.async_tcg_fetcher is not None:
+        core_manager.async_tcg_fetcher.cache = None
+    start_background_workers(app)
+    return app, rest_api_server
+
+
+def seed_collection(app, cards: int, batch_size: int = 20000):
+    """Inserisce la collezione sintetica in blocco (trigger FTS compresi) e ricalcola le statistiche."""
+    rng = random.Random(42)
+    with app.app_context():
+        db.session.execute(insert(Set), [
+            {'id': f"bench{s}", 'name': f"Bench Set {s}", 'release_date': "N/A"} for s in range(NUM_SETS)
+        ])
+        for start in range(0, cards, batch_size):
+            db.session.execute(insert(Card), [
+                {
+                    'id': f"bench-{n}",
+                    'name': f"{rng.choice(POKEMON_NAMES)} {n}",
+                    'type': rng.choice(TYPES),
+                    'rarity': rng.choice(RARITIES),
+                    'image_url': None,
+                    'set_id': f"bench{n % NUM_SETS}",
+                }
+                for n in range(start, min(cards, start + batch_size))
+            ])
+        db.session.commit()
+        _backfill_collection_stats()
+
+
+# -------------------------------------------------------------------
+# GENERAZIONE DEL CARICO
+# -------------------------------------------------------------------
+
+class SharedIterator:
+    """Iteratore condiviso tra i client (ID da aggiungere o cancellare, ognuno usato una sola volta)."""
+
+    def __init__(self, values):
+        self._values = iter(values)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            return next(self._values, None)
+
+
+def make_scenario(scenario: str, base_url: str, add_ids: SharedIterator, delete_ids: SharedIterator):
+    """
+    Restituisce la funzione che esegue una richiesta dello scenario:
+    request(session, rng) -> True/False (esito) oppure None se non c'e' piu' lavoro da fare.
+    """
+    if scenario == 'search':
+        def request(session, rng):
+            response = session.get(f"{base_url}/api/tcg/search_name", params={'name': rng.choice(POKEMON_NAMES)})
+            return response.status_code == 200
+    elif scenario == 'list':
+        def request(session, rng):
+            return session.get(f"{base_url}/api/collection", params={'limit': 50}).status_code == 200
+    elif scenario == 'filter':
+        def request(session, rng):
+            response = session.get(f"{base_url}/api/collection",
+                                   params={'name': rng.choice(FILTER_QUERIES), 'limit': 50})
+            return response.status_code == 200
+    elif scenario == 'facets':
+        def request(session, rng):
+            params = {'type': rng.sample(TYPES, rng.randint(1, 2)), 'sort': rng.choice(['name', 'rarity', 'set_id']),
+                      'order': rng.choice(['asc', 'desc']), 'limit': 50}
+            if rng.random() < 0.5:
+                params['rarity'] = rng.choice(RARITIES)
+            return session.get(f"{base_url}/api/collection", params=params).status_code == 200
+    elif scenario == 'add':
+        def request(session, rng):
+            card_id = add_ids.next()
+            if card_id is None:
+                return None
+            return session.post(f"{base_url}/api/collection", json={'id': card_id}).status_code in (201, 202)
+    elif scenario == 'delete':
+        def request(session, rng):
+            card_id = delete_ids.next()
+            if card_id is None:
+                return None
+            return session.delete(f"{base_url}/api/collection", params={'id': card_id}).status_code == 200
+    else:
+        raise ValueError(f"Scenario sconosciuto: {scenario}")
+    return request
+
+
+def run_scenario(request, clients: int, duration: float) -> dict:
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(client_id):
+        rng = random.Random(client_id)
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            request_start = time.perf_counter()
+            try:
+                outcome = request(session, rng)
+            except requests.exceptions.RequestException:
+                outcome = False
+            if outcome is None:
+                break
+            local_latencies.append(time.perf_counter() - request_start)
+            local_errors += not outcome
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def wait_for_enrichment(core_manager, timeout: float):
+    """Attende che i worker abbiano svuotato la coda di arricchimento: gli scenari successivi non la misurano."""
+    if not core_manager.enrichment_enabled:
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        counts = core_manager.enrichment_queue.get_summary(limit=0)['counts']
+        if counts['queued'] + counts['running'] == 0:
+            return
+        time.sleep(0.2)
+
+
+def run_size(size: int, args) -> list:
+    # Lo stub deve avere abbastanza carte per tutte le aggiunte dello scenario 'add'
+    stub = StubTCGDexServer(latency_ms=args.latency_ms, num_sets=args.stub_sets, cards_per_set=100).start()
+    port = free_port()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app, rest_api_server = build_app(os.path.join(tmp_dir, "load.db"), port, stub.base_url,
+                                         args.mode, args.threads)
+        seed_start = time.perf_counter()
+        seed_collection(app, size)
+        seed_seconds = time.perf_counter() - seed_start
+
+        rest_api_server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(f"{base_url}/api/collection?limit=1")
+            add_ids = SharedIterator(list(stub.catalog.cards))
+            delete_ids = SharedIterator(f"bench-{n}" for n in range(size))
+            for scenario in args.scenarios:
+                request = make_scenario(scenario, base_url, add_ids, delete_ids)
+                result = run_scenario(request, args.clients, args.duration)
+                results.append({'size': size, 'scenario': scenario, 'seed_s': round(seed_seconds, 2), **result})
+                print_row(results[-1])
+                if scenario == 'add':
+                    wait_for_enrichment(rest_api_server.core_manager, args.duration * 10)
+        finally:
+            rest_api_server.stop()
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+            stub.stop()
+    return results
+
+
+# -------------------------------------------------------------------
+# REPORT E CONFRONTO CON UNA BASELINE
+# -------------------------------------------------------------------
+
+def print_header():
+    print(f"{'carte':>8} | {'scenario':>8} | {'richieste':>9} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} "
+          f"| {'p99 ms':>8} | {'errori':>6}")
+
+
+def print_row(result: dict):
+    print(f"{result['size']:>8} | {result['scenario']:>8} | {result['requests']:>9} | {result['rps']:>8.1f} "
+          f"| {result['p50_ms']:>8.2f} | {result['p95_ms']:>8.2f} | {result['p99_ms']:>8.2f} | {result['errors']:>6}")
+
+
+def compare_with_baseline(results: list, baseline: dict, tolerance: float) -> list:
+    """Scenari peggiorati rispetto alla baseline: p95 piu' alto o throughput piu' basso oltre la tolleranza."""
+    previous = {(entry['size'], entry['scenario']): entry for entry in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['size'], result['scenario']))
+        if before is None:
+            continue
+        if before['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{result['size']}/{result['scenario']}: p95 {before['p95_ms']:.2f} -> "
+                               f"{result['p95_ms']:.2f} ms")
+        if before['rps'] and result['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{result['size']}/{result['scenario']}: req/s {before['rps']:.1f} -> "
+                               f"{result['rps']:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test dell'intero percorso delle richieste")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Dimensioni della collezione sintetica")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5, help="Secondi per scenario")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Latenza dello stub TCGDEX")
+    parser.add_argument("--stub-sets", type=int, default=50, help="Espansioni dello stub (100 carte ciascuna)")
+    parser.add_argument("--mode", choices=['dev', 'waitress'], default='dev')
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output", help="File JSON in cui salvare i risultati")
+    parser.add_argument("--baseline", help="Risultati JSON di un'esecuzione precedente da confrontare")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Peggioramento relativo tollerato")
+    args = parser.parse_args()
+    args.scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+
+    print_header()
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        results.extend(run_size(size, args))
+
+    report = {
+        'meta': {
+            'commit': current_commit(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'json_backend': JSON_BACKEND,
+            'mode': args.mode,
+            'clients': args.clients,
+            'duration_s': args.duration,
+            'latency_ms': args.latency_ms,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nRisultati salvati in {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        print(f"\nConfronto con {baseline.get('meta', {}).get('commit', args.baseline)} "
+              f"(tolleranza {args.tolerance:.0%}): {len(regressions)} peggioramenti")
+        for regression in regressions:
+            print(f"  - {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Verifica del rate limiter TCGDEX.
+
+1. Clock finto: burst iniziale, ritmo a regime e rifiuto delle richieste oltre la scadenza,
+   senza attese reali.
+2. Stub locale: un import massivo (corsia background) gira insieme a ricerche interattive;
+   confronta l'attesa delle ricerche nella corsia interattiva e nella stessa corsia del batch,
+   e riporta il ritmo effettivo delle richieste arrivate allo stub.
+
+Uso:
+    python -m benchmarks.rate_limiter --rate 20 --burst 5 --batch 200
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.serving_load import percentile
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.rate_limiter import (RateLimiter, RateLimitExceededError,
+                                             LANE_INTERACTIVE, LANE_BACKGROUND)
+from communication.api.tcg_fetcher import TCGFetcher
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TCG_CONFIG_FILE = os.path.join(BASE_DIR, "config", "api_config.yaml")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, condition, timeout):
+        # Nessuna attesa reale: il tempo avanza di quanto il limiter vorrebbe attendere
+        self.now += timeout
+
+
+def check(description: str, condition: bool) -> bool:
+    print(f"[{'OK' if condition else 'FAIL'}] {description}")
+    return condition
+
+
+def fake_clock_checks() -> bool:
+    clock = FakeClock()
+    limiter = RateLimiter(rate_per_second=10, burst=5, max_wait_seconds={LANE_INTERACTIVE: 0.25},
+                          clock=clock, wait=clock.wait)
+    passed = True
+
+    waits = [limiter.acquire(LANE_BACKGROUND) for _ in range(5)]
+    passed &= check("burst: 5 token disponibili senza attesa", all(wait == 0 for wait in waits))
+
+    waits = [limiter.acquire(LANE_BACKGROUND) for _ in range(10)]
+    passed &= check("a regime: un token ogni 0.1 s", all(abs(wait - 0.1) < 1e-6 for wait in waits))
+    passed &= check("10 token in 1 s di tempo simulato", abs(clock.now - 1.0) < 1e-6)
+
+    passed &= check("interattiva servita entro max_wait", abs(limiter.acquire(LANE_INTERACTIVE) - 0.1) < 1e-6)
+
+    # Bucket vuoto e 0.1 s per token: con max_wait 0.05 s la richiesta va rifiutata subito
+    limiter.max_wait_seconds[LANE_INTERACTIVE] = 0.05
+    start = clock.now
+    try:
+        limiter.acquire(LANE_INTERACTIVE)
+        rejected = False
+    except RateLimitExceededError:
+        rejected = True
+    passed &= check("rifiuto immediato se l'attesa stimata supera max_wait", rejected and clock.now == start)
+    passed &= check("la richiesta rifiutata non resta in coda", limiter.stats()['queued'][LANE_INTERACTIVE] == 0)
+    return passed
+
+
+def stub_run(rate: float, burst: int, batch: int, latency_ms: float, interactive_lane: str) -> dict:
+    stub = StubTCGDexServer(latency_ms=latency_ms, num_sets=batch // 100 + 1, cards_per_set=100).start()
+    fetcher = TCGFetcher(TCG_CONFIG_FILE)
+    fetcher.base_url = stub.base_url
+    fetcher.rate_limiter = RateLimiter(rate_per_second=rate, burst=burst)
+
+    card_ids = list(stub.catalog.cards)[:batch]
+    batch_done = threading.Event()
+    interactive_latencies = []
+
+    def run_batch():
+        fetcher.search_cards_by_ids(card_ids, max_concurrency=8)
+        batch_done.set()
+
+    start = time.perf_counter()
+    batch_thread = threading.Thread(target=run_batch)
+    batch_thread.start()
+    time.sleep(0.5)  # il batch ha gia' esaurito il burst e riempito la coda
+    while not batch_done.is_set():
+        search_start = time.perf_counter()
+        with fetcher.rate_limiter.lane(interactive_lane):
+            fetcher.search_cards_by_name("Pikachu")
+        interactive_latencies.append(time.perf_counter() - search_start)
+        time.sleep(0.2)
+    batch_thread.join()
+    elapsed = time.perf_counter() - start
+    stub.stop()
+
+    interactive_latencies.sort()
+    return {
+        'upstream_rps': stub.httpd.request_count / elapsed,
+        'batch_s': elapsed,
+        'searches': len(interactive_latencies),
+        'search_p50_ms': percentile(interactive_latencies, 0.50) * 1000,
+        'search_p95_ms': percentile(interactive_latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica del rate limiter TCGDEX")
+    parser.add_argument("--rate", type=float, default=20)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    if not fake_clock_checks():
+        raise SystemExit(1)
+
+    print(f"\n{'corsia ricerche':>15} | {'req/s stub':>10} | {'batch s':>7} | {'ricerche':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+    for lane in (LANE_BACKGROUND, LANE_INTERACTIVE):
+        result = stub_run(args.rate, args.burst, args.batch, args.latency_ms, lane)
+        print(f"{lane:>15} | {result['upstream_rps']:>10.1f} | {result['batch_s']:>7.1f} | {result['searches']:>8} "
+              f"| {result['search_p50_ms']:>8.1f} | {result['search_p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Misura l'effetto della coalescenza (single-flight) del CoreManager: N thread cercano
+contemporaneamente lo stesso nome e lo stesso ID contro lo stub TCGDEX e si contano
+le richieste arrivate effettivamente allo stub.
+
+Uso:
+    python -m benchmarks.request_coalescing --clients 50 --latency-ms 200
+"""
+import argparse
+import os
+import threading
+import time
+
+from application.core_manager import CoreManager
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.tcg_fetcher import TCGFetcher
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TCG_CONFIG_FILE = os.path.join(BASE_DIR, "config", "api_config.yaml")
+
+
+def run_burst(stub: StubTCGDexServer, core_manager: CoreManager, clients: int, target) -> dict:
+    """Lancia `clients` thread che partono insieme sulla stessa ricerca."""
+    barrier = threading.Barrier(clients)
+    results = [None] * clients
+
+    def client(index):
+        barrier.wait()
+        results[index] = target(core_manager)
+
+    stub.httpd.request_count = 0
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'upstream_requests': stub.httpd.request_count,
+        'elapsed_s': time.perf_counter() - start,
+        'empty_results': sum(1 for result in results if not result),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark della coalescenza delle richieste identiche")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    stub = StubTCGDexServer(latency_ms=args.latency_ms, num_sets=2, cards_per_set=50).start()
+    card_id = next(iter(stub.catalog.cards))
+
+    fetcher = TCGFetcher(TCG_CONFIG_FILE)
+    fetcher.base_url = stub.base_url
+    # Senza cache ne' mirror locale: ogni ricerca non coalescente arriva allo stub
+    core_manager = CoreManager(data_manager=None, tcg_fetcher=fetcher, coalescing_timeout=10)
+
+    scenarios = {
+        'search_name': lambda manager: manager.search_cards_by_name("Pikachu")[0],
+        'search_id': lambda manager: manager.search_card_by_id(card_id),
+    }
+
+    print(f"{'ricerca':>12} | {'client':>6} | {'richieste stub':>14} | {'tempo s':>8} | {'vuote':>5}")
+    for name, target in scenarios.items():
+        result = run_burst(stub, core_manager, args.clients, target)
+        print(f"{name:>12} | {args.clients:>6} | {result['upstream_requests']:>14} "
+              f"| {result['elapsed_s']:>8.2f} | {result['empty_results']:>5}")
+
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load test delle modalità di esecuzione del server (dev, waitress, gunicorn).
+Per ogni modalità avvia main.py in un processo separato su un database sintetico,
+genera carico concorrente su GET /api/collection e riporta throughput e latenze.
+
+Uso:
+    python -m benchmarks.serving_load --modes dev,waitress,gunicorn --clients 16 --duration 10
+"""
+import argparse
+import contextlib
+import io
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+import yaml
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def seed_database(app_config: dict, cards: int):
+    """Popola il database sintetico usando l'app factory e DataManager.add_cards."""
+    from main import create_app
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app(app_config)
+        data_manager = app.extensions['rest_api_server'].core_manager.data_manager
+        data_manager.add_cards([
+            {'id': f"load-{n}", 'name': f"Pikachu {n}", 'type': "Lightning", 'rarity': "Common",
+             'image_url': None, 'set_id': f"set{n % 50}", 'set_name': f"Set {n % 50}"}
+            for n in range(cards)
+        ])
+
+
+def wait_until_ready(url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Il server non risponde su {url}")
+
+
+def run_load(url: str, clients: int, duration: float) -> dict:
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if session.get(url, timeout=10).status_code != 200:
+                    local_errors += 1
+            except requests.exceptions.RequestException:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test delle modalità di esecuzione del server")
+    parser.add_argument("--modes", default="dev,waitress,gunicorn")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--path", default="/api/collection?limit=50")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_config = {
+            'server': {'host': '127.0.0.1', 'port': args.port, 'threads': 8, 'workers': 4,
+                       'shutdown_timeout_seconds': 5},
+            'database': {'uri': f"sqlite:///{os.path.join(tmp_dir, 'load.db')}"},
+        }
+        seed_database(app_config, args.cards)
+
+        config_file = os.path.join(tmp_dir, "app_config.yaml")
+        with open(config_file, "w") as file:
+            yaml.safe_dump(app_config, file)
+
+        url = f"http://127.0.0.1:{args.port}{args.path}"
+        print(f"{'modalità':>9} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'errori':>6}")
+        for mode in args.modes.split(","):
+            process = subprocess.Popen(
+                [sys.executable, "main.py", "--config", config_file, "--mode", mode],
+                cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_until_ready(url)
+                result = run_load(url, args.clients, args.duration)
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait(timeout=30)
+
+            print(f"{mode:>9} | {result['rps']:>8.1f} | {result['p50_ms']:>8.1f} | {result['p95_ms']:>8.1f} "
+                  f"| {result['p99_ms']:>8.1f} | {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
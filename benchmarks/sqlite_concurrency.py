@@ -0,0 +1,122 @@
+"""
+Carico misto di letture e scritture concorrenti sul DataManager, con due profili SQLite:
+- legacy: nessun PRAGMA (journal rollback, synchronous FULL, pool di default)
+- tuned: profilo predefinito di engine_profile (WAL, synchronous NORMAL, busy_timeout, mmap, cache)
+
+Ogni thread esegue in ciclo: pagina della collezione (lettura), inserimento o cancellazione (scrittura).
+Riporta throughput, latenze ed errori per profilo.
+
+Uso:
+    python -m benchmarks.sqlite_concurrency --threads 8 --duration 10 --write-ratio 0.2
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from benchmarks.serving_load import percentile
+from persistence.data_manager import DataManager
+from persistence.database.engine_profile import engine_options_from_config, sqlite_pragmas_from_config
+from persistence.database.model import initialize_db
+
+PROFILES = ('legacy', 'tuned')
+
+
+def build_data_manager(db_path: str, profile: str, threads: int) -> DataManager:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if profile == 'tuned':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_config(
+            app.config['SQLALCHEMY_DATABASE_URI'], {}, default_pool_size=threads
+        )
+        app.config['SQLITE_PRAGMAS'] = sqlite_pragmas_from_config()
+    else:
+        app.config['SQLITE_PRAGMAS'] = {}
+    initialize_db(app)
+    return DataManager(app=app)
+
+
+def run_mixed_load(data_manager: DataManager, threads: int, duration: float, write_ratio: float) -> dict:
+    read_latencies, write_latencies = [], []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        rng = random.Random(worker_id)
+        own_ids = []
+        local_reads, local_writes, local_errors = [], [], 0
+        sequence = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if rng.random() < write_ratio:
+                if own_ids and rng.random() < 0.5:
+                    success, _ = data_manager.delete_card_by_id(own_ids.pop())
+                else:
+                    card_id = f"w{worker_id}-{sequence}"
+                    sequence += 1
+                    success, _ = data_manager.add_card({
+                        'id': card_id, 'name': f"Eevee {card_id}", 'type': "Colorless", 'rarity': "Common",
+                        'image_url': None, 'set_id': "bench", 'set_name': "Bench Set",
+                    })
+                    if success:
+                        own_ids.append(card_id)
+                local_errors += not success
+                local_writes.append(time.perf_counter() - start)
+            else:
+                data_manager.get_cards_page(limit=50)
+                local_reads.append(time.perf_counter() - start)
+        with lock:
+            read_latencies.extend(local_reads)
+            write_latencies.extend(local_writes)
+            errors[0] += local_errors
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    read_latencies.sort()
+    write_latencies.sort()
+    return {
+        'ops_per_s': (len(read_latencies) + len(write_latencies)) / duration,
+        'reads': len(read_latencies),
+        'writes': len(write_latencies),
+        'read_p95_ms': percentile(read_latencies, 0.95) * 1000,
+        'write_p95_ms': percentile(write_latencies, 0.95) * 1000,
+        'errors': errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark letture/scritture concorrenti su SQLite")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--cards", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'profilo':>7} | {'op/s':>8} | {'letture':>8} | {'scritture':>9} | {'p95 lett. ms':>12} "
+          f"| {'p95 scritt. ms':>14} | {'errori':>6}")
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_manager = build_data_manager(os.path.join(tmp_dir, "bench.db"), profile, args.threads)
+            data_manager.add_cards([
+                {'id': f"seed-{n}", 'name': f"Pikachu {n}", 'type': "Lightning", 'rarity': "Common",
+                 'image_url': None, 'set_id': f"set{n % 20}", 'set_name': f"Set {n % 20}"}
+                for n in range(args.cards)
+            ])
+            result = run_mixed_load(data_manager, args.threads, args.duration, args.write_ratio)
+
+        print(f"{profile:>7} | {result['ops_per_s']:>8.1f} | {result['reads']:>8} | {result['writes']:>9} "
+              f"| {result['read_p95_ms']:>12.2f} | {result['write_p95_ms']:>14.2f} | {result['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Server HTTP locale che imita gli endpoint TCGDEX usati dal TCGFetcher.
+Serve un catalogo sintetico deterministico e permette di simulare latenza ed errori 5xx
+(casuali con --failure-rate, o una sequenza precisa con fail_next, anche 429 con Retry-After),
+cosi' fetcher, retry e circuit breaker possono essere provati senza rete.
+
+Uso:
+    python -m benchmarks.stub_tcgdex --port 8765 --latency-ms 50 --failure-rate 0.1
+
+e puntare 'api.base_url' a http://127.0.0.1:8765/v2
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POKEMON_NAMES = [
+    "Pikachu", "Charizard", "Bulbasaur", "Squirtle", "Eevee", "Mewtwo", "Gengar", "Snorlax",
+    "Gyarados", "Dragonite", "Lucario", "Greninja", "Rayquaza", "Umbreon", "Sylveon", "Blastoise",
+    "Venusaur", "Jigglypuff", "Machamp", "Alakazam", "Farfetch'd", "Flabébé", "Mr. Mime", "Zapdos",
+]
+TYPES = ["Lightning", "Fire", "Grass", "Water", "Psychic", "Fighting", "Darkness", "Metal", "Colorless"]
+RARITIES = ["Common", "Uncommon", "Rare", "Rare Holo", "Ultra Rare"]
+
+# Dimensioni indicative delle immagini TCGDEX (webp) per qualità
+IMAGE_SIZES = {"high": 150_000, "low": 20_000}
+
+
+class StubCatalog:
+    """Catalogo sintetico: num_sets espansioni da cards_per_set carte ciascuna."""
+
+    def __init__(self, num_sets: int = 20, cards_per_set: int = 100, base_url: str = "http://127.0.0.1"):
+        self.sets = {}
+        self.cards = {}
+        for s in range(num_sets):
+            set_id = f"stub{s + 1}"
+            set_brief = {"id": set_id, "name": f"Stub Set {s + 1}"}
+            self.sets[set_id] = {
+                **set_brief,
+                "releaseDate": f"20{10 + s % 15:02d}-01-01",
+                "cardCount": {"total": cards_per_set, "official": cards_per_set},
+                "cards": [],
+            }
+            for n in range(cards_per_set):
+                card_id = f"{set_id}-{n + 1}"
+                name = POKEMON_NAMES[(s * cards_per_set + n) % len(POKEMON_NAMES)]
+                image = f"{base_url}/assets/{set_id}/{n + 1}"
+                card = {
+                    "id": card_id,
+                    "localId": str(n + 1),
+                    "name": name,
+                    "image": image,
+                    "rarity": RARITIES[n % len(RARITIES)],
+                    "types": [TYPES[n % len(TYPES)]],
+                    "set": set_brief,
+                    "variants": {"normal": True, "reverse": n % 2 == 0, "holo": n % 5 == 3, "firstEdition": False},
+                    "pricing": {
+                        "cardmarket": {"updated": "2025-01-01T00:00:00.000Z", "unit": "EUR",
+                                       "avg": round(0.1 + n * 0.05, 2), "low": 0.05, "trend": round(0.1 + n * 0.04, 2)},
+                    },
+                }
+                self.cards[card_id] = card
+                self.sets[set_id]["cards"].append({"id": card_id, "localId": str(n + 1), "name": name, "image": image})
+
+    def brief(self, card: dict) -> dict:
+        return {"id": card["id"], "localId": card["localId"], "name": card["name"], "image": card["image"]}
+
+
+def make_handler(latency_ms: float, failure_rate: float):
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload, headers: dict = None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_image(self, path: str, quality: str):
+            # Contenuto deterministico (diverso per carta) della dimensione tipica della qualità richiesta
+            seed = hashlib.sha256(path.encode("utf-8")).digest()
+            body = (seed * (IMAGE_SIZES[quality] // len(seed) + 1))[:IMAGE_SIZES[quality]]
+            self.send_response(200)
+            self.send_header("Content-Type", "image/webp")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.server.request_count += 1
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            with self.server.scripted_lock:
+                scripted = self.server.scripted_failures.pop(0) if self.server.scripted_failures else None
+            if scripted is not None:
+                status, headers = scripted
+                return self._send_json(status, {"error": "scripted stub failure"}, headers)
+            if failure_rate and random.random() < failure_rate:
+                return self._send_json(503, {"error": "stub failure"})
+
+            catalog = self.server.catalog
+            parsed = urllib.parse.urlparse(self.path)
+            parts = [p for p in parsed.path.split("/") if p]
+            query = urllib.parse.parse_qs(parsed.query)
+
+            # /assets/<set>/<n>/<high|low>.webp
+            if parts[:1] == ["assets"] and parts[-1].split(".")[0] in IMAGE_SIZES:
+                return self._send_image(parsed.path, parts[-1].split(".")[0])
+            # /v2/en/cards?name=...
+            if parts[-1:] == ["cards"]:
+                name = query.get("name", [""])[0].lower()
+                results = [catalog.brief(c) for c in catalog.cards.values() if name in c["name"].lower()]
+                return self._send_json(200, results)
+            # /v2/en/cards/<id>
+            if len(parts) >= 2 and parts[-2] == "cards":
+                card = catalog.cards.get(urllib.parse.unquote(parts[-1]))
+                return self._send_json(200, card) if card else self._send_json(404, {"error": "not found"})
+            # /v2/en/sets
+            if parts[-1:] == ["sets"]:
+                return self._send_json(200, [
+                    {"id": s["id"], "name": s["name"], "cardCount": s["cardCount"]} for s in catalog.sets.values()
+                ])
+            # /v2/en/sets/<id>
+            if len(parts) >= 2 and parts[-2] == "sets":
+                set_obj = catalog.sets.get(parts[-1])
+                return self._send_json(200, set_obj) if set_obj else self._send_json(404, {"error": "not found"})
+
+            return self._send_json(404, {"error": "unknown endpoint"})
+
+    return StubHandler
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # Coda di connessioni ampia: i load test aprono centinaia di connessioni contemporanee
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Il client ha chiuso la connessione prima della risposta (es. ricerca async cancellata)
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubTCGDexServer:
+    """Avvia lo stub in un thread di background (utile da script e benchmark)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 failure_rate: float = 0.0, num_sets: int = 20, cards_per_set: int = 100):
+        self.httpd = StubHTTPServer((host, port), make_handler(latency_ms, failure_rate))
+        # Il catalogo viene creato dopo il bind per conoscere la porta effettiva (URL immagini)
+        self.catalog = StubCatalog(num_sets, cards_per_set, base_url=self.base_url.rsplit("/v2", 1)[0])
+        self.httpd.catalog = self.catalog
+        self.httpd.request_count = 0
+        self.httpd.scripted_failures = []
+        self.httpd.scripted_lock = threading.Lock()
+        self.thread = None
+
+    def fail_next(self, count: int, status: int = 503, retry_after=None):
+        """Le prossime count richieste ricevono status (con l'header Retry-After, se indicato)."""
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        with self.httpd.scripted_lock:
+            self.httpd.scripted_failures.extend([(status, headers)] * count)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub locale dell'API TCGDEX")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--sets", type=int, default=20)
+    parser.add_argument("--cards-per-set", type=int, default=100)
+    args = parser.parse_args()
+
+    server = StubTCGDexServer(args.host, args.port, args.latency_ms, args.failure_rate, args.sets, args.cards_per_set)
+    print(f"Stub TCGDEX in ascolto su {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,103 @@
+"""
+Microbenchmark dell'indice di autocompletamento (NamePrefixIndex).
+Costruisce l'indice da N nomi sintetici e riporta tempo di costruzione, memoria (stima esportata
+nelle metriche e misura con tracemalloc), latenza delle ricerche per prefisso e costo di un
+aggiornamento incrementale. I risultati vengono confrontati con una scansione lineare.
+
+Uso:
+    python -m benchmarks.suggest_index --names 50000 --queries 20000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from application.name_index import NamePrefixIndex, normalize_name, display_name
+from benchmarks.collection_search import SYLLABLES
+from benchmarks.serving_load import percentile
+from benchmarks.stub_tcgdex import POKEMON_NAMES
+
+PREFIXES = ["ch", "pika", "fla", "mr", "dark ", "eev", "z", "gen", "ka", "mew"]
+
+
+def synthetic_names(count: int, rng: random.Random) -> list:
+    names = set(POKEMON_NAMES)
+    while len(names) < count:
+        suffix = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        style = rng.random()
+        if style < 0.3:
+            names.add(f"{rng.choice(POKEMON_NAMES)} {suffix.capitalize()}")
+        elif style < 0.5:
+            names.add(f"Dark {rng.choice(POKEMON_NAMES)}-{suffix}")
+        else:
+            names.add(suffix.capitalize() + rng.choice(["mon", "chu", "zard", "saur", "bebe"]))
+    return list(names)
+
+
+def linear_suggest(names: list, prefix: str, limit: int) -> list:
+    """Riferimento: scansione di tutti i nomi, solo corrispondenze sul nome intero (ordinate come l'indice)."""
+    key = normalize_name(prefix)
+    matches = sorted((normalize_name(display_name(name)), display_name(name)) for name in names)
+    return list(dict.fromkeys(shown for normalized, shown in matches if normalized.startswith(key)))[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark dell'indice di autocompletamento")
+    parser.add_argument("--names", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    names = synthetic_names(args.names, rng)
+
+    start = time.perf_counter()
+    index = NamePrefixIndex()
+    index.build(names)
+    build_seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    NamePrefixIndex().build(names)
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    prefixes = PREFIXES + [normalize_name(name)[:rng.randint(1, 5)] for name in rng.sample(names, 200)]
+    latencies = []
+    for _ in range(args.queries):
+        prefix = rng.choice(prefixes)
+        start = time.perf_counter()
+        index.suggest(prefix, args.limit)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    # Correttezza: i nomi interi che iniziano col prefisso vengono prima, in ordine, fino a limit
+    mismatches = 0
+    for prefix in prefixes[:50]:
+        expected = linear_suggest(names, prefix, args.limit)
+        result = index.suggest(prefix, args.limit)
+        if [name for name in result if normalize_name(name).startswith(normalize_name(prefix))] != expected:
+            mismatches += 1
+
+    start = time.perf_counter()
+    index.add_names([f"Nuovo Pokemon {n}" for n in range(10)])
+    incremental_ms = (time.perf_counter() - start) * 1000
+
+    linear_start = time.perf_counter()
+    linear_suggest(names, "pika", args.limit)
+    linear_ms = (time.perf_counter() - linear_start) * 1000
+
+    stats = index.stats()
+    print(f"Nomi indicizzati:            {stats['names']} ({stats['entries']} voci)")
+    print(f"Costruzione:                 {build_seconds * 1000:.0f} ms")
+    print(f"Memoria stimata (metriche):  {stats['approx_bytes'] / 1024 / 1024:.1f} MiB")
+    print(f"Memoria misurata:            {traced_bytes / 1024 / 1024:.1f} MiB (tracemalloc)")
+    print(f"Suggerimenti p50/p99:        {percentile(latencies, 0.5) * 1e6:.1f} / {percentile(latencies, 0.99) * 1e6:.1f} us")
+    print(f"Scansione + ordinamento:     {linear_ms:.1f} ms (riferimento lineare)")
+    print(f"Aggiunta di 10 nomi:         {incremental_ms:.1f} ms")
+    print(f"Differenze dal riferimento:  {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
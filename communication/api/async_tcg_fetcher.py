@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import requests
+from communication.api.tcg_fetcher import TCGFetcher, UpstreamUnavailableError, RETRYABLE_STATUS_CODES
+from communication.api.response_cache import ResponseCache, CACHE_FRESH, CACHE_STALE
+from communication.api.rate_limiter import RateLimitExceededError, LANE_INTERACTIVE, LANE_BACKGROUND
+from monitoring.metrics import time_stage, UPSTREAM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTCGFetcher:
+    """
+    Variante asyncio del TCGFetcher per le ricerche interattive (per nome e per ID) servite
+    in modalita' ASGI: le richieste in attesa di TCGDEX non occupano un thread ciascuna,
+    migliaia possono essere in corso sullo stesso event loop.
+
+    Riusa dal fetcher sincrono configurazione, URL e parsing, circuit breaker e rate limiter
+    (acquire_async, stessa coda dei thread) e, se presente, la ResponseCache del CachedTCGFetcher:
+    la memoria viene letta sull'event loop, lo store su disco solo in thread separati.
+    Gli errori vengono riportati con le stesse eccezioni requests del fetcher sincrono.
+
+    Richiede aiohttp (pip install aiohttp); la sessione viene creata sull'event loop al primo uso.
+    """
+
+    def __init__(self, fetcher: TCGFetcher, cache: ResponseCache = None, pool_size: int = 100, sleep=asyncio.sleep):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.pool_size = pool_size
+        # Attesa tra i tentativi (iniettabile nei test, come nel TCGFetcher)
+        self._sleep = sleep
+        self._session = None
+        # Chiavi con una rivalidazione gia' in corso (evita task duplicati)
+        self._revalidating = set()
+        # Scritture della cache su disco in corso (riferimenti ai task, vedi _cache_set)
+        self._disk_writes = set()
+
+    @classmethod
+    def from_fetcher(cls, fetcher):
+        """Costruisce la variante async da un TCGFetcher o da un CachedTCGFetcher (cache condivisa)."""
+        cache = fetcher.cache if hasattr(fetcher, 'cache') else None
+        base_fetcher = getattr(fetcher, 'fetcher', fetcher)
+        http_config = base_fetcher.config.get('http', {}) or {}
+        return cls(base_fetcher, cache=cache, pool_size=http_config.get('async_pool_size', 100))
+
+    @property
+    def circuit_breaker(self):
+        return self.fetcher.circuit_breaker
+
+    @property
+    def rate_limiter(self):
+        return self.fetcher.rate_limiter
+
+    def _get_session(self):
+        # Import opzionale: aiohttp serve solo in modalita' ASGI
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        return self._session
+
+    async def close(self):
+        """Chiude la sessione HTTP (allo spegnimento dell'event loop)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    # -------------------------------------------------------------------
+    # RICHIESTE HTTP (retry, backoff, circuit breaker)
+    # -------------------------------------------------------------------
+
+    async def _request(self, url: str, read_timeout: float) -> tuple:
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(sock_connect=self.fetcher.connect_timeout, sock_read=read_timeout)
+        async with self._get_session().get(url, timeout=timeout) as response:
+            return response.status, response.headers.get('Retry-After'), await response.read()
+
+    async def _get(self, url: str, read_timeout: float, lane: str = LANE_INTERACTIVE) -> bytes:
+        """
+        Come TCGFetcher._get: retry limitati con backoff, circuit breaker e rate limiter.
+        Restituisce il corpo della risposta; se la coroutine viene cancellata (client disconnesso)
+        la richiesta HTTP viene interrotta.
+        """
+        import aiohttp
+
+        await self.rate_limiter.acquire_async(lane)
+
+        if not self.circuit_breaker.allow_request():
+            UPSTREAM_REQUESTS.inc(outcome='circuit_open')
+            raise UpstreamUnavailableError(f"Circuit breaker aperto: TCGDEX temporaneamente non disponibile ({url})")
+
+        attempt = 0
+        try:
+            while True:
+                retry_after = None
+                try:
+                    with time_stage('http_upstream'):
+                        status, retry_after, content = await self._request(url, read_timeout)
+                except asyncio.TimeoutError as e:
+                    error = requests.exceptions.Timeout(f"Timeout per url: {url} ({e})")
+                    UPSTREAM_REQUESTS.inc(outcome='network_error')
+                except aiohttp.ClientConnectionError as e:
+                    error = requests.exceptions.ConnectionError(str(e))
+                    UPSTREAM_REQUESTS.inc(outcome='network_error')
+                except aiohttp.ClientError as e:
+                    # Errori non ritentabili: chiudono comunque un'eventuale richiesta di prova
+                    UPSTREAM_REQUESTS.inc(outcome='network_error')
+                    self.circuit_breaker.record_failure()
+                    raise requests.exceptions.RequestException(str(e)) from e
+                else:
+                    if status not in RETRYABLE_STATUS_CODES:
+                        # Anche un 404 indica che il servizio risponde correttamente
+                        UPSTREAM_REQUESTS.inc(outcome='success' if status < 400 else 'client_error')
+                        self.circuit_breaker.record_success()
+                        if status >= 400:
+                            raise requests.exceptions.HTTPError(f"{status} Client Error for url: {url}")
+                        return content
+                    UPSTREAM_REQUESTS.inc(outcome='server_error')
+                    error = requests.exceptions.HTTPError(f"{status} Server Error for url: {url}")
+
+                delay = self.fetcher._retry_delay(attempt, retry_after) if attempt < self.fetcher.max_retries else None
+                if delay is None:
+                    self.circuit_breaker.record_failure()
+                    raise error
+
+                logger.warning("Richiesta TCGDEX fallita, nuovo tentativo",
+                               extra={'url': url, 'attempt': attempt + 1, 'error': str(error), 'retry_in_s': round(delay, 3)})
+                await self._sleep(delay)
+                attempt += 1
+                try:
+                    await self.rate_limiter.acquire_async(lane)
+                except RateLimitExceededError:
+                    # Il tentativo precedente e' fallito: chiude anche un'eventuale richiesta di prova
+                    self.circuit_breaker.record_failure()
+                    raise
+        except asyncio.CancelledError:
+            # Nessun esito da contare, ma un'eventuale richiesta di prova non deve restare appesa
+            self.circuit_breaker.record_cancelled()
+            raise
+
+    # -------------------------------------------------------------------
+    # RICERCHE (stessi risultati ed errori del TCGFetcher)
+    # -------------------------------------------------------------------
+
+    async def search_cards_by_name(self, name_query: str) -> list:
+        if not name_query:
+            return []
+        return await self._cached(f"name:{name_query.strip().lower()}",
+                                  lambda lane: self._search_cards_by_name(name_query, lane))
+
+    async def _search_cards_by_name(self, name_query: str, lane: str) -> list:
+        try:
+            content = await self._get(self.fetcher._name_search_url(name_query), read_timeout=15, lane=lane)
+            return self.fetcher._cards_from_search(content)
+        except requests.exceptions.RequestException as e:
+            logger.error("Errore durante la ricerca per nome su TCGDEX", extra={'query': name_query, 'error': str(e)})
+            return []
+
+    async def search_card_by_id(self, card_id: str) -> dict:
+        if not card_id:
+            return {}
+        return await self._cached(f"id:{card_id}", lambda lane: self._search_card_by_id(card_id, lane))
+
+    async def _search_card_by_id(self, card_id: str, lane: str) -> dict:
+        try:
+            content = await self._get(self.fetcher._card_url(card_id), read_timeout=10, lane=lane)
+            return self.fetcher._card_from_lookup(content)
+        except requests.exceptions.RequestException as e:
+            logger.error("Errore durante il lookup per ID su TCGDEX", extra={'card_id': card_id, 'error': str(e)})
+            return {}
+
+    # -------------------------------------------------------------------
+    # CACHE (stesse chiavi e regole del CachedTCGFetcher)
+    # -------------------------------------------------------------------
+
+    async def _cached(self, key: str, loader):
+        """loader(lane) e' la coroutine che interroga TCGDEX per la chiave."""
+        if self.cache is None:
+            return await loader(LANE_INTERACTIVE)
+
+        status, value = await self._cache_get(key)
+        if status == CACHE_FRESH:
+            return value
+        if status == CACHE_STALE:
+            # Stale-while-revalidate: risposta immediata, aggiornamento in un task separato
+            if key not in self._revalidating:
+                self._revalidating.add(key)
+                asyncio.ensure_future(self._revalidate(key, loader))
+            return value
+
+        value = await loader(LANE_INTERACTIVE)
+        # Le risposte vuote corrispondono a errori o assenza di risultati: non le salviamo
+        if value:
+            self._cache_set(key, value)
+        return value
+
+    async def _revalidate(self, key: str, loader):
+        try:
+            # La rivalidazione non deve rallentare le ricerche dell'utente
+            value = await loader(LANE_BACKGROUND)
+            if value:
+                self._cache_set(key, value)
+        finally:
+            self._revalidating.discard(key)
+
+    async def _cache_get(self, key: str) -> tuple:
+        """
+        Lettura dalla cache senza bloccare l'event loop: la memoria viene letta direttamente,
+        lo store su disco (SQLite) solo se serve e in un thread.
+        """
+        result = self.cache.peek(key)
+        if result is None:
+            result = await asyncio.to_thread(self.cache.get, key)
+        return result
+
+    def _cache_set(self, key: str, value):
+        """Salva subito in memoria; la scrittura su disco avviene in un thread e la risposta non la attende."""
+        stored_at = self.cache.set_in_memory(key, value)
+        if self.cache.persistent:
+            task = asyncio.ensure_future(asyncio.to_thread(self.cache.save_to_disk, key, value, stored_at))
+            self._disk_writes.add(task)
+            task.add_done_callback(self._disk_write_done)
+
+    def _disk_write_done(self, task):
+        self._disk_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Scrittura della cache su disco fallita", extra={'error': str(task.exception())})
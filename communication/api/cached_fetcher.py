@@ -0,0 +1,123 @@
+import threading
+from communication.api.tcg_fetcher import TCGFetcher
+from communication.api.config_loader import resolve_project_path
+from communication.api.response_cache import ResponseCache, CACHE_FRESH, CACHE_STALE
+from communication.api.rate_limiter import LANE_BACKGROUND
+from monitoring.metrics import REGISTRY
+
+
+class CachedTCGFetcher:
+    """
+    Livello di cache davanti al TCGFetcher.
+    Espone la stessa interfaccia del fetcher: le ricerche ripetute vengono servite
+    dalla ResponseCache, le voci 'stale' vengono restituite subito e rivalidate in background.
+    """
+
+    def __init__(self, fetcher: TCGFetcher, cache: ResponseCache):
+        self.fetcher = fetcher
+        self.cache = cache
+
+        # Chiavi con una rivalidazione gia' in corso (evita thread duplicati)
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+
+        REGISTRY.gauge('tcg_cache_entries', 'Voci presenti nella cache delle risposte TCGDEX').set_function(
+            self.cache.size
+        )
+
+    @classmethod
+    def from_config(cls, fetcher: TCGFetcher):
+        """Costruisce la cache a partire dalla sezione 'cache' della configurazione del fetcher."""
+        cache_config = fetcher.config.get('cache', {}) or {}
+
+        db_path = cache_config.get('db_path')
+        if db_path:
+            db_path = resolve_project_path(db_path)
+
+        cache = ResponseCache(
+            max_entries=cache_config.get('max_entries', 1024),
+            ttl_seconds=cache_config.get('ttl_seconds', 3600),
+            stale_ttl_seconds=cache_config.get('stale_ttl_seconds', 0),
+            db_path=db_path,
+            max_disk_entries=cache_config.get('max_disk_entries', 50000),
+            purge_interval_seconds=cache_config.get('purge_interval_seconds', 300)
+        )
+        return cls(fetcher, cache)
+
+    def __getattr__(self, name):
+        # Tutto cio' che non e' messo in cache viene delegato al fetcher reale
+        return getattr(self.fetcher, name)
+
+    # -------------------------------------------------------------------
+    # RICERCHE IN CACHE
+    # -------------------------------------------------------------------
+
+    def search_cards_by_name(self, name_query: str) -> list:
+        if not name_query:
+            return []
+        key = f"name:{name_query.strip().lower()}"
+        return self._cached(key, lambda: self.fetcher.search_cards_by_name(name_query))
+
+    def search_card_by_id(self, card_id: str) -> dict:
+        if not card_id:
+            return {}
+        key = f"id:{card_id}"
+        return self._cached(key, lambda: self.fetcher.search_card_by_id(card_id))
+
+    def search_cards_by_ids(self, card_ids: list, max_concurrency: int = None) -> list:
+        """Lookup in batch: gli ID gia' in cache non vengono richiesti, gli altri sono delegati al fetcher."""
+        cached_results = {}
+        missing_ids = []
+        for card_id in dict.fromkeys(card_ids):
+            status, value = self.cache.get(f"id:{card_id}") if card_id else (None, None)
+            if status in (CACHE_FRESH, CACHE_STALE):
+                cached_results[card_id] = {'id': card_id, 'card': value, 'error': None}
+            else:
+                missing_ids.append(card_id)
+
+        if missing_ids:
+            for result in self.fetcher.search_cards_by_ids(missing_ids, max_concurrency):
+                if result['card']:
+                    self.cache.set(f"id:{result['id']}", result['card'])
+                cached_results[result['id']] = result
+
+        return [cached_results[card_id] for card_id in card_ids]
+
+    def get_cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def _cached(self, key: str, loader):
+        status, value = self.cache.get(key)
+
+        if status == CACHE_FRESH:
+            return value
+
+        if status == CACHE_STALE:
+            # Stale-while-revalidate: risposta immediata, aggiornamento in background
+            self._revalidate_in_background(key, loader)
+            return value
+
+        value = loader()
+        # Le risposte vuote corrispondono a errori o assenza di risultati: non le salviamo
+        if value:
+            self.cache.set(key, value)
+        return value
+
+    def _revalidate_in_background(self, key: str, loader):
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                # La rivalidazione non deve rallentare le ricerche dell'utente
+                with self.fetcher.rate_limiter.lane(LANE_BACKGROUND):
+                    value = loader()
+                if value:
+                    self.cache.set(key, value)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, daemon=True).start()
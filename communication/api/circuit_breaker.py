@@ -0,0 +1,73 @@
+import threading
+import time
+
+# Stati del circuit breaker
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per le chiamate verso un servizio esterno.
+
+    - CLOSED: le richieste passano; dopo failure_threshold errori consecutivi si apre.
+    - OPEN: le richieste falliscono subito fino a reset_timeout_seconds.
+    - HALF_OPEN: passa una sola richiesta di prova; se riesce si richiude, altrimenti si riapre.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._clock = clock
+
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self):
+        # Trascorso il timeout, il circuito aperto passa in HALF_OPEN
+        if self._state == STATE_OPEN and self._clock() - self._opened_at >= self.reset_timeout_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Indica se la richiesta puo' essere inoltrata al servizio esterno."""
+        with self._lock:
+            self._refresh_state()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == STATE_HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._state = STATE_OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def record_cancelled(self):
+        """
+        La richiesta autorizzata e' stata abbandonata prima dell'esito (chiamante cancellato):
+        nessun successo o fallimento da contare, ma la richiesta di prova va liberata.
+        """
+        with self._lock:
+            self._probe_in_flight = False
@@ -0,0 +1,23 @@
+"""
+Lettura dei file di configurazione YAML, separata dal TCGFetcher: main.py legge app_config.yaml
+nella fase 'config' senza importare requests e il resto del livello di comunicazione.
+"""
+import os
+import yaml
+
+# Radice del progetto: i percorsi relativi della configurazione sono risolti rispetto ad essa
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Parser YAML in C (libyaml) quando disponibile, altrimenti quello puro Python
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def resolve_project_path(path: str) -> str:
+    """Percorso assoluto: quelli gia' assoluti restano invariati, gli altri partono da PROJECT_ROOT."""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def load_yaml_file(file_path: str) -> dict:
+    """Legge un file di configurazione YAML (dizionario vuoto se il file e' vuoto)."""
+    with open(file_path, 'r') as file:
+        return yaml.load(file, Loader=YAML_LOADER) or {}
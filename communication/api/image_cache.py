@@ -0,0 +1,201 @@
+import contextlib
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from monitoring.metrics import REGISTRY
+
+# Formati serviti dal proxy immagini (GET /api/images/<card_id>?size=...)
+IMAGE_SIZE_THUMB = 'thumb'
+IMAGE_SIZE_HIGH = 'high'
+IMAGE_SIZES = (IMAGE_SIZE_THUMB, IMAGE_SIZE_HIGH)
+
+IMAGE_MIMETYPE = 'image/webp'
+
+# L'ultimo accesso di una voce viene aggiornato al massimo una volta per intervallo:
+# l'ordine LRU resta sufficientemente preciso senza una scrittura su disco per ogni richiesta
+ACCESS_UPDATE_INTERVAL_SECONDS = 60
+
+IMAGE_CACHE_EVENTS = REGISTRY.counter(
+    'tcg_image_cache_events_total', 'Eventi della cache su disco delle immagini', ('event',)
+)
+
+
+def make_thumbnail(data: bytes, width: int):
+    """
+    Ridimensiona l'immagine alla larghezza indicata (WebP).
+    Restituisce None se Pillow non e' installato o l'immagine non e' decodificabile.
+    """
+    try:
+        # Import opzionale: senza Pillow le miniature arrivano gia' ridotte da TCGDEX (low.webp)
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, format='WEBP', quality=80)
+            return output.getvalue()
+    except (OSError, ValueError):
+        return None
+
+
+def thumbnails_supported() -> bool:
+    """True se le miniature possono essere generate localmente (Pillow installato)."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ImageCache:
+    """
+    Cache su disco delle immagini delle carte, indirizzata per contenuto:
+    ogni immagine e' salvata una sola volta come <sha256>.webp, mentre un indice SQLite
+    associa la chiave (carta e formato) al digest e all'ultimo accesso.
+    Oltre max_bytes vengono eliminate le voci usate meno di recente (LRU).
+
+    La directory puo' essere condivisa da piu' processi (worker gunicorn): l'occupazione viene
+    calcolata dall'indice all'interno della transazione di scrittura, non da un contatore locale,
+    cosi' il limite vale per tutti i processi insieme.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.blobs_directory = os.path.join(directory, 'blobs')
+        self.max_bytes = max_bytes
+        os.makedirs(self.blobs_directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # isolation_level=None: le transazioni di scrittura sono aperte esplicitamente (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS image_index ("
+            "key TEXT PRIMARY KEY, digest TEXT NOT NULL, size_bytes INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_image_index_last_access ON image_index (last_access)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_image_index_digest ON image_index (digest)")
+
+        REGISTRY.gauge('tcg_image_cache_bytes', 'Byte occupati su disco dalla cache delle immagini').set_function(
+            lambda: self.total_bytes
+        )
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs_directory, f"{digest}.webp")
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._disk_bytes()
+
+    def _disk_bytes(self) -> int:
+        """Occupazione su disco secondo l'indice: ogni blob conta una sola volta anche se referenziato da piu' chiavi."""
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM (SELECT DISTINCT digest, size_bytes FROM image_index)"
+        ).fetchone()[0]
+
+    @contextlib.contextmanager
+    def _write_transaction(self):
+        """
+        Transazione che prende subito il lock di scrittura del database: tra processi diversi
+        le scritture dei file, il calcolo dell'occupazione e l'eviction non si sovrappongono.
+        """
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def get(self, key: str):
+        """Restituisce (percorso del file, digest) oppure None se l'immagine non e' in cache."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, last_access FROM image_index WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                IMAGE_CACHE_EVENTS.inc(event='miss')
+                return None
+
+            digest, last_access = row
+            path = self._blob_path(digest)
+            if not os.path.exists(path):
+                # File rimosso dall'esterno: la voce non e' piu' valida
+                with self._write_transaction():
+                    self._remove_key(key)
+                IMAGE_CACHE_EVENTS.inc(event='miss')
+                return None
+
+            now = time.time()
+            if now - last_access > ACCESS_UPDATE_INTERVAL_SECONDS:
+                self._db.execute("UPDATE image_index SET last_access = ? WHERE key = ?", (now, key))
+            IMAGE_CACHE_EVENTS.inc(event='hit')
+            return path, digest
+
+    def put(self, key: str, data: bytes) -> tuple:
+        """Salva l'immagine (se il contenuto non e' gia' presente) e restituisce (percorso, digest)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+
+        with self._lock, self._write_transaction():
+            if not os.path.exists(path):
+                # Scrittura atomica: un lettore concorrente non vede mai un file parziale
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as file:
+                    file.write(data)
+                os.replace(temp_path, path)
+
+            self._remove_key(key, keep_digest=digest)
+            self._db.execute(
+                "INSERT INTO image_index (key, digest, size_bytes, last_access) VALUES (?, ?, ?, ?)",
+                (key, digest, len(data), time.time())
+            )
+            self._evict(protected_key=key)
+
+        return path, digest
+
+    def _digest_referenced(self, digest: str) -> bool:
+        return self._db.execute("SELECT 1 FROM image_index WHERE digest = ? LIMIT 1", (digest,)).fetchone() is not None
+
+    def _remove_key(self, key: str, keep_digest: str = None) -> int:
+        """Rimuove la voce e, se nessun'altra chiave lo usa, il file corrispondente. Restituisce i byte liberati."""
+        row = self._db.execute("SELECT digest, size_bytes FROM image_index WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return 0
+        digest, size_bytes = row
+        self._db.execute("DELETE FROM image_index WHERE key = ?", (key,))
+        if digest == keep_digest or self._digest_referenced(digest):
+            return 0
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+        return size_bytes
+
+    def _evict(self, protected_key: str):
+        """
+        Elimina le voci meno usate di recente finche' l'occupazione non rientra nel limite
+        (da chiamare nella transazione di scrittura: il totale letto resta valido fino al commit).
+        """
+        total_bytes = self._disk_bytes()
+        while total_bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key FROM image_index WHERE key != ? ORDER BY last_access LIMIT 1", (protected_key,)
+            ).fetchone()
+            if row is None:
+                return
+            total_bytes -= self._remove_key(row[0])
+            IMAGE_CACHE_EVENTS.inc(event='eviction')
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM image_index").fetchone()[0]
+            total_bytes = self._disk_bytes()
+        return {'entries': entries, 'total_bytes': total_bytes, 'max_bytes': self.max_bytes}
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from monitoring.metrics import REGISTRY
+
+# Corsie di priorita' (in ordine di precedenza): le ricerche dell'utente passano
+# davanti all'arricchimento in batch, alla sincronizzazione del catalogo e alle rivalidazioni
+LANE_INTERACTIVE = 'interactive'
+LANE_BACKGROUND = 'background'
+LANES = (LANE_INTERACTIVE, LANE_BACKGROUND)
+
+RATE_LIMIT_WAIT = REGISTRY.histogram(
+    'tcg_rate_limit_wait_seconds', 'Attesa di un token del rate limiter TCGDEX per corsia', ('lane',)
+)
+RATE_LIMIT_REJECTIONS = REGISTRY.counter(
+    'tcg_rate_limit_rejections_total', 'Richieste TCGDEX rifiutate perche\' non servibili entro la scadenza', ('lane',)
+)
+
+
+class RateLimitExceededError(requests.exceptions.RequestException):
+    """Sollevata quando la richiesta non otterrebbe un token entro la sua scadenza (max_wait della corsia)."""
+
+
+class _Waiter:
+    __slots__ = ('lane', 'started_at', 'deadline')
+
+    def __init__(self, lane: str, started_at: float, deadline: float):
+        self.lane = lane
+        self.started_at = started_at
+        self.deadline = deadline
+
+
+class RateLimiter:
+    """
+    Token bucket condiviso tra i thread: rate_per_second token al secondo, fino a burst accumulati.
+
+    Le richieste senza token si accodano per corsia (FIFO all'interno della corsia, la corsia
+    interattiva sempre prima di quella di background). Una richiesta che non otterrebbe il token
+    entro il max_wait della sua corsia viene rifiutata subito, invece di occupare un thread per poi
+    andare comunque in timeout.
+
+    clock e wait sono iniettabili per i test: wait(condition, timeout) deve attendere (o far avanzare
+    un clock finto di) al massimo timeout secondi.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int = 1, max_wait_seconds: dict = None,
+                 clock=time.monotonic, wait=None):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.max_wait_seconds = {lane: None for lane in LANES}
+        self.max_wait_seconds.update(max_wait_seconds or {})
+        self._clock = clock
+        self._wait = wait or (lambda condition, timeout: condition.wait(timeout))
+
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+        self._queue = []                      # heap di (indice corsia, sequenza, _Waiter)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._lane_context = threading.local()
+
+        REGISTRY.gauge('tcg_rate_limit_queue_depth', 'Richieste TCGDEX in attesa di un token').set_function(
+            lambda: len(self._queue)
+        )
+
+    # -------------------------------------------------------------------
+    # CORSIA DEL THREAD CORRENTE
+    # -------------------------------------------------------------------
+
+    @contextmanager
+    def lane(self, lane: str):
+        """Esegue il blocco con la corsia indicata (per le chiamate che non la specificano)."""
+        previous = getattr(self._lane_context, 'lane', None)
+        self._lane_context.lane = lane
+        try:
+            yield
+        finally:
+            self._lane_context.lane = previous
+
+    def current_lane(self) -> str:
+        return getattr(self._lane_context, 'lane', None) or LANE_INTERACTIVE
+
+    # -------------------------------------------------------------------
+    # ACQUISIZIONE DEI TOKEN
+    # -------------------------------------------------------------------
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate_per_second)
+            self._updated_at = now
+
+    def _estimated_wait(self, entry: tuple) -> float:
+        """Tempo stimato perche' entry ottenga un token (richieste davanti in coda comprese)."""
+        ahead = sum(1 for queued in self._queue if queued < entry)
+        missing = ahead + 1 - self._tokens
+        return max(0.0, missing / self.rate_per_second)
+
+    def acquire(self, lane: str = None) -> float:
+        """
+        Attende un token e restituisce i secondi di attesa.
+        Solleva RateLimitExceededError se il token non arriverebbe entro il max_wait della corsia.
+        """
+        if not self.rate_per_second:
+            return 0.0
+
+        with self._condition:
+            entry = self._enqueue(lane or self.current_lane())
+            try:
+                while True:
+                    waited, timeout = self._poll(entry)
+                    if waited is not None:
+                        return waited
+                    self._wait(self._condition, timeout)
+            except BaseException:
+                self._remove(entry)
+                raise
+
+    async def acquire_async(self, lane: str = LANE_INTERACTIVE) -> float:
+        """
+        Come acquire, per le coroutine: attende con asyncio.sleep senza bloccare l'event loop.
+        Condivide coda e token con i thread; se la coroutine viene cancellata esce dalla coda.
+        """
+        if not self.rate_per_second:
+            return 0.0
+
+        with self._condition:
+            entry = self._enqueue(lane)
+        try:
+            while True:
+                with self._condition:
+                    waited, timeout = self._poll(entry)
+                if waited is not None:
+                    return waited
+                # Non viene svegliata da notify_all: ricontrolla allo scadere dell'attesa stimata
+                await asyncio.sleep(timeout)
+        except BaseException:
+            with self._condition:
+                self._remove(entry)
+            raise
+
+    def _enqueue(self, lane: str) -> tuple:
+        """Accoda una nuova richiesta della corsia (da chiamare con il lock acquisito)."""
+        start = self._clock()
+        max_wait = self.max_wait_seconds.get(lane)
+        waiter = _Waiter(lane, start, start + max_wait if max_wait is not None else None)
+        entry = (LANES.index(lane), next(self._sequence), waiter)
+        heapq.heappush(self._queue, entry)
+        return entry
+
+    def _poll(self, entry: tuple) -> tuple:
+        """
+        Un passo dell'attesa (con il lock acquisito): (secondi attesi, None) se il token e' stato
+        assegnato, altrimenti (None, secondi da attendere prima di riprovare).
+        """
+        waiter = entry[2]
+        now = self._clock()
+        self._refill(now)
+
+        # Tolleranza per gli arrotondamenti del refill in virgola mobile
+        if self._queue[0] is entry and self._tokens >= 1 - 1e-9:
+            heapq.heappop(self._queue)
+            self._tokens = max(0.0, self._tokens - 1)
+            waited = now - waiter.started_at
+            RATE_LIMIT_WAIT.observe(waited, lane=waiter.lane)
+            # Il prossimo in coda puo' ricalcolare la propria attesa
+            self._condition.notify_all()
+            return waited, None
+
+        wait_time = self._estimated_wait(entry)
+        if waiter.deadline is not None and now + wait_time > waiter.deadline:
+            self._remove(entry)
+            RATE_LIMIT_REJECTIONS.inc(lane=waiter.lane)
+            raise RateLimitExceededError(
+                f"Rate limit TCGDEX: richiesta '{waiter.lane}' non servibile entro "
+                f"{waiter.deadline - waiter.started_at:.2f}s (attesa stimata {wait_time:.2f}s)"
+            )
+
+        if self._queue[0] is entry:
+            # Primo della coda: attende esattamente il prossimo token
+            return None, max(wait_time, 1e-3)
+        # In coda dietro altri: viene svegliato quando la testa della coda avanza
+        timeout = min(wait_time, waiter.deadline - now) if waiter.deadline is not None else wait_time
+        return None, max(timeout, 1e-3)
+
+    def _remove(self, entry: tuple):
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            self._refill(self._clock())
+            queued = {lane: 0 for lane in LANES}
+            for _, _, waiter in self._queue:
+                queued[waiter.lane] += 1
+            return {
+                'rate_per_second': self.rate_per_second,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 3),
+                'queued': queued,
+            }
@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from monitoring.metrics import CACHE_EVENTS
+
+# Esito di una lettura dalla cache
+CACHE_FRESH = 'fresh'
+CACHE_STALE = 'stale'
+CACHE_MISS = 'miss'
+
+
+class ResponseCache:
+    """
+    Cache LRU in-process con limite di dimensione e TTL per singola voce.
+    Opzionalmente e' affiancata da uno store SQLite su disco, cosi' le risposte
+    sopravvivono al riavvio dell'applicazione.
+
+    Una voce e' 'fresh' fino a ttl_seconds, poi 'stale' per altri stale_ttl_seconds
+    (servibile mentre viene rivalidata), infine scade del tutto.
+
+    Anche lo store su disco e' limitato: al massimo max_disk_entries voci (eliminate quelle usate
+    meno di recente) e le voci scadute vengono rimosse periodicamente. Il lock della memoria non
+    viene mai tenuto durante l'I/O su disco; ogni thread usa una propria connessione SQLite (WAL).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600,
+                 stale_ttl_seconds: float = 0, db_path: str = None,
+                 max_disk_entries: int = 50000, purge_interval_seconds: float = 300, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.purge_interval_seconds = purge_interval_seconds
+        # Orologio di sistema: i timestamp su disco sono confrontati anche dopo un riavvio
+        self._clock = clock
+
+        # chiave -> (valore, timestamp di salvataggio)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contatori esposti tramite stats()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        self._db_path = None
+        self._connections = threading.local()
+        # Una sola pulizia dello store su disco alla volta, al piu' ogni purge_interval_seconds
+        # o dopo un decimo di max_disk_entries scritture
+        self._purge_lock = threading.Lock()
+        self._next_purge_at = 0.0
+        self._writes_since_purge = 0
+        if db_path:
+            self._open_disk_store(db_path)
+
+    @property
+    def persistent(self) -> bool:
+        return self._db_path is not None
+
+    def size(self) -> int:
+        """Numero di voci in memoria."""
+        with self._lock:
+            return len(self._entries)
+
+    # -------------------------------------------------------------------
+    # STORE SU DISCO (SQLite)
+    # -------------------------------------------------------------------
+
+    def _open_disk_store(self, db_path: str):
+        """Apre (o crea) lo store SQLite e rimuove le voci scadute o oltre il limite."""
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db_path = db_path
+        db = self._connection()
+        # WAL: le letture dei thread non attendono le scritture
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL)"
+        )
+        # Store creati prima del limite su disco: senza la colonna dell'ultimo accesso
+        columns = {row[1] for row in db.execute("PRAGMA table_info(response_cache)")}
+        if 'accessed_at' not in columns:
+            db.execute("ALTER TABLE response_cache ADD COLUMN accessed_at REAL")
+            db.execute("UPDATE response_cache SET accessed_at = stored_at")
+        db.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_accessed_at ON response_cache (accessed_at)")
+        db.commit()
+        self._purge_disk()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connessione SQLite del thread corrente (le connessioni non sono condivise tra thread)."""
+        db = getattr(self._connections, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self._db_path, timeout=5)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._connections.db = db
+        return db
+
+    def _load_from_disk(self, key: str):
+        db = self._connection()
+        row = db.execute(
+            "SELECT value, stored_at FROM response_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        # Ultimo accesso per l'espulsione LRU dello store (solo sulle letture dal disco)
+        db.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (self._clock(), key))
+        db.commit()
+        return json.loads(row[0]), row[1]
+
+    def save_to_disk(self, key: str, value, stored_at: float):
+        """Scrive la voce nello store su disco (no-op senza store). Puo' essere eseguita fuori dall'event loop."""
+        if self._db_path is None:
+            return
+        db = self._connection()
+        db.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), stored_at, stored_at)
+        )
+        db.commit()
+        self._writes_since_purge += 1
+        self._maybe_purge_disk()
+
+    def _maybe_purge_disk(self):
+        due = self._clock() >= self._next_purge_at or self._writes_since_purge >= max(1, self.max_disk_entries // 10)
+        if due and self._purge_lock.acquire(blocking=False):
+            try:
+                self._purge_disk()
+            finally:
+                self._purge_lock.release()
+
+    def _purge_disk(self):
+        """Elimina dallo store le voci scadute e, oltre max_disk_entries, quelle usate meno di recente."""
+        now = self._clock()
+        self._next_purge_at = now + self.purge_interval_seconds
+        self._writes_since_purge = 0
+
+        db = self._connection()
+        db.execute("DELETE FROM response_cache WHERE stored_at < ?", (now - self.ttl_seconds - self.stale_ttl_seconds,))
+        evicted = db.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        ).rowcount
+        db.commit()
+        if evicted > 0:
+            self.disk_evictions += evicted
+            CACHE_EVENTS.inc(evicted, event='disk_eviction')
+
+    # -------------------------------------------------------------------
+    # API PUBBLICA
+    # -------------------------------------------------------------------
+
+    def _classify(self, stored_at: float) -> str:
+        age = self._clock() - stored_at
+        if age <= self.ttl_seconds:
+            return CACHE_FRESH
+        if age <= self.ttl_seconds + self.stale_ttl_seconds:
+            return CACHE_STALE
+        return CACHE_MISS
+
+    def peek(self, key: str):
+        """
+        Lettura dalla sola memoria, senza I/O: (stato, valore) come get, oppure None se la voce
+        non e' in memoria ma potrebbe essere su disco (in quel caso serve get).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db_path is not None:
+                return None
+            return self._resolve(key, entry)
+
+    def get(self, key: str) -> tuple:
+        """
+        Restituisce una tupla (stato, valore) dove stato e' CACHE_FRESH, CACHE_STALE o CACHE_MISS.
+        """
+        result = self.peek(key)
+        if result is not None:
+            return result
+
+        # Voce non in memoria: lettura dal disco senza tenere il lock
+        entry = self._load_from_disk(key)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None:
+                # Salvata da un altro thread durante la lettura: e' la piu' recente
+                entry = current
+            elif entry is not None:
+                self._store_in_memory(key, entry)
+            return self._resolve(key, entry)
+
+    def _resolve(self, key: str, entry) -> tuple:
+        """Esito della lettura di entry (con il lock acquisito): aggiorna LRU e contatori."""
+        if entry is None:
+            self.misses += 1
+            CACHE_EVENTS.inc(event='miss')
+            return CACHE_MISS, None
+
+        value, stored_at = entry
+        status = self._classify(stored_at)
+
+        if status == CACHE_MISS:
+            # Voce scaduta oltre la finestra stale: la eliminiamo
+            self._entries.pop(key, None)
+            self.misses += 1
+            CACHE_EVENTS.inc(event='miss')
+            return CACHE_MISS, None
+
+        self._entries.move_to_end(key)
+        if status == CACHE_FRESH:
+            self.hits += 1
+            CACHE_EVENTS.inc(event='hit')
+        else:
+            self.stale_hits += 1
+            CACHE_EVENTS.inc(event='stale_hit')
+        return status, value
+
+    def set(self, key: str, value):
+        """Salva (o aggiorna) una voce in memoria e, se configurato, su disco."""
+        stored_at = self.set_in_memory(key, value)
+        self.save_to_disk(key, value, stored_at)
+
+    def set_in_memory(self, key: str, value) -> float:
+        """Salva la voce solo in memoria (senza I/O); restituisce il timestamp per save_to_disk."""
+        stored_at = self._clock()
+        with self._lock:
+            self._store_in_memory(key, (value, stored_at))
+        return stored_at
+
+    def _store_in_memory(self, key: str, entry: tuple):
+        """Inserisce la voce in coda (piu' recente) ed espelle le meno usate oltre il limite."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            CACHE_EVENTS.inc(event='eviction')
+
+    def disk_size(self) -> int:
+        """Numero di voci nello store su disco (0 senza store)."""
+        if self._db_path is None:
+            return 0
+        return self._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Contatori di utilizzo della cache."""
+        disk_entries = self.disk_size()
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'persistent': self._db_path is not None,
+                'disk_entries': disk_entries,
+                'max_disk_entries': self.max_disk_entries,
+                'disk_evictions': self.disk_evictions,
+            }
@@ -1,9 +1,28 @@
 import requests
-import yaml
-import os
+from requests.adapters import HTTPAdapter
 import time
+import random
+import logging
 import urllib.parse
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
 from communication.dto.card_dto import CardDTO 
+from communication.json_codec import loads_json
+from communication.api.config_loader import resolve_project_path, load_yaml_file
+from communication.api.circuit_breaker import CircuitBreaker
+from communication.api.rate_limiter import RateLimiter, RateLimitExceededError, LANE_BACKGROUND
+from monitoring.metrics import time_stage, UPSTREAM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailableError(requests.exceptions.RequestException):
+    """Sollevata quando il circuit breaker e' aperto e TCGDEX non viene nemmeno contattato."""
+
+
+# Status HTTP per cui ha senso ritentare la richiesta
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 class TCGFetcher:
     """
@@ -11,152 +30,336 @@ class TCGFetcher:
     Centralizza l'estrazione dati e la conversione nel Card DTO.
     """
 
-    def __init__(self, config_file: str):
+    def __init__(self, config_file: str, sleep=time.sleep):
         self.config_file = config_file
+        # Attesa tra i tentativi (iniettabile nei test)
+        self._sleep = sleep
         self.config = self._load_config()
         
         
         self.base_url = self.config['api']['base_url']
         self.cards_endpoint = self.config['api']['cards_endpoint']
-        
+        self.sets_endpoint = self.config['api'].get('sets_endpoint', '/en/sets')
+
+        http_config = self.config.get('http', {}) or {}
+        self.connect_timeout = http_config.get('connect_timeout_seconds', 3.05)
+        self.max_retries = http_config.get('max_retries', 2)
+        self.backoff_base = http_config.get('backoff_base_seconds', 0.2)
+        self.backoff_max = http_config.get('backoff_max_seconds', 2.0)
+
+        # Sessione condivisa: pool di connessioni keep-alive riutilizzate tra le richieste
+        self.session = self._create_session(http_config.get('pool_size', 10))
+
+        # Numero massimo di lookup per ID eseguiti in parallelo da search_cards_by_ids
+        self.batch_max_concurrency = (self.config.get('batch', {}) or {}).get('max_concurrency', 8)
+
+        breaker_config = http_config.get('circuit_breaker', {}) or {}
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=breaker_config.get('failure_threshold', 5),
+            reset_timeout_seconds=breaker_config.get('reset_timeout_seconds', 30)
+        )
+
+        # Rate limiter condiviso da tutti i thread che usano questo fetcher
+        rate_config = self.config.get('rate_limit', {}) or {}
+        self.rate_limiter = RateLimiter(
+            rate_per_second=rate_config.get('requests_per_second', 0) if rate_config.get('enabled', False) else 0,
+            burst=rate_config.get('burst', 1),
+            max_wait_seconds={
+                lane: (lane_config or {}).get('max_wait_seconds')
+                for lane, lane_config in (rate_config.get('lanes', {}) or {}).items()
+            }
+        )
 
 
     def _load_config(self):
         """Carica la configurazione dal file YAML."""
-        main_app_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        file_path = os.path.join(main_app_path, self.config_file)
-        
-        with open(file_path, 'r') as file:
-            return yaml.safe_load(file)
+        return load_yaml_file(resolve_project_path(self.config_file))
+
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Crea la sessione HTTP con un pool di connessioni dimensionato da configurazione."""
+        session = requests.Session()
+        # I retry sono gestiti da _get (backoff con jitter + circuit breaker), non dall'adapter
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Backoff esponenziale con 'full jitter'."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _parse_retry_after(value) -> float:
+        """Secondi indicati dall'header Retry-After (intero o data HTTP); None se assente o non valido."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _retry_delay(self, attempt: int, retry_after=None) -> float:
+        """
+        Attesa prima del tentativo successivo: backoff con jitter, ma mai meno del Retry-After
+        (429/503). None se il Retry-After supera backoff_max: meglio fallire subito che tenere
+        occupato il thread (o ritentare prima di quanto chiesto da TCGDEX).
+        """
+        delay = self._backoff_delay(attempt)
+        retry_after_seconds = self._parse_retry_after(retry_after)
+        if retry_after_seconds is None:
+            return delay
+        if retry_after_seconds > self.backoff_max:
+            return None
+        return max(delay, retry_after_seconds)
+
+    def _get(self, url: str, read_timeout: float) -> requests.Response:
+        """
+        Esegue una GET sulla sessione condivisa con retry limitati e circuit breaker.
+        Solleva RequestException (o UpstreamUnavailableError) in caso di fallimento.
+        """
+        # Ogni tentativo consuma un token; la corsia e' quella del thread corrente (vedi RateLimiter.lane)
+        self.rate_limiter.acquire()
+
+        if not self.circuit_breaker.allow_request():
+            UPSTREAM_REQUESTS.inc(outcome='circuit_open')
+            raise UpstreamUnavailableError(f"Circuit breaker aperto: TCGDEX temporaneamente non disponibile ({url})")
+
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                with time_stage('http_upstream'):
+                    response = self.session.get(url, timeout=(self.connect_timeout, read_timeout))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                UPSTREAM_REQUESTS.inc(outcome='network_error')
+            except requests.exceptions.RequestException:
+                # Errori non ritentabili: chiudono comunque un'eventuale richiesta di prova
+                UPSTREAM_REQUESTS.inc(outcome='network_error')
+                self.circuit_breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # Anche un 404 indica che il servizio risponde correttamente
+                    UPSTREAM_REQUESTS.inc(outcome='success' if response.ok else 'client_error')
+                    self.circuit_breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                UPSTREAM_REQUESTS.inc(outcome='server_error')
+                error = requests.exceptions.HTTPError(f"{response.status_code} Server Error for url: {url}", response=response)
+                retry_after = response.headers.get('Retry-After')
+
+            delay = self._retry_delay(attempt, retry_after) if attempt < self.max_retries else None
+            if delay is None:
+                self.circuit_breaker.record_failure()
+                raise error
+
+            logger.warning("Richiesta TCGDEX fallita, nuovo tentativo",
+                           extra={'url': url, 'attempt': attempt + 1, 'error': str(error), 'retry_in_s': round(delay, 3)})
+            self._sleep(delay)
+            attempt += 1
+            try:
+                self.rate_limiter.acquire()
+            except RateLimitExceededError:
+                # Il tentativo precedente e' fallito: chiude anche un'eventuale richiesta di prova
+                self.circuit_breaker.record_failure()
+                raise
 
     def _create_dto_from_raw(self, card_data: dict, is_full_detail: bool) -> CardDTO:
         """
-        Crea un DTO card a partire dal JSON grezzo dell'API, 
-       
+        Crea un DTO card a partire dal JSON grezzo dell'API (vedi CardDTO.from_raw).
         """
-        
-        # --- 1. Campi Base e Immagine (Sempre o Placeholder) ---
-        card_id = card_data.get('id', 'N/A')
-        card_name = card_data.get('name', 'Unknown Card')
-        
-        # Gestione dell'apostrofo 
-        if isinstance(card_name, str) and "'" in card_name:
-            card_name = card_name.replace("'", "^")
-        
-        # Costruzione URL Immagine
-        base_image_url = card_data.get('image', '')
-        if base_image_url:
-             # Aggiunge l'estensione finale (es. /high.webp)
-            image_url = f"{base_image_url}/high.webp"
-        else:
-            image_url = "placeholder.png"
+        return CardDTO.from_raw(card_data, is_full_detail)
 
-        
-        # --- 2. Campi Dettagliati (Solo se la risposta è COMPLETA) ---
-        
-        # Se i dati sono completi (ricerca ID), li estraiamo.
-        if is_full_detail:
-            
-            # Estrazione sicura del tipo
-            types_list = card_data.get('types', [])
-            main_type = types_list[0] if types_list and isinstance(types_list, list) and len(types_list) > 0 else 'Unknown'
-            
-            # Estrazione sicura dei dati del set
-            set_obj = card_data.get('set', {})
-            set_id = set_obj.get('id', 'N/A')
-            set_name = set_obj.get('name', 'Unknown Set')
-            rarity = card_data.get('rarity', 'N/A')
-
-            return CardDTO(
-                id=card_id,
-                name=card_name,
-                image_url=image_url,
-                set_name=set_name,
-                set_id=set_id,
-                type=main_type,
-                rarity=rarity
-            )
-        
-        # 3. Caso di Risposta BREVE (Ricerca per Nome)
-        else:
-            # Restituisce solo i campi base. Gli altri saranno 'N/A' (default DTO).
-            return CardDTO(
-                id=card_id,
-                name=card_name,
-                image_url=image_url
-            )
 
+    # -------------------------------------------------------------------
+    # URL E PARSING (condivisi con AsyncTCGFetcher)
+    # -------------------------------------------------------------------
+
+    def _name_search_url(self, name_query: str) -> str:
+        return f"{self.base_url}{self.cards_endpoint}?name={urllib.parse.quote(name_query)}"
+
+    def _card_url(self, card_id: str) -> str:
+        return f"{self.base_url}{self.cards_endpoint}/{card_id}"
+
+    @staticmethod
+    def _cards_from_search(content: bytes) -> list:
+        """Risposta della ricerca per nome -> lista di dizionari DTO brevi."""
+        with time_stage('json_decode'):
+            raw_cards = loads_json(content)
+
+        if not raw_cards:
+            return []
+
+        with time_stage('dto_build'):
+            # Restituisce una lista di dizionari per la serializzazione JSON
+            return CardDTO.to_dicts(CardDTO.from_raw_list(raw_cards, is_full_detail=False))
+
+    def _card_from_lookup(self, content: bytes) -> dict:
+        """Risposta del lookup per ID -> dizionario DTO completo ({} se la carta non c'e')."""
+        with time_stage('json_decode'):
+            raw_card = loads_json(content)
+
+        if not raw_card or 'id' not in raw_card:
+            return {}
+
+        with time_stage('dto_build'):
+            return self._create_dto_from_raw(raw_card, is_full_detail=True).to_dict()
+
+    def _card_details_from_lookup(self, content: bytes) -> dict:
+        """
+        Come _card_from_lookup, con in piu' varianti ('variants': normal, reverse, holo, ...) e prezzi
+        ('pricing': cardmarket, tcgplayer) cosi' come forniti da TCGDEX (None se assenti).
+        """
+        with time_stage('json_decode'):
+            raw_card = loads_json(content)
+
+        if not raw_card or 'id' not in raw_card:
+            return {}
+
+        with time_stage('dto_build'):
+            card = self._create_dto_from_raw(raw_card, is_full_detail=True).to_dict()
+        card['variants'] = raw_card.get('variants') or None
+        card['pricing'] = raw_card.get('pricing') or None
+        return card
+
+    # -------------------------------------------------------------------
+    # RICERCHE
+    # -------------------------------------------------------------------
 
     def search_cards_by_name(self, name_query: str) -> list:
 
         if not name_query:
             return []
-            
-        encoded_name = urllib.parse.quote(name_query) 
 
-        full_url_with_query = (
-            f"{self.base_url}{self.cards_endpoint}"
-            f"?name={encoded_name}"
-        )
-        
         try:
-            start_time = time.time()
-            response = requests.get(full_url_with_query, timeout=15) 
-            response_time = time.time() - start_time
-            print(f"[DEBUG FETCH NAME] API Response Time: {response_time:.2f} seconds")
-
-            response.raise_for_status() 
-        
-            start_parsing_time = time.time()
-            raw_cards = response.json() 
-            parsing_time = time.time() - start_parsing_time
-            print(f"[DEBUG FETCH NAME] JSON Parsing Time: {parsing_time:.2f} seconds")
-
-            if not raw_cards:
-                return []
-            
-            start_extraction_time = time.time()
-            simplified_dtos = [self._create_dto_from_raw(card, is_full_detail=False) for card in raw_cards]
-            extraction_time = time.time() - start_extraction_time
-            print(f"[DEBUG FETCH NAME] Data Extraction Time: {extraction_time:.2f} seconds")
-            
-            # ⬅️ CORREZIONE 2: Restituisce una lista di dizionari per la serializzazione JSON di Flask
-            return [dto.to_dict() for dto in simplified_dtos] 
+            response = self._get(self._name_search_url(name_query), read_timeout=15)
+            return self._cards_from_search(response.content)
             
         except requests.exceptions.RequestException as e:
-            print(f"[ERRORE FATALE] Error fetching data from TCGDEX API: {e}")
+            logger.error("Errore durante la ricerca per nome su TCGDEX", extra={'query': name_query, 'error': str(e)})
             return []
     
 
+    def _fetch_card_by_id(self, card_id: str) -> dict:
+        """
+        Lookup completo per ID. A differenza di search_card_by_id solleva
+        RequestException in caso di errore, cosi' il chiamante puo' riportarlo.
+        """
+        response = self._get(self._card_url(card_id), read_timeout=10)
+        return self._card_from_lookup(response.content)
+
+    def fetch_card_details(self, card_id: str) -> dict:
+        """
+        Lookup completo per ID con varianti e prezzi (arricchimento in background), senza cache:
+        i prezzi devono essere quelli correnti. Solleva RequestException in caso di errore.
+        """
+        response = self._get(self._card_url(card_id), read_timeout=10)
+        return self._card_details_from_lookup(response.content)
+
     def search_card_by_id(self, card_id: str) -> dict:
 
         if not card_id:
             return {}
         
-        full_url = f"{self.base_url}{self.cards_endpoint}/{card_id}"
-        
         try:
-            start_time = time.time()
-            response = requests.get(full_url, timeout=10)
-            request_duration = time.time() - start_time
-            print(f"[DEBUG FETCH ID] API Respone Time: {request_duration:.4f} seconds.")
-            
-            response.raise_for_status() 
-
-            start_parsing_time = time.time()
-            raw_card = response.json()
-            parsing_duration = time.time() - start_parsing_time
-            print(f"[DEBUG FETCH ID] JSON Parsing Time: {parsing_duration:.4f} seconds.")
-            
-            if not raw_card or 'id' not in raw_card:
-                return {}
-
-            start_simplify_time = time.time()
-            simplified_dto = self._create_dto_from_raw(raw_card, is_full_detail=True)
-            simplify_duration = time.time() - start_simplify_time
-            print(f"[DEBUG FETCH ID] Data Extraction time: {simplify_duration:.4f} seconds.")
-            return simplified_dto.to_dict()
+            return self._fetch_card_by_id(card_id)
             
         except requests.exceptions.RequestException as e:
-            print(f"[ERRORE FATALE] Errore durante il fetching dei dati per ID {card_id}: {e}")
-            return {}
\ No newline at end of file
+            logger.error("Errore durante il lookup per ID su TCGDEX", extra={'card_id': card_id, 'error': str(e)})
+            return {}
+
+    def search_cards_by_ids(self, card_ids: list, max_concurrency: int = None) -> list:
+        """
+        Lookup completo di piu' carte in parallelo (pool di thread limitato).
+        Restituisce, nello stesso ordine degli ID in input, una lista di dizionari:
+        {'id': <id>, 'card': <dict o None>, 'error': <messaggio o None>}.
+        """
+        if not card_ids:
+            return []
+
+        max_workers = max_concurrency or self.batch_max_concurrency
+        unique_ids = list(dict.fromkeys(card_ids))
+
+
+        def lookup(card_id):
+            if not card_id:
+                return {'id': card_id, 'card': None, 'error': "ID della carta mancante."}
+            try:
+                # Arricchimento in batch: corsia di background, le ricerche interattive passano avanti
+                with self.rate_limiter.lane(LANE_BACKGROUND):
+                    card = self._fetch_card_by_id(card_id)
+            except requests.exceptions.RequestException as e:
+                return {'id': card_id, 'card': None, 'error': str(e)}
+            if not card:
+                return {'id': card_id, 'card': None, 'error': f"Nessuna carta trovata con ID {card_id}."}
+            return {'id': card_id, 'card': card, 'error': None}
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_ids))) as executor:
+            results_by_id = dict(zip(unique_ids, executor.map(lookup, unique_ids)))
+        logger.debug("Lookup batch completato",
+                     extra={'ids': len(unique_ids), 'duration_s': round(time.perf_counter() - start_time, 4)})
+
+        return [results_by_id[card_id] for card_id in card_ids]
+
+
+    # -------------------------------------------------------------------
+    # CATALOGO (Set ed elenco carte per set, usati dal mirror locale)
+    # -------------------------------------------------------------------
+
+    def fetch_sets(self) -> list:
+        """
+        Elenco di tutti i set TCGDEX: [{'id', 'name', 'card_count'}].
+        Solleva RequestException in caso di errore.
+        """
+        response = self._get(f"{self.base_url}{self.sets_endpoint}", read_timeout=30)
+        return [
+            {
+                'id': raw_set.get('id'),
+                'name': raw_set.get('name', 'Unknown Set'),
+                'card_count': (raw_set.get('cardCount') or {}).get('total')
+                              or (raw_set.get('cardCount') or {}).get('official') or 0
+            }
+            for raw_set in loads_json(response.content) or [] if raw_set.get('id')
+        ]
+
+    def fetch_set(self, set_id: str) -> dict:
+        """
+        Dettaglio di un set con l'elenco breve delle sue carte (DTO con set valorizzato).
+        Solleva RequestException in caso di errore.
+        """
+        response = self._get(f"{self.base_url}{self.sets_endpoint}/{set_id}", read_timeout=30)
+        raw_set = loads_json(response.content) or {}
+
+        set_name = raw_set.get('name', 'Unknown Set')
+        cards = []
+        for raw_card in raw_set.get('cards', []):
+            dto = CardDTO.from_raw(raw_card, is_full_detail=False)._replace(set_id=set_id, set_name=set_name)
+            card = dto.to_dict()
+            card['local_id'] = raw_card.get('localId')
+            cards.append(card)
+
+        card_count = raw_set.get('cardCount') or {}
+        return {
+            'id': raw_set.get('id', set_id),
+            'name': set_name,
+            'release_date': raw_set.get('releaseDate', 'N/A'),
+            'card_count': card_count.get('total') or card_count.get('official') or len(cards),
+            'cards': cards
+        }
+
+    # -------------------------------------------------------------------
+    # IMMAGINI
+    # -------------------------------------------------------------------
+
+    def fetch_image(self, image_url: str) -> bytes:
+        """
+        Scarica un'immagine (es. <image>/high.webp) sulla sessione condivisa.
+        Solleva RequestException in caso di errore.
+        """
+        return self._get(image_url, read_timeout=15).content
@@ -1,11 +1,62 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, g, send_file
 from flask_cors import CORS
+import logging
 import threading
+import time
+import signal
+import csv
+import hashlib
+import io
+import urllib.parse
+import requests
 from application.core_manager import CoreManager 
+from communication.json_codec import dumps_json, loads_json
+from communication.serving_modes import SERVING_MODE_DEV, SERVING_MODE_WAITRESS, SERVING_MODE_GUNICORN, SERVING_MODE_ASGI
+from communication.api.image_cache import IMAGE_SIZES, IMAGE_SIZE_THUMB, IMAGE_MIMETYPE
+from monitoring.metrics import REGISTRY, HTTP_REQUEST_DURATION, time_stage
+
+logger = logging.getLogger(__name__)
+
+# Numero massimo di ID accettati da una singola richiesta di import massivo
+MAX_BULK_IMPORT_SIZE = 5000
+
+# Export/import in streaming: campi esportati e dimensione dei blocchi inviati al client
+EXPORT_FIELDS = ['id', 'name', 'type', 'rarity', 'image_url', 'set', 'set_id']
+EXPORT_CHUNK_ROWS = 500
+
+# Paginazione della collezione (GET /api/collection)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Parametri di filtro accettati da GET /api/collection (vedi CARD_FILTER_COLUMNS nel DataManager)
+COLLECTION_FILTERS = ('type', 'rarity', 'set_id')
+
+# Stato dell'arricchimento (GET /api/collection/jobs): job elencati per default
+ENRICHMENT_STATUS_DEFAULT_LIMIT = 50
+
+# Autocompletamento (GET /api/tcg/suggest): suggerimenti restituiti e durata della cache del browser
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+SUGGEST_MAX_AGE_SECONDS = 60
+
+# Stream SSE delle modifiche: intervallo di controllo della versione, keep-alive e durata massima
+# di una connessione (EventSource si riconnette da solo riprendendo da Last-Event-ID)
+CHANGES_STREAM_POLL_SECONDS = 1.0
+CHANGES_STREAM_KEEPALIVE_SECONDS = 15.0
+CHANGES_STREAM_MAX_SECONDS = 60.0
+# Ogni stream aperto occupa un thread del server WSGI: per default al massimo un quarto di server.threads
+CHANGES_STREAM_THREADS_SHARE = 4
+
+
+# Header di risposta leggibili dal frontend (paginazione e versione della collezione)
+CORS_EXPOSE_HEADERS = ['X-Total-Count', 'X-Next-Cursor', 'X-Collection-Version', 'X-Search-Partial']
+
 
 class RestApiServer:
     
-    def __init__(self, core_manager: CoreManager, app: Flask, host, port): # ⬅️ Solo CoreManager
+    def __init__(self, core_manager: CoreManager, app: Flask, host, port,
+                 mode: str = SERVING_MODE_DEV, threads: int = 8, debug: bool = False, shutdown_timeout: float = 10,
+                 image_max_age: int = 604800, search_max_age: int = 300,
+                 max_change_streams: int = None): # ⬅️ Solo CoreManager
         # Iniezione della Dipendenza (L'unico oggetto iniettato)
         self.core_manager = core_manager
         
@@ -14,11 +65,39 @@ class RestApiServer:
         self.port = port
         self.app = app
 
-        CORS(self.app)
+        # Configurazione del server WSGI
+        self.mode = mode
+        self.threads = threads
+        self.debug = debug
+        self.shutdown_timeout = shutdown_timeout
+        self.server = None
+
+        # Durata (secondi) della cache del browser per le immagini servite dal proxy
+        self.image_max_age = image_max_age
+        # Durata (secondi) della cache del browser per i risultati delle ricerche su TCGDEX
+        self.search_max_age = search_max_age
+        self.server_thread = None
+
+        # Stream SSE aperti contemporaneamente: oltre il limite si risponde 503 e il frontend
+        # ripiega sul polling di /api/collection/changes, lasciando i thread alle altre richieste
+        self.max_change_streams = max_change_streams if max_change_streams is not None \
+            else max(1, threads // CHANGES_STREAM_THREADS_SHARE)
+        self._change_streams = 0
+        self._change_streams_lock = threading.Lock()
+        REGISTRY.gauge('tcg_change_streams_open', 'Stream SSE delle modifiche della collezione aperti').set_function(
+            lambda: self._change_streams
+        )
+
+        # Gli header di paginazione devono essere leggibili dal frontend
+        CORS(self.app, expose_headers=CORS_EXPOSE_HEADERS)
         
         # Mappatura degli URL alle funzioni
         self._add_url_rules()
 
+        # Misura della durata di ogni richiesta (per endpoint, metodo e status)
+        self.app.before_request(self._start_request_timer)
+        self.app.after_request(self._observe_request_duration)
+
     def _add_url_rules(self):
         """Mappa gli endpoint REST alle funzioni handler."""
         # 1. Endpoint di Ricerca per Nome
@@ -30,8 +109,83 @@ class RestApiServer:
         # 3. Endpoint ricerca per ID
         self.app.add_url_rule('/api/tcg/search_id', 'get_card_by_id', self.handle_search_card_by_id, methods=['GET']) 
 
+        # 4. Endpoint import massivo nella collezione (JSON o CSV)
+        self.app.add_url_rule('/api/collection/bulk', 'handle_collection_bulk', self.handle_collection_bulk, methods=['POST'])
+
+        # 5. Export/import in streaming della collezione (NDJSON o CSV)
+        self.app.add_url_rule('/api/collection/export', 'handle_collection_export', self.handle_collection_export, methods=['GET'])
+        self.app.add_url_rule('/api/collection/import', 'handle_collection_import', self.handle_collection_import, methods=['POST'])
+        self.app.add_url_rule('/api/collection/stats', 'get_collection_stats', self.handle_collection_stats, methods=['GET'])
+        self.app.add_url_rule('/api/collection/changes', 'get_collection_changes', self.handle_collection_changes, methods=['GET'])
+        self.app.add_url_rule('/api/collection/changes/stream', 'stream_collection_changes', self.handle_collection_changes_stream, methods=['GET'])
+        # Avanzamento dell'arricchimento in background delle carte aggiunte (POST /api/collection -> 202)
+        self.app.add_url_rule('/api/collection/jobs', 'get_enrichment_status', self.handle_enrichment_status, methods=['GET'])
+        self.app.add_url_rule('/api/collection/jobs/<int:job_id>', 'get_enrichment_job', self.handle_enrichment_job, methods=['GET'])
+
+        # 6. Endpoint statistiche della cache TCGDEX
+        self.app.add_url_rule('/api/tcg/cache_stats', 'get_cache_stats', self.handle_cache_stats, methods=['GET'])
+
+        # 7. Metriche in formato Prometheus
+        self.app.add_url_rule('/api/metrics', 'get_metrics', self.handle_metrics, methods=['GET'])
+
+        # 8. Proxy immagini con cache su disco (miniature o alta risoluzione)
+        self.app.add_url_rule('/api/images/<card_id>', 'get_card_image', self.handle_card_image, methods=['GET'])
+
+        # 9. Autocompletamento dei nomi (indice in memoria, nessuna chiamata a TCGDEX)
+        self.app.add_url_rule('/api/tcg/suggest', 'suggest_card_names', self.handle_suggest_card_names, methods=['GET'])
+
+    # --- METRICHE ---
+
+    def _start_request_timer(self):
+        g.request_start = time.perf_counter()
+
+    def _observe_request_duration(self, response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                endpoint=request.endpoint or 'unknown', method=request.method, status=response.status_code
+            )
+        return response
+
     # --- HANDLERS ---
 
+    @staticmethod
+    def _json_response(payload, status: int = 200) -> Response:
+        """Risposta JSON serializzata direttamente in byte (orjson se disponibile), per i payload grandi."""
+        return Response(dumps_json(payload), status=status, mimetype='application/json')
+
+    def _search_response(self, payload, partial: bool = False) -> Response:
+        """
+        Risultato di una ricerca su TCGDEX: cacheabile dal browser per search_max_age secondi
+        e, scaduto il max-age, rivalidato con If-None-Match (ETag calcolato sul corpo).
+        Con partial l'header X-Search-Partial segnala un elenco che puo' essere incompleto.
+        """
+        response = self._json_response(payload)
+        response.headers['Cache-Control'] = f"public, max-age={self.search_max_age}"
+        if partial:
+            response.headers['X-Search-Partial'] = 'true'
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @staticmethod
+    def _not_modified(etag: str) -> Response:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @staticmethod
+    def _collection_etag(version: int) -> str:
+        """ETag di GET /api/collection: versione della collezione + parametri (ricerca, pagina, campi)."""
+        query = urllib.parse.urlencode(sorted(request.args.items(multi=True)))
+        return f"v{version}-{hashlib.sha1(query.encode('utf-8')).hexdigest()[:16]}"
+
+    @staticmethod
+    def _multi_value_arg(name: str) -> list:
+        """Valori di un parametro ripetuto e/o separato da virgole."""
+        return [value.strip() for raw in request.args.getlist(name) for value in raw.split(',') if value.strip()]
+
     def handle_search_cards_by_name(self):
         """Handler per GET /api/tcg/search?name=<query>"""
         name_query = request.args.get('name')
@@ -41,23 +195,42 @@ class RestApiServer:
 
         try:
             
-            results = self.core_manager.search_cards_by_name(name_query) 
+            results, partial = self.core_manager.search_cards_by_name(name_query) 
             
             if not results:
                 return jsonify({"message": f"No cards found matching '{name_query}'"}), 404
                 
-            return jsonify(results)
+            with time_stage('serialization'):
+                return self._search_response(results, partial)
         except Exception as e:
-            print(f"Errore server durante la ricerca nome: {e}")
+            logger.error("Errore server durante la ricerca nome", extra={'error': str(e)})
             return jsonify({"error": "External API Error or Timeout."}), 503
 
+    def handle_suggest_card_names(self):
+        """Handler per GET /api/tcg/suggest?prefix=<testo>&limit=<n> (lista di nomi di carte)"""
+        prefix = request.args.get('prefix', '').strip()
+        if not prefix:
+            return jsonify({"error": "Missing 'prefix' query parameter"}), 400
+
+        try:
+            limit = int(request.args.get('limit', SUGGEST_DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+        response = self._json_response(self.core_manager.suggest_card_names(prefix, limit))
+        response.headers['Cache-Control'] = f'public, max-age={SUGGEST_MAX_AGE_SECONDS}'
+        return response
+
     def handle_collection(self):
         """Handler per /api/collection (GET, POST, DELETE)"""
         if request.method == 'POST':
             card_data = request.json
             if not card_data or 'id' not in card_data:
                 return jsonify({"error": "Invalid card data provided"}), 400
-                
+
+            if self.core_manager.enrichment_enabled:
+                return self._enqueue_card(card_data)
             
             success, message = self.core_manager.add_card_to_collection(card_data)
             
@@ -67,9 +240,48 @@ class RestApiServer:
                 return jsonify({"message": message}), 409
                 
         elif request.method == 'GET':
+            # Risposta condizionale: se la collezione non e' cambiata basta confrontare l'ETag,
+            # senza eseguire la query della pagina ne' serializzarla
+            etag = self._collection_etag(self.core_manager.get_collection_version())
+            if request.if_none_match.contains(etag):
+                return self._not_modified(etag)
+
             search_query = request.args.get('name') 
-            collection = self.core_manager.get_user_collection(search_query=search_query)
-            return jsonify(collection)
+            cursor = request.args.get('cursor')
+            fields = request.args.get('fields')
+            fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+            try:
+                limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+            except ValueError:
+                return jsonify({"error": "'limit' must be an integer"}), 400
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+            # Filtri componibili: ?type=Fire&type=Water oppure ?type=Fire,Water (piu' valori in OR)
+            filters = {
+                name: self._multi_value_arg(name) for name in COLLECTION_FILTERS if name in request.args
+            }
+            sort = request.args.get('sort', 'name')
+            order = request.args.get('order', 'asc').lower()
+
+            try:
+                page = self.core_manager.get_user_collection_page(search_query=search_query, limit=limit, cursor=cursor, fields=fields,
+                                                                  filters=filters, sort=sort, order=order)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+            with time_stage('serialization'):
+                response = self._json_response(page['cards'])
+            if page['total'] is not None:
+                response.headers['X-Total-Count'] = str(page['total'])
+            if page['next_cursor']:
+                response.headers['X-Next-Cursor'] = page['next_cursor']
+            response.set_etag(etag)
+            # Versione da cui il client puo' chiedere le sole differenze (GET /api/collection/changes)
+            response.headers['X-Collection-Version'] = str(self._etag_version(etag))
+            # Il browser puo' riusare la risposta solo dopo averla rivalidata (If-None-Match)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         
         elif request.method == 'DELETE':
             card_id = request.args.get('id')
@@ -85,6 +297,269 @@ class RestApiServer:
                 return jsonify({"message": message}), 404
     
     
+    def _enqueue_card(self, card_data: dict):
+        """
+        POST /api/collection con l'arricchimento in background: 202 con la carta in stato 'pending'
+        e l'URL di stato del job (header Location); 409 se la carta e' gia' in collezione.
+        """
+        job, message = self.core_manager.enqueue_card_for_enrichment(card_data)
+        if job is None:
+            return jsonify({"message": message}), 409
+
+        status_url = f"/api/collection/jobs/{job['id']}"
+        response = jsonify({
+            "message": message,
+            "card": {"id": job['card_id'], "name": job['name'], "image_url": job['image_url'], "status": "pending"},
+            "job": job,
+            "status_url": status_url,
+        })
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        return response
+
+    def handle_enrichment_status(self):
+        """Handler per GET /api/collection/jobs (job per stato, job in attesa e falliti)"""
+        if self.core_manager.enrichment_queue is None:
+            return jsonify({"error": "Background enrichment is not enabled"}), 404
+        try:
+            limit = int(request.args.get('limit', ENRICHMENT_STATUS_DEFAULT_LIMIT))
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        response = self._json_response(self.core_manager.get_enrichment_status(limit))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    def handle_enrichment_job(self, job_id: int):
+        """Handler per GET /api/collection/jobs/<job_id> (stato di un singolo job)"""
+        job = self.core_manager.get_enrichment_job(job_id) if self.core_manager.enrichment_queue is not None else None
+        if job is None:
+            return jsonify({"message": f"No enrichment job with ID {job_id}"}), 404
+
+        response = self._json_response(job)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    def handle_collection_stats(self):
+        """Handler per GET /api/collection/stats (contatori aggregati, con ETag come la lista)"""
+        etag = self._collection_etag(self.core_manager.get_collection_version())
+        if request.if_none_match.contains(etag):
+            return self._not_modified(etag)
+
+        response = self._json_response(self.core_manager.get_collection_stats())
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @staticmethod
+    def _etag_version(etag: str) -> int:
+        """Versione della collezione contenuta in un ETag di _collection_etag ('v<versione>-<hash>')."""
+        return int(etag[1:].split('-', 1)[0])
+
+    @staticmethod
+    def _parse_since(value):
+        """Versione 'since' del change feed (intero >= 0) oppure None se non valida."""
+        try:
+            since = int(value)
+        except (TypeError, ValueError):
+            return None
+        return since if since >= 0 else None
+
+    def handle_collection_changes(self):
+        """Handler per GET /api/collection/changes?since=<versione> (carte aggiunte e rimosse dopo la versione)"""
+        since = self._parse_since(request.args.get('since'))
+        if since is None:
+            return jsonify({"error": "Missing or invalid 'since' query parameter (expected a collection version)"}), 400
+
+        response = self._json_response(self.core_manager.get_collection_changes(since))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    def handle_collection_changes_stream(self):
+        """
+        Handler per GET /api/collection/changes/stream?since=<versione> (Server-Sent Events).
+        Ogni evento 'changes' ha come id la nuova versione e come dati lo stesso JSON di /api/collection/changes.
+        La versione viene controllata ogni CHANGES_STREAM_POLL_SECONDS (una lettura per chiave primaria),
+        cosi' lo stream vede anche le modifiche fatte da altri processi (worker gunicorn).
+        """
+        # In riconnessione EventSource invia l'id dell'ultimo evento ricevuto
+        since = self._parse_since(request.headers.get('Last-Event-ID', request.args.get('since')))
+        if since is None:
+            return jsonify({"error": "Missing or invalid 'since' query parameter (expected a collection version)"}), 400
+
+        release = self._acquire_change_stream()
+        if release is None:
+            # EventSource non si riconnette dopo un 503: il frontend passa al polling di /changes
+            response = jsonify({"error": "Too many open change streams, poll /api/collection/changes instead."})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(int(CHANGES_STREAM_MAX_SECONDS))
+            return response
+
+        def generate(last_version):
+            yield f"retry: {int(CHANGES_STREAM_POLL_SECONDS * 3000)}\n\n"
+            started = last_sent = time.monotonic()
+            while time.monotonic() - started < CHANGES_STREAM_MAX_SECONDS:
+                if self.core_manager.get_collection_version() != last_version:
+                    changes = self.core_manager.get_collection_changes(last_version)
+                    last_version = changes['version']
+                    yield f"id: {last_version}\nevent: changes\ndata: {dumps_json(changes).decode('utf-8')}\n\n"
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= CHANGES_STREAM_KEEPALIVE_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                time.sleep(CHANGES_STREAM_POLL_SECONDS)
+
+        response = Response(generate(since), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        # Il posto si libera alla chiusura della risposta (fine dello stream o client disconnesso)
+        response.call_on_close(release)
+        return response
+
+    def _acquire_change_stream(self):
+        """Riserva un posto per uno stream SSE; restituisce la funzione che lo libera (una sola volta) o None se sono tutti occupati."""
+        with self._change_streams_lock:
+            if self._change_streams >= self.max_change_streams:
+                return None
+            self._change_streams += 1
+
+        held = True
+
+        def release():
+            nonlocal held
+            with self._change_streams_lock:
+                if held:
+                    held = False
+                    self._change_streams -= 1
+
+        return release
+
+    def handle_collection_bulk(self):
+        """Handler per POST /api/collection/bulk (JSON: lista di ID o {"ids": [...]}, oppure CSV)"""
+        card_ids = self._parse_bulk_ids()
+
+        if not card_ids:
+            return jsonify({"error": "No card IDs provided (expected JSON list, {'ids': [...]} or CSV with an 'id' column)"}), 400
+        if len(card_ids) > MAX_BULK_IMPORT_SIZE:
+            return jsonify({"error": f"Too many card IDs: maximum is {MAX_BULK_IMPORT_SIZE} per request"}), 413
+
+        report = self.core_manager.add_cards_to_collection(card_ids)
+        return jsonify(report)
+
+    def _parse_bulk_ids(self) -> list:
+        """Estrae la lista di ID dal corpo della richiesta (upload CSV, body CSV o JSON)."""
+        uploaded_file = request.files.get('file')
+        if uploaded_file:
+            return self._parse_csv_ids(uploaded_file.read().decode('utf-8-sig'))
+
+        if request.mimetype == 'text/csv':
+            return self._parse_csv_ids(request.get_data(as_text=True))
+
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('ids') or payload.get('cards') or []
+        if not isinstance(payload, list):
+            return []
+
+        # Accetta sia stringhe che oggetti carta con chiave 'id'
+        return [item.get('id') if isinstance(item, dict) else item for item in payload]
+
+    def _parse_csv_ids(self, text: str) -> list:
+        """Legge gli ID da un CSV: usa la colonna 'id' se presente un header, altrimenti la prima colonna."""
+        rows = [row for row in csv.reader(io.StringIO(text)) if row]
+        if not rows:
+            return []
+
+        header = [column.strip().lower() for column in rows[0]]
+        if 'id' in header:
+            id_index = header.index('id')
+            rows = rows[1:]
+        else:
+            id_index = 0
+
+        return [row[id_index].strip() for row in rows if len(row) > id_index]
+
+    def handle_collection_export(self):
+        """Handler per GET /api/collection/export?format=ndjson|csv (risposta in streaming, chunked)"""
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({"error": "Unsupported format: use 'ndjson' or 'csv'"}), 400
+
+        cards = self.core_manager.export_collection()
+        if export_format == 'csv':
+            body, mimetype = self._stream_csv(cards), 'text/csv'
+        else:
+            body, mimetype = self._stream_ndjson(cards), 'application/x-ndjson'
+
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=collection.{export_format}'
+        })
+
+    def _stream_ndjson(self, cards):
+        """Serializza una riga JSON per carta, inviando blocchi di EXPORT_CHUNK_ROWS righe."""
+        lines = []
+        for card in cards:
+            lines.append(dumps_json(card))
+            if len(lines) >= EXPORT_CHUNK_ROWS:
+                yield b'\n'.join(lines) + b'\n'
+                lines = []
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+
+    def _stream_csv(self, cards):
+        """Serializza le carte in CSV con header, inviando blocchi di EXPORT_CHUNK_ROWS righe."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        rows_in_buffer = 0
+
+        for card in cards:
+            writer.writerow(card)
+            rows_in_buffer += 1
+            if rows_in_buffer >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                rows_in_buffer = 0
+        yield buffer.getvalue()
+
+    def handle_collection_import(self):
+        """Handler per POST /api/collection/import?format=ndjson|csv (il corpo viene letto riga per riga)"""
+        import_format = request.args.get('format')
+        if not import_format:
+            import_format = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+        if import_format not in ('ndjson', 'csv'):
+            return jsonify({"error": "Unsupported format: use 'ndjson' or 'csv'"}), 400
+
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+        rows = self._iter_csv(lines) if import_format == 'csv' else self._iter_ndjson(lines)
+
+        try:
+            summary = self.core_manager.import_collection(rows)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(summary)
+
+    @staticmethod
+    def _iter_csv(lines):
+        """Righe del CSV; le celle vuote tornano None, come i valori mancanti esportati."""
+        for row in csv.DictReader(lines):
+            yield {name: value if value != '' else None for name, value in row.items()}
+
+    @staticmethod
+    def _iter_ndjson(lines):
+        """Righe del NDJSON; quelle non leggibili arrivano come ValueError e vengono riportate tra gli errori."""
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = loads_json(line)
+            except ValueError:
+                yield ValueError(f"Invalid JSON at line {line_number}")
+                continue
+            yield row if isinstance(row, dict) else ValueError(f"Line {line_number} is not a JSON object")
+
     def handle_search_card_by_id(self):
         """Handler per GET /api/tcg/search?id=<card_id>"""
         card_id = request.args.get('id')
@@ -99,19 +574,129 @@ class RestApiServer:
             if not card:
                 return jsonify({"message": f"No card found with ID '{card_id}'"}), 404
             
-            return jsonify(card)
+            with time_stage('serialization'):
+                return self._search_response(card)
         except Exception as e:
             return jsonify({"error": f"Internal Server Error or PokeTCG API issue: {str(e)}"}), 503
+
+    def handle_cache_stats(self):
+        """Handler per GET /api/tcg/cache_stats"""
+        return jsonify(self.core_manager.get_cache_stats())
+
+    def handle_card_image(self, card_id):
+        """Handler per GET /api/images/<card_id>?size=thumb|high"""
+        size = request.args.get('size', IMAGE_SIZE_THUMB)
+        if size not in IMAGE_SIZES:
+            return jsonify({"error": f"'size' must be one of: {', '.join(IMAGE_SIZES)}"}), 400
+
+        try:
+            image = self.core_manager.get_card_image(card_id, size)
+        except (TimeoutError, requests.exceptions.Timeout) as e:
+            # Timeout di TCGDEX o dell'attesa del download gia' in corso (single-flight)
+            logger.warning("Timeout durante il recupero dell'immagine", extra={'card_id': card_id, 'error': str(e)})
+            return jsonify({"error": "Timeout while fetching the image from TCGDEX."}), 504
+        except Exception as e:
+            logger.error("Errore server durante il recupero dell'immagine", extra={'card_id': card_id, 'error': str(e)})
+            return jsonify({"error": "External API Error or Timeout."}), 503
+
+        if image is None:
+            return jsonify({"message": f"No image available for card ID '{card_id}'"}), 404
+
+        path, digest = image
+        # ETag = hash del contenuto (304 su If-None-Match); il file viene inviato con wsgi.file_wrapper
+        # (sendfile dove il server WSGI lo supporta) senza essere caricato in memoria
+        response = send_file(path, mimetype=IMAGE_MIMETYPE, etag=digest, conditional=True, max_age=self.image_max_age)
+        response.cache_control.public = True
+        return response
+
+    def handle_metrics(self):
+        """Handler per GET /api/metrics (formato di esposizione testuale Prometheus)"""
+        return Response(REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
             
 
     # --- METODI DI AVVIO/STOP ---
 
+    def _create_server(self):
+        """Crea il server WSGI in base alla modalità configurata."""
+        if self.mode == SERVING_MODE_WAITRESS:
+            # Import opzionale: waitress serve solo in questa modalità
+            from waitress.server import create_server
+            return create_server(self.app, host=self.host, port=self.port, threads=self.threads)
+
+        if self.mode == SERVING_MODE_ASGI:
+            # Import opzionali: uvicorn, a2wsgi e aiohttp servono solo in questa modalità
+            import uvicorn
+            config = uvicorn.Config(
+                self.asgi_app(), host=self.host, port=self.port, lifespan='on',
+                log_config=None, access_log=False, backlog=2048,
+                timeout_graceful_shutdown=self.shutdown_timeout
+            )
+            return uvicorn.Server(config)
+
+        if self.mode == SERVING_MODE_DEV:
+            from werkzeug.serving import make_server
+            self.app.debug = self.debug
+            return make_server(self.host, self.port, self.app, threaded=True)
+
+        raise ValueError(f"Modalità server non supportata da RestApiServer: {self.mode}")
+
+    def asgi_app(self):
+        """Applicazione ASGI (ricerche TCGDEX async + app Flask), anche per server ASGI esterni (asgi.py)."""
+        from communication.asgi_app import AsgiApp
+        return AsgiApp(self, threads=self.threads)
+
     def run_server(self):
         """Metodo per avviare il server (target per il thread)."""
-        self.app.run(host=self.host, port=self.port, debug=True, use_reloader=False)
+        if self.mode in (SERVING_MODE_WAITRESS, SERVING_MODE_ASGI):
+            self.server.run()
+        else:
+            self.server.serve_forever()
 
     def start(self):
         """Avvia il server in un thread separato (opzionale, ma pulito)."""
+        self.server = self._create_server()
         self.server_thread = threading.Thread(target=self.run_server)
         self.server_thread.start()
-        print(f"REST API Server running on http://{self.host}:{self.port}")
\ No newline at end of file
+        logger.info("REST API Server in esecuzione",
+                    extra={'mode': self.mode, 'threads': self.threads, 'url': f"http://{self.host}:{self.port}"})
+
+    def stop(self):
+        """
+        Spegnimento controllato: il server smette di accettare connessioni
+        e attende (fino a shutdown_timeout) le richieste in corso.
+        """
+        if self.server is None:
+            return
+
+        logger.info("Spegnimento in corso, attesa delle richieste attive")
+        if self.mode == SERVING_MODE_WAITRESS:
+            self.server.task_dispatcher.shutdown(timeout=self.shutdown_timeout)
+            self.server.close()
+        elif self.mode == SERVING_MODE_ASGI:
+            # uvicorn chiude il listener e attende le richieste in corso (timeout_graceful_shutdown)
+            self.server.should_exit = True
+        else:
+            self.server.shutdown()
+
+        if self.server_thread is not None:
+            self.server_thread.join(timeout=self.shutdown_timeout)
+        self.server = None
+        # Nessuna nuova richiesta: si fermano anche i worker di arricchimento
+        self.core_manager.stop_enrichment_workers(timeout=self.shutdown_timeout)
+        logger.info("Server arrestato")
+
+    def serve_until_signal(self):
+        """Avvia il server e lo arresta in modo controllato alla ricezione di SIGINT o SIGTERM."""
+        stop_requested = threading.Event()
+
+        def request_stop(signum, frame):
+            stop_requested.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.start()
+        # wait() con timeout per restare reattivi ai segnali sul thread principale
+        while not stop_requested.wait(timeout=0.5):
+            pass
+        self.stop()
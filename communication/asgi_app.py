@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+import urllib.parse
+from werkzeug.http import generate_etag, quote_etag, parse_etags
+from communication.api_server import CORS_EXPOSE_HEADERS
+from communication.json_codec import dumps_json
+from monitoring.metrics import REGISTRY, HTTP_REQUEST_DURATION, time_stage
+
+logger = logging.getLogger(__name__)
+
+# Status registrato nelle metriche per le richieste abbandonate dal client (convenzione di nginx)
+STATUS_CLIENT_CLOSED_REQUEST = 499
+
+ASGI_CANCELLED_REQUESTS = REGISTRY.counter(
+    'tcg_asgi_cancelled_requests_total', 'Ricerche async cancellate perche\' il client si e\' disconnesso', ('endpoint',)
+)
+
+
+class AsgiApp:
+    """
+    Applicazione ASGI della modalità 'asgi' (servita da uvicorn).
+
+    Le ricerche su TCGDEX (GET /api/tcg/search_name e /api/tcg/search_id) sono gestite da
+    handler async sull'event loop, con le stesse risposte degli handler Flask: l'attesa di
+    TCGDEX non occupa un thread, quindi le ricerche in corso non sono limitate da server.threads.
+    Tutte le altre richieste passano all'app Flask tramite a2wsgi (pool di server.threads thread).
+
+    Se il client si disconnette durante una ricerca, l'handler viene cancellato e con lui la
+    richiesta verso TCGDEX, a meno che altre richieste identiche ne attendano il risultato.
+    """
+
+    def __init__(self, rest_api_server, threads: int = 8):
+        # Import opzionale: a2wsgi serve solo in questa modalità
+        from a2wsgi import WSGIMiddleware
+
+        self.rest_api_server = rest_api_server
+        self.core_manager = rest_api_server.core_manager
+        self.wsgi_app = WSGIMiddleware(rest_api_server.app, workers=threads)
+
+        # path -> (nome dell'endpoint come in Flask, handler async); senza AsyncTCGFetcher tutto va a Flask
+        self.routes = {}
+        if self.core_manager.async_tcg_fetcher is not None:
+            self.routes = {
+                '/api/tcg/search_name': ('get_cards_by_name', self.handle_search_cards_by_name),
+                '/api/tcg/search_id': ('get_card_by_id', self.handle_search_card_by_id),
+            }
+
+        self._in_flight = 0
+        REGISTRY.gauge('tcg_asgi_requests_in_flight', 'Ricerche async in corso sull\'event loop').set_function(
+            lambda: self._in_flight
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        route = self.routes.get(scope['path']) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if route is None:
+            await self.wsgi_app(scope, receive, send)
+            return
+
+        endpoint, handler = route
+        start = time.perf_counter()
+        args = {key: values[0] for key, values in urllib.parse.parse_qs(scope['query_string'].decode('latin-1')).items()}
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+        self._in_flight += 1
+        try:
+            response = await self._run_until_disconnect(handler(args, headers), receive)
+        finally:
+            self._in_flight -= 1
+
+        if response is None:
+            ASGI_CANCELLED_REQUESTS.inc(endpoint=endpoint)
+            status = STATUS_CLIENT_CLOSED_REQUEST
+        else:
+            status, response_headers, body = response
+            response_headers += self._cors_headers(headers)
+            await send({'type': 'http.response.start', 'status': status, 'headers': [
+                (name.encode('latin-1'), value.encode('latin-1')) for name, value in response_headers
+            ]})
+            await send({'type': 'http.response.body', 'body': body})
+
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, method='GET', status=status)
+
+    async def _run_until_disconnect(self, coroutine, receive):
+        """Esegue l'handler; se prima arriva http.disconnect lo cancella e restituisce None."""
+        handler_task = asyncio.ensure_future(coroutine)
+        disconnect_task = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait({handler_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # Spegnimento del server: vengono cancellati entrambi
+            handler_task.cancel()
+            disconnect_task.cancel()
+            raise
+        disconnect_task.cancel()
+
+        if handler_task.done():
+            return handler_task.result()
+
+        # Client disconnesso prima della risposta: la cancellazione interrompe la richiesta a TCGDEX
+        handler_task.cancel()
+        await asyncio.wait({handler_task})
+        logger.debug("Client disconnesso, ricerca cancellata")
+        return None
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.core_manager.async_tcg_fetcher is not None:
+                    await self.core_manager.async_tcg_fetcher.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # -------------------------------------------------------------------
+    # RISPOSTE (stesse intestazioni degli handler Flask)
+    # -------------------------------------------------------------------
+
+    @staticmethod
+    def _json(status: int, payload) -> tuple:
+        return status, [('content-type', 'application/json')], dumps_json(payload)
+
+    @staticmethod
+    def _cors_headers(request_headers: dict) -> list:
+        """Come Flask-CORS con origins='*': l'Origin della richiesta viene riflesso (con Vary)."""
+        headers = [('access-control-expose-headers', ', '.join(sorted(CORS_EXPOSE_HEADERS)))]
+        origin = request_headers.get('origin')
+        if origin:
+            return headers + [('access-control-allow-origin', origin), ('vary', 'Origin')]
+        return headers + [('access-control-allow-origin', '*')]
+
+    def _search_response(self, payload, request_headers: dict, partial: bool = False) -> tuple:
+        """Come RestApiServer._search_response: Cache-Control, ETag sul corpo, X-Search-Partial e 304 su If-None-Match."""
+        body = dumps_json(payload)
+        etag = generate_etag(body)
+        headers = [('cache-control', f"public, max-age={self.rest_api_server.search_max_age}"), ('etag', quote_etag(etag))]
+        if partial:
+            headers.append(('x-search-partial', 'true'))
+        if parse_etags(request_headers.get('if-none-match')).contains_weak(etag):
+            return 304, headers, b''
+        return 200, [('content-type', 'application/json')] + headers, body
+
+    # -------------------------------------------------------------------
+    # HANDLERS ASYNC
+    # -------------------------------------------------------------------
+
+    async def handle_search_cards_by_name(self, args: dict, request_headers: dict) -> tuple:
+        """Handler async per GET /api/tcg/search_name?name=<query>"""
+        name_query = args.get('name')
+        if not name_query:
+            return self._json(400, {"error": "Missing 'name' query parameter"})
+
+        try:
+            results, partial = await self.core_manager.search_cards_by_name_async(name_query)
+            if not results:
+                return self._json(404, {"message": f"No cards found matching '{name_query}'"})
+
+            with time_stage('serialization'):
+                return self._search_response(results, request_headers, partial)
+        except Exception as e:
+            logger.error("Errore server durante la ricerca nome", extra={'error': str(e)})
+            return self._json(503, {"error": "External API Error or Timeout."})
+
+    async def handle_search_card_by_id(self, args: dict, request_headers: dict) -> tuple:
+        """Handler async per GET /api/tcg/search_id?id=<card_id>"""
+        card_id = args.get('id')
+        if not card_id:
+            return self._json(400, {"error": "Missing 'id' query parameter"})
+
+        try:
+            card = await self.core_manager.search_card_by_id_async(card_id)
+            if not card:
+                return self._json(404, {"message": f"No card found with ID '{card_id}'"})
+
+            with time_stage('serialization'):
+                return self._search_response(card, request_headers)
+        except Exception as e:
+            return self._json(503, {"error": f"Internal Server Error or PokeTCG API issue: {str(e)}"})
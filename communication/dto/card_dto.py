@@ -1,37 +1,87 @@
+from typing import NamedTuple
 
-class CardDTO:
+
+class CardDTO(NamedTuple):
     """
-    Data Transfer Object (DTO) per una Carta Pokémon. 
+    Data Transfer Object (DTO) per una Carta Pokémon.
     Definisce il contratto dei dati tra i livelli.
+
+    E' una tupla immutabile (nessun __dict__ per istanza): per ottenere una copia
+    con campi diversi si usa _replace(...).
     """
 
-    def __init__(self, 
-                 id: str, 
-                 name: str, 
-                 image_url: str, 
-                 set_name: str = 'N/A', 
-                 set_id: str = 'N/A',
-                 type: str = 'N/A', 
-                 rarity: str = 'N/A'):
-        
-        self.id = id
-        self.name = name
-        self.image_url = image_url
-        
-        # Dati dettagliati (possono essere N/A per ricerche brevi)
-        self.set_name = set_name
-        self.set_id = set_id
-        self.type = type
-        self.rarity = rarity
-        
+    id: str
+    name: str
+    image_url: str
+
+    # Dati dettagliati (possono essere N/A per ricerche brevi)
+    set_name: str = 'N/A'
+    set_id: str = 'N/A'
+    type: str = 'N/A'
+    rarity: str = 'N/A'
+
+    # -------------------------------------------------------------------
+    # COSTRUZIONE DAL JSON GREZZO DI TCGDEX
+    # -------------------------------------------------------------------
+
+    @classmethod
+    def from_raw(cls, card_data: dict, is_full_detail: bool) -> 'CardDTO':
+        """
+        Crea il DTO a partire dal JSON grezzo dell'API.
+        Le risposte brevi (ricerca per nome) valorizzano solo id, nome e immagine.
+        """
+        card_name = card_data.get('name', 'Unknown Card')
+
+        # Gestione dell'apostrofo
+        if isinstance(card_name, str) and "'" in card_name:
+            card_name = card_name.replace("'", "^")
+
+        # Costruzione URL Immagine (es. <image>/high.webp)
+        base_image_url = card_data.get('image', '')
+        image_url = f"{base_image_url}/high.webp" if base_image_url else "placeholder.png"
+
+        if not is_full_detail:
+            return cls(card_data.get('id', 'N/A'), card_name, image_url)
+
+        # Estrazione sicura del tipo e dei dati del set
+        types_list = card_data.get('types')
+        main_type = types_list[0] if types_list and isinstance(types_list, list) else 'Unknown'
+        set_obj = card_data.get('set') or {}
+
+        return cls(
+            card_data.get('id', 'N/A'),
+            card_name,
+            image_url,
+            set_obj.get('name', 'Unknown Set'),
+            set_obj.get('id', 'N/A'),
+            main_type,
+            card_data.get('rarity', 'N/A'),
+        )
+
+    @classmethod
+    def from_raw_list(cls, raw_cards: list, is_full_detail: bool = False) -> list:
+        """Converte in un solo passaggio un'intera lista di risultati grezzi."""
+        from_raw = cls.from_raw
+        return [from_raw(card_data, is_full_detail) for card_data in raw_cards]
+
+    # -------------------------------------------------------------------
+    # SERIALIZZAZIONE
+    # -------------------------------------------------------------------
+
     def to_dict(self):
         """Converte l'oggetto in un dizionario per la serializzazione JSON di Flask."""
+        card_id, name, image_url, set_name, set_id, card_type, rarity = self
         return {
-            'id': self.id,
-            'name': self.name,
-            'image_url': self.image_url,
-            'set': self.set_name,        # Usato dal frontend per visualizzare
-            'set_id': self.set_id,       # Usato dal DataManager per la Foreign Key
-            'type': self.type,
-            'rarity': self.rarity,
-        }
\ No newline at end of file
+            'id': card_id,
+            'name': name,
+            'image_url': image_url,
+            'set': set_name,        # Usato dal frontend per visualizzare
+            'set_id': set_id,       # Usato dal DataManager per la Foreign Key
+            'type': card_type,
+            'rarity': rarity,
+        }
+
+    @staticmethod
+    def to_dicts(dtos: list) -> list:
+        """Versione batch di to_dict."""
+        return [dto.to_dict() for dto in dtos]
@@ -0,0 +1,26 @@
+"""
+Codifica/decodifica JSON condivisa da fetcher e server REST.
+Usa orjson quando e' installato (pip install orjson), altrimenti il modulo json standard.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # Dipendenza opzionale
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps_json(payload) -> bytes:
+    """Serializza direttamente in byte UTF-8 (compatto, senza ordinamento delle chiavi)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads_json(data):
+    """Decodifica JSON da byte o stringa."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,8 @@
+# Modalità di esecuzione del server (vedi config/app_config.yaml). Modulo a parte, senza dipendenze:
+# main.py sceglie la modalità prima di importare il server REST.
+SERVING_MODE_DEV = 'dev'            # Server di sviluppo Werkzeug
+SERVING_MODE_WAITRESS = 'waitress'  # Server WSGI multi-thread
+SERVING_MODE_GUNICORN = 'gunicorn'  # Server WSGI multi-processo (avviato da main.py)
+SERVING_MODE_ASGI = 'asgi'          # uvicorn: ricerche TCGDEX async, resto dell'app via WSGI (vedi AsgiApp)
+
+SERVING_MODES = (SERVING_MODE_DEV, SERVING_MODE_WAITRESS, SERVING_MODE_GUNICORN, SERVING_MODE_ASGI)
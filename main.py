@@ -1,47 +1,254 @@
+import time
+# Inizio dell'import dei moduli dell'applicazione (fase 'imports' del profilo di avvio)
+_IMPORTS_STARTED = time.perf_counter()
+
+# Qui solo cio' che serve prima di qualsiasi fase (configurazione, logging, profilo) e il livello di
+# persistenza, usato dalla fase 'database'. Fetcher, cache, CoreManager e server REST (con requests e
+# flask_cors) sono importati nelle fasi di create_app che li usano, cosi' il profilo di avvio li attribuisce
+# a quelle fasi, i componenti disattivati non vengono importati e il master gunicorn non li carica affatto.
 from persistence.data_manager import DataManager
+from persistence.catalog_manager import CatalogManager
 from persistence.database.model import initialize_db, db
-from communication.api.tcg_fetcher import TCGFetcher
-from application.core_manager import CoreManager 
-from communication.api_server import RestApiServer
+from persistence.database.engine_profile import engine_options_from_config, sqlite_pragmas_from_config
+from communication.api.config_loader import load_yaml_file
+from communication.serving_modes import SERVING_MODES, SERVING_MODE_GUNICORN, SERVING_MODE_ASGI
+from monitoring.logging_setup import configure_logging
+from monitoring.startup_profile import StartupProfile
 from flask import Flask
+import logging
 import os
 
+IMPORT_SECONDS = time.perf_counter() - _IMPORTS_STARTED
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TCG_CONFIG_FILE = os.path.join(BASE_DIR, "config", "api_config.yaml")
+APP_CONFIG_FILE = os.path.join(BASE_DIR, "config", "app_config.yaml")
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///collezione.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+logger = logging.getLogger(__name__)
 
-if __name__ == '__main__':
-    print("--- Avvio Applicazione Mini-Pokedex TCG ---")
 
-    initialize_db(app) 
-    print("✓ Database SQLite inizializzato e tabelle create.")
+def load_app_config(config_file: str = APP_CONFIG_FILE) -> dict:
+    """Carica la configurazione dell'applicazione (server e database) dal file YAML."""
+    return load_yaml_file(config_file)
+
+
+def enrichment_options_from_config(enrichment_config: dict) -> dict:
+    """Opzioni di EnrichmentWorkerPool dalla sezione 'enrichment' di api_config.yaml."""
+    return {
+        'workers': enrichment_config.get('workers', 2),
+        'max_attempts': enrichment_config.get('max_attempts', 5),
+        'backoff_base': enrichment_config.get('backoff_base_seconds', 2.0),
+        'backoff_max': enrichment_config.get('backoff_max_seconds', 300.0),
+        'poll_interval': enrichment_config.get('poll_interval_seconds', 1.0),
+        'lease_seconds': enrichment_config.get('lease_seconds', 60.0),
+    }
+
+
+def _configure_app(app_config: dict) -> Flask:
+    """Logging e app Flask con la configurazione del database (engine e profilo SQLite), senza inizializzarlo."""
+    server_config = app_config.get('server', {}) or {}
+    database_config = app_config.get('database', {}) or {}
+    logging_config = app_config.get('logging', {}) or {}
+
+    configure_logging(logging_config.get('level', 'INFO'), logging_config.get('format', 'text'))
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_config.get('uri', 'sqlite:///collezione.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pool dimensionato sui thread del server e profilo SQLite (ignorato con PostgreSQL)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_config(
+        app.config['SQLALCHEMY_DATABASE_URI'], database_config, default_pool_size=server_config.get('threads', 8)
+    )
+    app.config['SQLITE_PRAGMAS'] = sqlite_pragmas_from_config(database_config.get('sqlite'))
+    return app
+
+
+def create_database_app(app_config: dict = None) -> Flask:
+    """
+    App Flask con il solo database inizializzato, per gli strumenti a riga di comando (sync_catalog.py):
+    niente fetcher, cache, CoreManager o server REST, quindi nessun pool HTTP o rate limiter da duplicare.
+    """
+    app = _configure_app(app_config if app_config is not None else load_app_config())
+    initialize_db(app)
+    return app
+
+
+def create_app(app_config: dict = None) -> Flask:
+    """
+    App factory: costruisce l'app Flask con tutti i livelli collegati.
+    Il RestApiServer e' disponibile in app.extensions['rest_api_server'],
+    il profilo delle fasi di avvio in app.extensions['startup_profile'].
+    """
+    profile = StartupProfile()
+    profile.record('imports', IMPORT_SECONDS)
+
+    with profile.phase('config'):
+        app_config = app_config if app_config is not None else load_app_config()
+        server_config = app_config.get('server', {}) or {}
+        app = _configure_app(app_config)
+
+    with profile.phase('database'):
+        schema_created = initialize_db(app)
+    if schema_created:
+        logger.info("Database inizializzato e tabelle create")
+    else:
+        logger.info("Database inizializzato, schema gia' aggiornato")
 
     # 1. Inizializzazione dei Livelli Inferiori (Dipendenze)
-    data_manager = DataManager(app=app)
-    tcg_fetcher = TCGFetcher(TCG_CONFIG_FILE)
+    with profile.phase('persistence'):
+        data_manager = DataManager(app=app)
+        catalog_manager = CatalogManager(app=app)
+
+    with profile.phase('fetcher'):
+        from communication.api.tcg_fetcher import TCGFetcher
+        tcg_fetcher = TCGFetcher(TCG_CONFIG_FILE)
+
+        # Cache LRU/TTL (opzionalmente persistente) davanti al fetcher
+        if tcg_fetcher.config.get('cache', {}).get('enabled', False):
+            from communication.api.cached_fetcher import CachedTCGFetcher
+            tcg_fetcher = CachedTCGFetcher.from_config(tcg_fetcher)
+            logger.info("Cache delle risposte TCGDEX attiva")
+
+        # Modalità ASGI: ricerche su TCGDEX sull'event loop (import differito, aiohttp e' opzionale)
+        async_tcg_fetcher = None
+        if server_config.get('mode') == SERVING_MODE_ASGI:
+            from communication.api.async_tcg_fetcher import AsyncTCGFetcher
+            async_tcg_fetcher = AsyncTCGFetcher.from_fetcher(tcg_fetcher)
+
+    # Cache su disco del proxy immagini
+    with profile.phase('image_cache'):
+        image_config = tcg_fetcher.config.get('images', {}) or {}
+        image_cache = None
+        if image_config.get('enabled', True):
+            from communication.api.image_cache import ImageCache
+            image_cache = ImageCache(
+                directory=image_config.get('directory', 'cache/images'),
+                max_bytes=int(image_config.get('max_megabytes', 256) * 1024 * 1024)
+            )
 
     # 2. Creazione del CORE MANAGER (L'Orchestratore)
     # Il Core Manager prende le dipendenze di Livello Dati e Livello API Esterna.
-    core_manager = CoreManager(
-        data_manager=data_manager, 
-        tcg_fetcher=tcg_fetcher
-    )
-    print("✓ CoreManager (Livello Applicativo/Logico) inizializzato.")
+    with profile.phase('core_manager'):
+        # Arricchimento delle carte aggiunte in background (POST /api/collection -> 202): qui solo la coda,
+        # i worker vengono avviati dai punti di ingresso che servono richieste (start_background_workers)
+        from application.core_manager import CoreManager
+        enrichment_config = tcg_fetcher.config.get('enrichment', {}) or {}
+        enrichment_queue = None
+        if enrichment_config.get('enabled', True):
+            from persistence.enrichment_queue_manager import EnrichmentQueueManager
+            enrichment_queue = EnrichmentQueueManager(app=app)
+
+        core_manager = CoreManager(
+            data_manager=data_manager, 
+            tcg_fetcher=tcg_fetcher,
+            catalog_manager=catalog_manager,
+            catalog_mode=tcg_fetcher.config.get('catalog', {}).get('mode', 'remote'),
+            coalescing_timeout=tcg_fetcher.config.get('coalescing', {}).get('timeout_seconds'),
+            image_cache=image_cache,
+            thumbnail_width=image_config.get('thumbnail_width', 245),
+            async_tcg_fetcher=async_tcg_fetcher,
+            enrichment_queue=enrichment_queue,
+            enrichment_options=enrichment_options_from_config(enrichment_config),
+            search_limit=tcg_fetcher.config.get('search', {}).get('max_results', 250)
+        )
+    logger.info("CoreManager inizializzato",
+                extra={'catalog_mode': core_manager.catalog_mode, 'background_enrichment': core_manager.enrichment_enabled})
     
-    # 3. Inizializzazione e Avvio del Server REST API (Livello di Interfaccia)
+    # 3. Inizializzazione del Server REST API (Livello di Interfaccia)
     # Il server riceve SOLO il CoreManager, rendendolo disaccoppiato.
-    rest_api_server = RestApiServer(
-        core_manager=core_manager, 
-        host='0.0.0.0', 
-        port=5000,
-        app=app
-    )
-    print("✓ RestApiServer (Livello API) inizializzato.")
+    with profile.phase('api_server'):
+        from communication.api_server import RestApiServer
+        rest_api_server = RestApiServer(
+            core_manager=core_manager, 
+            host=server_config.get('host', '0.0.0.0'), 
+            port=server_config.get('port', 5000),
+            app=app,
+            mode=server_config.get('mode', 'dev'),
+            threads=server_config.get('threads', 8),
+            debug=server_config.get('debug', False),
+            shutdown_timeout=server_config.get('shutdown_timeout_seconds', 10),
+            image_max_age=image_config.get('max_age_seconds', 604800),
+            search_max_age=tcg_fetcher.config.get('cache', {}).get('client_max_age_seconds', 300),
+            max_change_streams=server_config.get('max_change_streams')
+        )
+    app.extensions['rest_api_server'] = rest_api_server
+    app.extensions['startup_profile'] = profile
+    logger.info("RestApiServer inizializzato", extra=profile.as_log_fields())
 
-    # 4. Avvio del Server
-    rest_api_server.start()
-    
-    print(f"Applicazione avviata. Accesso REST API su http://localhost:{5000}")
\ No newline at end of file
+    return app
+
+
+def start_background_workers(app: Flask):
+    """
+    Avvia i worker di arricchimento dell'app. Va chiamata solo dai punti di ingresso che servono
+    richieste (main, worker gunicorn, wsgi.py): gli strumenti a riga di comando che usano create_app
+    (--profile-startup) non devono prelevare job dalla coda condivisa.
+    """
+    app.extensions['rest_api_server'].core_manager.start_enrichment_workers()
+
+
+def run_gunicorn(app_config: dict):
+    """
+    Avvia gunicorn in modo programmatico. Ogni worker costruisce la propria app
+    (niente connessioni SQLite o sessioni HTTP condivise attraverso il fork).
+    """
+    from gunicorn.app.base import BaseApplication
+
+    server_config = app_config.get('server', {}) or {}
+
+    class GunicornApplication(BaseApplication):
+
+        def load_config(self):
+            self.cfg.set('bind', f"{server_config.get('host', '0.0.0.0')}:{server_config.get('port', 5000)}")
+            self.cfg.set('workers', server_config.get('workers', 2))
+            self.cfg.set('threads', server_config.get('threads', 8))
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('graceful_timeout', server_config.get('shutdown_timeout_seconds', 10))
+
+        def load(self):
+            # Eseguito in ogni worker dopo il fork: i thread dei worker di arricchimento nascono qui
+            app = create_app(app_config)
+            start_background_workers(app)
+            return app
+
+    GunicornApplication().run()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Mini-Pokedex TCG")
+    parser.add_argument("--config", default=APP_CONFIG_FILE, help="File di configurazione dell'applicazione")
+    parser.add_argument("--mode", choices=SERVING_MODES, help="Sovrascrive server.mode")
+    parser.add_argument("--host", help="Sovrascrive server.host")
+    parser.add_argument("--port", type=int, help="Sovrascrive server.port")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Costruisce l'app, stampa la durata delle fasi di avvio ed esce")
+    args = parser.parse_args()
+
+    app_config = load_app_config(args.config)
+    server_config = app_config.setdefault('server', {})
+    for key in ('mode', 'host', 'port'):
+        if getattr(args, key) is not None:
+            server_config[key] = getattr(args, key)
+
+    logging_config = app_config.get('logging', {}) or {}
+    configure_logging(logging_config.get('level', 'INFO'), logging_config.get('format', 'text'))
+    logger.info("Avvio Applicazione Mini-Pokedex TCG", extra={'mode': server_config.get('mode', 'dev')})
+
+    if server_config.get('mode') == SERVING_MODE_GUNICORN:
+        run_gunicorn(app_config)
+        return
+
+    app = create_app(app_config)
+
+    if args.profile_startup:
+        print(app.extensions['startup_profile'].report())
+        return
+
+    # 4. Avvio dei worker di arricchimento e del Server (fino a SIGINT/SIGTERM, con spegnimento controllato)
+    start_background_workers(app)
+    app.extensions['rest_api_server'].serve_until_signal()
+
+
+if __name__ == '__main__':
+    main()
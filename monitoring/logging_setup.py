@@ -0,0 +1,55 @@
+"""
+Configurazione del logging strutturato dell'applicazione.
+I campi passati con extra={...} vengono inclusi nel record (JSON o key=value).
+"""
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+# Attributi standard di LogRecord: tutto il resto proviene da extra={...}
+_STANDARD_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD_RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """Un oggetto JSON per riga: adatto ad essere raccolto da un sistema di log aggregation."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Formato leggibile da console con i campi strutturati in coda (key=value)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')
+        fields = ' '.join(f"{key}={value}" for key, value in _extra_fields(record).items())
+        line = f"{timestamp} {record.levelname:<7} [{record.name}] {record.getMessage()}"
+        if fields:
+            line = f"{line} | {fields}"
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+def configure_logging(level: str = 'INFO', log_format: str = 'text'):
+    """Configura il root logger (livello e formato 'text' o 'json')."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else KeyValueFormatter())
+
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [handler]
+    root_logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
@@ -0,0 +1,215 @@
+"""
+Metriche dell'applicazione (contatori, gauge, istogrammi) esposte in formato testo Prometheus.
+Tutte le metriche sono thread-safe e misurate con un clock monotono (time.perf_counter).
+"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket (secondi) adatti a latenze da microsecondi (cache) a secondi (TCGDEX)
+DEFAULT_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: tuple, labelvalues: tuple, extra: dict = None) -> str:
+    pairs = list(zip(labelnames, labelvalues)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class Counter(_Metric):
+    """Contatore monotono, opzionalmente con label."""
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Valore istantaneo: impostato esplicitamente o letto da callback al momento dello scrape."""
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._callbacks = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, callback, **labels):
+        """Registra una funzione senza argomenti il cui risultato viene letto ad ogni scrape."""
+        with self._lock:
+            self._callbacks[self._key(labels)] = callback
+
+    def render(self) -> list:
+        lines = super().render()
+        with self._lock:
+            values = dict(self._values)
+            callbacks = dict(self._callbacks)
+        for key, callback in callbacks.items():
+            try:
+                values[key] = callback()
+            except Exception:
+                continue
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Istogramma a bucket cumulativi (compatibile con histogram_quantile di Prometheus)."""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # chiave label -> [conteggi per bucket (+Inf incluso), somma, conteggio]
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list:
+        lines = super().render()
+        with self._lock:
+            series_items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series_items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Raccolta delle metriche dell'applicazione."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Registrazione idempotente: la stessa metrica puo' essere richiesta da piu' moduli
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        """Serializza tutte le metriche nel formato di esposizione testuale Prometheus (v0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# -------------------------------------------------------------------
+# METRICHE CONDIVISE TRA I LIVELLI
+# -------------------------------------------------------------------
+
+# Durata delle singole fasi: http_upstream, json_decode, dto_build, db_query, serialization
+STAGE_DURATION = REGISTRY.histogram(
+    'tcg_stage_duration_seconds', 'Durata delle fasi di elaborazione di una richiesta', ('stage',)
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    'tcg_upstream_requests_total', 'Richieste HTTP verso TCGDEX per esito', ('outcome',)
+)
+CACHE_EVENTS = REGISTRY.counter(
+    'tcg_cache_events_total', 'Eventi della cache delle risposte TCGDEX', ('event',)
+)
+DB_OPERATIONS = REGISTRY.counter(
+    'tcg_db_operations_total', 'Operazioni sul database per tipo', ('operation',)
+)
+CORE_REQUESTS = REGISTRY.counter(
+    'tcg_core_requests_total', 'Richieste gestite dal CoreManager per operazione', ('operation',)
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    'tcg_http_request_duration_seconds', 'Durata delle richieste REST per endpoint', ('endpoint', 'method', 'status')
+)
+
+
+def time_stage(stage: str):
+    """Context manager che misura una fase nell'istogramma tcg_stage_duration_seconds."""
+    return STAGE_DURATION.time(stage=stage)
+
+
+def track_db_operation(operation: str):
+    """Decoratore per i metodi del livello di persistenza: conta l'operazione e ne misura la durata."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            DB_OPERATIONS.inc(operation=operation)
+            with time_stage('db_query'):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
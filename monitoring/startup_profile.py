@@ -0,0 +1,51 @@
+"""
+Profilo dell'avvio: durata dell'import dei moduli e delle fasi di inizializzazione dell'app.
+Le durate sono esportate nella gauge tcg_startup_phase_seconds e riassunte nel log di avvio
+(python main.py --profile-startup stampa il dettaglio ed esce senza avviare il server).
+"""
+import time
+from contextlib import contextmanager
+from monitoring.metrics import REGISTRY
+
+STARTUP_PHASE_DURATION = REGISTRY.gauge(
+    'tcg_startup_phase_seconds', 'Durata delle fasi di avvio dell\'applicazione', ('phase',)
+)
+
+
+class StartupProfile:
+    """Raccoglie, in ordine, le fasi dell'avvio e la loro durata in secondi."""
+
+    def __init__(self):
+        self.phases = []
+
+    def record(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+        STARTUP_PHASE_DURATION.set(seconds, phase=name)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Misura il blocco come fase 'name'."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.phases)
+
+    def as_log_fields(self) -> dict:
+        """Campi per extra={...} del log: una chiave <fase>_ms per fase piu' il totale."""
+        fields = {f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.phases}
+        fields['total_ms'] = round(self.total_seconds * 1000, 1)
+        return fields
+
+    def report(self) -> str:
+        """Tabella leggibile delle fasi con la quota sul totale."""
+        total = self.total_seconds or 1
+        lines = [f"{'Fase':<14} {'ms':>8} {'%':>6}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<14} {seconds * 1000:>8.1f} {seconds / total * 100:>5.1f}%")
+        lines.append(f"{'totale':<14} {self.total_seconds * 1000:>8.1f}")
+        return '\n'.join(lines)
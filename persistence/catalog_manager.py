@@ -0,0 +1,191 @@
+from datetime import datetime, timezone
+from flask import Flask
+from sqlalchemy import select, delete, insert, update, func
+from persistence.database.model import db, CatalogCard, CatalogSet
+from persistence.data_manager import IN_CLAUSE_CHUNK_SIZE
+from monitoring.metrics import track_db_operation
+
+
+class CatalogManager:
+    """
+    Gestisce il mirror locale del catalogo TCGDEX (tabelle catalog_set e catalog_card).
+    Permette di servire le ricerche per nome e per ID senza contattare l'API esterna.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+
+    # --- SINCRONIZZAZIONE ---
+
+    def get_set_card_counts(self) -> dict:
+        """Restituisce {set_id: card_count} per i set gia' sincronizzati."""
+        with self.app.app_context():
+            rows = db.session.execute(select(CatalogSet.id, CatalogSet.card_count)).all()
+            return {set_id: card_count for set_id, card_count in rows}
+
+    @track_db_operation('catalog_replace_set')
+    def replace_set(self, set_data: dict):
+        """
+        Sostituisce il contenuto di un set nel mirror (set + carte) in un'unica transazione.
+        """
+        set_id = set_data['id']
+        with self.app.app_context():
+            try:
+                db.session.execute(delete(CatalogCard).where(CatalogCard.set_id == set_id))
+                db.session.execute(delete(CatalogSet).where(CatalogSet.id == set_id))
+
+                db.session.execute(insert(CatalogSet), [{
+                    'id': set_id,
+                    'name': set_data.get('name', 'Unknown Set'),
+                    'release_date': set_data.get('release_date', 'N/A'),
+                    'card_count': set_data.get('card_count', 0),
+                    'synced_at': datetime.now(timezone.utc).isoformat()
+                }])
+
+                card_rows = [
+                    {
+                        'id': card['id'],
+                        'local_id': card.get('local_id'),
+                        'name': card.get('name', 'Unknown Card'),
+                        'type': card.get('type'),
+                        'rarity': card.get('rarity'),
+                        'image_url': card.get('image_url'),
+                        'set_id': set_id,
+                        'is_full_detail': False
+                    }
+                    for card in set_data.get('cards', []) if card.get('id')
+                ]
+                if card_rows:
+                    db.session.execute(insert(CatalogCard), card_rows)
+
+                db.session.commit()
+                return len(card_rows)
+            except Exception:
+                db.session.rollback()
+                raise
+
+    @track_db_operation('catalog_register_sets')
+    def register_sets(self, remote_sets: list) -> int:
+        """
+        Registra i set di TCGDEX non ancora presenti nel mirror, senza carte e con synced_at NULL:
+        finche' non vengono sincronizzati il mirror risulta incompleto (vedi is_complete).
+        """
+        with self.app.app_context():
+            existing = set(db.session.execute(select(CatalogSet.id)).scalars())
+            rows = [
+                {'id': remote_set['id'], 'name': remote_set.get('name', 'Unknown Set'), 'release_date': 'N/A',
+                 'card_count': 0, 'synced_at': None}
+                for remote_set in remote_sets if remote_set['id'] not in existing
+            ]
+            if rows:
+                db.session.execute(insert(CatalogSet), rows)
+                db.session.commit()
+            return len(rows)
+
+    @track_db_operation('catalog_update_card_details')
+    def update_card_details(self, cards: list) -> int:
+        """Aggiorna tipo, rarità e immagine delle carte con i dati del lookup completo."""
+        rows = [
+            {'id': card['id'], 'type': card.get('type'), 'rarity': card.get('rarity'),
+             'image_url': card.get('image_url'), 'is_full_detail': True}
+            for card in cards if card and card.get('id')
+        ]
+        if not rows:
+            return 0
+
+        with self.app.app_context():
+            # UPDATE executemany per chiave primaria
+            db.session.execute(update(CatalogCard), rows)
+            db.session.commit()
+            return len(rows)
+
+    # --- LETTURA ---
+
+    def has_data(self) -> bool:
+        with self.app.app_context():
+            return db.session.execute(select(CatalogCard.id).limit(1)).first() is not None
+
+    @track_db_operation('catalog_is_complete')
+    def is_complete(self) -> bool:
+        """True se il mirror contiene almeno un set e tutti i set registrati sono stati sincronizzati."""
+        with self.app.app_context():
+            if db.session.execute(select(CatalogSet.id).limit(1)).first() is None:
+                return False
+            unsynced = select(CatalogSet.id).where(CatalogSet.synced_at.is_(None)).limit(1)
+            return db.session.execute(unsynced).first() is None
+
+    def _to_dict(self, row) -> dict:
+        # Stessa forma del DTO restituito dal TCGFetcher
+        return {
+            'id': row.id,
+            'name': row.name,
+            'image_url': row.image_url,
+            'set': row.set_name,
+            'set_id': row.set_id,
+            'type': row.type or 'N/A',
+            'rarity': row.rarity or 'N/A',
+        }
+
+    def _select_cards(self):
+        return (
+            select(
+                CatalogCard.id, CatalogCard.name, CatalogCard.image_url, CatalogCard.set_id,
+                CatalogCard.type, CatalogCard.rarity, CatalogCard.is_full_detail,
+                CatalogSet.name.label('set_name')
+            )
+            .join(CatalogSet, CatalogCard.set_id == CatalogSet.id)
+        )
+
+    @track_db_operation('catalog_search_by_name')
+    def search_by_name(self, name_query: str, limit: int = None) -> list:
+        """Ricerca per nome (sottostringa, case-insensitive) sul mirror locale, al massimo limit carte."""
+        # I nomi sono salvati con l'apostrofo sostituito (vedi TCGFetcher._create_dto_from_raw)
+        normalized_query = name_query.lower().replace("'", "^")
+        with self.app.app_context():
+            stmt = (
+                self._select_cards()
+                .where(func.lower(CatalogCard.name).like(f'%{normalized_query}%'))
+                .order_by(CatalogCard.name.asc(), CatalogCard.id.asc())
+                .limit(limit)
+            )
+            return [self._to_dict(row) for row in db.session.execute(stmt)]
+
+    def iter_card_names(self, batch_size: int = 5000):
+        """Nomi distinti delle carte del mirror (per l'indice di autocompletamento), letti a blocchi."""
+        with self.app.app_context():
+            stmt = select(CatalogCard.name).distinct().execution_options(yield_per=batch_size, stream_results=True)
+            for name in db.session.execute(stmt).scalars():
+                yield name
+
+    @track_db_operation('catalog_get_card')
+    def get_card(self, card_id: str):
+        """
+        Restituisce (carta, is_full_detail) dal mirror locale, oppure (None, False) se assente.
+        """
+        with self.app.app_context():
+            row = db.session.execute(self._select_cards().where(CatalogCard.id == card_id)).first()
+            if row is None:
+                return None, False
+            return self._to_dict(row), row.is_full_detail
+
+    @track_db_operation('catalog_get_cards')
+    def get_cards(self, card_ids: list) -> dict:
+        """Versione batch di get_card: {card_id: (carta, is_full_detail)} per gli ID presenti."""
+        found = {}
+        card_ids = list(dict.fromkeys(card_ids))
+        with self.app.app_context():
+            for start in range(0, len(card_ids), IN_CLAUSE_CHUNK_SIZE):
+                chunk = card_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+                for row in db.session.execute(self._select_cards().where(CatalogCard.id.in_(chunk))):
+                    found[row.id] = (self._to_dict(row), row.is_full_detail)
+        return found
+
+    def get_stats(self) -> dict:
+        with self.app.app_context():
+            return {
+                'sets': db.session.execute(select(func.count()).select_from(CatalogSet)).scalar_one(),
+                'cards': db.session.execute(select(func.count()).select_from(CatalogCard)).scalar_one(),
+                'full_detail_cards': db.session.execute(
+                    select(func.count()).select_from(CatalogCard).where(CatalogCard.is_full_detail.is_(True))
+                ).scalar_one(),
+            }
@@ -1,8 +1,69 @@
 from flask import Flask
 from sqlalchemy.exc import IntegrityError
-from persistence.database.model import db, Card, Set 
+from persistence.database.model import db, Card, Set, CollectionState, CollectionStat, CollectionChange, CatalogSet
+from persistence.database.model import STAT_TOTAL, STAT_SET, STAT_TYPE, STAT_RARITY, CHANGE_ADD, CHANGE_DELETE
+from monitoring.metrics import track_db_operation, DB_OPERATIONS
+import logging
 from sqlalchemy import select
 from sqlalchemy import func
+from sqlalchemy import insert, update, delete, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import text, table, column, tuple_
+import base64
+import json
+import re
+
+logger = logging.getLogger(__name__)
+
+# Numero massimo di parametri per singola clausola IN (limite variabili SQLite)
+IN_CLAUSE_CHUNK_SIZE = 900
+
+# Change log: versioni conservate (le piu' vecchie vengono potate ad ogni scrittura) e numero massimo
+# di righe restituite da get_changes_since (oltre, il client deve ricaricare la collezione)
+CHANGE_LOG_RETENTION_VERSIONS = 10000
+CHANGE_FEED_MAX_ROWS = 5000
+
+# Tabella virtuale FTS5 creata da initialize_db (vedi model.py)
+card_fts = table('card_fts', column('card_id'), column('rank'))
+
+# Campi selezionabili con ?fields= e relative colonne (il nome del set richiede la JOIN con 'set')
+CARD_FIELD_COLUMNS = {
+    'id': Card.id,
+    'name': Card.name,
+    'type': Card.type,
+    'rarity': Card.rarity,
+    'image_url': Card.image_url,
+    'set': Set.name,
+    'set_id': Card.set_id,
+}
+
+# Dettagli JSON scritti dall'arricchimento in background: restituiti solo se richiesti con ?fields=
+CARD_DETAIL_FIELD_COLUMNS = {
+    'variants': Card.variants,
+    'pricing': Card.pricing,
+}
+
+# Filtri di GET /api/collection (ognuno accetta piu' valori, combinati in OR; filtri diversi in AND)
+CARD_FILTER_COLUMNS = {
+    'type': Card.type,
+    'rarity': Card.rarity,
+    'set_id': Card.set_id,
+}
+
+# Chiavi di ordinamento: colonna principale seguita da (name, id), cosi' l'ordine e' totale
+# e coincide con gli indici composti (colonna, name, id) dichiarati in model.py
+CARD_SORT_KEYS = {
+    'name': (Card.name, Card.id),
+    'type': (Card.type, Card.name, Card.id),
+    'rarity': (Card.rarity, Card.name, Card.id),
+    'set_id': (Card.set_id, Card.name, Card.id),
+}
+SORT_ORDERS = ('asc', 'desc')
+
+def _encode_json_column(value):
+    """Dizionario o lista -> testo JSON per le colonne variants/pricing (None se assente)."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False) if value else None
+
 
 class DataManager:
     """
@@ -15,6 +76,15 @@ class DataManager:
         self.app = app
         
     
+    @staticmethod
+    def _dialect_insert():
+        """insert() del dialetto corrente (SQLite o PostgreSQL), con il supporto di ON CONFLICT."""
+        if db.engine.dialect.name == 'postgresql':
+            # Import differito: il dialetto PostgreSQL (e asyncpg) costa ~30 ms all'avvio con SQLite
+            from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+            return postgresql_insert
+        return sqlite_insert
+
     def _get_or_create_set(self, set_id: str, set_name: str):
         """
         Funzione helper: Cerca un Set per ID. Se non esiste, lo crea per la Foreign Key.
@@ -25,12 +95,151 @@ class DataManager:
         set_obj = db.session.get(Set, set_id) 
         
         if set_obj is None:
-            # 2. Se non trovato, crea un nuovo Set con dati di base
-            set_obj = Set(id=set_id, name=set_name, release_date="N/A") 
-            db.session.add(set_obj)
+            # 2. Se non trovato, crea un nuovo Set con dati di base. ON CONFLICT DO NOTHING: aggiunte
+            # concorrenti (worker di arricchimento) possono creare lo stesso Set nello stesso momento.
             # Il commit avverrà solo se la Card viene salvata con successo.
+            db.session.execute(self._dialect_insert()(Set).values(
+                id=set_id, name=set_name, release_date="N/A"
+            ).on_conflict_do_nothing(index_elements=[Set.id]))
+            set_obj = db.session.get(Set, set_id)
         return set_obj
 
+    # --- VERSIONE DELLA COLLEZIONE ---
+    def _bump_version(self) -> int:
+        """Incrementa la versione della collezione (nella transazione corrente, prima del commit)."""
+        return db.session.execute(
+            update(CollectionState).where(CollectionState.id == 1)
+            .values(version=CollectionState.version + 1)
+            .returning(CollectionState.version)
+        ).scalar_one()
+
+    def _record_changes(self, operation: str, card_ids: list):
+        """
+        Nuova versione della collezione e relative righe del change log, nella transazione corrente:
+        il commit della modifica rende visibili insieme carte, versione e change log.
+        """
+        version = self._bump_version()
+        db.session.execute(insert(CollectionChange), [
+            {'version': version, 'card_id': card_id, 'operation': operation} for card_id in card_ids
+        ])
+        # Potatura: i client piu' indietro della finestra conservata ricaricano la collezione
+        db.session.execute(
+            delete(CollectionChange).where(CollectionChange.version <= version - CHANGE_LOG_RETENTION_VERSIONS)
+        )
+
+    # --- STATISTICHE AGGREGATE ---
+    @staticmethod
+    def _stat_keys(set_id, card_type, rarity) -> list:
+        """Contatori (dimensione, chiave) interessati da una carta."""
+        return [(STAT_TOTAL, ''), (STAT_SET, set_id), (STAT_TYPE, card_type or 'N/A'), (STAT_RARITY, rarity or 'N/A')]
+
+    def _adjust_stats(self, cards: list, sign: int):
+        """
+        Aggiorna i contatori aggregati (nella transazione corrente) per le carte inserite (+1)
+        o cancellate (-1). cards: tuple (set_id, type, rarity).
+        """
+        deltas = {}
+        for set_id, card_type, rarity in cards:
+            for stat_key in self._stat_keys(set_id, card_type, rarity):
+                deltas[stat_key] = deltas.get(stat_key, 0) + sign
+        if not deltas:
+            return
+
+        # Upsert: INSERT ... ON CONFLICT (dimension, key) DO UPDATE SET count = count + delta
+        stmt = self._dialect_insert()(CollectionStat).values([
+            {'dimension': dimension, 'key': key, 'count': delta} for (dimension, key), delta in deltas.items()
+        ])
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[CollectionStat.dimension, CollectionStat.key],
+            set_={'count': CollectionStat.count + stmt.excluded.count}
+        ))
+        if sign < 0:
+            db.session.execute(delete(CollectionStat).where(CollectionStat.count <= 0))
+
+    @track_db_operation('get_collection_stats')
+    def get_collection_stats(self) -> dict:
+        """
+        Statistiche della collezione lette dai contatori aggregati (costo indipendente dal numero di carte).
+        La percentuale di completamento di un set richiede il mirror del catalogo (numero di carte del set).
+        """
+        stats = {'total_cards': 0, 'by_set': [], 'by_type': {}, 'by_rarity': {}}
+        with self.app.app_context():
+            rows = db.session.execute(
+                select(CollectionStat.dimension, CollectionStat.key, CollectionStat.count, Set.name, CatalogSet.card_count)
+                .outerjoin(Set, and_(CollectionStat.dimension == STAT_SET, Set.id == CollectionStat.key))
+                .outerjoin(CatalogSet, and_(CollectionStat.dimension == STAT_SET, CatalogSet.id == CollectionStat.key))
+                .where(CollectionStat.count > 0)
+                .order_by(CollectionStat.dimension, CollectionStat.count.desc(), CollectionStat.key)
+            ).all()
+
+        for dimension, key, count, set_name, set_card_count in rows:
+            if dimension == STAT_TOTAL:
+                stats['total_cards'] = count
+            elif dimension == STAT_SET:
+                stats['by_set'].append({
+                    'set_id': key,
+                    'name': set_name,
+                    'owned': count,
+                    'total': set_card_count or None,
+                    'completion_pct': round(100 * count / set_card_count, 1) if set_card_count else None,
+                })
+            elif dimension == STAT_TYPE:
+                stats['by_type'][key] = count
+            elif dimension == STAT_RARITY:
+                stats['by_rarity'][key] = count
+        return stats
+
+    @track_db_operation('get_collection_version')
+    def get_collection_version(self) -> int:
+        """Versione corrente della collezione: cambia ad ogni inserimento o cancellazione."""
+        with self.app.app_context():
+            return db.session.execute(
+                select(CollectionState.version).where(CollectionState.id == 1)
+            ).scalar() or 0
+
+    @track_db_operation('get_changes_since')
+    def get_changes_since(self, since: int) -> dict:
+        """
+        Differenze della collezione dopo la versione 'since', compattate per carta (conta l'ultima operazione):
+        {'version', 'reset', 'added': [carte], 'deleted': [ID]}.
+        'reset' e' True quando le differenze non sono ricostruibili (versione potata dal change log,
+        precedente al change log o successiva a quella corrente) o sono troppe: il client ricarica tutto.
+        """
+        with self.app.app_context():
+            version = db.session.execute(
+                select(CollectionState.version).where(CollectionState.id == 1)
+            ).scalar() or 0
+            result = {'version': version, 'reset': False, 'added': [], 'deleted': []}
+            if since == version:
+                return result
+
+            oldest = db.session.execute(select(func.min(CollectionChange.version))).scalar()
+            if since > version or since < 0 or oldest is None or oldest > since + 1:
+                result['reset'] = True
+                return result
+
+            rows = db.session.execute(
+                select(CollectionChange.card_id, CollectionChange.operation)
+                .where(CollectionChange.version > since, CollectionChange.version <= version)
+                .order_by(CollectionChange.version)
+                .limit(CHANGE_FEED_MAX_ROWS + 1)
+            ).all()
+            if len(rows) > CHANGE_FEED_MAX_ROWS:
+                result['reset'] = True
+                return result
+
+            last_operation = {card_id: operation for card_id, operation in rows}
+            added_ids = [card_id for card_id, operation in last_operation.items() if operation == CHANGE_ADD]
+            result['deleted'] = [card_id for card_id, operation in last_operation.items() if operation == CHANGE_DELETE]
+            for start in range(0, len(added_ids), IN_CLAUSE_CHUNK_SIZE):
+                chunk = added_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+                result['added'].extend(
+                    self._card_row_to_dict(row)
+                    for row in db.session.execute(self._select_card_rows().where(Card.id.in_(chunk)))
+                )
+            return result
+
+    @track_db_operation('add_card')
     def add_card(self, card_data: dict):
         """
         Aggiunge una nuova carta al database, gestendo la relazione Set.
@@ -62,11 +271,15 @@ class DataManager:
                     type=card_data.get('type'),
                     rarity=card_data.get('rarity'),
                     image_url=card_data.get('image_url'),
+                    variants=_encode_json_column(card_data.get('variants')),
+                    pricing=_encode_json_column(card_data.get('pricing')),
                     # Collega l'oggetto Set tramite la relazione
                     set_info=set_obj 
                 )
                 
                 db.session.add(new_card)
+                self._adjust_stats([(set_id, new_card.type, new_card.rarity)], +1)
+                self._record_changes(CHANGE_ADD, [card_id])
                 db.session.commit()
                 
                 return True, f"Card {card_data.get('name')} successfully added to collection."
@@ -78,63 +291,342 @@ class DataManager:
                 db.session.rollback()
                 return False, f"Unexpected DB Error: {e}"
 
+    # --- CREATE (Bulk) ---
+    def _select_existing_ids(self, column, ids: list) -> set:
+        """Restituisce gli ID gia' presenti per la colonna indicata (una query per blocco di ID)."""
+        existing = set()
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = ids[start:start + IN_CLAUSE_CHUNK_SIZE]
+            existing.update(db.session.execute(select(column).where(column.in_(chunk))).scalars())
+        return existing
+
+    @track_db_operation('get_existing_card_ids')
+    def get_existing_card_ids(self, card_ids: list) -> set:
+        """Restituisce il sottoinsieme di card_ids gia' presente nella collezione."""
+        with self.app.app_context():
+            return self._select_existing_ids(Card.id, list(card_ids))
+
+    @track_db_operation('add_cards')
+    def add_cards(self, cards_data: list) -> list:
+        """
+        Inserisce molte carte in un'unica transazione.
+        Le Card e i Set esistenti vengono pre-caricati con una query ciascuno, poi
+        i nuovi Set e le nuove Card sono inseriti con due INSERT executemany ed un solo commit.
+        Restituisce un report per carta: {'id', 'success', 'message'}.
+        """
+        if not cards_data:
+            return []
+
+        with self.app.app_context():
+            report = []
+            card_rows = []
+            set_rows = {}
+
+            try:
+                card_ids = [card.get('id') for card in cards_data if card.get('id')]
+                existing_card_ids = self._select_existing_ids(Card.id, card_ids)
+                existing_set_ids = self._select_existing_ids(Set.id, list({card.get('set_id') for card in cards_data if card.get('set_id')}))
+
+                for card_data in cards_data:
+                    card_id = card_data.get('id')
+                    set_id = card_data.get('set_id')
+
+                    if not card_id:
+                        report.append({'id': card_id, 'success': False, 'message': "Missing card ID."})
+                        continue
+                    if card_id in existing_card_ids:
+                        report.append({'id': card_id, 'success': False, 'message': f"Card ID {card_id} is already in the collection."})
+                        continue
+                    if not set_id:
+                        report.append({'id': card_id, 'success': False, 'message': "Missing Set ID required for database integrity."})
+                        continue
+
+                    if set_id not in existing_set_ids and set_id not in set_rows:
+                        set_rows[set_id] = {'id': set_id, 'name': card_data.get('set_name'), 'release_date': "N/A"}
+
+                    card_rows.append({
+                        'id': card_id,
+                        'name': card_data.get('name', 'Unknown Card'),
+                        'type': card_data.get('type'),
+                        'rarity': card_data.get('rarity'),
+                        'image_url': card_data.get('image_url'),
+                        'set_id': set_id,
+                        'variants': _encode_json_column(card_data.get('variants')),
+                        'pricing': _encode_json_column(card_data.get('pricing')),
+                    })
+                    # Evita duplicati all'interno dello stesso batch
+                    existing_card_ids.add(card_id)
+                    report.append({'id': card_id, 'success': True, 'message': f"Card {card_data.get('name')} successfully added to collection."})
+
+                if set_rows:
+                    # ON CONFLICT DO NOTHING: un import o un worker di arricchimento concorrente puo' aver
+                    # creato lo stesso Set dopo il pre-caricamento, senza annullare l'intero batch
+                    db.session.execute(
+                        self._dialect_insert()(Set).on_conflict_do_nothing(index_elements=[Set.id]),
+                        list(set_rows.values())
+                    )
+                if card_rows:
+                    db.session.execute(insert(Card), card_rows)
+                    self._adjust_stats([(row['set_id'], row['type'], row['rarity']) for row in card_rows], +1)
+                    self._record_changes(CHANGE_ADD, [row['id'] for row in card_rows])
+                db.session.commit()
+                return report
+
+            except IntegrityError:
+                db.session.rollback()
+                error_message = "Database error (Integrity constraint failed). Annullamento transazione."
+            except Exception as e:
+                db.session.rollback()
+                error_message = f"Unexpected DB Error: {e}"
+
+            # La transazione e' unica: in caso di errore nessuna carta e' stata salvata
+            return [
+                {'id': entry['id'], 'success': False, 'message': error_message if entry['success'] else entry['message']}
+                for entry in report
+            ]
+
     # --- READ (Tutti) ---
+    def _build_fts_match(self, search_query: str):
+        """
+        Converte la ricerca dell'utente in un'espressione MATCH FTS5:
+        ogni parola diventa un prefisso ("pika"*) e tutte devono essere presenti.
+        """
+        tokens = re.findall(r'\w+', search_query.lower())
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def _apply_name_filter(self, stmt, search_query: str):
+        """Applica il filtro per nome: indice FTS5 (con ranking) se disponibile, altrimenti LIKE."""
+        fts_match = self._build_fts_match(search_query) if self.app.config.get('CARD_FTS_ENABLED') else None
+
+        if fts_match is None:
+            return stmt.where(func.lower(Card.name).like(f'%{search_query.lower()}%')).order_by(Card.name.asc())
+
+        return (
+            stmt.join(card_fts, card_fts.c.card_id == Card.id)
+            .where(text('card_fts MATCH :fts_match').bindparams(fts_match=fts_match))
+            # rank = bm25: i risultati più pertinenti per primi
+            .order_by(card_fts.c.rank, Card.name.asc())
+        )
+
+    def _select_card_rows(self):
+        """
+        SELECT delle sole colonne necessarie con JOIN sul Set: una sola query,
+        nessun oggetto ORM e nessun lazy load di Card.set_info per riga.
+        """
+        return (
+            select(Card.id, Card.name, Card.type, Card.rarity, Card.image_url, Card.set_id, Set.name.label('set_name'))
+            .outerjoin(Set, Card.set_id == Set.id)
+        )
+
+    def _card_row_to_dict(self, row) -> dict:
+        return {
+            'id': row.id,
+            'name': row.name,
+            'type': row.type,
+            'rarity': row.rarity,
+            'image_url': row.image_url,
+            'set': row.set_name if row.set_name is not None else 'Unknown Set',
+            'set_id': row.set_id
+        }
+
+    @track_db_operation('get_all_card')
     def get_all_card(self, search_query: str = None) -> list:
     
         with self.app.app_context():
-        # Inizia la query di selezione
-            stmt = db.select(Card).order_by(Card.name.asc())
+        # Inizia la query di selezione (solo colonne, Set in JOIN)
+            stmt = self._select_card_rows()
         
         # LOGICA CRITICA: Applica il filtro SOLO se la query è presente
             if search_query:
-                # Filtra i risultati se la query è fornita
-                stmt = stmt.where(func.lower(Card.name).like(f'%{search_query.lower()}%'))
+                # Filtra i risultati se la query è fornita (FTS5 o LIKE)
+                stmt = self._apply_name_filter(stmt, search_query)
+            else:
+                stmt = stmt.order_by(Card.name.asc())
         
-            # Esegue la query aggiornata (filtrata o completa)
-            cards = db.session.execute(stmt).scalars().all()
-            
-            # Mappa gli oggetti SQLAlchemy in una lista di dizionari JSON-serializzabili
-            return [
-                {
-                    'id': card.id,
-                    'name': card.name,
-                    'type': card.type,
-                    'rarity': card.rarity,
-                    'image_url': card.image_url,
-                    # Accesso alla relazione per recuperare il nome del set
-                    'set': card.set_info.name if card.set_info else 'Unknown Set', 
-                    'set_id': card.set_id
-                } 
-                for card in cards
+            # Esegue la query aggiornata (filtrata o completa): righe semplici, mappate direttamente in dizionari
+            return [self._card_row_to_dict(row) for row in db.session.execute(stmt)]
+
+    # --- READ (Streaming) ---
+    def iter_cards(self, batch_size: int = 1000):
+        """
+        Generatore su tutta la collezione (ordinata per name, id) a memoria costante:
+        le righe vengono lette dal cursore a blocchi di batch_size (yield_per / stream_results).
+        """
+        DB_OPERATIONS.inc(operation='iter_cards')
+        with self.app.app_context():
+            stmt = (
+                self._select_card_rows()
+                .order_by(Card.name.asc(), Card.id.asc())
+                .execution_options(yield_per=batch_size, stream_results=True)
+            )
+            for row in db.session.execute(stmt):
+                yield self._card_row_to_dict(row)
+
+    def iter_card_names(self, batch_size: int = 5000):
+        """Nomi distinti delle carte della collezione (per l'indice di autocompletamento), letti a blocchi."""
+        DB_OPERATIONS.inc(operation='iter_card_names')
+        with self.app.app_context():
+            stmt = select(Card.name).distinct().execution_options(yield_per=batch_size, stream_results=True)
+            for name in db.session.execute(stmt).scalars():
+                yield name
+
+    # --- READ (Paginato) ---
+    def _name_filter_clause(self, search_query: str):
+        """Clausola WHERE per il filtro per nome (FTS5 se disponibile, altrimenti LIKE), senza ordinamento."""
+        fts_match = self._build_fts_match(search_query) if self.app.config.get('CARD_FTS_ENABLED') else None
+
+        if fts_match is None:
+            return func.lower(Card.name).like(f'%{search_query.lower()}%')
+
+        matching_ids = text('SELECT card_id FROM card_fts WHERE card_fts MATCH :fts_match').bindparams(fts_match=fts_match)
+        return Card.id.in_(matching_ids)
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        """Cursore opaco con la chiave di ordinamento (es. name, id) dell'ultima carta restituita."""
+        return base64.urlsafe_b64encode(json.dumps(list(values)).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str, key_count: int = 2) -> list:
+        """Solleva ValueError se il cursore non e' valido (o non corrisponde all'ordinamento richiesto)."""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        # Le colonne di ordinamento sono tutte testuali: un cursore manomesso non arriva alla query
+        if (not isinstance(values, list) or len(values) != key_count
+                or not all(value is None or isinstance(value, str) for value in values)):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return values
+
+    @staticmethod
+    def _keyset_clause(sort_columns: tuple, values: list, descending: bool):
+        """
+        Condizione "dopo il cursore" per la paginazione keyset su (colonna, name, id).
+        Le colonne type e rarity possono essere NULL: i NULL vengono per primi in ordine
+        crescente e per ultimi in ordine decrescente (come l'ordinamento nativo di SQLite).
+        """
+        columns, key = tuple_(*sort_columns), tuple_(*values)
+        if not sort_columns[0].nullable or (values[0] is not None and not descending):
+            # name e set_id non sono mai NULL; in ordine crescente i NULL sono gia' stati superati
+            return columns < key if descending else columns > key
+
+        head, tail = sort_columns[0], tuple_(*sort_columns[1:])
+        tail_key = tuple_(*values[1:])
+        if values[0] is None:
+            after_nulls = tail < tail_key if descending else tail > tail_key
+            null_group = and_(head.is_(None), after_nulls)
+            return null_group if descending else or_(null_group, head.is_not(None))
+        return or_(columns < key, head.is_(None))
+
+    @track_db_operation('get_cards_page')
+    def get_cards_page(self, search_query: str = None, limit: int = 100, cursor: str = None, fields: list = None,
+                       filters: dict = None, sort: str = 'name', order: str = 'asc') -> dict:
+        """
+        Pagina della collezione con paginazione keyset, compilata in una sola query indicizzata.
+        - cursor: valore 'next_cursor' della pagina precedente (None per la prima pagina)
+        - fields: campi di CARD_FIELD_COLUMNS o CARD_DETAIL_FIELD_COLUMNS da restituire (default: tutti
+          quelli di CARD_FIELD_COLUMNS)
+        - filters: {'type' | 'rarity' | 'set_id': [valori]} (vedi CARD_FILTER_COLUMNS)
+        - sort/order: chiave di CARD_SORT_KEYS e direzione ('asc' o 'desc')
+        Restituisce {'cards', 'next_cursor', 'total'}; 'total' e' calcolato solo sulla prima pagina.
+        Solleva ValueError per ordinamenti, filtri o cursori non validi.
+        """
+        if sort not in CARD_SORT_KEYS:
+            raise ValueError(f"Invalid sort key: {sort} (expected one of {', '.join(CARD_SORT_KEYS)})")
+        if order not in SORT_ORDERS:
+            raise ValueError(f"Invalid sort order: {order} (expected 'asc' or 'desc')")
+        unknown_filters = set(filters or {}) - set(CARD_FILTER_COLUMNS)
+        if unknown_filters:
+            raise ValueError(f"Invalid filter: {', '.join(sorted(unknown_filters))}")
+
+        selectable_columns = {**CARD_FIELD_COLUMNS, **CARD_DETAIL_FIELD_COLUMNS}
+        fields = [field for field in (fields or CARD_FIELD_COLUMNS) if field in selectable_columns]
+        sort_columns = CARD_SORT_KEYS[sort]
+        descending = order == 'desc'
+
+        # Le colonne della chiave di ordinamento servono sempre per costruire il cursore
+        selected = {column.key: column for column in sort_columns}
+        selected.update({field: selectable_columns[field].label(field) for field in fields})
+
+        with self.app.app_context():
+            stmt = select(*selected.values())
+            if 'set' in fields:
+                stmt = stmt.outerjoin(Set, Card.set_id == Set.id)
+
+            filter_clauses = [
+                CARD_FILTER_COLUMNS[name].in_(values)
+                for name, values in (filters or {}).items() if values
             ]
+            if search_query:
+                filter_clauses.append(self._name_filter_clause(search_query))
+            if filter_clauses:
+                stmt = stmt.where(*filter_clauses)
+
+            if cursor:
+                stmt = stmt.where(self._keyset_clause(
+                    sort_columns, self.decode_cursor(cursor, len(sort_columns)), descending
+                ))
+
+            order_by = []
+            for column in sort_columns:
+                ordered = column.desc() if descending else column.asc()
+                if column.nullable:
+                    ordered = ordered.nulls_last() if descending else ordered.nulls_first()
+                order_by.append(ordered)
+
+            # Una riga in più per sapere se esiste una pagina successiva
+            stmt = stmt.order_by(*order_by).limit(limit + 1)
+            rows = db.session.execute(stmt).all()
+
+            total = None
+            if not cursor:
+                count_stmt = select(func.count()).select_from(Card)
+                if filter_clauses:
+                    count_stmt = count_stmt.where(*filter_clauses)
+                total = db.session.execute(count_stmt).scalar_one()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor([getattr(rows[-1], column.key) for column in sort_columns])
+
+        cards = []
+        for row in rows:
+            card = {field: getattr(row, field) for field in fields}
+            if 'set' in card and card['set'] is None:
+                card['set'] = 'Unknown Set'
+            for field in CARD_DETAIL_FIELD_COLUMNS.keys() & card.keys():
+                card[field] = json.loads(card[field]) if card[field] else None
+            cards.append(card)
+
+        return {'cards': cards, 'next_cursor': next_cursor, 'total': total}
 
     # --- READ (Singolo) ---
+    @track_db_operation('get_card_by_id')
     def get_card_by_id(self, card_id: str):
         """Recupera i dettagli di una singola carta tramite ID."""
         with self.app.app_context():
-            card = db.session.get(Card, card_id)
-            if card:
-                return {
-                    'id': card.id,
-                    'name': card.name,
-                    'type': card.type,
-                    'rarity': card.rarity,
-                    'image_url': card.image_url,
-                    'set': card.set_info.name if card.set_info else 'Unknown Set',
-                    'set_id': card.set_id
-                }
+            row = db.session.execute(self._select_card_rows().where(Card.id == card_id)).first()
+            if row:
+                return self._card_row_to_dict(row)
             return None # Restituisce None se non trovata
 
     # --- DELETE ---
+    @track_db_operation('delete_card_by_id')
     def delete_card_by_id(self, card_id: str):
         """Rimuove una carta dal database."""
         with self.app.app_context():
             card_to_delete = db.session.get(Card, card_id)
             if card_to_delete:
                 db.session.delete(card_to_delete)
+                self._adjust_stats([(card_to_delete.set_id, card_to_delete.type, card_to_delete.rarity)], -1)
+                self._record_changes(CHANGE_DELETE, [card_id])
                 db.session.commit()
                 # ⬅️ Logica di debug (rimossa la stampa diretta dal return)
                 return True, f"Card ID {card_id} deleted."
             
-            print(f"[DM DELETE] Carta non trovata ID: {card_id}")
+            logger.info("Carta da eliminare non trovata", extra={'card_id': card_id})
             return False, f"Card ID {card_id} not found."
\ No newline at end of file
@@ -0,0 +1,68 @@
+from sqlalchemy import event
+
+# Profilo SQLite predefinito per l'accesso concorrente da piu' thread:
+# - WAL: i lettori non bloccano lo scrittore (e viceversa)
+# - synchronous NORMAL: in WAL resta consistente, con un fsync per checkpoint invece che per commit
+# - busy_timeout: uno scrittore attende il lock invece di fallire subito con "database is locked"
+# - mmap_size / cache_size: letture servite dalla memoria mappata e da una page cache piu' ampia
+DEFAULT_SQLITE_PROFILE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout_ms': 5000,
+    'mmap_size_mb': 256,
+    'cache_size_mb': 64,
+}
+
+
+def sqlite_pragmas_from_config(sqlite_config: dict = None) -> dict:
+    """
+    Converte la sezione 'database.sqlite' della configurazione nei PRAGMA da applicare.
+    Le chiavi assenti prendono il valore del profilo predefinito; un valore null disattiva il PRAGMA.
+    """
+    profile = {**DEFAULT_SQLITE_PROFILE, **(sqlite_config or {})}
+    pragmas = {
+        'journal_mode': profile.get('journal_mode'),
+        'synchronous': profile.get('synchronous'),
+        'busy_timeout': profile.get('busy_timeout_ms'),
+        'mmap_size': profile['mmap_size_mb'] * 1024 * 1024 if profile.get('mmap_size_mb') is not None else None,
+        # Valore negativo = dimensione in KiB invece che in pagine
+        'cache_size': -profile['cache_size_mb'] * 1024 if profile.get('cache_size_mb') is not None else None,
+    }
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def engine_options_from_config(database_uri: str, database_config: dict, default_pool_size: int) -> dict:
+    """
+    Opzioni del pool di connessioni (SQLALCHEMY_ENGINE_OPTIONS).
+    Il pool viene dimensionato sui thread del server: ogni thread che serve una richiesta
+    tiene al massimo una connessione.
+    """
+    if database_uri.startswith('sqlite') and (':memory:' in database_uri or database_uri.rstrip('/') == 'sqlite:'):
+        # Database in memoria: Flask-SQLAlchemy usa un pool statico con una sola connessione
+        return {}
+
+    options = {
+        'pool_size': database_config.get('pool_size', default_pool_size),
+        'max_overflow': database_config.get('max_overflow', 0),
+        'pool_timeout': database_config.get('pool_timeout_seconds', 30),
+    }
+    if not database_uri.startswith('sqlite'):
+        # Server remoto (es. PostgreSQL): scarta le connessioni chiuse dal server o dalla rete
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = database_config.get('pool_recycle_seconds', 1800)
+    return options
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict):
+    """Registra un listener che applica i PRAGMA ad ogni nuova connessione SQLite del pool."""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
@@ -1,6 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Integer, Boolean, Float, Text, text, inspect
+from sqlalchemy.exc import OperationalError
+from persistence.database.engine_profile import apply_sqlite_pragmas, sqlite_pragmas_from_config
+import logging
+
+logger = logging.getLogger(__name__)
 
 # 1. Istanza del Database
 # Questo oggetto 'db' verrà inizializzato e collegato all'app Flask in main.py
@@ -35,6 +40,16 @@ class Set(db.Model):
 class Card(db.Model):
     __tablename__ = 'card'
 
+    # Indici composti per l'ordinamento e la paginazione keyset (name, id) e per i filtri
+    # di GET /api/collection: (colonna, name, id) serve sia "colonna = valore ordinato per nome"
+    # sia l'ordinamento per colonna (vedi CARD_SORT_KEYS nel DataManager)
+    __table_args__ = (
+        db.Index('ix_card_name_id', 'name', 'id'),
+        db.Index('ix_card_type_name_id', 'type', 'name', 'id'),
+        db.Index('ix_card_rarity_name_id', 'rarity', 'name', 'id'),
+        db.Index('ix_card_set_id_name_id', 'set_id', 'name', 'id'),
+    )
+
     # ID della carta TCGDEX (es. 'swsh1-1') - Primary Key
     id = Column(String(50), primary_key=True)
     
@@ -43,6 +58,11 @@ class Card(db.Model):
     type = Column(String(50))
     rarity = Column(String(50))
     image_url = Column(String(255))
+
+    # Varianti (normal, reverse, holo, ...) e prezzi (cardmarket, tcgplayer) di TCGDEX, in JSON:
+    # scritti dall'arricchimento in background, restituiti solo con ?fields=variants,pricing
+    variants = Column(Text)
+    pricing = Column(Text)
     
     # CHIAVE ESTERNA (Foreign Key): collega la carta alla tabella 'set'
     # 'set.id' indica che si riferisce alla colonna 'id' della tabella 'set'
@@ -56,16 +76,370 @@ class Card(db.Model):
     def __repr__(self):
         return f"<Card(id='{self.id}', name='{self.name}', set_id='{self.set_id}')>"
 
+
+class CollectionState(db.Model):
+    """
+    Riga unica (id = 1) con la versione della collezione: viene incrementata nella stessa
+    transazione di ogni inserimento o cancellazione ed e' la base degli ETag di GET /api/collection.
+    """
+    __tablename__ = 'collection_state'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CollectionState(version={self.version})>"
+
+
+# Operazioni registrate nel change log della collezione
+CHANGE_ADD = 'add'
+CHANGE_DELETE = 'delete'
+
+
+class CollectionChange(db.Model):
+    """
+    Change log della collezione: una riga per carta inserita o cancellata, scritta nella stessa
+    transazione della modifica con la versione (CollectionState.version) che la modifica produce.
+    I client che conoscono una versione ricevono solo le differenze (GET /api/collection/changes).
+    """
+    __tablename__ = 'collection_change'
+
+    version = Column(Integer, primary_key=True)
+    card_id = Column(String(50), primary_key=True)
+    operation = Column(String(10), nullable=False)
+
+    def __repr__(self):
+        return f"<CollectionChange(version={self.version}, card_id='{self.card_id}', operation='{self.operation}')>"
+
+
+# Dimensioni delle statistiche aggregate della collezione
+STAT_TOTAL = 'total'
+STAT_SET = 'set'
+STAT_TYPE = 'type'
+STAT_RARITY = 'rarity'
+
+
+class CollectionStat(db.Model):
+    """
+    Contatori aggregati della collezione (carte totali, per set, per tipo e per rarità),
+    aggiornati dal DataManager nella stessa transazione di inserimenti e cancellazioni.
+    """
+    __tablename__ = 'collection_stat'
+
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CollectionStat({self.dimension}={self.key!r}: {self.count})>"
+
+# Stati di un job di arricchimento
+JOB_QUEUED = 'queued'     # In attesa di un worker (anche tra un tentativo fallito e il successivo)
+JOB_RUNNING = 'running'   # Preso in carico da un worker fino a locked_until
+JOB_DONE = 'done'         # Carta salvata nella collezione
+JOB_FAILED = 'failed'     # Tentativi esauriti o errore permanente (es. carta inesistente)
+JOB_ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class EnrichmentJob(db.Model):
+    """
+    Coda persistente dell'arricchimento delle carte aggiunte con POST /api/collection.
+    La carta entra nella tabella card solo quando un worker ha ottenuto i dati completi da TCGDEX;
+    fino ad allora il job conserva i dati brevi inviati dal client (nome e immagine).
+    Gli istanti sono timestamp Unix (secondi), confrontabili tra processi diversi.
+    """
+    __tablename__ = 'enrichment_job'
+
+    __table_args__ = (
+        # Prelievo del prossimo job pronto: status = 'queued' AND next_attempt_at <= ora
+        db.Index('ix_enrichment_job_status_next_attempt', 'status', 'next_attempt_at'),
+        # Al massimo un job attivo per carta (POST ripetuti restituiscono il job esistente).
+        # La condizione per PostgreSQL viene aggiunta da initialize_db: un argomento postgresql_*
+        # qui importerebbe il dialetto PostgreSQL (e asyncpg) ad ogni avvio, anche su SQLite
+        db.Index('ux_enrichment_job_active_card', 'card_id', unique=True,
+                 sqlite_where=text("status IN ('queued', 'running')")),
+    )
+
+    id = Column(Integer, primary_key=True)
+    card_id = Column(String(50), nullable=False)
+    name = Column(String(150))
+    image_url = Column(String(255))
+
+    status = Column(String(10), nullable=False, default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(Float, nullable=False)
+    # Scadenza della presa in carico: oltre, un job 'running' (worker terminato) torna prelevabile
+    locked_until = Column(Float)
+    last_error = Column(Text)
+
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<EnrichmentJob(id={self.id}, card_id='{self.card_id}', status='{self.status}')>"
+
 # -------------------------------------------------------------------
-# 4. Funzione di inizializzazione (Da usare in main.py)
+# 4. TABELLE CATALOGO (Mirror locale di TCGDEX)
 # -------------------------------------------------------------------
 
-def initialize_db(app):
+class CatalogSet(db.Model):
+    __tablename__ = 'catalog_set'
+
+    id = Column(String(20), primary_key=True)
+    name = Column(String(100), nullable=False)
+    release_date = Column(String(20))
+
+    # Numero di carte dichiarato da TCGDEX: usato per decidere se il set va risincronizzato
+    card_count = Column(Integer, nullable=False, default=0)
+    synced_at = Column(String(32))
+
+    cards = relationship("CatalogCard", back_populates="set_info", lazy='dynamic')
+
+    def __repr__(self):
+        return f"<CatalogSet(id='{self.id}', name='{self.name}', card_count={self.card_count})>"
+
+
+class CatalogCard(db.Model):
+    __tablename__ = 'catalog_card'
+
+    id = Column(String(50), primary_key=True)
+    local_id = Column(String(20))
+    name = Column(String(150), nullable=False, index=True)
+    type = Column(String(50))
+    rarity = Column(String(50))
+    image_url = Column(String(255))
+
+    set_id = Column(String(20), ForeignKey('catalog_set.id'), nullable=False, index=True)
+
+    # True se tipo e rarità provengono dal lookup completo per ID
+    is_full_detail = Column(Boolean, nullable=False, default=False)
+
+    set_info = relationship("CatalogSet", back_populates="cards")
+
+    def __repr__(self):
+        return f"<CatalogCard(id='{self.id}', name='{self.name}', set_id='{self.set_id}')>"
+
+# -------------------------------------------------------------------
+# 5. INDICE FULL-TEXT (FTS5) SUI NOMI DELLA COLLEZIONE
+# -------------------------------------------------------------------
+
+# Tabella FTS5 con il nome della carta e il suo ID (UNINDEXED, non ricercabile) su cui fare la JOIN
+# con card. Non e' una tabella "external content" legata a card.rowid: card ha una chiave primaria
+# testuale, quindi il suo rowid e' implicito e VACUUM puo' rinumerarlo, disallineando l'indice.
+# card_fts_key associa ogni carta al rowid (stabile) della sua riga FTS: i trigger di cancellazione
+# la usano per eliminare la riga per rowid invece di scandire card_fts sulla colonna UNINDEXED.
+# unicode61 + remove_diacritics rende la ricerca case e accent-insensitive,
+# gli indici prefix velocizzano le ricerche per prefisso (es. "pika*").
+CARD_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS card_fts USING fts5(
+        name,
+        card_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS card_fts_key (
+        card_id VARCHAR(50) PRIMARY KEY,
+        fts_rowid INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    # Trigger che mantengono l'indice allineato alla tabella card
+    """
+    CREATE TRIGGER IF NOT EXISTS card_fts_after_insert AFTER INSERT ON card BEGIN
+        INSERT INTO card_fts(name, card_id) VALUES (new.name, new.id);
+        INSERT INTO card_fts_key(card_id, fts_rowid) VALUES (new.id, last_insert_rowid());
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS card_fts_after_delete AFTER DELETE ON card BEGIN
+        DELETE FROM card_fts WHERE rowid = (SELECT fts_rowid FROM card_fts_key WHERE card_id = old.id);
+        DELETE FROM card_fts_key WHERE card_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS card_fts_after_update AFTER UPDATE OF id, name ON card BEGIN
+        DELETE FROM card_fts WHERE rowid = (SELECT fts_rowid FROM card_fts_key WHERE card_id = old.id);
+        DELETE FROM card_fts_key WHERE card_id = old.id;
+        INSERT INTO card_fts(name, card_id) VALUES (new.name, new.id);
+        INSERT INTO card_fts_key(card_id, fts_rowid) VALUES (new.id, last_insert_rowid());
+    END
+    """,
+]
+
+# Popolamento di un indice nuovo con le carte gia' presenti
+CARD_FTS_POPULATE = [
+    "INSERT INTO card_fts(name, card_id) SELECT name, id FROM card",
+    "INSERT INTO card_fts_key(card_id, fts_rowid) SELECT card_id, rowid FROM card_fts",
+]
+
+# Indice e trigger da ricreare: anche quelli delle versioni precedenti (external content su card.rowid)
+DROP_CARD_FTS_DDL = [
+    "DROP TRIGGER IF EXISTS card_fts_after_insert",
+    "DROP TRIGGER IF EXISTS card_fts_after_delete",
+    "DROP TRIGGER IF EXISTS card_fts_after_update",
+    "DROP TABLE IF EXISTS card_fts_key",
+    "DROP TABLE IF EXISTS card_fts",
+]
+
+
+def _create_card_fts(app) -> bool:
+    """
+    Crea l'indice FTS5, la tabella delle chiavi e i trigger (solo SQLite). Se l'indice e' nuovo,
+    o era quello legato a card.rowid, lo popola con le carte gia' presenti.
+    Restituisce False se FTS5 non e' disponibile.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+
+    try:
+        with db.engine.begin() as connection:
+            existing = {
+                name: sql for name, sql in connection.execute(
+                    text("SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN ('card_fts', 'card_fts_key')")
+                )
+            }
+            is_current = 'card_fts_key' in existing and 'card_id' in existing.get('card_fts', '')
+            if not is_current:
+                for statement in DROP_CARD_FTS_DDL:
+                    connection.execute(text(statement))
+
+            for statement in CARD_FTS_DDL:
+                connection.execute(text(statement))
+
+            if not is_current:
+                for statement in CARD_FTS_POPULATE:
+                    connection.execute(text(statement))
+        return True
+    except OperationalError as e:
+        logger.warning("FTS5 non disponibile, la ricerca per nome userà LIKE", extra={'error': str(e)})
+        return False
+
+def _ensure_collection_state():
+    """Crea la riga della versione della collezione se non esiste."""
+    if db.session.get(CollectionState, 1) is None:
+        db.session.add(CollectionState(id=1, version=0))
+        db.session.commit()
+
+def _backfill_collection_stats():
+    """
+    Popola i contatori aggregati a partire dalle carte gia' presenti
+    (database creato prima dell'introduzione delle statistiche).
+    """
+    if db.session.execute(db.select(CollectionStat.key).limit(1)).first() is not None:
+        return
+    if db.session.execute(db.select(Card.id).limit(1)).first() is None:
+        return
+
+    counts = {(STAT_TOTAL, ''): db.session.execute(db.select(db.func.count()).select_from(Card)).scalar()}
+    for dimension, column in ((STAT_SET, Card.set_id), (STAT_TYPE, Card.type), (STAT_RARITY, Card.rarity)):
+        for key, count in db.session.execute(db.select(column, db.func.count()).group_by(column)):
+            # I valori mancanti confluiscono in 'N/A', come negli aggiornamenti del DataManager
+            counts[(dimension, key or 'N/A')] = counts.get((dimension, key or 'N/A'), 0) + count
+    db.session.execute(db.insert(CollectionStat), [
+        {'dimension': dimension, 'key': key, 'count': count} for (dimension, key), count in counts.items()
+    ])
+    db.session.commit()
+
+# Indici a colonna singola sostituiti dagli indici composti (colonna, name, id) di Card
+OBSOLETE_INDEXES = ['ix_card_type', 'ix_card_rarity', 'ix_card_set_id']
+
+def _apply_postgresql_index_options():
+    """Indici parziali su PostgreSQL: stessa condizione WHERE dichiarata per SQLite."""
+    for mapped_table in db.metadata.sorted_tables:
+        for index in mapped_table.indexes:
+            where = index.dialect_options['sqlite']['where']
+            if where is not None:
+                index.dialect_options['postgresql']['where'] = where
+
+def _create_missing_indexes():
+    """Crea gli indici dichiarati nei modelli che non esistono ancora nel database."""
+    for mapped_table in db.metadata.sorted_tables:
+        for index in mapped_table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def _add_missing_columns():
+    """
+    Aggiunge con ALTER TABLE le colonne (nullable) dichiarate nei modelli ma assenti nelle tabelle
+    esistenti: create_all crea solo le tabelle mancanti.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    with db.engine.begin() as connection:
+        for mapped_table in db.metadata.sorted_tables:
+            if mapped_table.name not in existing_tables:
+                continue
+            existing_columns = {column['name'] for column in inspector.get_columns(mapped_table.name)}
+            for column in mapped_table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                connection.execute(text(f'ALTER TABLE "{mapped_table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                logger.info("Colonna aggiunta allo schema", extra={'table': mapped_table.name, 'column': column.name})
+
+def _drop_obsolete_indexes():
+    """Rimuove gli indici ridondanti (prefisso di un indice composto) creati dalle versioni precedenti."""
+    with db.engine.begin() as connection:
+        for name in OBSOLETE_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+# -------------------------------------------------------------------
+# 6. Funzione di inizializzazione (Da usare in main.py)
+# -------------------------------------------------------------------
+
+# Versione dello schema (tabelle, indici, trigger FTS) salvata in PRAGMA user_version.
+# Va incrementata ad ogni modifica dei modelli: con la versione gia' registrata nel database
+# l'avvio salta create_all, il controllo degli indici e il backfill.
+SCHEMA_VERSION = 3
+
+def _stored_schema_version() -> int:
+    """Versione dello schema registrata nel database SQLite (0 se mai registrata)."""
+    with db.engine.connect() as connection:
+        return connection.execute(text("PRAGMA user_version")).scalar() or 0
+
+def _store_schema_version():
+    with db.engine.begin() as connection:
+        connection.execute(text(f"PRAGMA user_version = {int(SCHEMA_VERSION)}"))
+
+def _card_fts_exists() -> bool:
+    with db.engine.connect() as connection:
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_fts'")
+        ).first() is not None
+
+def initialize_db(app) -> bool:
     """
     Collega l'istanza db all'app Flask e crea le tabelle.
+    Restituisce False se lo schema era gia' alla versione corrente (creazione saltata).
     """
     with app.app_context():
         # Collega l'oggetto db all'app Flask
         db.init_app(app)
+        is_sqlite = db.engine.dialect.name == 'sqlite'
+        # PRAGMA del profilo SQLite (WAL, synchronous, busy_timeout, ...) su ogni nuova connessione
+        if is_sqlite:
+            apply_sqlite_pragmas(db.engine, app.config.get('SQLITE_PRAGMAS', sqlite_pragmas_from_config()))
+
+            # Schema gia' aggiornato da un avvio precedente: basta sapere se l'indice FTS esiste
+            if _stored_schema_version() == SCHEMA_VERSION:
+                app.config['CARD_FTS_ENABLED'] = _card_fts_exists()
+                return False
+
+        if db.engine.dialect.name == 'postgresql':
+            _apply_postgresql_index_options()
+
         # Crea le tabelle nel database se non esistono
-        db.create_all()
\ No newline at end of file
+        db.create_all()
+        # create_all non aggiunge colonne e indici a tabelle già esistenti: li creiamo se mancano
+        _add_missing_columns()
+        _create_missing_indexes()
+        _drop_obsolete_indexes()
+        _ensure_collection_state()
+        _backfill_collection_stats()
+        # Indice full-text per la ricerca nella collezione (letto dal DataManager)
+        app.config['CARD_FTS_ENABLED'] = _create_card_fts(app)
+
+        if is_sqlite:
+            _store_schema_version()
+        return True
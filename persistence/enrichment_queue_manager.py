@@ -0,0 +1,200 @@
+import time
+from datetime import datetime, timezone
+from flask import Flask
+from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy.exc import IntegrityError
+from persistence.database.model import db, EnrichmentJob, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_ACTIVE_STATUSES
+from monitoring.metrics import track_db_operation
+
+# I job completati vengono conservati per questo tempo (consultabili dall'endpoint di stato), poi eliminati
+DONE_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+jobs = EnrichmentJob.__table__
+
+
+class EnrichmentQueueManager:
+    """
+    Gestisce la coda persistente dei job di arricchimento (tabella enrichment_job).
+    Ogni operazione e' una transazione breve: piu' worker, anche in processi diversi
+    (worker gunicorn), prelevano dalla stessa coda senza prendere due volte lo stesso job.
+    """
+
+    def __init__(self, app: Flask, clock=time.time):
+        self.app = app
+        # Orologio di sistema (timestamp Unix): gli istanti sono confrontati tra processi diversi
+        self._clock = clock
+
+    @staticmethod
+    def _format_timestamp(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp is not None else None
+
+    def _job_to_dict(self, row) -> dict:
+        return {
+            'id': row.id,
+            'card_id': row.card_id,
+            'name': row.name,
+            'image_url': row.image_url,
+            'status': row.status,
+            'attempts': row.attempts,
+            'last_error': row.last_error,
+            'next_attempt_at': self._format_timestamp(row.next_attempt_at) if row.status == JOB_QUEUED else None,
+            'created_at': self._format_timestamp(row.created_at),
+            'updated_at': self._format_timestamp(row.updated_at),
+        }
+
+    def _active_job(self, card_id: str):
+        return db.session.execute(
+            select(jobs).where(jobs.c.card_id == card_id, jobs.c.status.in_(JOB_ACTIVE_STATUSES))
+        ).first()
+
+    # --- INSERIMENTO ---
+
+    @track_db_operation('enqueue_enrichment_job')
+    def enqueue(self, card_brief: dict) -> tuple:
+        """
+        Accoda l'arricchimento di una carta (dati brevi: id, name, image_url).
+        Restituisce (job, created): se la carta ha gia' un job attivo viene restituito quello (created=False).
+        """
+        card_id = card_brief['id']
+        now = self._clock()
+        with self.app.app_context():
+            existing = self._active_job(card_id)
+            if existing is not None:
+                return self._job_to_dict(existing), False
+
+            try:
+                result = db.session.execute(jobs.insert().values(
+                    card_id=card_id,
+                    name=card_brief.get('name'),
+                    image_url=card_brief.get('image_url'),
+                    status=JOB_QUEUED,
+                    attempts=0,
+                    next_attempt_at=now,
+                    created_at=now,
+                    updated_at=now
+                ))
+                db.session.commit()
+            except IntegrityError:
+                # Un'altra richiesta ha accodato la stessa carta nel frattempo (indice univoco sui job attivi)
+                db.session.rollback()
+                existing = self._active_job(card_id)
+                if existing is None:
+                    raise
+                return self._job_to_dict(existing), False
+
+            row = db.session.execute(select(jobs).where(jobs.c.id == result.inserted_primary_key[0])).first()
+            return self._job_to_dict(row), True
+
+    # --- PRELIEVO ED ESITO (usati dai worker) ---
+
+    @track_db_operation('claim_enrichment_job')
+    def claim(self, lease_seconds: float):
+        """
+        Preleva il prossimo job pronto (in coda e con next_attempt_at scaduto, oppure 'running' con la
+        presa in carico scaduta) e lo marca 'running' fino a ora + lease_seconds, incrementando i tentativi.
+        Selezione e aggiornamento sono un unico UPDATE ... RETURNING: il prelievo e' atomico.
+        Restituisce il job (dizionario) oppure None se la coda non ha job pronti; il suo 'attempts'
+        identifica la presa in carico e va passato a complete/retry/fail.
+        """
+        now = self._clock()
+        ready = or_(
+            and_(jobs.c.status == JOB_QUEUED, jobs.c.next_attempt_at <= now),
+            and_(jobs.c.status == JOB_RUNNING, jobs.c.locked_until < now),
+        )
+        next_job_id = (
+            select(jobs.c.id).where(ready).order_by(jobs.c.next_attempt_at, jobs.c.id).limit(1).scalar_subquery()
+        )
+        stmt = (
+            update(jobs)
+            .where(jobs.c.id == next_job_id, ready)
+            .values(status=JOB_RUNNING, attempts=jobs.c.attempts + 1, locked_until=now + lease_seconds, updated_at=now)
+            .returning(*jobs.c)
+        )
+        with self.app.app_context():
+            # Lettura preliminare: con la coda vuota i worker non prendono il lock di scrittura
+            if db.session.execute(select(jobs.c.id).where(ready).limit(1)).first() is None:
+                db.session.rollback()
+                return None
+            try:
+                row = db.session.execute(stmt).first()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            return self._job_to_dict(row) if row is not None else None
+
+    def _finish(self, job_id: int, attempt: int, *cleanup, **values) -> bool:
+        """
+        Aggiorna un job ancora 'running' per il tentativo indicato: 'attempts' fa da token della presa
+        in carico, quindi l'esito tardivo di un worker il cui lease e' scaduto (job ripreso da altri,
+        che ha incrementato i tentativi) non sovrascrive lo stato del nuovo proprietario.
+        Gli eventuali statement di pulizia sono eseguiti nella stessa transazione.
+        Restituisce False se il job non e' piu' in carico a questo tentativo.
+        """
+        with self.app.app_context():
+            try:
+                result = db.session.execute(
+                    update(jobs).where(jobs.c.id == job_id, jobs.c.status == JOB_RUNNING, jobs.c.attempts == attempt)
+                    .values(locked_until=None, updated_at=self._clock(), **values)
+                )
+                if result.rowcount != 1:
+                    db.session.rollback()
+                    return False
+                for statement in cleanup:
+                    db.session.execute(statement)
+                db.session.commit()
+                return True
+            except Exception:
+                db.session.rollback()
+                raise
+
+    @track_db_operation('complete_enrichment_job')
+    def complete(self, job_id: int, attempt: int) -> bool:
+        """Segna il job come completato ed elimina i job completati piu' vecchi della retention."""
+        expired = delete(jobs).where(
+            jobs.c.status == JOB_DONE, jobs.c.updated_at < self._clock() - DONE_JOB_RETENTION_SECONDS
+        )
+        return self._finish(job_id, attempt, expired, status=JOB_DONE, last_error=None)
+
+    @track_db_operation('retry_enrichment_job')
+    def retry(self, job_id: int, attempt: int, error: str, delay_seconds: float) -> bool:
+        """Rimette il job in coda, prelevabile dopo delay_seconds."""
+        return self._finish(job_id, attempt, status=JOB_QUEUED, last_error=error,
+                            next_attempt_at=self._clock() + delay_seconds)
+
+    @track_db_operation('fail_enrichment_job')
+    def fail(self, job_id: int, attempt: int, error: str) -> bool:
+        """Segna il job come fallito definitivamente."""
+        return self._finish(job_id, attempt, status=JOB_FAILED, last_error=error)
+
+    # --- STATO ---
+
+    @track_db_operation('get_enrichment_job')
+    def get_job(self, job_id: int):
+        """Dettaglio di un job (None se non esiste)."""
+        with self.app.app_context():
+            row = db.session.execute(select(jobs).where(jobs.c.id == job_id)).first()
+            return self._job_to_dict(row) if row is not None else None
+
+    @track_db_operation('get_enrichment_summary')
+    def get_summary(self, limit: int = 50) -> dict:
+        """
+        Avanzamento della coda: numero di job per stato, job attivi (dal piu' vecchio)
+        e ultimi job falliti, al massimo 'limit' per elenco.
+        """
+        with self.app.app_context():
+            counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED)}
+            counts.update(db.session.execute(select(jobs.c.status, func.count()).group_by(jobs.c.status)).all())
+
+            active = db.session.execute(
+                select(jobs).where(jobs.c.status.in_(JOB_ACTIVE_STATUSES)).order_by(jobs.c.id).limit(limit)
+            ).all()
+            failed = db.session.execute(
+                select(jobs).where(jobs.c.status == JOB_FAILED).order_by(jobs.c.updated_at.desc()).limit(limit)
+            ).all()
+
+        return {
+            'counts': counts,
+            'pending': [self._job_to_dict(row) for row in active],
+            'failed': [self._job_to_dict(row) for row in failed],
+        }
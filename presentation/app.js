@@ -13,7 +13,8 @@ function setStatus(elementId, message, isError = false) {
 /**
  * Funzione generica per eseguire tutte le richieste GET API.
  */
-async function fetchData(endpoint) {
+// onResponse (opzionale) riceve la risposta riuscita, ad esempio per leggerne gli header
+async function fetchData(endpoint, onResponse = null) {
     const fullUrl = `${API_BASE_URL}/${endpoint}`;
     
     try {
@@ -23,6 +24,7 @@ async function fetchData(endpoint) {
         if (!response.ok) {
             throw new Error(data.error || data.message || `Errore HTTP ${response.status}`);
         }
+        if (onResponse) onResponse(response);
         return data;
 
     } catch (error) {
@@ -34,10 +36,13 @@ function renderCard(card, isCollection = false) {
     const cardHtml = document.createElement('div');
     cardHtml.className = 'card-item';
     
-    const imageUrl = card.image_url || 'placeholder.jpg'; 
+    // Nella collezione le immagini passano dal proxy del server (miniature in cache su disco)
+    const imageUrl = isCollection && card.id
+        ? `${API_BASE_URL}/images/${encodeURIComponent(card.id)}?size=thumb`
+        : (card.image_url || 'placeholder.jpg'); 
 
     cardHtml.innerHTML = `
-        <img src="${imageUrl}" alt="${card.name}">
+        <img src="${imageUrl}" alt="${card.name}" loading="lazy">
         <strong>${card.name}</strong>
         
         <p style="font-size: 0.9em; margin: 5px 0;">Set: ${card.set || 'Unknown Set'}</p> 
@@ -120,7 +125,11 @@ async function handleSearchResults(endpoint, query, containerId, statusId) {
     setStatus(statusId, `Loading results for "${query}"...`);
     
     try {
-        const data = await fetchData(endpoint);
+        // X-Search-Partial: elenco troncato o mirror locale incompleto senza risposta da TCGDEX
+        let partial = false;
+        const data = await fetchData(endpoint, response => {
+            partial = response.headers.get('X-Search-Partial') === 'true';
+        });
         
         // Se la ricerca per ID restituisce un singolo oggetto (non un array)
         let results = Array.isArray(data) ? data : [data];
@@ -141,7 +150,8 @@ async function handleSearchResults(endpoint, query, containerId, statusId) {
             container.appendChild(renderCard(card)); 
         });
         
-        setStatus(statusId, `${results.length} availiable results.`, false);
+        const partialNote = partial ? ' Results may be incomplete, refine the search.' : '';
+        setStatus(statusId, `${results.length} availiable results.${partialNote}`, false);
 
     } catch (error) {
         setStatus(statusId, error.message, true);
@@ -157,6 +167,28 @@ function handleSearchByName() {
     }
 }
 
+// Autocompletamento: suggerimenti dall'indice in memoria del server (GET /api/tcg/suggest),
+// con un breve ritardo per non inviare una richiesta ad ogni tasto
+const SUGGEST_DELAY_MS = 150;
+let suggestTimer = null;
+
+function suggestCardNames(prefix) {
+    clearTimeout(suggestTimer);
+    const datalist = document.getElementById('search-name-suggestions');
+    if (!prefix.trim()) {
+        datalist.innerHTML = '';
+        return;
+    }
+    suggestTimer = setTimeout(async () => {
+        try {
+            const names = await fetchData(`tcg/suggest?prefix=${encodeURIComponent(prefix.trim())}`);
+            datalist.replaceChildren(...names.map(name => new Option(name)));
+        } catch (error) {
+            console.error('Error loading the suggestions:', error);
+        }
+    }, SUGGEST_DELAY_MS);
+}
+
 /** * Ricerca per ID: Chiama /api/tcg/search_id?id=cardId */
 function handleSearchById() {
     const cardId = document.getElementById('search-input-id').value.trim();
@@ -181,13 +213,19 @@ async function addToCollection(cardData) {
 
         const result = await response.json();
         
+        if (response.status === 202) {
+            // Arricchimento in background: la carta compare nella collezione quando il job termina
+            setStatus('collection-status', `${result.message} (pending)`, false);
+            waitForEnrichment(result.status_url);
+            return;
+        }
         if (response.status === 201) {
             alert(`${result.message}`);
         } else {
             alert(`Error/Conflict: ${result.message}`); 
         }
         
-        loadCollection(); 
+        syncCollection(); 
 
     } catch (error) {
         console.error('Error during the saving:', error);
@@ -195,45 +233,135 @@ async function addToCollection(cardData) {
     }
 }
 
+// Controlla lo stato del job di arricchimento finche' la carta non e' salvata (o il job fallisce)
+const ENRICHMENT_POLL_MS = 1000;
+const ENRICHMENT_MAX_POLLS = 300;
+
+async function waitForEnrichment(statusUrl) {
+    const endpoint = statusUrl.replace(/^\/api\//, '');
+    for (let poll = 0; poll < ENRICHMENT_MAX_POLLS; poll++) {
+        await new Promise(resolve => setTimeout(resolve, ENRICHMENT_POLL_MS));
+        let job;
+        try {
+            job = await fetchData(endpoint);
+        } catch (error) {
+            continue;
+        }
+        if (job.status === 'done') {
+            syncCollection();
+            return;
+        }
+        if (job.status === 'failed') {
+            alert(`Error: ${job.name || job.card_id} could not be added (${job.last_error})`);
+            return;
+        }
+    }
+}
+
+// Paginazione keyset della collezione: il server restituisce al massimo COLLECTION_PAGE_SIZE carte
+// per richiesta e indica la pagina successiva tramite l'header X-Next-Cursor.
+const COLLECTION_PAGE_SIZE = 100;
+let collectionQuery = '';
+let collectionNextCursor = null;
+let collectionTotal = 0;
+let collectionShown = 0;
+
+// Filtri e ordinamento applicati dal server (i valori vuoti indicano "tutti")
+function collectionFilterParams() {
+    const params = {};
+    const filters = { type: 'collection-filter-type', rarity: 'collection-filter-rarity', set_id: 'collection-filter-set' };
+    Object.entries(filters).forEach(([name, elementId]) => {
+        const value = document.getElementById(elementId).value;
+        if (value) params[name] = value;
+    });
+    params.sort = document.getElementById('collection-sort').value;
+    params.order = document.getElementById('collection-order').value;
+    return params;
+}
+
+// Popola le tendine dei filtri con i valori presenti nella collezione (GET /api/collection/stats)
+async function loadCollectionFilterOptions() {
+    try {
+        const response = await fetch(`${API_BASE_URL}/collection/stats`);
+        if (!response.ok) return;
+        const stats = await response.json();
+
+        const fill = (elementId, options) => {
+            const select = document.getElementById(elementId);
+            const selected = select.value;
+            select.length = 1; // Mantiene solo l'opzione "tutti"
+            options.forEach(([value, label]) => select.add(new Option(label, value, false, value === selected)));
+        };
+        fill('collection-filter-type', Object.keys(stats.by_type).sort().map(type => [type, type]));
+        fill('collection-filter-rarity', Object.keys(stats.by_rarity).sort().map(rarity => [rarity, rarity]));
+        fill('collection-filter-set', stats.by_set.map(set => [set.set_id, set.name || set.set_id]));
+    } catch (error) {
+        console.error('Error loading the collection filters:', error);
+    }
+}
+
+async function fetchCollectionPage(searchQuery, cursor) {
+    const params = new URLSearchParams({ limit: COLLECTION_PAGE_SIZE, ...collectionFilterParams() });
+    if (searchQuery) params.set('name', searchQuery);
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`${API_BASE_URL}/collection?${params}`);
+    const data = await response.json();
+
+    if (!response.ok) {
+        throw new Error(data.error || data.message || `Errore HTTP ${response.status}`);
+    }
+    return {
+        cards: data,
+        total: response.headers.get('X-Total-Count'),
+        nextCursor: response.headers.get('X-Next-Cursor'),
+        version: Number(response.headers.get('X-Collection-Version')),
+    };
+}
+
+function renderCollectionPage(page) {
+    const container = document.getElementById('collection-results-container');
+    page.cards.forEach(card => {
+        // Se una carta dovesse fallire, l'errore verrà catturato all'esterno del loop
+        container.appendChild(renderCollectionCard(card)); 
+    });
+
+    collectionShown += page.cards.length;
+    collectionNextCursor = page.nextCursor;
+    document.getElementById('collection-load-more').style.display = collectionNextCursor ? 'block' : 'none';
+    setStatus('collection-status', `${collectionShown} of ${collectionTotal} cards shown.`, false);
+}
+
 async function loadCollection(searchQuery = '') { 
     const container = document.getElementById('collection-results-container');
-    const inputElement = document.getElementById('collection-search-input');
     
     // Pulizia e stato iniziale
     container.innerHTML = '';
+    collectionQuery = searchQuery ? searchQuery.trim() : '';
+    collectionNextCursor = null;
+    collectionShown = 0;
+    collectionVersion = null; // Le differenze ricevute durante il caricamento vengono ignorate
+    document.getElementById('collection-load-more').style.display = 'none';
     
-    let endpoint = 'collection';
-    let statusMessage = 'Collection loaded...';
-    
-    // 1. Logica di Filtraggio e Costruzione Endpoint
-    if (searchQuery && searchQuery.trim() !== '') {
-        const cleanedQuery = searchQuery.trim();
-        // Codifica il valore per URL
-        endpoint = `collection?name=${encodeURIComponent(cleanedQuery)}`;
-        statusMessage = `Searching "${cleanedQuery}" in the collection...`;
-    } 
-    
+    const statusMessage = collectionQuery
+        ? `Searching "${collectionQuery}" in the collection...`
+        : 'Collection loaded...';
     setStatus('collection-status', statusMessage); // Mostra lo stato di attesa
     
-    // 2. Esecuzione della Richiesta API
+    // Esecuzione della Richiesta API (solo la prima pagina)
     try {
-        const collection = await fetchData(endpoint);
-        
-        // 3. Gestione dei Risultati
+        const page = await fetchCollectionPage(collectionQuery, null);
+        collectionTotal = Number(page.total || page.cards.length);
+        collectionVersion = page.version;
+        openCollectionChangesStream();
         
-        if (collection.length === 0) {
-            const emptyMsg = searchQuery ? `Nessuna carta trovata con il nome "${searchQuery}".` : `La tua collezione è vuota. Aggiungi nuove carte!`;
+        if (page.cards.length === 0) {
+            const emptyMsg = collectionQuery ? `Nessuna carta trovata con il nome "${collectionQuery}".` : `La tua collezione è vuota. Aggiungi nuove carte!`;
             setStatus('collection-status', emptyMsg, true); // True per indicare che è un messaggio di esito (sebbene vuoto)
             return;
         }
 
-        // 4. Rendering Sicuro dei Risultati
-        collection.forEach(card => {
-            // Se una carta dovesse fallire, l'errore verrà catturato all'esterno del loop
-            container.appendChild(renderCard(card, true)); 
-        });
-        
-        setStatus('collection-status', `${collection.length} cards availiable.`, false);
+        renderCollectionPage(page);
 
     } catch (error) {
         // Cattura errori di rete, parsing JSON o fallimenti del server (500/503)
@@ -241,6 +369,134 @@ async function loadCollection(searchQuery = '') {
     }
 }
 
+// ------------------------------------------------------------------
+// CHANGE FEED: differenze della collezione invece di ricaricarla
+// ------------------------------------------------------------------
+
+// Versione della collezione mostrata (header X-Collection-Version), null durante un caricamento
+let collectionVersion = null;
+let collectionChangesSource = null;
+// Polling di /collection/changes quando il server rifiuta lo stream (503, troppi stream aperti)
+const COLLECTION_POLL_MS = 5000;
+const COLLECTION_STREAM_RETRY_MS = 60000;
+let collectionPollTimer = null;
+
+function renderCollectionCard(card) {
+    const element = renderCard(card, true);
+    element.dataset.cardId = card.id;
+    element.cardData = card;
+    return element;
+}
+
+// Stessa chiave di ordinamento del server: (colonna, name, id), con i valori mancanti per primi
+function cardSortKey(card, sort) {
+    return sort === 'name' ? [card.name, card.id] : [card[sort] ?? null, card.name, card.id];
+}
+
+function compareSortKeys(a, b) {
+    for (let i = 0; i < a.length; i++) {
+        if (a[i] === b[i]) continue;
+        if (a[i] === null) return -1;
+        if (b[i] === null) return 1;
+        return a[i] < b[i] ? -1 : 1;
+    }
+    return 0;
+}
+
+function applyCollectionChanges(changes) {
+    // Differenze gia' applicate (o arrivate durante un ricaricamento completo)
+    if (collectionVersion === null || changes.version <= collectionVersion) return;
+
+    // Il filtro per nome (FTS) non e' riproducibile esattamente nel browser: in quel caso si ricarica
+    if (changes.reset || (collectionQuery && changes.added.length > 0)) {
+        loadCollection(collectionQuery);
+        return;
+    }
+
+    const container = document.getElementById('collection-results-container');
+    const removeCard = cardId => {
+        const element = container.querySelector(`[data-card-id="${CSS.escape(cardId)}"]`);
+        if (element) {
+            element.remove();
+            collectionShown--;
+            collectionTotal--;
+        }
+    };
+    changes.deleted.forEach(removeCard);
+
+    const params = collectionFilterParams();
+    const direction = params.order === 'desc' ? -1 : 1;
+    changes.added.forEach(card => {
+        removeCard(card.id);
+        const matches = ['type', 'rarity', 'set_id'].every(name => !params[name] || card[name] === params[name]);
+        if (!matches) return;
+
+        collectionTotal++;
+        const key = cardSortKey(card, params.sort);
+        const next = Array.from(container.children)
+            .find(element => direction * compareSortKeys(key, cardSortKey(element.cardData, params.sort)) < 0);
+        // Oltre l'ultima carta caricata arrivera' con "Load more" (paginazione keyset)
+        if (!next && collectionNextCursor) return;
+        container.insertBefore(renderCollectionCard(card), next || null);
+        collectionShown++;
+    });
+
+    collectionVersion = changes.version;
+    setStatus('collection-status', `${collectionShown} of ${collectionTotal} cards shown.`, false);
+}
+
+// Dopo un inserimento o una cancellazione chiede solo le differenze dalla versione mostrata
+async function syncCollection() {
+    if (collectionVersion === null) {
+        loadCollection(collectionQuery);
+        return;
+    }
+    try {
+        applyCollectionChanges(await fetchData(`collection/changes?since=${collectionVersion}`));
+    } catch (error) {
+        setStatus('collection-status', error.message, true);
+    }
+}
+
+// Modifiche fatte da altre schede o client (Server-Sent Events, riconnessione automatica)
+function openCollectionChangesStream() {
+    if (collectionChangesSource || typeof EventSource === 'undefined') return;
+
+    collectionChangesSource = new EventSource(`${API_BASE_URL}/collection/changes/stream?since=${collectionVersion}`);
+    collectionChangesSource.addEventListener('changes', event => applyCollectionChanges(JSON.parse(event.data)));
+    collectionChangesSource.addEventListener('error', () => {
+        // Dopo una risposta diversa da 200 (es. 503) EventSource non si riconnette piu' da solo
+        if (collectionChangesSource.readyState === EventSource.CLOSED) pollCollectionChanges();
+    });
+}
+
+// Ripiego sul polling delle differenze, riprovando lo stream dopo COLLECTION_STREAM_RETRY_MS
+function pollCollectionChanges() {
+    collectionChangesSource = null;
+    if (collectionPollTimer) return;
+
+    const startedAt = Date.now();
+    collectionPollTimer = setInterval(() => {
+        if (Date.now() - startedAt < COLLECTION_STREAM_RETRY_MS) {
+            syncCollection();
+            return;
+        }
+        clearInterval(collectionPollTimer);
+        collectionPollTimer = null;
+        openCollectionChangesStream();
+    }, COLLECTION_POLL_MS);
+}
+
+async function loadMoreCollection() {
+    if (!collectionNextCursor) return;
+
+    try {
+        renderCollectionPage(await fetchCollectionPage(collectionQuery, collectionNextCursor));
+    } catch (error) {
+        setStatus('collection-status', error.message, true);
+    }
+}
+
 async function deleteCard(cardId) {
     if (!confirm(`Are you sure you want to remove card: ${cardId}?`)) return;
     
@@ -253,7 +509,7 @@ async function deleteCard(cardId) {
         
         if (response.ok) {
             alert(result.message);
-            loadCollection(); 
+            syncCollection(); 
         } else {
              alert(`Errore: ${result.message}`);
         }
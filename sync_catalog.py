@@ -0,0 +1,39 @@
+"""
+Sincronizza il mirror locale del catalogo TCGDEX (tabelle catalog_set / catalog_card).
+
+Uso:
+    python sync_catalog.py                  # sincronizzazione incrementale di tutti i set
+    python sync_catalog.py --sets sv1,sv2   # solo i set indicati
+    python sync_catalog.py --force          # riscarica anche i set invariati
+    python sync_catalog.py --full-details   # aggiunge tipo e rarità (un lookup per carta)
+"""
+import argparse
+from main import create_database_app, TCG_CONFIG_FILE
+from persistence.catalog_manager import CatalogManager
+from communication.api.tcg_fetcher import TCGFetcher
+from application.catalog_sync import CatalogSynchronizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronizzazione del catalogo TCGDEX locale")
+    parser.add_argument("--sets", help="Elenco di ID set separati da virgola")
+    parser.add_argument("--force", action="store_true", help="Riscarica anche i set invariati")
+    parser.add_argument("--full-details", action="store_true", help="Scarica i dettagli completi di ogni carta")
+    args = parser.parse_args()
+
+    # Solo database e un fetcher: l'app completa aprirebbe un secondo pool HTTP e un secondo rate limiter
+    app = create_database_app()
+    catalog_manager = CatalogManager(app=app)
+    synchronizer = CatalogSynchronizer(TCGFetcher(TCG_CONFIG_FILE), catalog_manager)
+
+    set_ids = [set_id.strip() for set_id in args.sets.split(',')] if args.sets else None
+    report = synchronizer.sync(set_ids=set_ids, force=args.force, full_details=args.full_details)
+
+    print(f"✓ Set sincronizzati: {len(report['synced_sets'])}, invariati: {report['skipped_sets']}, "
+          f"falliti: {len(report['failed_sets'])}")
+    print(f"✓ Carte scaricate: {report['cards']}, con dettagli completi: {report['detailed_cards']}")
+    print(f"✓ Catalogo locale: {catalog_manager.get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import contextlib
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, insert
+
+from persistence.data_manager import DataManager
+from persistence.database.model import db, initialize_db, Card, Set
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App Flask minimale su un database SQLite temporaneo con lo schema completo."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    initialize_db(app)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def data_manager(app):
+    return DataManager(app=app)
+
+
+@pytest.fixture
+def engine(app):
+    with app.app_context():
+        return db.engine
+
+
+@pytest.fixture
+def seed_cards(app):
+    """Inserisce in blocco le carte indicate (dizionari con id, name, type, rarity, set_id) e i relativi Set."""
+    def seed(cards: list):
+        with app.app_context():
+            set_ids = sorted({card['set_id'] for card in cards})
+            db.session.execute(insert(Set), [{'id': set_id, 'name': f"Set {set_id}", 'release_date': "N/A"}
+                                             for set_id in set_ids])
+            db.session.execute(insert(Card), [{'image_url': None, **card} for card in cards])
+            db.session.commit()
+    return seed
+
+
+@contextlib.contextmanager
+def capture_queries(engine):
+    """Raccoglie (istruzione, parametri) delle query eseguite sull'engine all'interno del blocco."""
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield executed
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def queries(engine):
+    """Context manager che raccoglie le query eseguite sul database di test."""
+    return lambda: capture_queries(engine)
@@ -0,0 +1,129 @@
+"""
+Ricerche async della modalità ASGI: se il client si disconnette l'handler viene cancellato
+e con lui la richiesta a TCGDEX, a meno che un'altra richiesta identica ne attenda il risultato.
+"""
+import asyncio
+import json
+
+import pytest
+from flask import Flask
+
+from application.core_manager import CoreManager
+from communication.api_server import RestApiServer
+from communication.asgi_app import AsgiApp, ASGI_CANCELLED_REQUESTS
+
+pytest.importorskip("a2wsgi")
+
+
+class StubAsyncFetcher:
+    """Ricerca per nome che resta in corso finche' il test non la rilascia; registra le cancellazioni."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def search_cards_by_name(self, name_query):
+        self.calls += 1
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return [{'id': 'base1-58', 'name': 'Pikachu', 'image_url': None}]
+
+    async def close(self):
+        pass
+
+
+class Client:
+    """Una richiesta ASGI: i messaggi inviati dall'app e la possibilita' di simulare la disconnessione."""
+
+    def __init__(self, asgi_app, path):
+        self.sent = []
+        self._messages = asyncio.Queue()
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'name=pika', 'headers': []}
+        self.task = asyncio.ensure_future(asgi_app(scope, self._messages.get, self._send))
+
+    async def _send(self, message):
+        self.sent.append(message)
+
+    def disconnect(self):
+        self._messages.put_nowait({'type': 'http.disconnect'})
+
+    @property
+    def status(self):
+        return self.sent[0]['status'] if self.sent else None
+
+
+def make_asgi_app(fetcher):
+    core_manager = CoreManager(data_manager=None, tcg_fetcher=None, async_tcg_fetcher=fetcher)
+    server = RestApiServer(core_manager=core_manager, app=Flask(__name__), host='127.0.0.1', port=0)
+    return AsgiApp(server, threads=1)
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_disconnect_cancels_the_upstream_search():
+    async def scenario():
+        fetcher = StubAsyncFetcher()
+        asgi_app = make_asgi_app(fetcher)
+        cancelled_before = ASGI_CANCELLED_REQUESTS.value(endpoint='get_cards_by_name')
+
+        client = Client(asgi_app, '/api/tcg/search_name')
+        await fetcher.started.wait()
+        client.disconnect()
+        await client.task
+
+        assert fetcher.calls == 1 and fetcher.cancelled == 1
+        assert client.sent == []
+        assert ASGI_CANCELLED_REQUESTS.value(endpoint='get_cards_by_name') == cancelled_before + 1
+        assert asgi_app._in_flight == 0
+        assert asgi_app.core_manager.async_single_flight.in_flight() == 0
+
+    run(scenario)
+
+
+def test_disconnect_keeps_a_search_shared_with_another_request():
+    async def scenario():
+        fetcher = StubAsyncFetcher()
+        asgi_app = make_asgi_app(fetcher)
+
+        leaving = Client(asgi_app, '/api/tcg/search_name')
+        staying = Client(asgi_app, '/api/tcg/search_name')
+        await fetcher.started.wait()
+        # Entrambe le richieste attendono la stessa chiamata condivisa
+        while asgi_app.core_manager.async_single_flight._calls['name:pika'][1] < 2:
+            await asyncio.sleep(0)
+        leaving.disconnect()
+        await leaving.task
+        fetcher.release.set()
+        await staying.task
+
+        assert fetcher.calls == 1 and fetcher.cancelled == 0
+        assert leaving.sent == []
+        assert staying.status == 200
+        assert json.loads(staying.sent[1]['body']) == [{'id': 'base1-58', 'name': 'Pikachu', 'image_url': None}]
+
+    run(scenario)
+
+
+def test_completed_search_is_sent_to_the_client():
+    async def scenario():
+        fetcher = StubAsyncFetcher()
+        fetcher.release.set()
+        asgi_app = make_asgi_app(fetcher)
+
+        client = Client(asgi_app, '/api/tcg/search_name')
+        await client.task
+
+        assert client.status == 200
+        headers = dict(client.sent[0]['headers'])
+        assert b'etag' in headers and headers[b'access-control-allow-origin'] == b'*'
+        assert asgi_app._in_flight == 0
+
+    run(scenario)
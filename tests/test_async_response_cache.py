@@ -0,0 +1,78 @@
+"""
+Cache delle ricerche async: l'event loop non esegue mai I/O sullo store SQLite della ResponseCache.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from communication.api.async_tcg_fetcher import AsyncTCGFetcher
+from communication.api.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(db_path=str(tmp_path / "responses.db"))
+
+
+@pytest.fixture
+def disk_io_threads(cache):
+    """Thread in cui la cache ha letto o scritto su disco."""
+    threads = []
+    original_load, original_save = cache._load_from_disk, cache.save_to_disk
+
+    def load(key):
+        threads.append(threading.current_thread())
+        return original_load(key)
+
+    def save(key, value, stored_at):
+        threads.append(threading.current_thread())
+        return original_save(key, value, stored_at)
+
+    cache._load_from_disk, cache.save_to_disk = load, save
+    return threads
+
+
+def run_searches(fetcher: AsyncTCGFetcher, keys: list) -> list:
+    calls = []
+
+    async def loader(lane):
+        calls.append(lane)
+        return [{'id': 'card-1'}]
+
+    async def main():
+        results = [await fetcher._cached(key, loader) for key in keys]
+        # Attende le scritture su disco avviate in background
+        await asyncio.gather(*list(fetcher._disk_writes))
+        return results
+
+    return asyncio.run(main()), calls
+
+
+def test_disk_reads_and_writes_run_off_the_event_loop(cache, disk_io_threads):
+    fetcher = AsyncTCGFetcher(fetcher=None, cache=cache)
+
+    results, calls = run_searches(fetcher, ["name:pika", "name:pika"])
+
+    assert results == [[{'id': 'card-1'}]] * 2
+    assert len(calls) == 1
+    # Una lettura dal disco (miss) e una scrittura, nessuna sul thread dell'event loop
+    assert len(disk_io_threads) == 2
+    assert threading.main_thread() not in disk_io_threads
+
+
+def test_memory_hit_does_not_touch_the_disk(cache, disk_io_threads):
+    cache.set_in_memory("name:pika", [{'id': 'card-1'}])
+    fetcher = AsyncTCGFetcher(fetcher=None, cache=cache)
+
+    results, calls = run_searches(fetcher, ["name:pika"])
+
+    assert results == [[{'id': 'card-1'}]]
+    assert calls == [] and disk_io_threads == []
+
+
+def test_entry_written_from_the_loop_is_persisted(tmp_path, cache):
+    run_searches(AsyncTCGFetcher(fetcher=None, cache=cache), ["id:card-1"])
+
+    restarted = ResponseCache(db_path=str(tmp_path / "responses.db"))
+    assert restarted.get("id:card-1")[1] == [{'id': 'card-1'}]
@@ -0,0 +1,212 @@
+"""
+Retry con backoff, Retry-After e circuit breaker dell'AsyncTCGFetcher contro lo stub TCGDEX locale.
+Come per il TCGFetcher, le attese tra i tentativi sono registrate invece che eseguite.
+"""
+import asyncio
+
+import pytest
+import requests
+
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.async_tcg_fetcher import AsyncTCGFetcher
+from communication.api.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+from communication.api.rate_limiter import RateLimiter
+from communication.api.tcg_fetcher import TCGFetcher, UpstreamUnavailableError
+
+CARD_ID = "stub1-1"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = StubTCGDexServer(num_sets=2, cards_per_set=10).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def fetcher(stub, clock, sleeps):
+    stub.httpd.scripted_failures.clear()
+    base_fetcher = TCGFetcher("config/api_config.yaml")
+    base_fetcher.base_url = stub.base_url
+    base_fetcher.rate_limiter = RateLimiter(rate_per_second=0)
+    base_fetcher.max_retries = 2
+    base_fetcher.backoff_base = 0.2
+    base_fetcher.backoff_max = 2.0
+    base_fetcher.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=30, clock=clock)
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    yield AsyncTCGFetcher(base_fetcher, sleep=sleep)
+    base_fetcher.session.close()
+
+
+@pytest.fixture
+def served(stub):
+    """Numero di richieste ricevute dallo stub dall'inizio del test."""
+    start = stub.httpd.request_count
+    return lambda: stub.httpd.request_count - start
+
+
+def run(fetcher: AsyncTCGFetcher, coroutine):
+    """Esegue la coroutine su un nuovo event loop e chiude la sessione aiohttp creata su di esso."""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await fetcher.close()
+
+    return asyncio.run(main())
+
+
+def get_card(fetcher: AsyncTCGFetcher, card_id: str = CARD_ID):
+    return run(fetcher, fetcher._get(fetcher.fetcher._card_url(card_id), read_timeout=5))
+
+
+# -------------------------------------------------------------------
+# RETRY E BACKOFF
+# -------------------------------------------------------------------
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried_with_jittered_backoff(stub, fetcher, sleeps, served, status):
+    stub.fail_next(2, status=status)
+
+    card = run(fetcher, fetcher.search_card_by_id(CARD_ID))
+
+    assert card['id'] == CARD_ID
+    assert served() == 3 and len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.2 and 0 <= sleeps[1] <= 0.4
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+
+
+def test_exhausted_retries_raise_and_count_one_breaker_failure(stub, fetcher, sleeps, served):
+    stub.fail_next(3, status=503)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_card(fetcher)
+
+    assert served() == 3 and len(sleeps) == 2
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+    stub.fail_next(3, status=503)
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_card(fetcher)
+    assert fetcher.circuit_breaker.state == STATE_OPEN
+
+
+def test_client_error_is_not_retried(fetcher, sleeps, served):
+    with pytest.raises(requests.exceptions.HTTPError, match="404"):
+        get_card(fetcher, "missing-card")
+
+    assert served() == 1 and sleeps == []
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+
+
+def test_connection_error_is_retried(fetcher, sleeps):
+    fetcher.fetcher.base_url = "http://127.0.0.1:9/v2"
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        get_card(fetcher)
+    assert len(sleeps) == 2
+
+
+def test_search_errors_return_an_empty_result(stub, fetcher):
+    stub.fail_next(3, status=503)
+
+    assert run(fetcher, fetcher.search_card_by_id(CARD_ID)) == {}
+
+
+# -------------------------------------------------------------------
+# RETRY-AFTER
+# -------------------------------------------------------------------
+
+def test_retry_after_sets_the_minimum_delay(stub, fetcher, sleeps):
+    stub.fail_next(1, status=429, retry_after=1)
+
+    assert run(fetcher, fetcher.search_card_by_id(CARD_ID))['id'] == CARD_ID
+    assert len(sleeps) == 1 and sleeps[0] >= 1
+
+
+def test_retry_after_beyond_backoff_max_fails_without_retrying(stub, fetcher, sleeps, served):
+    stub.fail_next(1, status=503, retry_after=120)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_card(fetcher)
+    assert served() == 1 and sleeps == []
+
+
+# -------------------------------------------------------------------
+# CIRCUIT BREAKER
+# -------------------------------------------------------------------
+
+def open_circuit(stub, fetcher):
+    for _ in range(fetcher.circuit_breaker.failure_threshold):
+        stub.fail_next(fetcher.fetcher.max_retries + 1, status=503)
+        with pytest.raises(requests.exceptions.HTTPError):
+            get_card(fetcher)
+    assert fetcher.circuit_breaker.state == STATE_OPEN
+
+
+def test_open_circuit_fails_fast_without_contacting_upstream(stub, fetcher, served):
+    open_circuit(stub, fetcher)
+    requests_before = served()
+
+    with pytest.raises(UpstreamUnavailableError):
+        get_card(fetcher)
+    assert served() == requests_before
+
+
+def test_circuit_half_opens_after_timeout_and_closes_on_success(stub, fetcher, clock):
+    open_circuit(stub, fetcher)
+
+    clock.advance(30)
+    assert fetcher.circuit_breaker.state == STATE_HALF_OPEN
+
+    assert run(fetcher, fetcher.search_card_by_id(CARD_ID))['id'] == CARD_ID
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+
+
+def test_cancelled_probe_frees_the_half_open_circuit(stub, fetcher, clock):
+    open_circuit(stub, fetcher)
+    clock.advance(30)
+    stub.fail_next(1, status=503)
+
+    async def cancelled_probe():
+        # Il primo tentativo fallisce; la cancellazione arriva durante l'attesa prima del secondo
+        backing_off = asyncio.Event()
+
+        async def sleep(delay):
+            backing_off.set()
+            await asyncio.Event().wait()
+
+        fetcher._sleep = sleep
+        task = asyncio.ensure_future(fetcher._get(fetcher.fetcher._card_url(CARD_ID), read_timeout=5))
+        await backing_off.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(fetcher, cancelled_probe())
+
+    assert fetcher.circuit_breaker.state == STATE_HALF_OPEN
+    assert fetcher.circuit_breaker.allow_request()
@@ -0,0 +1,98 @@
+"""
+Ricerca per nome nella collezione con l'indice FTS5 (card_fts): prefissi, parole, accenti
+e allineamento dell'indice alla tabella card tramite i trigger.
+"""
+import pytest
+from sqlalchemy import text, update
+
+from persistence.database.model import db, Card, _create_card_fts
+
+
+@pytest.fixture
+def collection(app, seed_cards):
+    assert app.config['CARD_FTS_ENABLED']
+    seed_cards([
+        {'id': "base1-4", 'name': "Charizard", 'type': "Fire", 'rarity': "Rare", 'set_id': "base1"},
+        {'id': "base1-58", 'name': "Pikachu", 'type': "Lightning", 'rarity': "Common", 'set_id': "base1"},
+        {'id': "base5-4", 'name': "Dark Charizard", 'type': "Fire", 'rarity': "Rare", 'set_id': "base5"},
+        {'id': "xy12-64", 'name': "Flabébé", 'type': "Fairy", 'rarity': "Common", 'set_id': "xy12"},
+    ])
+
+
+def search_ids(data_manager, query: str) -> list:
+    return sorted(card['id'] for card in data_manager.get_all_card(query))
+
+
+def page_ids(data_manager, query: str) -> list:
+    return sorted(card['id'] for card in data_manager.get_cards_page(search_query=query)['cards'])
+
+
+def fts_rows(app) -> list:
+    with app.app_context():
+        return sorted(db.session.execute(text("SELECT card_id, name FROM card_fts")).all())
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("pika", ["base1-58"]),                          # prefisso
+    ("PIKACHU", ["base1-58"]),                       # maiuscole/minuscole
+    ("char", ["base1-4", "base5-4"]),                # prefisso di una parola qualsiasi
+    ("dark char", ["base5-4"]),                      # tutte le parole devono essere presenti
+    ("flabebe", ["xy12-64"]),                        # accenti ignorati
+    ("Flabébé", ["xy12-64"]),
+    ("izard", []),                                   # solo prefissi, non sottostringhe
+])
+def test_name_search_matches(collection, data_manager, query, expected):
+    assert search_ids(data_manager, query) == expected
+    assert page_ids(data_manager, query) == expected
+
+
+def test_index_follows_add_delete_and_rename(app, collection, data_manager):
+    data_manager.add_card({'id': "sv3pt5-25", 'name': "Charmander", 'type': "Fire", 'rarity': "Common",
+                           'set_id': "sv3pt5", 'set_name': "151"})
+    assert search_ids(data_manager, "charm") == ["sv3pt5-25"]
+
+    data_manager.delete_card_by_id("base1-4")
+    assert search_ids(data_manager, "char") == ["base5-4", "sv3pt5-25"]
+
+    with app.app_context():
+        db.session.execute(update(Card).where(Card.id == "base1-58").values(name="Raichu"))
+        db.session.commit()
+    assert search_ids(data_manager, "pika") == []
+    assert search_ids(data_manager, "raichu") == ["base1-58"]
+
+    with app.app_context():
+        cards = sorted(db.session.execute(text("SELECT id, name FROM card")).all())
+    assert fts_rows(app) == cards
+
+
+def test_index_survives_vacuum(app, collection, data_manager):
+    """VACUUM puo' rinumerare i rowid impliciti di card: l'indice non deve dipenderne."""
+    data_manager.delete_card_by_id("base1-4")
+    data_manager.delete_card_by_id("base1-58")
+    with app.app_context():
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+
+    assert search_ids(data_manager, "char") == ["base5-4"]
+    assert search_ids(data_manager, "flab") == ["xy12-64"]
+
+    data_manager.delete_card_by_id("base5-4")
+    assert search_ids(data_manager, "char") == []
+    assert search_ids(data_manager, "flab") == ["xy12-64"]
+
+
+def test_rowid_keyed_index_is_rebuilt(app, collection, data_manager):
+    """Un indice "external content" su card.rowid delle versioni precedenti viene sostituito e ripopolato."""
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for statement in ("DROP TRIGGER card_fts_after_insert", "DROP TRIGGER card_fts_after_delete",
+                              "DROP TRIGGER card_fts_after_update", "DROP TABLE card_fts_key", "DROP TABLE card_fts"):
+                connection.execute(text(statement))
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE card_fts USING fts5(name, content='card', content_rowid='rowid')"
+            ))
+        assert _create_card_fts(app)
+
+    assert search_ids(data_manager, "char") == ["base1-4", "base5-4"]
+    data_manager.delete_card_by_id("base1-4")
+    assert search_ids(data_manager, "char") == ["base5-4"]
@@ -0,0 +1,84 @@
+import pytest
+import requests
+from flask import Flask
+
+from application.core_manager import CoreManager
+from application.single_flight import SingleFlightTimeoutError
+from communication.api.image_cache import ImageCache, IMAGE_SIZE_HIGH
+from communication.api.tcg_fetcher import UpstreamUnavailableError
+from communication.api_server import RestApiServer
+
+IMAGE_URL = 'https://assets.tcgdex.net/en/base/base1/4'
+
+
+class StubDataManager:
+    def get_card_by_id(self, card_id):
+        return {'id': card_id, 'image_url': f"{IMAGE_URL}/high.webp"}
+
+
+class StubFetcher:
+    def __init__(self, error):
+        self.error = error
+
+    def fetch_image(self, image_url):
+        raise self.error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+def make_core_manager(tmp_path, error):
+    return CoreManager(data_manager=StubDataManager(), tcg_fetcher=StubFetcher(error),
+                       image_cache=ImageCache(str(tmp_path / 'images')))
+
+
+# -------------------------------------------------------------------
+# CoreManager: 404 di TCGDEX = nessuna immagine, gli altri errori vengono propagati
+# -------------------------------------------------------------------
+
+def test_missing_upstream_image_returns_none(tmp_path):
+    core_manager = make_core_manager(tmp_path, http_error(404))
+
+    assert core_manager.get_card_image('base1-4', IMAGE_SIZE_HIGH) is None
+
+
+@pytest.mark.parametrize('error', [
+    UpstreamUnavailableError("Circuit breaker aperto"),
+    requests.exceptions.ConnectionError("connection refused"),
+    http_error(503),
+])
+def test_upstream_failures_propagate(tmp_path, error):
+    core_manager = make_core_manager(tmp_path, error)
+
+    with pytest.raises(type(error)):
+        core_manager.get_card_image('base1-4', IMAGE_SIZE_HIGH)
+
+
+# -------------------------------------------------------------------
+# Handler: errori di TCGDEX mappati su 503/504 come per le ricerche
+# -------------------------------------------------------------------
+
+class RaisingCoreManager:
+    def __init__(self, error):
+        self.error = error
+
+    def get_card_image(self, card_id, size):
+        raise self.error
+
+
+@pytest.mark.parametrize('error, status', [
+    (UpstreamUnavailableError("Circuit breaker aperto"), 503),
+    (requests.exceptions.ConnectionError("connection refused"), 503),
+    (requests.exceptions.ReadTimeout("read timed out"), 504),
+    (SingleFlightTimeoutError("attesa scaduta"), 504),
+])
+def test_image_endpoint_maps_upstream_errors(error, status):
+    server = RestApiServer(core_manager=RaisingCoreManager(error), app=Flask(__name__), host='127.0.0.1', port=0)
+
+    response = server.app.test_client().get('/api/images/base1-4?size=high')
+
+    assert response.status_code == status
+    assert 'error' in response.get_json()
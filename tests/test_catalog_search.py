@@ -0,0 +1,108 @@
+import pytest
+
+from application.core_manager import CoreManager, CATALOG_MODE_HYBRID, CATALOG_MODE_LOCAL
+from persistence.catalog_manager import CatalogManager
+
+
+class StubFetcher:
+    """Ricerca per nome su TCGDEX con risultati fissi; conta le chiamate."""
+
+    def __init__(self, cards=()):
+        self.cards = list(cards)
+        self.calls = 0
+
+    def search_cards_by_name(self, name_query):
+        self.calls += 1
+        return self.cards
+
+
+def card(card_id, name, set_id='base1'):
+    return {'id': card_id, 'name': name, 'image_url': None, 'set': f"Set {set_id}", 'set_id': set_id,
+            'type': 'N/A', 'rarity': 'N/A'}
+
+
+@pytest.fixture
+def catalog(app):
+    catalog_manager = CatalogManager(app=app)
+    catalog_manager.replace_set({'id': 'base1', 'name': 'Set base1', 'card_count': 3, 'cards': [
+        card('base1-1', 'Pikachu'), card('base1-2', 'Pikachu'), card('base1-3', 'Raichu'),
+    ]})
+    return catalog_manager
+
+
+def make_core_manager(catalog, fetcher, mode=CATALOG_MODE_HYBRID, search_limit=250):
+    return CoreManager(data_manager=None, tcg_fetcher=fetcher, catalog_manager=catalog,
+                       catalog_mode=mode, search_limit=search_limit)
+
+
+def test_search_by_name_applies_the_limit(catalog, queries):
+    with queries() as executed:
+        cards = catalog.search_by_name('pika', limit=1)
+
+    assert [c['id'] for c in cards] == ['base1-1']
+    assert 'LIMIT' in executed[-1][0]
+
+
+def test_catalog_is_complete_only_when_every_registered_set_is_synced(catalog):
+    assert catalog.is_complete()
+
+    assert catalog.register_sets([{'id': 'base1', 'name': 'Set base1'}, {'id': 'base2', 'name': 'Set base2'}]) == 1
+    assert not catalog.is_complete()
+
+
+def test_empty_catalog_is_not_complete(app):
+    assert not CatalogManager(app=app).is_complete()
+
+
+def test_hybrid_with_complete_catalog_answers_locally(catalog):
+    fetcher = StubFetcher([card('base1-1', 'Pikachu')])
+    core_manager = make_core_manager(catalog, fetcher)
+
+    cards, partial = core_manager.search_cards_by_name('pika')
+
+    assert [c['id'] for c in cards] == ['base1-1', 'base1-2']
+    assert not partial
+    assert fetcher.calls == 0
+
+
+def test_hybrid_with_unsynced_sets_merges_remote_results(catalog):
+    catalog.register_sets([{'id': 'base2', 'name': 'Set base2'}])
+    fetcher = StubFetcher([card('base2-1', 'Pikachu', 'base2'), card('base1-1', 'Pikachu')])
+    core_manager = make_core_manager(catalog, fetcher)
+
+    cards, partial = core_manager.search_cards_by_name('pika')
+
+    # Prima i risultati di TCGDEX, poi le carte del mirror che TCGDEX non ha restituito
+    assert [c['id'] for c in cards] == ['base2-1', 'base1-1', 'base1-2']
+    assert not partial
+    assert fetcher.calls == 1
+
+
+def test_hybrid_with_unsynced_sets_and_no_remote_answer_is_partial(catalog):
+    catalog.register_sets([{'id': 'base2', 'name': 'Set base2'}])
+    core_manager = make_core_manager(catalog, StubFetcher())
+
+    cards, partial = core_manager.search_cards_by_name('pika')
+
+    assert [c['id'] for c in cards] == ['base1-1', 'base1-2']
+    assert partial
+
+
+@pytest.mark.parametrize('mode', [CATALOG_MODE_LOCAL, CATALOG_MODE_HYBRID])
+def test_results_past_the_limit_are_truncated_and_partial(catalog, mode):
+    core_manager = make_core_manager(catalog, StubFetcher(), mode=mode, search_limit=1)
+
+    cards, partial = core_manager.search_cards_by_name('pika')
+
+    assert [c['id'] for c in cards] == ['base1-1']
+    assert partial
+
+
+def test_remote_results_past_the_limit_are_truncated(catalog):
+    fetcher = StubFetcher([card(f"sv1-{n}", 'Charizard', 'sv1') for n in range(5)])
+    core_manager = make_core_manager(catalog, fetcher, search_limit=3)
+
+    cards, partial = core_manager.search_cards_by_name('charizard')
+
+    assert len(cards) == 3
+    assert partial
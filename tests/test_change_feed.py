@@ -0,0 +1,158 @@
+"""
+Change feed della collezione: versione e change log scritti nella stessa transazione della modifica,
+differenze compattate per carta e reset quando le differenze non sono ricostruibili.
+"""
+import contextlib
+
+import pytest
+from flask import Flask
+from sqlalchemy import select
+
+import persistence.data_manager as data_manager_module
+from communication.api_server import RestApiServer
+from persistence.database.model import db, CollectionChange, CHANGE_ADD, CHANGE_DELETE
+
+
+def card(card_id, name='Pikachu'):
+    return {'id': card_id, 'name': name, 'type': 'Lightning', 'rarity': 'Common', 'set_id': 'base1', 'set_name': 'Base'}
+
+
+def change_log(app) -> list:
+    with app.app_context():
+        return db.session.execute(
+            select(CollectionChange.version, CollectionChange.card_id, CollectionChange.operation)
+            .order_by(CollectionChange.version, CollectionChange.card_id)
+        ).all()
+
+
+# -------------------------------------------------------------------
+# VERSIONE E CHANGE LOG NELLA TRANSAZIONE DELLA MODIFICA
+# -------------------------------------------------------------------
+
+def test_each_write_records_one_version(app, data_manager):
+    data_manager.add_card(card('base1-1'))
+    data_manager.add_cards([card('base1-2'), card('base1-3')])
+    data_manager.delete_card_by_id('base1-1')
+
+    assert data_manager.get_collection_version() == 3
+    assert change_log(app) == [
+        (1, 'base1-1', CHANGE_ADD), (2, 'base1-2', CHANGE_ADD), (2, 'base1-3', CHANGE_ADD), (3, 'base1-1', CHANGE_DELETE),
+    ]
+
+
+def test_rejected_writes_do_not_change_the_version(app, data_manager):
+    data_manager.add_card(card('base1-1'))
+
+    assert data_manager.add_card(card('base1-1'))[0] is False
+    assert data_manager.delete_card_by_id('base1-99')[0] is False
+    assert data_manager.get_collection_version() == 1
+    assert len(change_log(app)) == 1
+
+
+@pytest.mark.parametrize('write', [
+    lambda data_manager: data_manager.add_card(card('base1-2')),
+    lambda data_manager: data_manager.add_cards([card('base1-2')]),
+    lambda data_manager: data_manager.delete_card_by_id('base1-1'),
+], ids=['add', 'bulk_add', 'delete'])
+def test_failed_commit_rolls_back_card_version_and_log_together(app, data_manager, monkeypatch, write):
+    data_manager.add_card(card('base1-1'))
+
+    def failing_commit():
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr(db.session, 'commit', failing_commit)
+    # add_card e add_cards riportano l'errore nel risultato, delete_card_by_id lo propaga
+    with app.app_context(), contextlib.suppress(RuntimeError):
+        write(data_manager)
+    monkeypatch.undo()
+
+    assert data_manager.get_collection_version() == 1
+    assert change_log(app) == [(1, 'base1-1', CHANGE_ADD)]
+    assert data_manager.get_card_by_id('base1-1') is not None
+    assert data_manager.get_card_by_id('base1-2') is None
+
+
+# -------------------------------------------------------------------
+# DIFFERENZE DALLA VERSIONE DEL CLIENT
+# -------------------------------------------------------------------
+
+def test_changes_are_compacted_per_card(data_manager):
+    data_manager.add_card(card('base1-1'))
+    since = data_manager.get_collection_version()
+
+    data_manager.add_card(card('base1-2', 'Raichu'))
+    data_manager.delete_card_by_id('base1-2')
+    data_manager.delete_card_by_id('base1-1')
+    data_manager.add_card(card('base1-3', 'Charizard'))
+
+    changes = data_manager.get_changes_since(since)
+
+    assert changes['version'] == since + 4 and not changes['reset']
+    # Aggiunta e poi cancellazione della stessa carta: resta solo la cancellazione
+    assert sorted(changes['deleted']) == ['base1-1', 'base1-2']
+    assert [c['id'] for c in changes['added']] == ['base1-3']
+
+
+def test_current_version_has_no_changes(data_manager):
+    data_manager.add_card(card('base1-1'))
+
+    assert data_manager.get_changes_since(1) == {'version': 1, 'reset': False, 'added': [], 'deleted': []}
+
+
+def test_version_older_than_the_retained_log_resets(data_manager, monkeypatch):
+    monkeypatch.setattr(data_manager_module, 'CHANGE_LOG_RETENTION_VERSIONS', 2)
+    for n in range(1, 5):
+        data_manager.add_card(card(f"base1-{n}"))
+
+    # Conservate solo le versioni 3 e 4: da 2 in poi le differenze sono complete
+    assert data_manager.get_changes_since(1)['reset']
+    changes = data_manager.get_changes_since(2)
+    assert not changes['reset']
+    assert sorted(c['id'] for c in changes['added']) == ['base1-3', 'base1-4']
+
+
+def test_version_from_the_future_resets(data_manager):
+    data_manager.add_card(card('base1-1'))
+
+    changes = data_manager.get_changes_since(5)
+
+    assert changes == {'version': 1, 'reset': True, 'added': [], 'deleted': []}
+
+
+def test_too_many_changes_reset(data_manager, monkeypatch):
+    monkeypatch.setattr(data_manager_module, 'CHANGE_FEED_MAX_ROWS', 2)
+    data_manager.add_cards([card(f"base1-{n}") for n in range(1, 4)])
+
+    assert data_manager.get_changes_since(0)['reset']
+
+
+# -------------------------------------------------------------------
+# API
+# -------------------------------------------------------------------
+
+class StubCoreManager:
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+
+    def get_collection_changes(self, since):
+        return self.data_manager.get_changes_since(since)
+
+
+@pytest.mark.parametrize('since', ['', 'abc', '-1', '1.5'])
+def test_invalid_since_is_rejected(data_manager, since):
+    server = RestApiServer(core_manager=StubCoreManager(data_manager), app=Flask(__name__), host='127.0.0.1', port=0)
+
+    response = server.app.test_client().get(f"/api/collection/changes?since={since}")
+
+    assert response.status_code == 400
+
+
+def test_changes_endpoint_is_not_cached(data_manager):
+    data_manager.add_card(card('base1-1'))
+    server = RestApiServer(core_manager=StubCoreManager(data_manager), app=Flask(__name__), host='127.0.0.1', port=0)
+
+    response = server.app.test_client().get("/api/collection/changes?since=0")
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert [c['id'] for c in response.get_json()['added']] == ['base1-1']
@@ -0,0 +1,65 @@
+from flask import Flask
+
+from communication.api_server import RestApiServer, CHANGES_STREAM_MAX_SECONDS
+
+
+class StubCoreManager:
+    """Solo i metodi usati dallo stream delle modifiche (collezione ferma alla versione 1)."""
+
+    def get_collection_version(self):
+        return 1
+
+    def get_collection_changes(self, since):
+        return {'version': 1, 'added': [], 'deleted': [], 'reset': False}
+
+
+def make_client(**kwargs):
+    server = RestApiServer(core_manager=StubCoreManager(), app=Flask(__name__), host='127.0.0.1', port=0, **kwargs)
+    return server, server.app.test_client()
+
+
+def open_stream(client):
+    response = client.get('/api/collection/changes/stream?since=1', buffered=False)
+    if response.status_code == 200:
+        # Primo blocco (retry:) inviato prima di qualsiasi attesa
+        assert next(response.response).startswith(b'retry:')
+    return response
+
+
+def test_streams_past_the_cap_get_503_with_retry_after():
+    server, client = make_client(max_change_streams=1)
+
+    first = open_stream(client)
+    second = open_stream(client)
+
+    assert first.status_code == 200
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == str(int(CHANGES_STREAM_MAX_SECONDS))
+    assert server._change_streams == 1
+    first.close()
+
+
+def test_closing_a_stream_frees_its_slot():
+    server, client = make_client(max_change_streams=1)
+
+    first = open_stream(client)
+    first.close()
+    first.close()  # chiusura ripetuta: il posto viene liberato una sola volta
+    assert server._change_streams == 0
+
+    second = open_stream(client)
+    assert second.status_code == 200
+    second.close()
+    assert server._change_streams == 0
+
+
+def test_default_cap_is_a_quarter_of_the_threads():
+    assert make_client(threads=8)[0].max_change_streams == 2
+    assert make_client(threads=2)[0].max_change_streams == 1
+
+
+def test_invalid_since_does_not_take_a_slot():
+    server, client = make_client(max_change_streams=1)
+
+    assert client.get('/api/collection/changes/stream?since=abc').status_code == 400
+    assert server._change_streams == 0
@@ -0,0 +1,83 @@
+"""
+Risposte condizionali di GET /api/collection e /api/collection/stats: l'ETag dipende dalla
+versione della collezione e dai parametri della richiesta.
+"""
+import pytest
+from flask import Flask
+
+from application.core_manager import CoreManager
+from communication.api_server import RestApiServer
+
+
+def card(card_id, name='Pikachu'):
+    return {'id': card_id, 'name': name, 'type': 'Lightning', 'rarity': 'Common', 'set_id': 'base1', 'set_name': 'Base'}
+
+
+@pytest.fixture
+def client(data_manager):
+    data_manager.add_card(card('base1-1'))
+    data_manager.add_card(card('base1-2', 'Raichu'))
+    core_manager = CoreManager(data_manager=data_manager, tcg_fetcher=None)
+    return RestApiServer(core_manager=core_manager, app=Flask(__name__), host='127.0.0.1', port=0).app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/api/collection', '/api/collection/stats'])
+def test_current_etag_answers_304_with_an_empty_body(client, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+@pytest.mark.parametrize('path', ['/api/collection', '/api/collection/stats'])
+@pytest.mark.parametrize('change', [
+    lambda client, data_manager: data_manager.add_card(card('base1-3', 'Charizard')),
+    lambda client, data_manager: data_manager.add_cards([card('base1-3', 'Charizard'), card('base1-4', 'Eevee')]),
+    lambda client, data_manager: client.delete('/api/collection?id=base1-1'),
+], ids=['add', 'bulk_add', 'delete'])
+def test_changed_collection_answers_200_with_a_new_etag(client, data_manager, path, change):
+    old = client.get(path)
+
+    change(client, data_manager)
+    response = client.get(path, headers={'If-None-Match': old.headers['ETag']})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != old.headers['ETag']
+    assert response.get_json() != old.get_json()
+
+
+def test_rejected_write_keeps_the_etag(client):
+    old = client.get('/api/collection')
+
+    assert client.delete('/api/collection?id=base1-99').status_code == 404
+
+    assert client.get('/api/collection', headers={'If-None-Match': old.headers['ETag']}).status_code == 304
+
+
+def test_different_query_strings_get_different_etags(client):
+    etags = {
+        client.get(f"/api/collection{query}").headers['ETag']
+        for query in ['', '?name=pika', '?name=rai', '?limit=1', '?sort=rarity', '?order=desc', '?fields=id', '?type=Fire']
+    }
+
+    assert len(etags) == 8
+
+
+def test_parameter_order_does_not_change_the_etag(client):
+    first = client.get('/api/collection?name=pika&limit=1')
+    second = client.get('/api/collection?limit=1&name=pika')
+
+    assert first.headers['ETag'] == second.headers['ETag']
+
+
+def test_etag_of_another_query_does_not_match(client):
+    etag = client.get('/api/collection?name=pika').headers['ETag']
+
+    response = client.get('/api/collection?name=rai', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert [c['id'] for c in response.get_json()] == ['base1-2']
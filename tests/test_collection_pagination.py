@@ -0,0 +1,137 @@
+"""
+Paginazione keyset della collezione: percorrendo tutte le pagine si ottiene esattamente
+l'ORDER BY completo (senza buchi ne' duplicati) per ogni chiave e direzione, anche con
+type/rarity NULL e nomi ripetuti; i cursori non validi o manomessi sono rifiutati.
+"""
+import base64
+import json
+
+import pytest
+from flask import Flask
+
+from application.core_manager import CoreManager
+from communication.api_server import RestApiServer
+from persistence.data_manager import DataManager, CARD_SORT_KEYS, SORT_ORDERS
+
+NAMES = ["Pikachu", "Charizard", "Eevee", "Pikachu", "Mewtwo", "Eevee", "Pikachu"]
+TYPES = ["Lightning", None, "Fire", "Colorless", None]
+RARITIES = [None, "Common", "Rare", None, "Uncommon", "Common"]
+
+
+@pytest.fixture
+def collection(seed_cards):
+    cards = [
+        {'id': f"{set_id}-{n}", 'name': NAMES[(i + n) % len(NAMES)], 'type': TYPES[(i + n) % len(TYPES)],
+         'rarity': RARITIES[(i * 2 + n) % len(RARITIES)], 'set_id': set_id}
+        for i, set_id in enumerate(["base1", "base2", "jungle"]) for n in range(1, 12)
+    ]
+    seed_cards(cards)
+    return cards
+
+
+def expected_order(cards: list, sort: str, order: str) -> list:
+    """Ordine atteso: NULL prima in crescente e dopo in decrescente, poi (name, id) nella stessa direzione."""
+    keys = [column.key for column in CARD_SORT_KEYS[sort]]
+    ordered = sorted(cards, key=lambda card: [(card[key] is not None, card[key] or '') for key in keys],
+                     reverse=order == 'desc')
+    return [card['id'] for card in ordered]
+
+
+def walk_pages(data_manager, limit: int, **kwargs) -> list:
+    pages, cursor = [], None
+    while True:
+        page = data_manager.get_cards_page(limit=limit, cursor=cursor, fields=['id'], **kwargs)
+        pages.append([card['id'] for card in page['cards']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('order', SORT_ORDERS)
+@pytest.mark.parametrize('sort', CARD_SORT_KEYS)
+@pytest.mark.parametrize('limit', [1, 4])
+def test_pages_concatenate_to_the_full_order(collection, data_manager, sort, order, limit):
+    pages = walk_pages(data_manager, limit, sort=sort, order=order)
+
+    assert [card_id for page in pages for card_id in page] == expected_order(collection, sort, order)
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+@pytest.mark.parametrize('order', SORT_ORDERS)
+def test_pages_with_filters_and_search(collection, data_manager, order):
+    pages = walk_pages(data_manager, 2, sort='rarity', order=order, search_query='pika',
+                       filters={'set_id': ['base1', 'jungle']})
+
+    matching = [card for card in collection if card['name'] == 'Pikachu' and card['set_id'] in ('base1', 'jungle')]
+    assert [card_id for page in pages for card_id in page] == expected_order(matching, 'rarity', order)
+
+
+def test_total_is_returned_with_the_first_page_only(collection, data_manager):
+    first = data_manager.get_cards_page(limit=5)
+    second = data_manager.get_cards_page(limit=5, cursor=first['next_cursor'])
+
+    assert first['total'] == len(collection)
+    assert second['total'] is None
+
+
+# -------------------------------------------------------------------
+# CURSORI NON VALIDI
+# -------------------------------------------------------------------
+
+def encoded(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+INVALID_CURSORS = [
+    "not base64!",
+    "àèì",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode('ascii'),   # non e' JSON
+    encoded({'name': "Pikachu", 'id': "base1-1"}),            # non e' una lista
+    encoded(["Pikachu"]),                                     # numero di valori errato
+    encoded(["Pikachu", "base1-1", "extra"]),
+    encoded([{'name': "Pikachu"}, "base1-1"]),                # valori non scalari
+    encoded([["Pikachu"], "base1-1"]),
+    encoded([1.5, "base1-1"]),
+    encoded([True, "base1-1"]),
+]
+
+
+@pytest.mark.parametrize('cursor', INVALID_CURSORS)
+def test_invalid_cursor_raises_value_error(collection, data_manager, cursor):
+    with pytest.raises(ValueError):
+        data_manager.get_cards_page(limit=5, cursor=cursor)
+
+
+def test_cursor_from_another_sort_key_is_rejected(collection, data_manager):
+    cursor = data_manager.get_cards_page(limit=5, sort='name')['next_cursor']
+
+    with pytest.raises(ValueError):
+        data_manager.get_cards_page(limit=5, cursor=cursor, sort='rarity')
+
+
+@pytest.mark.parametrize('cursor', INVALID_CURSORS)
+def test_api_answers_400_for_invalid_cursors(app, collection, cursor):
+    core_manager = CoreManager(data_manager=DataManager(app=app), tcg_fetcher=None)
+    client = RestApiServer(core_manager=core_manager, app=Flask(__name__), host='127.0.0.1', port=0).app.test_client()
+
+    response = client.get('/api/collection', query_string={'limit': 5, 'cursor': cursor})
+
+    assert response.status_code == 400
+    assert 'Invalid cursor' in response.get_json()['error']
+
+
+def test_api_walks_pages_with_the_next_cursor_header(app, collection):
+    core_manager = CoreManager(data_manager=DataManager(app=app), tcg_fetcher=None)
+    client = RestApiServer(core_manager=core_manager, app=Flask(__name__), host='127.0.0.1', port=0).app.test_client()
+
+    ids, cursor = [], None
+    while True:
+        query = {'limit': 4, 'sort': 'type', 'order': 'desc', 'fields': 'id', **({'cursor': cursor} if cursor else {})}
+        response = client.get('/api/collection', query_string=query)
+        assert response.status_code == 200
+        ids.extend(card['id'] for card in response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    assert ids == expected_order(collection, 'type', 'desc')
@@ -0,0 +1,121 @@
+"""
+Statistiche della collezione lette dai contatori aggregati: dopo ogni scrittura (e dopo il backfill
+di un database esistente) devono coincidere con un conteggio GROUP BY sulle carte.
+"""
+import pytest
+from flask import Flask
+from sqlalchemy import select, func, delete, text
+
+from application.core_manager import CoreManager
+from communication.api_server import RestApiServer
+from persistence.data_manager import DataManager
+from persistence.database.model import db, initialize_db, Card, CollectionStat, _backfill_collection_stats
+
+
+def card(card_id, set_id='base1', card_type='Fire', rarity='Common'):
+    return {'id': card_id, 'name': 'Charmander', 'type': card_type, 'rarity': rarity,
+            'set_id': set_id, 'set_name': f"Set {set_id}"}
+
+
+def recount(app) -> dict:
+    """Statistiche ricalcolate con GROUP BY (valori mancanti come 'N/A', come i contatori)."""
+    with app.app_context():
+        def group_by(column):
+            counts = {}
+            for key, count in db.session.execute(select(column, func.count()).group_by(column)):
+                counts[key or 'N/A'] = counts.get(key or 'N/A', 0) + count
+            return counts
+
+        return {
+            'total_cards': db.session.execute(select(func.count()).select_from(Card)).scalar_one(),
+            'by_set': group_by(Card.set_id),
+            'by_type': group_by(Card.type),
+            'by_rarity': group_by(Card.rarity),
+        }
+
+
+def served_stats(app) -> dict:
+    core_manager = CoreManager(data_manager=DataManager(app=app), tcg_fetcher=None)
+    client = RestApiServer(core_manager=core_manager, app=Flask(__name__), host='127.0.0.1', port=0).app.test_client()
+    stats = client.get('/api/collection/stats').get_json()
+    return {**stats, 'by_set': {entry['set_id']: entry['owned'] for entry in stats['by_set']}}
+
+
+def assert_stats_match(app):
+    assert served_stats(app) == recount(app)
+
+
+def test_stats_follow_add_bulk_add_and_delete(app, data_manager):
+    assert_stats_match(app)
+
+    data_manager.add_card(card('base1-1'))
+    data_manager.add_card(card('base1-2', card_type=None, rarity=None))
+    assert_stats_match(app)
+
+    data_manager.add_cards([
+        card('base2-1', set_id='base2', card_type='Water'),
+        card('base2-2', set_id='base2', rarity='Rare'),
+        card('base1-1'),                                     # gia' presente: non conta
+        card('jungle-1', set_id='jungle', card_type=None),
+    ])
+    assert_stats_match(app)
+
+    for card_id in ('base1-1', 'base2-1', 'base1-2', 'missing'):
+        data_manager.delete_card_by_id(card_id)
+    assert_stats_match(app)
+
+    # Le chiavi arrivate a zero non vengono riportate
+    stats = served_stats(app)
+    assert 'Water' not in stats['by_type'] and 'N/A' in stats['by_type']
+
+
+def test_empty_collection_after_deleting_everything(app, data_manager):
+    data_manager.add_cards([card('base1-1'), card('base2-1', set_id='base2')])
+    data_manager.delete_card_by_id('base1-1')
+    data_manager.delete_card_by_id('base2-1')
+
+    assert served_stats(app) == {'total_cards': 0, 'by_set': {}, 'by_type': {}, 'by_rarity': {}}
+    with app.app_context():
+        assert db.session.execute(select(func.count()).select_from(CollectionStat)).scalar_one() == 0
+
+
+def test_backfill_of_an_existing_database(tmp_path, app, seed_cards):
+    # Database di una versione precedente: carte presenti, nessun contatore, schema non registrato
+    seed_cards([
+        {'id': 'base1-1', 'name': 'Charmander', 'type': 'Fire', 'rarity': 'Common', 'set_id': 'base1'},
+        {'id': 'base1-2', 'name': 'Squirtle', 'type': None, 'rarity': 'Common', 'set_id': 'base1'},
+        {'id': 'base2-1', 'name': 'Pikachu', 'type': 'Lightning', 'rarity': None, 'set_id': 'base2'},
+    ])
+    with app.app_context():
+        db.session.execute(delete(CollectionStat))
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(text("PRAGMA user_version = 0"))
+        db.engine.dispose()
+
+    restarted = Flask(__name__)
+    restarted.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI']
+    assert initialize_db(restarted)
+
+    assert_stats_match(restarted)
+    assert served_stats(restarted)['total_cards'] == 3
+
+    # I contatori ripartono dal backfill
+    DataManager(app=restarted).add_card(card('base2-2', set_id='base2'))
+    assert_stats_match(restarted)
+    with restarted.app_context():
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('existing_stats', [True, False])
+def test_backfill_runs_only_without_counters(app, data_manager, existing_stats):
+    data_manager.add_card(card('base1-1'))
+    if not existing_stats:
+        with app.app_context():
+            db.session.execute(delete(CollectionStat))
+            db.session.commit()
+
+    with app.app_context():
+        _backfill_collection_stats()
+
+    assert_stats_match(app)
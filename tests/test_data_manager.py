@@ -0,0 +1,39 @@
+"""
+Scritture del DataManager in presenza di Set creati nel frattempo da altre transazioni.
+"""
+from sqlalchemy import insert
+
+from persistence.database.model import db, Set
+
+
+def card(card_id: str, set_id: str) -> dict:
+    return {'id': card_id, 'name': f"Card {card_id}", 'type': "Fire", 'rarity': "Common",
+            'set_id': set_id, 'set_name': f"Set {set_id}"}
+
+
+def test_add_cards_tolerates_a_set_created_concurrently(app, data_manager, monkeypatch):
+    # Il Set viene creato da un'altra transazione dopo il pre-caricamento degli ID esistenti
+    original = data_manager._select_existing_ids
+
+    def select_then_race(column, ids):
+        existing = original(column, ids)
+        if column is Set.id:
+            with app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(insert(Set), [{'id': "sv1", 'name': "Set sv1", 'release_date': "N/A"}])
+        return existing
+
+    monkeypatch.setattr(data_manager, '_select_existing_ids', select_then_race)
+    report = data_manager.add_cards([card("sv1-1", "sv1"), card("sv1-2", "sv1"), card("sv2-1", "sv2")])
+
+    assert [entry['success'] for entry in report] == [True, True, True]
+    assert {c['id'] for c in data_manager.get_all_card()} == {"sv1-1", "sv1-2", "sv2-1"}
+
+
+def test_add_card_reuses_a_set_created_concurrently(app, data_manager):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(insert(Set), [{'id': "sv1", 'name': "Set sv1", 'release_date': "N/A"}])
+
+    assert data_manager.add_card(card("sv1-1", "sv1"))[0] is True
+    assert data_manager.add_cards([card("sv1-2", "sv1")])[0]['success'] is True
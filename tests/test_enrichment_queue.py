@@ -0,0 +1,239 @@
+import pytest
+from sqlalchemy import select
+
+from application.core_manager import CoreManager
+from application.enrichment_worker import EnrichmentWorkerPool, PermanentEnrichmentError, ENRICHMENT_JOBS
+from communication.api_server import RestApiServer
+from persistence.database.model import db, EnrichmentJob, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED
+from persistence.enrichment_queue_manager import EnrichmentQueueManager, DONE_JOB_RETENTION_SECONDS
+
+LEASE_SECONDS = 60
+
+
+class FakeClock:
+    """Orologio (timestamp Unix) controllato dal test."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def queue(app, clock):
+    return EnrichmentQueueManager(app=app, clock=clock)
+
+
+def brief(card_id='base1-4'):
+    return {'id': card_id, 'name': 'Charizard', 'image_url': "https://assets.tcgdex.net/en/base/base1/4/high.webp"}
+
+
+def stored_job(app, job_id):
+    with app.app_context():
+        return db.session.execute(select(EnrichmentJob.__table__).where(EnrichmentJob.id == job_id)).first()
+
+
+# -------------------------------------------------------------------
+# CODA: inserimento, prelievo, lease ed esito
+# -------------------------------------------------------------------
+
+def test_duplicate_enqueue_returns_the_active_job(queue):
+    job, created = queue.enqueue(brief())
+    again, created_again = queue.enqueue(brief())
+
+    assert created and not created_again
+    assert again['id'] == job['id']
+    assert again['status'] == JOB_QUEUED
+
+
+def test_enqueue_after_completion_creates_a_new_job(queue):
+    job, _ = queue.enqueue(brief())
+    claimed = queue.claim(LEASE_SECONDS)
+    assert queue.complete(claimed['id'], claimed['attempts'])
+
+    new_job, created = queue.enqueue(brief())
+
+    assert created
+    assert new_job['id'] != job['id']
+
+
+def test_claim_takes_each_ready_job_once(queue, clock):
+    first, _ = queue.enqueue(brief('base1-1'))
+    clock.advance(1)
+    second, _ = queue.enqueue(brief('base1-2'))
+
+    claimed = [queue.claim(LEASE_SECONDS), queue.claim(LEASE_SECONDS)]
+
+    assert [job['id'] for job in claimed] == [first['id'], second['id']]
+    assert all(job['status'] == JOB_RUNNING and job['attempts'] == 1 for job in claimed)
+    assert queue.claim(LEASE_SECONDS) is None
+
+
+def test_retry_is_not_claimable_before_its_delay(queue, clock):
+    queue.enqueue(brief())
+    job = queue.claim(LEASE_SECONDS)
+    assert queue.retry(job['id'], job['attempts'], "503", delay_seconds=30)
+
+    assert queue.claim(LEASE_SECONDS) is None
+    clock.advance(31)
+    again = queue.claim(LEASE_SECONDS)
+    assert again['id'] == job['id']
+    assert again['attempts'] == 2
+    assert again['last_error'] == "503"
+
+
+def test_job_with_expired_lease_is_reclaimed(queue, clock):
+    queue.enqueue(brief())
+    job = queue.claim(LEASE_SECONDS)
+
+    clock.advance(LEASE_SECONDS - 1)
+    assert queue.claim(LEASE_SECONDS) is None
+
+    clock.advance(2)
+    reclaimed = queue.claim(LEASE_SECONDS)
+    assert reclaimed['id'] == job['id']
+    assert reclaimed['attempts'] == job['attempts'] + 1
+
+
+@pytest.mark.parametrize('record', [
+    lambda queue, job: queue.complete(job['id'], job['attempts']),
+    lambda queue, job: queue.retry(job['id'], job['attempts'], "late", delay_seconds=5),
+    lambda queue, job: queue.fail(job['id'], job['attempts'], "late"),
+], ids=['complete', 'retry', 'fail'])
+def test_stale_claim_cannot_record_an_outcome(app, queue, clock, record):
+    queue.enqueue(brief())
+    stale = queue.claim(LEASE_SECONDS)
+    clock.advance(LEASE_SECONDS + 1)
+    current = queue.claim(LEASE_SECONDS)
+
+    assert record(queue, stale) is False
+
+    row = stored_job(app, current['id'])
+    assert row.status == JOB_RUNNING
+    assert row.attempts == current['attempts']
+    assert row.locked_until == clock() + LEASE_SECONDS
+    assert row.last_error is None
+    # Il proprietario attuale registra regolarmente il proprio esito
+    assert queue.complete(current['id'], current['attempts'])
+
+
+def test_complete_removes_done_jobs_past_retention(app, queue, clock):
+    queue.enqueue(brief('base1-1'))
+    old = queue.claim(LEASE_SECONDS)
+    queue.complete(old['id'], old['attempts'])
+
+    clock.advance(DONE_JOB_RETENTION_SECONDS + 1)
+    queue.enqueue(brief('base1-2'))
+    recent = queue.claim(LEASE_SECONDS)
+    queue.complete(recent['id'], recent['attempts'])
+
+    assert stored_job(app, old['id']) is None
+    assert stored_job(app, recent['id']).status == JOB_DONE
+
+
+# -------------------------------------------------------------------
+# WORKER: esiti registrati per tentativo
+# -------------------------------------------------------------------
+
+def make_pool(queue, enrich, **options):
+    return EnrichmentWorkerPool(queue, enrich, backoff_base=1, backoff_max=1, lease_seconds=LEASE_SECONDS, **options)
+
+
+def test_worker_records_done_retry_and_failed(app, queue):
+    def enrich(job):
+        if job['card_id'] == 'base1-2':
+            raise ConnectionError("TCGDEX non raggiungibile")
+        if job['card_id'] == 'base1-3':
+            raise PermanentEnrichmentError("Carta inesistente")
+
+    pool = make_pool(queue, enrich)
+    for card_id in ('base1-1', 'base1-2', 'base1-3'):
+        queue.enqueue(brief(card_id))
+        pool._process(queue.claim(LEASE_SECONDS))
+
+    statuses = [stored_job(app, job_id).status for job_id in (1, 2, 3)]
+    assert statuses == [JOB_DONE, JOB_QUEUED, JOB_FAILED]
+
+
+def test_worker_fails_the_job_after_max_attempts(app, queue, clock):
+    def enrich(job):
+        raise ConnectionError("TCGDEX non raggiungibile")
+
+    pool = make_pool(queue, enrich, max_attempts=2)
+    job, _ = queue.enqueue(brief())
+    for _ in range(2):
+        pool._process(queue.claim(LEASE_SECONDS))
+        clock.advance(2)
+
+    assert stored_job(app, job['id']).status == JOB_FAILED
+
+
+def test_outcome_of_a_lost_lease_is_unrecorded(app, queue, clock):
+    stale_claims = []
+
+    def enrich(job):
+        # Il lease scade durante l'elaborazione e un altro worker riprende il job
+        clock.advance(LEASE_SECONDS + 1)
+        stale_claims.append(queue.claim(LEASE_SECONDS))
+
+    pool = make_pool(queue, enrich)
+    queue.enqueue(brief())
+    unrecorded_before = ENRICHMENT_JOBS.value(outcome='unrecorded')
+
+    pool._process(queue.claim(LEASE_SECONDS))
+
+    assert ENRICHMENT_JOBS.value(outcome='unrecorded') == unrecorded_before + 1
+    assert stored_job(app, stale_claims[0]['id']).status == JOB_RUNNING
+
+
+# -------------------------------------------------------------------
+# API: 202 e stato del job
+# -------------------------------------------------------------------
+
+@pytest.fixture
+def client(app, data_manager, queue):
+    core_manager = CoreManager(data_manager=data_manager, tcg_fetcher=None, enrichment_queue=queue)
+    return RestApiServer(core_manager=core_manager, app=app, host='127.0.0.1', port=0).app.test_client()
+
+
+def test_post_answers_202_with_the_job_status_url(client):
+    response = client.post('/api/collection', json=brief())
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['card'] == {'id': 'base1-4', 'name': 'Charizard', 'image_url': brief()['image_url'], 'status': 'pending'}
+    assert 'queued for enrichment' in body['message']
+    assert response.headers['Location'] == body['status_url']
+
+    job = client.get(body['status_url']).get_json()
+    assert job['id'] == body['job']['id']
+    assert job['status'] == JOB_QUEUED
+
+
+def test_repeated_post_returns_the_same_job(client):
+    first = client.post('/api/collection', json=brief()).get_json()
+    second = client.post('/api/collection', json=brief())
+
+    assert second.status_code == 202
+    assert second.get_json()['job']['id'] == first['job']['id']
+    assert 'already being added' in second.get_json()['message']
+
+
+def test_status_endpoint_counts_jobs_by_status(client):
+    client.post('/api/collection', json=brief('base1-1'))
+    client.post('/api/collection', json=brief('base1-2'))
+
+    status = client.get('/api/collection/jobs').get_json()
+
+    assert status['counts'][JOB_QUEUED] == 2
+    assert [job['card_id'] for job in status['pending']] == ['base1-1', 'base1-2']
+    assert client.get('/api/collection/jobs/999').status_code == 404
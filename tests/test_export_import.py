@@ -0,0 +1,117 @@
+"""
+Export e import della collezione (NDJSON e CSV): un backup reimportato in un database vuoto
+restituisce le stesse carte; le righe non valide sono riportate senza interrompere l'import.
+"""
+import json
+
+import pytest
+from flask import Flask
+
+from application.core_manager import CoreManager
+from communication.api_server import RestApiServer
+from persistence.data_manager import DataManager
+from persistence.database.model import db, initialize_db
+
+CARDS = [
+    {'id': "base1-4", 'name': "Charizard", 'type': "Fire", 'rarity': "Rare Holo", 'set_id': "base1",
+     'set_name': "Base Set", 'image_url': "https://assets.tcgdex.net/en/base/base1/4"},
+    {'id': "base1-58", 'name': "Pikachu", 'type': "Lightning", 'rarity': "Common", 'set_id': "base1",
+     'set_name': "Base Set", 'image_url': None},
+    {'id': "xy12-64", 'name': "Flabébé", 'type': None, 'rarity': None, 'set_id': "xy12",
+     'set_name': "Evolutions", 'image_url': None},
+    {'id': "base2-27", 'name': "Farfetch^d, \"the\" duck", 'type': "Colorless", 'rarity': "Uncommon",
+     'set_id': "base2", 'set_name': "Jungle", 'image_url': "https://assets.tcgdex.net/en/base/base2/27"},
+]
+
+
+def make_client(data_manager):
+    core_manager = CoreManager(data_manager=data_manager, tcg_fetcher=None)
+    return RestApiServer(core_manager=core_manager, app=Flask(__name__), host='127.0.0.1', port=0).app.test_client()
+
+
+@pytest.fixture
+def source(data_manager):
+    assert all(entry['success'] for entry in data_manager.add_cards(CARDS))
+    return make_client(data_manager)
+
+
+@pytest.fixture
+def empty_data_manager(tmp_path):
+    """Secondo database, vuoto, in cui reimportare il backup."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'restore.db'}"
+    initialize_db(app)
+    yield DataManager(app=app)
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('export_format, mimetype', [('ndjson', 'application/x-ndjson'), ('csv', 'text/csv')])
+def test_export_then_import_restores_the_same_cards(data_manager, source, empty_data_manager, export_format, mimetype):
+    exported = source.get(f"/api/collection/export?format={export_format}")
+    assert exported.status_code == 200 and exported.mimetype == mimetype
+
+    response = make_client(empty_data_manager).post(f"/api/collection/import?format={export_format}",
+                                                    data=exported.data, content_type=mimetype)
+
+    assert response.get_json() == {'imported': len(CARDS), 'failed': 0, 'errors': []}
+    assert list(empty_data_manager.iter_cards()) == list(data_manager.iter_cards())
+    assert empty_data_manager.get_collection_stats() == data_manager.get_collection_stats()
+
+
+def test_import_into_the_same_collection_reports_duplicates(source):
+    exported = source.get("/api/collection/export?format=ndjson").data
+
+    summary = source.post("/api/collection/import", data=exported, content_type='application/x-ndjson').get_json()
+
+    assert summary['imported'] == 0 and summary['failed'] == len(CARDS)
+    assert all('already in the collection' in entry['message'] for entry in summary['errors'])
+
+
+def test_bad_ndjson_rows_are_reported_without_aborting(empty_data_manager):
+    lines = [
+        json.dumps(CARDS[0]),
+        "{not json",
+        json.dumps({**CARDS[1], 'id': None}),
+        json.dumps(["base1-1"]),
+        json.dumps({**CARDS[2], 'set_id': None}),
+        json.dumps(CARDS[0]),
+        json.dumps(CARDS[3]),
+        "",
+    ]
+
+    response = make_client(empty_data_manager).post("/api/collection/import", data='\n'.join(lines),
+                                                    content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['imported'] == 2 and summary['failed'] == 5
+    messages = [entry['message'] for entry in summary['errors']]
+    assert "Invalid JSON at line 2" in messages
+    assert "Line 4 is not a JSON object" in messages
+    assert "Missing card ID." in messages
+    assert "Missing Set ID required for database integrity." in messages
+    assert f"Card ID {CARDS[0]['id']} is already in the collection." in messages
+    assert [card['id'] for card in empty_data_manager.iter_cards()] == ["base1-4", "base2-27"]
+
+
+def test_bad_csv_rows_are_reported_without_aborting(empty_data_manager):
+    body = "id,name,type,rarity,image_url,set,set_id\n" \
+           "base1-4,Charizard,Fire,Rare Holo,,Base Set,base1\n" \
+           ",Nameless,Fire,,,Base Set,base1\n" \
+           "base1-58,Pikachu,Lightning,Common,,Base Set,\n" \
+           "xy12-64,Flabébé,,,,Evolutions,xy12\n"
+
+    summary = make_client(empty_data_manager).post("/api/collection/import", data=body.encode('utf-8'),
+                                                   content_type='text/csv').get_json()
+
+    assert summary['imported'] == 2 and summary['failed'] == 2
+    cards = {card['id']: card for card in empty_data_manager.iter_cards()}
+    assert cards['xy12-64'] == {'id': "xy12-64", 'name': "Flabébé", 'type': None, 'rarity': None, 'image_url': None,
+                                'set': "Evolutions", 'set_id': "xy12"}
+
+
+def test_unsupported_format_is_rejected(source):
+    assert source.get("/api/collection/export?format=xml").status_code == 400
+    assert source.post("/api/collection/import?format=xml", data=b"").status_code == 400
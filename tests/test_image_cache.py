@@ -0,0 +1,116 @@
+"""
+Cache su disco delle immagini: contenuti deduplicati, eviction LRU e limite di occupazione
+rispettato anche con piu' processi (qui: piu' istanze con connessioni proprie) sulla stessa directory.
+"""
+import os
+import threading
+
+import pytest
+
+import communication.api.image_cache as image_cache_module
+from communication.api.image_cache import ImageCache
+
+IMAGE_BYTES = 1000
+
+
+class FakeTime:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(image_cache_module, 'time', clock)
+    return clock
+
+
+def image(n: int) -> bytes:
+    return bytes([n % 256]) * IMAGE_BYTES
+
+
+def blob_bytes(directory) -> int:
+    blobs = os.path.join(directory, 'blobs')
+    return sum(os.path.getsize(os.path.join(blobs, name)) for name in os.listdir(blobs))
+
+
+def test_same_content_is_stored_once(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=10 * IMAGE_BYTES)
+
+    first_path, first_digest = cache.put('base1-4:high', image(1))
+    second_path, second_digest = cache.put('base2-4:high', image(1))
+
+    assert (first_path, first_digest) == (second_path, second_digest)
+    assert cache.stats() == {'entries': 2, 'total_bytes': IMAGE_BYTES, 'max_bytes': 10 * IMAGE_BYTES}
+    assert blob_bytes(tmp_path) == IMAGE_BYTES
+
+
+def test_replacing_a_key_frees_its_old_blob(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=10 * IMAGE_BYTES)
+    cache.put('base1-4:high', image(1))
+
+    cache.put('base1-4:high', image(2))
+
+    assert cache.total_bytes == IMAGE_BYTES == blob_bytes(tmp_path)
+    assert cache.get('base1-4:high')[1] == cache.put('other', image(2))[1]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ImageCache(str(tmp_path), max_bytes=3 * IMAGE_BYTES)
+    for n in range(3):
+        cache.put(f"card-{n}", image(n))
+        clock.now += 100
+    # card-0 letta di recente: la voce meno usata diventa card-1
+    assert cache.get('card-0') is not None
+    clock.now += 100
+
+    cache.put('card-3', image(3))
+
+    assert cache.get('card-1') is None
+    assert all(cache.get(key) is not None for key in ('card-0', 'card-2', 'card-3'))
+    assert cache.total_bytes == 3 * IMAGE_BYTES == blob_bytes(tmp_path)
+
+
+def test_entry_larger_than_the_limit_is_kept_alone(tmp_path):
+    cache = ImageCache(str(tmp_path), max_bytes=IMAGE_BYTES // 2)
+    cache.put('card-0', image(0))
+
+    cache.put('card-1', image(1))
+
+    assert cache.get('card-0') is None and cache.get('card-1') is not None
+    assert cache.total_bytes == IMAGE_BYTES
+
+
+def test_limit_holds_across_processes(tmp_path, clock):
+    caches = [ImageCache(str(tmp_path), max_bytes=3 * IMAGE_BYTES) for _ in range(3)]
+
+    for n in range(12):
+        caches[n % len(caches)].put(f"card-{n}", image(n))
+        clock.now += 1
+
+        assert blob_bytes(tmp_path) <= 3 * IMAGE_BYTES
+        assert {cache.total_bytes for cache in caches} == {blob_bytes(tmp_path)}
+
+    # Restano le voci piu' recenti, qualunque processo le abbia scritte
+    assert [n for n in range(12) if caches[0].get(f"card-{n}") is not None] == [9, 10, 11]
+
+
+def test_concurrent_writers_stay_within_the_limit(tmp_path):
+    caches = [ImageCache(str(tmp_path), max_bytes=5 * IMAGE_BYTES) for _ in range(4)]
+
+    def writer(index: int, cache: ImageCache):
+        for n in range(25):
+            cache.put(f"writer-{index}-{n}", image(index * 25 + n))
+
+    threads = [threading.Thread(target=writer, args=(index, cache)) for index, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert blob_bytes(tmp_path) <= 5 * IMAGE_BYTES
+    assert caches[0].stats()['entries'] <= 5
+    assert caches[0].total_bytes == blob_bytes(tmp_path)
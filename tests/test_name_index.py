@@ -0,0 +1,105 @@
+import pytest
+
+from application.name_index import NamePrefixIndex, normalize_name
+from monitoring.metrics import REGISTRY
+
+NAMES = ["Charizard", "Dark Charizard", "Charmander", "Pikachu", "Flabébé", "Farfetch^d", "Mr. Mime", "Ho-Oh"]
+
+
+def gauge_value(name: str) -> float:
+    """Valore corrente di un gauge, letto come farebbe lo scrape di Prometheus."""
+    for line in REGISTRY.render_prometheus().splitlines():
+        if line.startswith(f"{name} "):
+            return float(line.split()[1])
+    raise AssertionError(f"Gauge {name} non trovato")
+
+
+@pytest.fixture
+def index():
+    index = NamePrefixIndex()
+    index.build(NAMES)
+    return index
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ("char", ["Charizard", "Charmander", "Dark Charizard"]),   # prima il nome intero, poi le parole
+    ("CHAR", ["Charizard", "Charmander", "Dark Charizard"]),
+    ("  charm ", ["Charmander"]),
+    ("flabe", ["Flabébé"]),                                      # accenti ignorati
+    ("FLABÉ", ["Flabébé"]),
+    ("farfetch'", ["Farfetch'd"]),                               # nome mostrato con l'apostrofo
+    ("mime", ["Mr. Mime"]),
+    ("oh", ["Ho-Oh"]),
+    ("izard", []),                                               # solo prefissi
+    ("", []),
+])
+def test_suggest_by_prefix(index, prefix, expected):
+    assert index.suggest(prefix) == expected
+
+
+def test_normalize_name():
+    assert normalize_name("  Flabébé   EX ") == "flabebe ex"
+
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 3, 10])
+def test_suggest_returns_at_most_limit_names(index, limit):
+    suggestions = index.suggest("c", limit)
+
+    assert len(suggestions) == min(limit, 3)
+    assert suggestions == ["Charizard", "Charmander", "Dark Charizard"][:limit]
+
+
+def test_build_runs_once(index):
+    assert index.build(["Eevee"]) == 0
+    assert index.suggest("eev") == []
+    assert index.built
+
+
+def test_new_names_are_added_without_duplicates(index):
+    entries = index.stats()['entries']
+
+    assert index.add_names(["Charizard", "Eevee", "Eevee", None, ""]) == 1
+    assert index.add_names(["Eevee"]) == 0
+
+    assert index.suggest("eev") == ["Eevee"]
+    assert index.suggest("char") == ["Charizard", "Charmander", "Dark Charizard"]
+    assert index.stats()['names'] == len(NAMES) + 1
+    assert index.stats()['entries'] == entries + 1
+
+
+def test_many_new_names_are_merged_in_order(index):
+    added = [f"Unown {letter}" for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"] + ["Charjabug"] * 2 + ["Chatot"] * 10
+
+    assert index.add_names(added) == 28
+    assert index.suggest("char", 10) == ["Charizard", "Charjabug", "Charmander", "Dark Charizard"]
+    assert index.suggest("unown", 3) == ["Unown A", "Unown B", "Unown C"]
+    assert index.suggest("c", 100).count("Chatot") == 1
+
+
+def test_reader_keeps_a_consistent_snapshot(index):
+    entries = index._full_entries
+
+    index.add_names(["Eevee"])
+
+    # Copy-on-write: l'array letto prima dell'aggiunta non viene modificato
+    assert ("eevee", "Eevee") not in entries
+    assert entries is not index._full_entries
+
+
+def test_byte_gauge_follows_the_index():
+    index = NamePrefixIndex()
+    assert gauge_value('tcg_suggest_index_bytes') == 0
+    assert gauge_value('tcg_suggest_index_names') == 0
+
+    index.build(["Pikachu"])
+    after_build = gauge_value('tcg_suggest_index_bytes')
+    assert after_build > 0
+    assert gauge_value('tcg_suggest_index_names') == 1
+
+    index.add_names(["Pikachu"])
+    assert gauge_value('tcg_suggest_index_bytes') == after_build
+
+    index.add_names(["Dark Charizard"])
+    assert gauge_value('tcg_suggest_index_bytes') > after_build
+    assert gauge_value('tcg_suggest_index_names') == 2
+    assert gauge_value('tcg_suggest_index_bytes') == index.stats()['approx_bytes']
@@ -0,0 +1,54 @@
+"""
+Numero di query SQL dei percorsi del DataManager: letture e import massivo devono restare
+a numero costante di query, indipendentemente dal numero di carte (niente N+1).
+"""
+import pytest
+
+
+def make_cards(count: int, prefix: str = "card", sets: int = 20) -> list:
+    return [
+        {'id': f"{prefix}-{n}", 'name': f"Pikachu {n}", 'type': "Lightning", 'rarity': "Common",
+         'set_id': f"set{n % sets}"}
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def collection(seed_cards):
+    seed_cards(make_cards(500))
+
+
+@pytest.mark.parametrize("description, read_path, max_queries", [
+    ("get_all_card()", lambda dm: dm.get_all_card(), 1),
+    ("get_all_card('pika')", lambda dm: dm.get_all_card('pika'), 1),
+    ("get_card_by_id()", lambda dm: dm.get_card_by_id("card-1"), 1),
+    ("get_cards_page() (prima pagina)", lambda dm: dm.get_cards_page(limit=100), 2),
+    ("get_cards_page() con filtri e ordinamento",
+     lambda dm: dm.get_cards_page(limit=100, filters={'type': ["Lightning"]}, sort='set_id'), 2),
+    ("get_collection_stats()", lambda dm: dm.get_collection_stats(), 1),
+])
+def test_read_paths_use_constant_queries(collection, data_manager, queries, description, read_path, max_queries):
+    with queries() as executed:
+        result = read_path(data_manager)
+    assert result
+    assert len(executed) <= max_queries, f"{description}: {[statement for statement, _ in executed]}"
+
+
+def test_cards_page_does_not_lazy_load_sets(collection, data_manager, queries):
+    """Il nome del Set arriva dalla join della query della pagina, non da una query per carta."""
+    with queries() as executed:
+        page = data_manager.get_cards_page(limit=500, fields=['id', 'set'])
+    assert len(page['cards']) == 500
+    assert all(card['set'].startswith("Set ") for card in page['cards'])
+    assert len(executed) <= 2
+
+
+def test_add_cards_query_count_does_not_grow_with_batch(data_manager, queries):
+    with queries() as small_batch:
+        data_manager.add_cards([{**card, 'set_name': "Small"} for card in make_cards(10, prefix="small")])
+    with queries() as large_batch:
+        report = data_manager.add_cards([{**card, 'set_name': "Large"} for card in make_cards(400, prefix="large", sets=40)])
+
+    assert all(entry['success'] for entry in report)
+    assert len(large_batch) == len(small_batch)
+    assert len(large_batch) <= 10, [statement for statement, _ in large_batch]
@@ -0,0 +1,78 @@
+"""
+Piani di esecuzione (EXPLAIN QUERY PLAN) delle pagine della collezione: per le combinazioni comuni di
+filtri e ordinamento di GET /api/collection la query della pagina deve usare l'indice composto
+(col, name, id) atteso e, con un solo valore per filtro, ordinare senza B-tree temporaneo
+(la LIMIT si ferma dopo limit+1 righe invece di ordinare tutte quelle filtrate).
+"""
+import random
+
+import pytest
+
+from benchmarks.stub_tcgdex import POKEMON_NAMES, TYPES, RARITIES
+
+PAGE_FIELDS = ['id', 'name', 'type', 'rarity', 'set_id']
+
+
+@pytest.fixture
+def collection(seed_cards):
+    rng = random.Random(7)
+    seed_cards([
+        {'id': f"card-{n}", 'name': f"{rng.choice(POKEMON_NAMES)} {n}", 'type': rng.choice(TYPES),
+         'rarity': rng.choice(RARITIES), 'set_id': f"set{n % 50}"}
+        for n in range(5000)
+    ])
+
+
+def explain(engine, statement: str, parameters) -> list:
+    """Righe 'detail' di EXPLAIN QUERY PLAN per l'istruzione indicata."""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        connection.close()
+
+
+def page_plan(data_manager, engine, queries, **kwargs) -> list:
+    """Piano della query della pagina (quella con LIMIT) eseguita da get_cards_page."""
+    with queries() as executed:
+        data_manager.get_cards_page(limit=50, fields=PAGE_FIELDS, **kwargs)
+    statement, parameters = next(item for item in executed if 'LIMIT' in item[0])
+    return explain(engine, statement, parameters)
+
+
+# (argomenti di get_cards_page, pagina successiva, indice atteso)
+INDEXED_PAGES = [
+    ({}, False, 'ix_card_name_id'),
+    ({'order': 'desc'}, False, 'ix_card_name_id'),
+    ({}, True, 'ix_card_name_id'),
+    ({'filters': {'type': ["Fire"]}}, False, 'ix_card_type_name_id'),
+    ({'filters': {'rarity': ["Rare"]}, 'order': 'desc'}, False, 'ix_card_rarity_name_id'),
+    ({'filters': {'set_id': ["set3"]}}, False, 'ix_card_set_id_name_id'),
+    ({'filters': {'set_id': ["set3"]}}, True, 'ix_card_set_id_name_id'),
+    ({'sort': 'type'}, False, 'ix_card_type_name_id'),
+    ({'sort': 'rarity', 'order': 'desc'}, False, 'ix_card_rarity_name_id'),
+    ({'sort': 'set_id'}, False, 'ix_card_set_id_name_id'),
+    ({'sort': 'type'}, True, 'ix_card_type_name_id'),
+    ({'sort': 'set_id'}, True, 'ix_card_set_id_name_id'),
+    ({'sort': 'type', 'filters': {'type': ["Water"]}}, False, 'ix_card_type_name_id'),
+]
+
+
+@pytest.mark.parametrize("kwargs, next_page, expected_index", INDEXED_PAGES)
+def test_page_uses_composite_index_without_temp_sort(collection, data_manager, engine, queries,
+                                                     kwargs, next_page, expected_index):
+    if next_page:
+        first_page = data_manager.get_cards_page(limit=10, fields=['id'], **kwargs)
+        kwargs = {**kwargs, 'cursor': first_page['next_cursor']}
+    plan = page_plan(data_manager, engine, queries, **kwargs)
+
+    assert any(f"USING INDEX {expected_index}" in detail for detail in plan), plan
+    assert not any('USE TEMP B-TREE FOR ORDER BY' in detail for detail in plan), plan
+
+
+def test_multi_value_filter_uses_composite_index(collection, data_manager, engine, queries):
+    """Piu' valori: una ricerca sull'indice per valore, poi l'unione va ordinata (B-tree temporaneo ammesso)."""
+    plan = page_plan(data_manager, engine, queries, filters={'type': ["Fire", "Water"]})
+    assert any("USING INDEX ix_card_type_name_id" in detail for detail in plan), plan
@@ -0,0 +1,135 @@
+"""
+Token bucket del RateLimiter con clock finto: refill e burst, priorita' della corsia interattiva
+su quella di background e rifiuto delle richieste che non otterrebbero un token entro la scadenza.
+"""
+import threading
+import time
+
+import pytest
+
+from communication.api.rate_limiter import RateLimiter, RateLimitExceededError, LANE_INTERACTIVE, LANE_BACKGROUND
+
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def advancing_limiter(clock, **kwargs) -> RateLimiter:
+    """Limiter per un solo thread: ogni attesa fa avanzare il clock finto del timeout richiesto."""
+    return RateLimiter(clock=clock, wait=lambda condition, timeout: clock.advance(timeout), **kwargs)
+
+
+def test_burst_is_available_immediately_then_tokens_refill_at_rate(clock):
+    limiter = advancing_limiter(clock, rate_per_second=10, burst=5)
+
+    assert [limiter.acquire() for _ in range(5)] == [0.0] * 5
+    assert limiter.acquire() == pytest.approx(0.1)
+    assert limiter.acquire() == pytest.approx(0.1)
+
+
+def test_refill_is_capped_at_burst(clock):
+    limiter = advancing_limiter(clock, rate_per_second=10, burst=5)
+    for _ in range(5):
+        limiter.acquire()
+
+    clock.advance(0.25)
+    assert limiter.stats()['tokens'] == pytest.approx(2.5)
+    clock.advance(60)
+    assert limiter.stats()['tokens'] == 5
+
+
+def test_disabled_limiter_never_waits(clock):
+    limiter = advancing_limiter(clock, rate_per_second=0)
+    assert all(limiter.acquire() == 0.0 for _ in range(1000))
+
+
+def test_request_past_its_deadline_is_rejected_immediately(clock):
+    limiter = advancing_limiter(clock, rate_per_second=1, burst=1, max_wait_seconds={LANE_BACKGROUND: 0.5})
+    limiter.acquire()
+
+    with pytest.raises(RateLimitExceededError):
+        limiter.acquire(LANE_BACKGROUND)
+    assert clock() == 100.0
+    assert limiter.stats()['queued'] == {LANE_INTERACTIVE: 0, LANE_BACKGROUND: 0}
+
+    # La corsia interattiva (senza scadenza) attende il token successivo
+    assert limiter.acquire(LANE_INTERACTIVE) == pytest.approx(1.0)
+
+
+def wait_for_queue(limiter, lane: str, count: int, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while limiter.stats()['queued'][lane] < count:
+        assert time.monotonic() < deadline, limiter.stats()
+        time.sleep(0.005)
+
+
+def test_interactive_lane_goes_ahead_of_background(clock):
+    # Attese reali brevi, ma il tempo del bucket avanza solo con clock.advance
+    limiter = RateLimiter(rate_per_second=1, burst=1, clock=clock,
+                          wait=lambda condition, timeout: condition.wait(0.01))
+    limiter.acquire()
+    served = []
+
+    def acquire(lane: str):
+        limiter.acquire(lane)
+        served.append(lane)
+
+    background = threading.Thread(target=acquire, args=(LANE_BACKGROUND,))
+    background.start()
+    wait_for_queue(limiter, LANE_BACKGROUND, 1)
+    interactive = threading.Thread(target=acquire, args=(LANE_INTERACTIVE,))
+    interactive.start()
+    wait_for_queue(limiter, LANE_INTERACTIVE, 1)
+
+    # Un solo token: va alla richiesta interattiva, arrivata dopo
+    clock.advance(1)
+    interactive.join(timeout=5)
+    assert served == [LANE_INTERACTIVE]
+    assert background.is_alive()
+
+    clock.advance(1)
+    background.join(timeout=5)
+    assert served == [LANE_INTERACTIVE, LANE_BACKGROUND]
+
+
+def test_deadline_counts_requests_already_queued_ahead(clock):
+    limiter = RateLimiter(rate_per_second=1, burst=1, max_wait_seconds={LANE_BACKGROUND: 1.5}, clock=clock,
+                          wait=lambda condition, timeout: condition.wait(0.01))
+    limiter.acquire()
+    first = threading.Thread(target=limiter.acquire, args=(LANE_BACKGROUND,))
+    first.start()
+    wait_for_queue(limiter, LANE_BACKGROUND, 1)
+
+    # Da solo avrebbe il token tra 1 s, ma dietro la richiesta in coda lo avrebbe tra 2 s
+    with pytest.raises(RateLimitExceededError):
+        limiter.acquire(LANE_BACKGROUND)
+
+    clock.advance(1)
+    first.join(timeout=5)
+    assert not first.is_alive()
+
+
+def test_lane_context_applies_to_acquire_without_lane(clock):
+    limiter = advancing_limiter(clock, rate_per_second=1, burst=1, max_wait_seconds={LANE_BACKGROUND: 0.1})
+    limiter.acquire()
+
+    with limiter.lane(LANE_BACKGROUND):
+        assert limiter.current_lane() == LANE_BACKGROUND
+        with pytest.raises(RateLimitExceededError):
+            limiter.acquire()
+    assert limiter.current_lane() == LANE_INTERACTIVE
@@ -0,0 +1,122 @@
+"""
+ResponseCache: LRU in memoria, TTL/stale con clock finto e store SQLite su disco limitato
+(voci scadute e oltre max_disk_entries eliminate, I/O mai sotto il lock della memoria).
+"""
+import pytest
+
+from communication.api.response_cache import ResponseCache, CACHE_FRESH, CACHE_STALE, CACHE_MISS
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache" / "responses.db")
+
+
+def test_memory_lru_evicts_least_recently_used(clock):
+    cache = ResponseCache(max_entries=2, clock=clock)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.get("a")
+    cache.set("c", [3])
+
+    assert cache.size() == 2
+    assert cache.get("b") == (CACHE_MISS, None)
+    assert cache.get("a") == (CACHE_FRESH, [1])
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entry_goes_fresh_then_stale_then_expires(clock):
+    cache = ResponseCache(ttl_seconds=10, stale_ttl_seconds=20, clock=clock)
+    cache.set("k", {"v": 1})
+
+    clock.advance(10)
+    assert cache.get("k") == (CACHE_FRESH, {"v": 1})
+    clock.advance(1)
+    assert cache.get("k") == (CACHE_STALE, {"v": 1})
+    clock.advance(20)
+    assert cache.get("k") == (CACHE_MISS, None)
+    assert cache.size() == 0
+
+
+def test_disk_store_survives_restart(db_path, clock):
+    ResponseCache(db_path=db_path, clock=clock).set("id:x", {"id": "x"})
+
+    restarted = ResponseCache(db_path=db_path, clock=clock)
+    assert restarted.peek("id:x") is None
+    assert restarted.get("id:x") == (CACHE_FRESH, {"id": "x"})
+    assert restarted.peek("id:x") == (CACHE_FRESH, {"id": "x"})
+
+
+def test_disk_store_is_capped_with_lru_eviction(db_path, clock):
+    cache = ResponseCache(db_path=db_path, max_disk_entries=10, clock=clock)
+    for n in range(10):
+        clock.advance(1)
+        cache.set(f"k{n}", n)
+
+    # Letto dal disco (memoria vuota dopo il riavvio): diventa il piu' recente
+    clock.advance(1)
+    restarted = ResponseCache(db_path=db_path, max_disk_entries=10, clock=clock)
+    assert restarted.get("k0") == (CACHE_FRESH, 0)
+
+    for n in range(10, 15):
+        clock.advance(1)
+        restarted.set(f"k{n}", n)
+
+    assert restarted.disk_size() == 10
+    assert restarted.stats()['disk_evictions'] == 5
+    fresh = ResponseCache(db_path=db_path, max_disk_entries=10, clock=clock)
+    assert fresh.get("k0") == (CACHE_FRESH, 0)
+    assert all(fresh.get(f"k{n}") == (CACHE_MISS, None) for n in range(1, 6))
+
+
+def test_expired_disk_entries_are_purged_periodically(db_path, clock):
+    cache = ResponseCache(db_path=db_path, ttl_seconds=10, stale_ttl_seconds=5, purge_interval_seconds=60, clock=clock)
+    cache.set("old", 1)
+    clock.advance(30)
+    cache.set("recent", 2)
+    # Scaduta ma la pulizia periodica non e' ancora dovuta
+    assert cache.disk_size() == 2
+
+    clock.advance(31)
+    cache.set("newest", 3)
+    assert cache.disk_size() == 1
+
+
+def test_disk_io_happens_outside_the_memory_lock(db_path, clock):
+    cache = ResponseCache(db_path=db_path, clock=clock)
+    cache.set("k", 1)
+    restarted = ResponseCache(db_path=db_path, clock=clock)
+    lock_held = []
+
+    original_load, original_save = restarted._load_from_disk, restarted.save_to_disk
+
+    def load(key):
+        lock_held.append(restarted._lock.locked())
+        return original_load(key)
+
+    def save(key, value, stored_at):
+        lock_held.append(restarted._lock.locked())
+        return original_save(key, value, stored_at)
+
+    restarted._load_from_disk, restarted.save_to_disk = load, save
+    restarted.get("k")
+    restarted.get("missing")
+    restarted.set("other", 2)
+
+    assert lock_held == [False, False, False]
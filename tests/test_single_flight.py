@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from application.single_flight import SingleFlight, AsyncSingleFlight, SingleFlightTimeoutError, COALESCING_EVENTS
+
+CALLERS = 8
+
+
+class BlockingCall:
+    """Funzione condivisa che resta in corso finche' il test non la rilascia; conta le esecuzioni."""
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        assert self.release.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return {'calls': self.calls}
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def start_callers(flight: SingleFlight, func, count: int, **kwargs) -> tuple:
+    """Avvia il leader e count-1 thread accodati alla stessa chiave; restituisce (thread, esiti)."""
+    outcomes = []
+
+    def caller():
+        try:
+            outcomes.append(flight.do('key', func, **kwargs))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(count)]
+    threads[0].start()
+    wait_until(lambda: 'key' in flight._calls)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flight._calls['key'].waiters == count - 1)
+    return threads, outcomes
+
+
+def join_all(threads):
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+# -------------------------------------------------------------------
+# THREAD: un'unica esecuzione per le chiamate concorrenti
+# -------------------------------------------------------------------
+
+def test_concurrent_callers_share_a_single_call():
+    flight, func = SingleFlight(), BlockingCall()
+    threads, outcomes = start_callers(flight, func, CALLERS)
+
+    func.release.set()
+    join_all(threads)
+
+    assert func.calls == 1
+    assert outcomes == [{'calls': 1}] * CALLERS
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert flight.in_flight() == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    error = ValueError("TCGDEX non raggiungibile")
+    flight, func = SingleFlight(), BlockingCall(error)
+    threads, outcomes = start_callers(flight, func, CALLERS)
+
+    func.release.set()
+    join_all(threads)
+
+    assert func.calls == 1
+    assert len(outcomes) == CALLERS and all(outcome is error for outcome in outcomes)
+    assert flight.in_flight() == 0
+
+    # La chiamata successiva viene eseguita di nuovo
+    func.error = None
+    assert flight.do('key', func) == {'calls': 2}
+
+
+def test_waiter_times_out_while_the_leader_keeps_running():
+    flight, func = SingleFlight(), BlockingCall()
+    threads, outcomes = start_callers(flight, func, 1)
+    timeouts_before = COALESCING_EVENTS.value(event='timeout')
+
+    with pytest.raises(SingleFlightTimeoutError):
+        flight.do('key', func, timeout_seconds=0.05)
+
+    assert COALESCING_EVENTS.value(event='timeout') == timeouts_before + 1
+    assert threads[0].is_alive() and flight.in_flight() == 1
+    func.release.set()
+    join_all(threads)
+    assert outcomes == [{'calls': 1}]
+    assert func.calls == 1
+
+
+# -------------------------------------------------------------------
+# ASYNC: la chiamata condivisa vive finche' qualcuno ne attende il risultato
+# -------------------------------------------------------------------
+
+class SharedCall:
+    """Coroutine condivisa che resta in corso finche' il test non la rilascia."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return 'result'
+
+
+async def wait_for_waiters(flight: AsyncSingleFlight, key: str, count: int):
+    while key not in flight._calls or flight._calls[key][1] < count:
+        await asyncio.sleep(0)
+
+
+def test_async_call_is_cancelled_when_every_waiter_gives_up():
+    async def scenario():
+        flight, call = AsyncSingleFlight(), SharedCall()
+        waiters = [asyncio.ensure_future(flight.do('key', call)) for _ in range(2)]
+        await wait_for_waiters(flight, 'key', 2)
+        shared_task = flight._calls['key'][0]
+
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        assert not shared_task.done()
+
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert shared_task.cancelled()
+        assert flight.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_call_survives_a_cancelled_waiter():
+    async def scenario():
+        flight, call = AsyncSingleFlight(), SharedCall()
+        leader = asyncio.ensure_future(flight.do('key', call))
+        follower = asyncio.ensure_future(flight.do('key', call))
+        await wait_for_waiters(flight, 'key', 2)
+
+        leader.cancel()
+        call.release.set()
+
+        assert await follower == 'result'
+        assert call.calls == 1 and not call.cancelled
+        assert flight.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_waiter_timeout_does_not_cancel_the_leader():
+    async def scenario():
+        flight, call = AsyncSingleFlight(), SharedCall()
+        leader = asyncio.ensure_future(flight.do('key', call))
+        await asyncio.sleep(0)
+
+        with pytest.raises(SingleFlightTimeoutError):
+            await flight.do('key', call, timeout_seconds=0.01)
+
+        call.release.set()
+        assert await leader == 'result'
+        assert not call.cancelled
+
+    asyncio.run(scenario())
@@ -0,0 +1,210 @@
+"""
+Retry con backoff, Retry-After e circuit breaker del TCGFetcher contro lo stub TCGDEX locale.
+Le attese tra i tentativi sono registrate invece che eseguite, il circuit breaker usa un clock finto.
+"""
+import pytest
+import requests
+
+from benchmarks.stub_tcgdex import StubTCGDexServer
+from communication.api.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+from communication.api.rate_limiter import RateLimiter
+from communication.api.tcg_fetcher import TCGFetcher, UpstreamUnavailableError
+
+CARD_ID = "stub1-1"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server = StubTCGDexServer(num_sets=2, cards_per_set=10).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def fetcher(stub, clock, sleeps):
+    stub.httpd.scripted_failures.clear()
+    fetcher = TCGFetcher("config/api_config.yaml", sleep=sleeps.append)
+    fetcher.base_url = stub.base_url
+    fetcher.rate_limiter = RateLimiter(rate_per_second=0)
+    fetcher.max_retries = 2
+    fetcher.backoff_base = 0.2
+    fetcher.backoff_max = 2.0
+    fetcher.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=30, clock=clock)
+    yield fetcher
+    fetcher.session.close()
+
+
+@pytest.fixture
+def served(stub):
+    """Numero di richieste ricevute dallo stub dall'inizio del test."""
+    start = stub.httpd.request_count
+    return lambda: stub.httpd.request_count - start
+
+
+# -------------------------------------------------------------------
+# RETRY E BACKOFF
+# -------------------------------------------------------------------
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried_with_jittered_backoff(stub, fetcher, sleeps, served, status):
+    stub.fail_next(2, status=status)
+
+    card = fetcher.fetch_card_details(CARD_ID)
+
+    assert card['id'] == CARD_ID
+    assert served() == 3 and len(sleeps) == 2
+    # full jitter: random(0, min(max, base * 2^n))
+    assert 0 <= sleeps[0] <= 0.2 and 0 <= sleeps[1] <= 0.4
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+
+
+def test_exhausted_retries_raise_and_count_one_breaker_failure(stub, fetcher, sleeps, served):
+    stub.fail_next(3, status=503)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetcher.fetch_card_details(CARD_ID)
+
+    assert served() == 3 and len(sleeps) == 2
+    # Una chiamata fallita conta un solo errore: il circuito (soglia 2) si apre alla seconda
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+    stub.fail_next(3, status=503)
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetcher.fetch_card_details(CARD_ID)
+    assert fetcher.circuit_breaker.state == STATE_OPEN
+
+
+def test_client_error_is_not_retried(stub, fetcher, sleeps):
+    with pytest.raises(requests.exceptions.HTTPError) as error:
+        fetcher.fetch_card_details("missing-card")
+
+    assert error.value.response.status_code == 404
+    assert sleeps == []
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+
+
+def test_connection_error_is_retried(fetcher, sleeps):
+    fetcher.base_url = "http://127.0.0.1:9/v2"
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        fetcher.fetch_card_details(CARD_ID)
+    assert len(sleeps) == 2
+
+
+# -------------------------------------------------------------------
+# RETRY-AFTER
+# -------------------------------------------------------------------
+
+def test_retry_after_sets_the_minimum_delay(stub, fetcher, sleeps):
+    stub.fail_next(1, status=429, retry_after=1)
+
+    assert fetcher.fetch_card_details(CARD_ID)['id'] == CARD_ID
+    assert len(sleeps) == 1 and sleeps[0] >= 1
+
+
+def test_retry_after_beyond_backoff_max_fails_without_retrying(stub, fetcher, sleeps, served):
+    stub.fail_next(1, status=503, retry_after=120)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetcher.fetch_card_details(CARD_ID)
+    assert served() == 1 and sleeps == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0),
+    ("0", 0.0),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),   # data nel passato: nessuna attesa
+    ("not-a-date", None),
+    (None, None),
+])
+def test_parse_retry_after(value, expected):
+    assert TCGFetcher._parse_retry_after(value) == expected
+
+
+# -------------------------------------------------------------------
+# CIRCUIT BREAKER
+# -------------------------------------------------------------------
+
+def open_circuit(stub, fetcher):
+    for _ in range(fetcher.circuit_breaker.failure_threshold):
+        stub.fail_next(fetcher.max_retries + 1, status=503)
+        with pytest.raises(requests.exceptions.HTTPError):
+            fetcher.fetch_card_details(CARD_ID)
+    assert fetcher.circuit_breaker.state == STATE_OPEN
+
+
+def test_open_circuit_fails_fast_without_contacting_upstream(stub, fetcher, served):
+    open_circuit(stub, fetcher)
+    requests_before = served()
+
+    with pytest.raises(UpstreamUnavailableError):
+        fetcher.fetch_card_details(CARD_ID)
+    assert served() == requests_before
+
+
+def test_circuit_half_opens_after_timeout_and_closes_on_success(stub, fetcher, clock):
+    open_circuit(stub, fetcher)
+
+    clock.advance(29)
+    assert fetcher.circuit_breaker.state == STATE_OPEN
+    clock.advance(1)
+    assert fetcher.circuit_breaker.state == STATE_HALF_OPEN
+
+    assert fetcher.fetch_card_details(CARD_ID)['id'] == CARD_ID
+    assert fetcher.circuit_breaker.state == STATE_CLOSED
+
+
+def test_failed_probe_reopens_the_circuit(stub, fetcher, clock):
+    open_circuit(stub, fetcher)
+    clock.advance(30)
+
+    stub.fail_next(fetcher.max_retries + 1, status=503)
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetcher.fetch_card_details(CARD_ID)
+
+    assert fetcher.circuit_breaker.state == STATE_OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        fetcher.fetch_card_details(CARD_ID)
+
+
+def test_half_open_allows_a_single_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.advance(10)
+
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False
+    breaker.record_cancelled()
+    assert breaker.allow_request() is True
+
+
+# -------------------------------------------------------------------
+# CATALOGO (set)
+# -------------------------------------------------------------------
+
+def test_fetch_sets_parses_the_set_list(stub, fetcher):
+    sets = fetcher.fetch_sets()
+
+    assert sets == [{'id': "stub1", 'name': "Stub Set 1", 'card_count': 10},
+                    {'id': "stub2", 'name': "Stub Set 2", 'card_count': 10}]
@@ -0,0 +1,9 @@
+"""
+Entry point WSGI per server esterni, ad esempio:
+    gunicorn --workers 4 --threads 8 --worker-class gthread wsgi:app
+    waitress-serve --threads 8 wsgi:app
+"""
+from main import create_app, start_background_workers
+
+app = create_app()
+start_background_workers(app)